@@ -0,0 +1,150 @@
+"""Benchmark: buffered, streamed and cached SRT/VTT/TSV exports of a long transcript.
+
+Stores a synthetic columnar transcript (default: 10 hours of speech) and
+serves each export three ways:
+
+- buffered: get_transcript() (full row, word and utterance dicts), then the
+  whole file built with "\\n".join into one PlainTextResponse (the original
+  endpoints)
+- streamed: rendition cache off (get_transcript_export + StreamingResponse)
+- cached: rendition cache on, already rendered (served from disk)
+
+The responses are driven directly as ASGI apps to record time-to-first-byte
+and total time; peak allocated memory is measured in a separate traced run.
+
+Usage:
+    uv run python benchmarks/bench_export_streaming.py --hours 10
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+def legacy_export(fmt: str, utterances: list[dict[str, Any]]) -> str:
+    """The previous generate_srt / generate_vtt / generate_tsv."""
+    from murmurai_server.exports import format_timestamp_srt, format_timestamp_vtt
+
+    lines = []
+    if fmt == "srt":
+        for i, u in enumerate(utterances, 1):
+            start, end = format_timestamp_srt(u["start"]), format_timestamp_srt(u["end"])
+            lines.append(f"{i}\n{start} --> {end}\n{u['text']}\n")
+    elif fmt == "vtt":
+        lines.append("WEBVTT\n")
+        for u in utterances:
+            start, end = format_timestamp_vtt(u["start"]), format_timestamp_vtt(u["end"])
+            lines.append(f"{start} --> {end}\n{u['text']}\n")
+    else:
+        lines.append("start\tend\tspeaker\ttext")
+        for u in utterances:
+            text = u["text"].replace("\t", " ").replace("\n", " ")
+            lines.append(f"{u['start']}\t{u['end']}\t{u.get('speaker', '')}\t{text}")
+    return "\n".join(lines)
+
+
+async def serve(make_response: Callable[[], Awaitable[Any]]) -> tuple[float, float, int]:
+    """Build and send a response; return (ttfb, total, body bytes)."""
+    first: list[float] = []
+    size = 0
+
+    async def receive() -> dict[str, Any]:
+        await asyncio.sleep(3600)  # No disconnect
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal size
+        if message["type"] == "http.response.body" and message.get("body"):
+            if not first:
+                first.append(time.perf_counter())
+            size += len(message["body"])
+
+    start = time.perf_counter()
+    response = await make_response()
+    await response({"type": "http", "method": "GET", "headers": []}, receive, send)
+    done = time.perf_counter()
+    return first[0] - start, done - start, size
+
+
+async def run(hours: float) -> None:
+    from bench_result_format import synthetic_segments  # Same directory (on sys.path)
+    from fastapi import Request
+    from fastapi.responses import PlainTextResponse
+
+    from murmurai_server import server
+    from murmurai_server.config import get_settings
+    from murmurai_server.database import (
+        create_transcript,
+        get_transcript,
+        init_db,
+        update_transcript,
+    )
+    from murmurai_server.transcriber import format_result
+
+    # synthetic_segments averages 0.35 s per word
+    words = int(hours * 3600 / 0.35)
+    segments = synthetic_segments(words)
+    await init_db()
+    await create_transcript(
+        id="bench",
+        audio_url=None,
+        language="en",
+        speaker_labels=True,
+        speakers_expected=None,
+    )
+    formatted = format_result({"segments": segments}, "en", speaker_labels=True)
+    await update_transcript(
+        "bench", status="completed", text=formatted["text"], result_columns=formatted["columns"]
+    )
+    del formatted, segments
+    print(f"{hours}h transcript: {words:,} words")
+
+    for fmt in ("srt", "vtt", "tsv"):
+
+        async def buffered(fmt: str = fmt) -> Any:
+            result = await get_transcript("bench")
+            assert result is not None
+            return PlainTextResponse(legacy_export(fmt, result["utterances"]))
+
+        async def endpoint(fmt: str = fmt) -> Any:
+            return await server.export_response(
+                "bench", fmt, Request({"type": "http", "headers": []})
+            )
+
+        for name, make_response in (
+            ("buffered", buffered),
+            ("streamed", endpoint),
+            ("cached", endpoint),
+        ):
+            get_settings().rendition_cache = name == "cached"
+            if name == "cached":
+                await serve(make_response)  # Render once
+            ttfb, total, size = await serve(make_response)
+            # Separate traced run: tracemalloc slows allocation-heavy code several times
+            tracemalloc.start()
+            await serve(make_response)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"  {fmt} {name:8s} ttfb={ttfb * 1000:7.1f}ms total={total * 1000:7.1f}ms "
+                f"peak={peak / 2**20:6.1f}MB body={size / 2**20:5.1f}MB"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--hours", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="murmurai-bench-") as data_dir:
+        os.environ["MURMURAI_DATA_DIR"] = data_dir
+        asyncio.run(run(args.hours))
+
+
+if __name__ == "__main__":
+    main()
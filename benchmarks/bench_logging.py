@@ -0,0 +1,165 @@
+"""Benchmark: logging overhead per request, text and JSON, with a fast and a slow stdout.
+
+Each simulated request logs what a job does: a few progress lines and the
+"Job completed" line with its extras and timings. Measured on the calling
+thread (the event loop or a worker, which is what request latency sees):
+
+- sync+json.dumps: the previous pipeline (StreamHandler on the caller,
+  datetime.now, hasattr chain and json.dumps)
+- sync: the current formatters, written synchronously (log_queue_size=0)
+- queued: QueueHandler on the caller, formatting and writes on the listener
+
+Requests arrive every --interval-ms (the time between them, when the
+listener catches up, is not measured). The sink is a pipe drained by a
+reader thread, 4 KiB per read. With --slow-ms the reader sleeps that long
+per read, like a log shipper falling behind: the sync pipelines then block
+on the full pipe, and the queued one drops records once the queue is full
+(counted and reported).
+
+Usage:
+    uv run python benchmarks/bench_logging.py --slow-ms 20
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from typing import Any
+
+LINES_PER_REQUEST = 4
+
+
+class LegacyJSONFormatter(logging.Formatter):
+    """The previous JSONFormatter."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        from murmurai_server.logging import get_request_id
+
+        log_data: dict[str, Any] = {
+            "timestamp": datetime.now(UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = get_request_id()
+        if request_id:
+            log_data["request_id"] = request_id
+        for name in ("duration_ms", "audio_duration_ms", "transcript_id", "language"):
+            if hasattr(record, name):
+                log_data[name] = getattr(record, name)
+        for name in ("segments", "words", "timings"):
+            if hasattr(record, name):
+                log_data[name] = getattr(record, name)
+        if record.exc_info:
+            log_data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(log_data)
+
+
+def log_request(logger: logging.Logger, i: int) -> None:
+    """The log lines of one job."""
+    logger.info(f"Job job-{i} claimed")
+    logger.info("Transcribing 312.4s of audio", extra={"transcript_id": f"job-{i}"})
+    logger.info("Aligning 58 segments", extra={"language": "en"})
+    logger.info(
+        "Job completed: 58 segments, 812 words",
+        extra={
+            "segments": 58,
+            "words": 812,
+            "language": "en",
+            "timings": {
+                "total_seconds": 21.4,
+                "stages": {"decode": 0.8, "asr": 14.2, "align": 3.1, "format": 0.05},
+                "model_cache": {"asr": "hit", "align": "hit"},
+                "peak_rss_bytes": 3_221_225_472,
+            },
+        },
+    )
+
+
+def start_sink(slow_ms: float) -> tuple[Any, threading.Thread]:
+    """A pipe whose reader drains 4 KiB per read, sleeping ``slow_ms`` after each."""
+    read_fd, write_fd = os.pipe()
+
+    def drain() -> None:
+        while os.read(read_fd, 4096):
+            if slow_ms:
+                time.sleep(slow_ms / 1000)
+        os.close(read_fd)
+
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    return os.fdopen(write_fd, "w", buffering=1), reader
+
+
+def measure(
+    configure: Callable[[], logging.Logger], requests: int, interval_ms: float, slow_ms: float
+) -> tuple[float, float]:
+    """Median and p99 caller-side microseconds per request."""
+    from murmurai_server.logging import shutdown_logging
+
+    sink, reader = start_sink(slow_ms)
+    stdout, sys.stdout = sys.stdout, sink
+    try:
+        logger = configure()
+        times = []
+        for i in range(requests):
+            start = time.perf_counter()
+            log_request(logger, i)
+            times.append(time.perf_counter() - start)
+            time.sleep(interval_ms / 1000)
+        shutdown_logging()
+    finally:
+        sys.stdout = stdout
+        sink.close()
+        reader.join()
+    times.sort()
+    return statistics.median(times) * 1e6, times[int(len(times) * 0.99)] * 1e6
+
+
+def run(requests: int, interval_ms: float, slow_ms: float, queue_size: int) -> None:
+    from murmurai_server.logging import dropped_records, get_logger, setup_logging
+
+    def legacy() -> logging.Logger:
+        logger = setup_logging("json", queue_size=0)
+        logger.handlers[0].setFormatter(LegacyJSONFormatter())
+        return logger
+
+    print(
+        f"{requests:,} requests x {LINES_PER_REQUEST} lines every {interval_ms}ms,"
+        f" sink delay {slow_ms}ms per 4 KiB"
+    )
+    for log_format in ("text", "json"):
+        pipelines: dict[str, Callable[[], logging.Logger]] = {
+            "sync": lambda f=log_format: setup_logging(f, queue_size=0),  # type: ignore[misc]
+            "queued": lambda f=log_format: setup_logging(f, queue_size=queue_size),  # type: ignore[misc]
+        }
+        if log_format == "json":
+            pipelines = {"sync+json.dumps": legacy, **pipelines}
+        for name, configure in pipelines.items():
+            dropped = dropped_records()
+            median, p99 = measure(configure, requests, interval_ms, slow_ms)
+            print(
+                f"    {log_format:4s} {name:16s} median {median:8.1f}us  p99 {p99:8.1f}us"
+                f"  dropped {dropped_records() - dropped:,}"
+            )
+    get_logger().handlers.clear()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--interval-ms", type=float, default=1.0)
+    parser.add_argument("--slow-ms", type=float, default=0.0)
+    parser.add_argument("--queue-size", type=int, default=10_000)
+    args = parser.parse_args()
+    run(args.requests, args.interval_ms, args.slow_ms, args.queue_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark: murmurai_core.load_audio vs. the memory-mapped decoded audio cache.
+
+Each mode runs in a fresh process that loads the audio and reads every
+sample once (as the ASR stage does), then reports wall time and peak RSS
+growth over the process baseline (imports excluded):
+
+- load_audio: ffmpeg decode into an in-memory float32 array (the old path).
+- pcm-cold: first load_pcm call - decodes once, streaming into the .npy file.
+- pcm-warm: repeat load_pcm call (retry / re-run) - maps the cached file.
+
+Usage:
+    uv run python benchmarks/bench_pcm_cache.py --audio long_recording.mp3
+"""
+
+import argparse
+import multiprocessing as mp
+import resource
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+
+def _run(mode: str, audio: str, data_dir: str, out: "mp.Queue[tuple[float, float]]") -> None:
+    import os
+
+    os.environ["MURMURAI_DATA_DIR"] = data_dir
+    import numpy as np
+
+    from murmurai_server.cache import load_pcm
+    from murmurai_server.transcriber import murmurai_core
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "load_audio":
+        samples = murmurai_core.load_audio(audio)
+    else:
+        samples = load_pcm(Path(audio))
+
+    # Touch every sample in 30 s windows, like the ASR stage
+    window = 30 * 16000
+    for i in range(0, len(samples), window):
+        np.asarray(samples[i : i + window]).sum()
+    elapsed = time.perf_counter() - start
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    out.put((elapsed, (peak - baseline) / 1024))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--audio", required=True, help="Audio file to decode")
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    data_dir = tempfile.mkdtemp(prefix="murmurai-bench-")
+    try:
+        for mode in ["load_audio", "pcm-cold", "pcm-warm"]:
+            out = ctx.Queue()
+            p = ctx.Process(target=_run, args=(mode, args.audio, data_dir, out))
+            p.start()
+            elapsed, peak_mb = out.get()
+            p.join()
+            print(f"{mode:12s} time={elapsed:.2f}s peak_rss=+{peak_mb:.0f}MB")
+    finally:
+        shutil.rmtree(data_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Benchmark: transcript response encoding for 10k / 100k / 1M words.
+
+Encodes the dict returned by get_transcript() with:
+
+- validate+json: pydantic validation, then the stdlib encoder (the old
+  response_model + JSONResponse path)
+- validate+orjson: pydantic validation, then orjson (validate_responses=true)
+- orjson: field projection + orjson, no validation (the default)
+
+Then measures end-to-end GET /v1/transcript/{id} latency (database read,
+expansion of the stored columns and encoding) with validation on and off.
+
+Usage:
+    uv run python benchmarks/bench_response_encoding.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from typing import Any
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+async def run(sizes: list[int], repeat: int) -> None:
+    import orjson
+    from bench_result_format import synthetic_segments  # Same directory (on sys.path)
+    from httpx import ASGITransport, AsyncClient
+
+    from murmurai_server.config import get_settings
+    from murmurai_server.database import create_transcript, get_transcript, init_db
+    from murmurai_server.models import Transcript
+    from murmurai_server.server import app, transcript_response
+    from murmurai_server.transcriber import format_result
+    from murmurai_server.worker import save_result
+
+    settings = get_settings()
+    await init_db()
+    client = AsyncClient(transport=ASGITransport(app=app), base_url="http://bench")
+    headers = {"Authorization": settings.api_key}
+
+    for size in sizes:
+        transcript_id = f"bench-{size}"
+        await create_transcript(
+            id=transcript_id,
+            audio_url=None,
+            language="en",
+            speaker_labels=True,
+            speakers_expected=None,
+        )
+        segments = synthetic_segments(size)
+        await save_result(transcript_id, format_result({"segments": segments}, "en", True))
+        result = await get_transcript(transcript_id)
+        assert result is not None
+
+        def validate_json() -> bytes:
+            content = Transcript.model_validate(result).model_dump(mode="json")
+            return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+        def validate_orjson() -> bytes:
+            return orjson.dumps(Transcript.model_validate(result).model_dump(mode="json"))
+
+        def projected_orjson() -> bytes:
+            return bytes(transcript_response(result).body)
+
+        encode = {
+            "validate+json": timed(validate_json, repeat),
+            "validate+orjson": timed(validate_orjson, repeat),
+            "orjson": timed(projected_orjson, repeat),
+        }
+
+        latency = {}
+        for validate in (True, False):
+            settings.validate_responses = validate
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                response = await client.get(f"/v1/transcript/{transcript_id}", headers=headers)
+                response.raise_for_status()
+                times.append(time.perf_counter() - start)
+            latency[validate] = statistics.median(times)
+        settings.validate_responses = False
+
+        print(f"{size:>9,} words  payload={len(projected_orjson()) / 2**20:.1f}MB")
+        for name, seconds in encode.items():
+            print(f"    encode {name:16s} {seconds * 1000:9.1f}ms")
+        print(f"    GET validated          {latency[True] * 1000:9.1f}ms")
+        print(f"    GET orjson             {latency[False] * 1000:9.1f}ms")
+
+    await client.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="murmurai-bench-") as data_dir:
+        os.environ["MURMURAI_DATA_DIR"] = data_dir
+        asyncio.run(run(args.sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
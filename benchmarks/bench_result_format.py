@@ -0,0 +1,126 @@
+"""Benchmark: nested dict results vs. columnar results for a long transcript.
+
+Formats synthetic segments the old way (one dict per word, nested again
+inside its utterance, both lists json-encoded for the database) and the
+columnar way (format_result + json encoding of the columns), and reports
+build time, encode time, peak allocated memory and stored size.
+
+Usage:
+    uv run python benchmarks/bench_result_format.py --words 100000
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+
+def synthetic_segments(n_words: int, seed: int = 0) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+    segments = []
+    t = 0.0
+    while n_words > 0:
+        count = min(n_words, rng.randint(5, 30))
+        words = []
+        for _ in range(count):
+            start = t
+            t += rng.uniform(0.1, 0.6)
+            words.append({"word": "lorem", "start": start, "end": t, "score": rng.random()})
+        text = " ".join(w["word"] for w in words)
+        speaker = f"SPEAKER_{rng.randint(0, 5):02d}"
+        segments.append(
+            {"start": words[0]["start"], "end": t, "text": text, "speaker": speaker, "words": words}
+        )
+        n_words -= count
+    return segments
+
+
+def legacy_format(segments: list[dict[str, Any]]) -> dict[str, Any]:
+    """The previous format_result (speaker_labels=True)."""
+    words: list[dict[str, Any]] = []
+    utterances: list[dict[str, Any]] = []
+    for segment in segments:
+        speaker = segment.get("speaker")
+        utterance_words: list[dict[str, Any]] = []
+        for word in segment.get("words", []):
+            word_data: dict[str, Any] = {
+                "text": word.get("word", ""),
+                "start": int(word.get("start", 0) * 1000),
+                "end": int(word.get("end", 0) * 1000),
+                "confidence": word.get("score", 0.0),
+            }
+            if speaker:
+                word_data["speaker"] = speaker
+            words.append(word_data)
+            utterance_words.append(word_data)
+        utterance: dict[str, Any] = {
+            "text": segment.get("text", "").strip(),
+            "start": int(segment.get("start", 0) * 1000),
+            "end": int(segment.get("end", 0) * 1000),
+            "words": utterance_words,
+        }
+        if speaker:
+            utterance["speaker"] = speaker
+        if utterance_words:
+            utterance["confidence"] = sum(w["confidence"] for w in utterance_words) / len(
+                utterance_words
+            )
+        utterances.append(utterance)
+    return {
+        "text": " ".join(s.get("text", "").strip() for s in segments),
+        "words": words,
+        "utterances": utterances,
+        "confidence": sum(w["confidence"] for w in words) / len(words),
+    }
+
+
+def measure(
+    build: Callable[[], Any], encode: Callable[[Any], str]
+) -> tuple[float, float, int, int]:
+    start = time.perf_counter()
+    result = build()
+    built = time.perf_counter()
+    encoded = encode(result)
+    done = time.perf_counter()
+    del result
+
+    # Separate traced run: tracemalloc slows allocation-heavy code several times
+    tracemalloc.start()
+    encode(build())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return built - start, done - built, peak, len(encoded)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--words", type=int, default=100_000)
+    args = parser.parse_args()
+
+    from murmurai_server.transcriber import format_result
+
+    segments = synthetic_segments(args.words)
+    runs = {
+        "nested": (
+            lambda: legacy_format(segments),
+            lambda r: json.dumps(r["words"]) + json.dumps(r["utterances"]),
+        ),
+        "columnar": (
+            lambda: format_result({"segments": segments}, "en", speaker_labels=True),
+            lambda r: json.dumps(r["columns"]),
+        ),
+    }
+    print(f"{args.words} words in {len(segments)} segments")
+    for name, (build, encode) in runs.items():
+        build_s, encode_s, peak, size = measure(build, encode)
+        print(
+            f"{name:9s} build={build_s * 1000:7.1f}ms encode={encode_s * 1000:7.1f}ms "
+            f"peak={peak / 2**20:6.1f}MB stored={size / 2**20:5.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
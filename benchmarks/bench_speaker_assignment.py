@@ -0,0 +1,85 @@
+"""Benchmark: pandas speaker assignment vs. the vectorized NumPy assigner.
+
+Builds a synthetic meeting (overlapping turns, timed words) and times:
+
+- pandas: DataFrame from the turns + murmurai_core.assign_word_speakers
+  (the previous path: one DataFrame scan per segment and per word).
+- numpy: SpeakerTurns + assign_speakers (what transcribe() uses now).
+
+Both outputs are compared to make sure the labels are identical.
+
+Usage:
+    uv run python benchmarks/bench_speaker_assignment.py --hours 3 --speakers 8
+"""
+
+import argparse
+import copy
+import random
+import time
+
+import pandas as pd
+
+
+def synthetic_meeting(hours: float, speakers: int, seed: int = 0) -> tuple[list, dict]:
+    rng = random.Random(seed)
+    labels = [f"SPEAKER_{i:02d}" for i in range(speakers)]
+    duration = hours * 3600
+
+    tracks = []
+    t = 0.0
+    while t < duration:
+        length = rng.uniform(0.5, 15)
+        tracks.append((t, t + length, rng.choice(labels)))
+        if rng.random() < 0.15:  # Overlapping speech
+            tracks.append((t + length / 2, t + length * 1.3, rng.choice(labels)))
+        t += length + rng.uniform(-0.3, 1.5)
+    tracks.sort(key=lambda track: (track[0], track[1]))
+
+    segments = []
+    t = 0.0
+    while t < duration:
+        words = []
+        for _ in range(rng.randint(5, 40)):
+            start = round(t, 3)
+            t += rng.uniform(0.1, 0.6)
+            words.append({"word": "w", "start": start, "end": round(t, 3), "score": 0.9})
+            t += rng.uniform(0, 0.2)
+        segments.append({"start": words[0]["start"], "end": round(t, 3), "words": words})
+        t += rng.uniform(0, 2)
+    return tracks, {"segments": segments}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--hours", type=float, default=3.0)
+    parser.add_argument("--speakers", type=int, default=8)
+    parser.add_argument("--skip-pandas", action="store_true", help="Only time the NumPy path")
+    args = parser.parse_args()
+
+    from murmurai_server.transcriber import SpeakerTurns, assign_speakers, murmurai_core
+
+    tracks, result = synthetic_meeting(args.hours, args.speakers)
+    words = sum(len(seg["words"]) for seg in result["segments"])
+    print(
+        f"{args.hours}h meeting: {len(tracks)} turns, {len(result['segments'])} segments, {words} words"
+    )
+
+    start = time.perf_counter()
+    fast = assign_speakers(SpeakerTurns.from_tracks(tracks), copy.deepcopy(result))
+    numpy_time = time.perf_counter() - start
+    print(f"numpy   {numpy_time:8.3f}s")
+
+    if args.skip_pandas:
+        return
+
+    start = time.perf_counter()
+    df = pd.DataFrame(tracks, columns=["start", "end", "speaker"])
+    slow = murmurai_core.assign_word_speakers(df, copy.deepcopy(result))
+    pandas_time = time.perf_counter() - start
+    print(f"pandas  {pandas_time:8.3f}s")
+
+    print(f"speedup {pandas_time / numpy_time:8.1f}x  identical={fast == slow}")
+
+
+if __name__ == "__main__":
+    main()
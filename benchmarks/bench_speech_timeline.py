@@ -0,0 +1,123 @@
+"""Benchmark: VAD run once and shared by ASR and diarization vs. each stage on its own.
+
+Builds a silence-heavy recording (a call with holds): the given speech
+audio is cut into parts with quiet noise between them. Then it runs:
+
+- separate: model.transcribe with its own VAD, then diarization of the
+  whole waveform (the previous pipeline)
+- shared: speech_regions once, ASR chunked from them, and diarization of
+  the padded speech regions only (diarize_speech_only)
+
+It reports the time per stage, whether the ASR text is identical, and how
+many segments get the same speaker (after matching the label sets by
+overlap). Needs the ASR model and the diarization model (MURMURAI_HF_TOKEN).
+
+Usage:
+    uv run python benchmarks/bench_speech_timeline.py --audio call.wav --holds 6 --hold-minutes 4
+"""
+
+import argparse
+import copy
+import time
+from collections import Counter
+from collections.abc import Callable
+from typing import Any
+
+
+def timed(fn: Callable[[], Any]) -> tuple[Any, float]:
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def with_holds(speech: Any, holds: int, hold_seconds: float, seed: int = 0) -> Any:
+    """Split ``speech`` into ``holds + 1`` parts with quiet noise (-50 dBFS) between them."""
+    import numpy as np
+
+    from murmurai_server.cache import SAMPLE_RATE
+
+    rng = np.random.default_rng(seed)
+    parts = np.array_split(speech, holds + 1)
+    out = [parts[0]]
+    for part in parts[1:]:
+        noise = rng.normal(0, 10 ** (-50 / 20), int(hold_seconds * SAMPLE_RATE))
+        out += [noise.astype(np.float32), part]
+    return np.concatenate(out)
+
+
+def speaker_agreement(a: list[str | None], b: list[str | None]) -> float:
+    """Share of items labelled alike once each label of ``b`` is renamed to its best match."""
+    pairs = Counter(zip(b, a, strict=True))
+    best: dict[str | None, str | None] = {}
+    for (label_b, label_a), _ in pairs.most_common():
+        if label_b not in best and label_a not in best.values():
+            best[label_b] = label_a
+    same = sum(1 for x, y in zip(a, b, strict=True) if best.get(y) == x)
+    return same / len(a) if a else 1.0
+
+
+def run(audio_path: str, holds: int, hold_minutes: float) -> None:
+    from murmurai_server.cache import SAMPLE_RATE
+    from murmurai_server.config import get_settings
+    from murmurai_server.model_manager import ModelManager
+    from murmurai_server.transcriber import (
+        SpeakerTurns,
+        TranscribeOptions,
+        _diarize,
+        _transcribe_regions,
+        assign_speakers,
+        murmurai_core,
+        speech_regions,
+    )
+
+    settings = get_settings()
+    audio = with_holds(murmurai_core.load_audio(audio_path), holds, hold_minutes * 60)
+    duration = len(audio) / SAMPLE_RATE
+    options = TranscribeOptions(speaker_labels=True)
+    kwargs = {"batch_size": settings.batch_size, "language": settings.language}
+
+    model = ModelManager.get_model()
+    ModelManager.get_diarize_model(options.diarize_model)
+    model.transcribe(audio[: 30 * SAMPLE_RATE], **kwargs)  # Warm up
+
+    settings.diarize_speech_only = False
+    separate, asr_a = timed(lambda: model.transcribe(audio, **kwargs))
+    (tracks_a, _), diarize_a = timed(lambda: _diarize(audio, [], options, None, None, False))
+
+    settings.diarize_speech_only = True
+    regions, vad = timed(lambda: speech_regions(model, audio, options.chunk_size))
+    shared, asr_b = timed(lambda: _transcribe_regions(model, audio, regions, kwargs))
+    (tracks_b, _), diarize_b = timed(lambda: _diarize(audio, regions, options, None, None, False))
+
+    speech = sum(e - s for s, e in regions)
+    print(
+        f"{duration / 60:.1f} min recording, {speech / 60:.1f} min speech ({len(regions)} regions)"
+    )
+    print(
+        f"  separate  asr+vad={asr_a:7.1f}s  diarize={diarize_a:7.1f}s  total={asr_a + diarize_a:7.1f}s"
+    )
+    print(
+        f"  shared    vad={vad:7.1f}s  asr={asr_b:7.1f}s  diarize={diarize_b:7.1f}s  "
+        f"total={vad + asr_b + diarize_b:7.1f}s"
+    )
+
+    same_text = [s["text"] for s in separate["segments"]] == [s["text"] for s in shared["segments"]]
+    labels = []
+    for tracks in (tracks_a, tracks_b):
+        result = assign_speakers(SpeakerTurns.from_tracks(tracks), copy.deepcopy(shared))
+        labels.append([segment.get("speaker") for segment in result["segments"]])
+    print(f"  ASR text identical: {same_text}")
+    print(f"  segment speaker agreement: {speaker_agreement(labels[0], labels[1]):.1%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--audio", required=True, help="Recording with speech (any format)")
+    parser.add_argument("--holds", type=int, default=6)
+    parser.add_argument("--hold-minutes", type=float, default=4.0)
+    args = parser.parse_args()
+    run(args.audio, args.holds, args.hold_minutes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Benchmark: pre-fork worker pool vs. N independent worker processes.
+
+Both modes run the same job loop; only the way processes start differs:
+
+- prefork: the parent loads models via ModelManager, then forks N children
+  that share the weights copy-on-write (what `murmurai worker --processes N` does).
+- independent: N fresh interpreters ("spawn"), each loading its own model copy.
+
+Reports total PSS (proportional set size, so shared pages are counted once)
+and throughput in jobs/second.
+
+Usage (CPU node):
+    MURMURAI_DEVICE_TYPE=cpu MURMURAI_COMPUTE_TYPE=int8 \\
+        uv run python benchmarks/bench_worker_pool.py --audio sample.wav --processes 4 --jobs 16
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import time
+from pathlib import Path
+
+
+def pss_kb(pid: int) -> int:
+    """Proportional set size of a process in kB (Linux only)."""
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _worker(
+    index: int,
+    processes: int,
+    threads: int,
+    jobs: "mp.Queue[str | None]",
+    ready: "mp.Queue[int]",
+    done: "mp.Queue[tuple[int, int]]",
+) -> None:
+    from murmurai_server.model_manager import ModelManager
+    from murmurai_server.transcriber import TranscribeOptions, transcribe
+    from murmurai_server.worker import _pin_worker, worker_cpu_slices
+
+    # No-op when inherited from a prefork parent; full load when spawned
+    ModelManager.preload()
+    _pin_worker(worker_cpu_slices(processes, threads)[index], threads)
+    ready.put(os.getpid())
+
+    count = 0
+    while (audio := jobs.get()) is not None:
+        transcribe(Path(audio), TranscribeOptions(language="en"))
+        count += 1
+    done.put((os.getpid(), count))
+
+
+def run(mode: str, audio: str, processes: int, n_jobs: int, threads: int) -> None:
+    ctx = mp.get_context("fork" if mode == "prefork" else "spawn")
+    if mode == "prefork":
+        import gc
+
+        from murmurai_server.model_manager import ModelManager
+
+        ModelManager.preload()
+        gc.collect()
+        gc.freeze()
+
+    jobs = ctx.Queue()
+    ready = ctx.Queue()
+    done = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(i, processes, threads, jobs, ready, done))
+        for i in range(processes)
+    ]
+    for p in procs:
+        p.start()
+    pids = [ready.get() for _ in procs]
+
+    # Steady-state memory: all models loaded, one warm-up job per worker
+    for _ in procs:
+        jobs.put(audio)
+    start = time.perf_counter()
+    for _ in range(n_jobs):
+        jobs.put(audio)
+    for _ in procs:
+        jobs.put(None)
+
+    total_pss = sum(pss_kb(pid) for pid in pids)
+    if mode == "prefork":
+        total_pss += pss_kb(os.getpid())
+    results = [done.get() for _ in procs]
+    elapsed = time.perf_counter() - start
+    for p in procs:
+        p.join()
+
+    completed = sum(count for _, count in results) - processes
+    print(
+        f"{mode:12s} processes={processes} threads={threads} "
+        f"pss={total_pss / 1024:.0f}MB jobs={completed} "
+        f"time={elapsed:.1f}s throughput={completed / elapsed:.2f} jobs/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--audio", required=True, help="Audio file transcribed by every job")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--jobs", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--mode", choices=["prefork", "independent", "both"], default="both")
+    args = parser.parse_args()
+
+    threads = args.threads or max(1, len(os.sched_getaffinity(0)) // args.processes)
+    modes = ["independent", "prefork"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        # Fresh interpreter state per mode so prefork never reuses a spawned run's models
+        p = mp.get_context("spawn").Process(
+            target=run, args=(mode, args.audio, args.processes, args.jobs, threads)
+        )
+        p.start()
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,519 @@
+"""Content-addressed caches for transcript results and decoded audio.
+
+Results are keyed by the sha256 of the audio bytes combined with a canonical
+hash of every option (and server setting) that changes the transcript, so a
+resubmitted recording is answered from disk instead of re-running the GPU
+pipeline. Entries are JSON files under ``data_dir/cache/results``.
+
+Decoded audio (16 kHz mono float32, as ``murmurai_core.load_audio`` returns
+it) is keyed by the audio sha256 alone and stored as ``.npy`` files under
+``data_dir/cache/pcm``. Every pipeline stage memory-maps the same file, so
+ffmpeg runs once per recording and the samples never have to be resident
+in RAM all at once.
+
+Diarization intermediates (pyannote segmentation and embeddings, see
+``diarization``) are kept per job as ``.npz`` files under
+``data_dir/cache/diarization``, so a transcript can be re-clustered with
+other speaker counts without running the models again.
+
+Stage checkpoints (raw ASR segments, aligned segments, diarization turns)
+are JSON files under ``data_dir/cache/checkpoints/<result cache key>``. A
+job that fails or is requeued after a stage finished resumes after that
+stage when it runs again (as a retried attempt or as an identical
+resubmission). They are deleted once the job's result is saved, and
+expire after ``checkpoint_retention_hours`` otherwise.
+
+Export renditions (the bytes served by ``/srt``, ``/vtt``, ``/json`` etc.)
+are rendered once per transcript version and stored under
+``data_dir/cache/renditions/<transcript id>``, together with gzip (and,
+when the ``brotli`` package is installed, br) encoded copies.
+
+All caches refresh the file mtime on hits and evict the oldest entries
+once their directory exceeds its configured size.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from collections.abc import Collection, Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import orjson
+
+from murmurai_server.config import get_settings
+from murmurai_server.logging import get_logger
+
+try:
+    import brotli
+except ImportError:  # Optional: renditions are only pre-compressed with gzip
+    brotli = None
+
+if TYPE_CHECKING:
+    from murmurai_server.transcriber import TranscribeOptions
+
+SAMPLE_RATE = 16000
+
+# Data offset of cached .npy files: the header is written after decoding,
+# once the sample count is known (v1.0 headers for 1-D float32 fit in 128)
+PCM_HEADER_BYTES = 128
+
+# Options only used when rendering exports - they never change the stored result
+EXPORT_ONLY_OPTIONS = {"segment_resolution", "max_line_width", "max_line_count", "highlight_words"}
+
+# Bump when export output changes, so clients revalidate cached renditions
+RENDITION_FORMAT_VERSION = 2
+
+# Content-Encodings stored next to each rendition, in order of preference
+RENDITION_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+_ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# Per-process counters (exported via /v1/cache/stats)
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "inflight_hits": 0,
+    "stores": 0,
+    "evictions": 0,
+    "pcm_hits": 0,
+    "pcm_misses": 0,
+    "rendition_hits": 0,
+    "rendition_misses": 0,
+    "diarization_hits": 0,
+    "diarization_misses": 0,
+    "checkpoint_hits": 0,
+    "checkpoint_stores": 0,
+}
+
+
+def options_fingerprint(options: "TranscribeOptions") -> str:
+    """Canonical hash of everything that determines the transcript for a given audio.
+
+    Server settings are included because requests that leave an option at
+    its default inherit them (model, default language, ASR/VAD defaults).
+    """
+    settings = get_settings()
+    data = {
+        "options": {k: v for k, v in options.to_dict().items() if k not in EXPORT_ONLY_OPTIONS},
+        "model": settings.model,
+        "compute_type": settings.compute_type,
+        "language": settings.language,
+        "asr": settings.asr_options,
+        "vad": settings.vad_options,
+        "vad_method": settings.vad_method,
+        "window": [
+            settings.window_seconds,
+            settings.window_search_seconds,
+            settings.window_speaker_distance,
+        ],
+        "shards": [settings.shard_replicas, settings.shard_min_seconds],
+        "diarize_speech_only": settings.diarize_speech_only,
+    }
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def result_cache_key(audio_sha256: str, options: "TranscribeOptions") -> str:
+    """Cache key for an audio digest transcribed with ``options``."""
+    return hashlib.sha256(f"{audio_sha256}:{options_fingerprint(options)}".encode()).hexdigest()
+
+
+def _cache_dir() -> Path:
+    return get_settings().data_dir / "cache" / "results"
+
+
+def get_cached_result(key: str) -> dict[str, Any] | None:
+    """Load a cached result, refreshing its LRU position. None on miss."""
+    path = _cache_dir() / f"{key}.json"
+    try:
+        with open(path) as f:
+            result = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        _stats["misses"] += 1
+        return None
+
+    os.utime(path)
+    _stats["hits"] += 1
+    return result
+
+
+def put_cached_result(key: str, result: dict[str, Any]) -> None:
+    """Store a result atomically, then evict least recently used entries over budget."""
+    cache_dir = _cache_dir()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.NamedTemporaryFile("w", dir=cache_dir, suffix=".tmp", delete=False) as f:
+        json.dump(result, f)
+    os.replace(f.name, cache_dir / f"{key}.json")
+    _stats["stores"] += 1
+
+    evict_results(get_settings().result_cache_max_mb * 1024 * 1024)
+
+
+def evict_results(max_bytes: int) -> int:
+    """Delete the least recently used results until the cache fits ``max_bytes``.
+
+    Returns:
+        Number of entries evicted.
+    """
+    return _evict(_cache_dir(), "*.json", max_bytes)
+
+
+def _evict(directory: Path, pattern: str, max_bytes: int, keep: Collection[Path] = ()) -> int:
+    entries = []
+    total = 0
+    for path in directory.glob(pattern):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue  # Evicted concurrently by another worker
+        total += stat.st_size
+        if path not in keep:
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    evicted = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        evicted += 1
+
+    if evicted:
+        _stats["evictions"] += evicted
+        get_logger().debug(f"Cache evicted {evicted} entries from {directory.name}")
+    return evicted
+
+
+def file_sha256(path: Path) -> str:
+    """sha256 of a file's contents (same digest the API computes on upload)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _pcm_dir() -> Path:
+    return get_settings().data_dir / "cache" / "pcm"
+
+
+def load_pcm(audio_path: Path, audio_sha256: str | None = None) -> np.ndarray:
+    """Decoded 16 kHz mono float32 audio, memory-mapped from the PCM cache.
+
+    Decodes with ffmpeg on a miss. The map is copy-on-write, so stages that
+    need a writable array (e.g. ``torch.from_numpy``) never touch the file.
+
+    Args:
+        audio_path: Audio file in any format ffmpeg reads.
+        audio_sha256: Digest of the file, if already known.
+    """
+    audio_sha256 = audio_sha256 or file_sha256(audio_path)
+    cached = cached_pcm(audio_sha256)
+    if cached is not None:
+        _stats["pcm_hits"] += 1
+        return cached
+
+    path = _pcm_dir() / f"{audio_sha256}.npy"
+    _decode_pcm(audio_path, path)
+    audio = np.load(path, mmap_mode="c")
+    _stats["pcm_misses"] += 1
+
+    # Open maps keep their pages even if the file is evicted under them
+    evict_pcm(get_settings().pcm_cache_max_mb * 1024 * 1024)
+    return audio
+
+
+def cached_pcm(audio_sha256: str) -> np.ndarray | None:
+    """Decoded audio of a digest if it is still in the PCM cache (None if evicted)."""
+    path = _pcm_dir() / f"{audio_sha256}.npy"
+    try:
+        audio = np.load(path, mmap_mode="c")
+    except FileNotFoundError:
+        return None
+    os.utime(path)
+    return audio
+
+
+def evict_pcm(max_bytes: int) -> int:
+    """Delete the least recently used decoded audio until it fits ``max_bytes``.
+
+    Returns:
+        Number of entries evicted.
+    """
+    return _evict(_pcm_dir(), "*.npy", max_bytes)
+
+
+def _decode_pcm(audio_path: Path, out_path: Path) -> None:
+    """Stream ffmpeg output into a float32 ``.npy`` file, one chunk at a time.
+
+    Samples are converted exactly like ``murmurai_core.load_audio`` (s16le
+    scaled by 1/32768) so cached and uncached runs are bit-identical.
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-threads",
+        "0",
+        "-i",
+        str(audio_path),
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-acodec",
+        "pcm_s16le",
+        "-ar",
+        str(SAMPLE_RATE),
+        "-",
+    ]
+
+    tmp = tempfile.NamedTemporaryFile(dir=out_path.parent, suffix=".tmp", delete=False)
+    try:
+        with tmp as f, tempfile.TemporaryFile() as stderr:
+            f.seek(PCM_HEADER_BYTES)
+            samples = 0
+            with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr) as proc:
+                assert proc.stdout is not None
+                while chunk := proc.stdout.read(1024 * 1024):
+                    pcm = np.frombuffer(chunk, np.int16)
+                    (pcm.astype(np.float32) / 32768.0).tofile(f)
+                    samples += len(pcm)
+            if proc.returncode != 0:
+                stderr.seek(0)
+                raise RuntimeError(
+                    f"Failed to load audio: {stderr.read().decode(errors='replace')}"
+                )
+
+            f.seek(0)
+            header = {"descr": "<f4", "fortran_order": False, "shape": (samples,)}
+            np.lib.format.write_array_header_1_0(f, header)
+            assert f.tell() == PCM_HEADER_BYTES
+        os.replace(tmp.name, out_path)
+    except BaseException:
+        Path(tmp.name).unlink(missing_ok=True)
+        raise
+
+
+def _diarization_path(job_id: str) -> Path:
+    return get_settings().data_dir / "cache" / "diarization" / f"{job_id}.npz"
+
+
+def get_diarization(job_id: str) -> dict[str, np.ndarray] | None:
+    """Stored diarization intermediates of a job, refreshing their LRU position."""
+    path = _diarization_path(job_id)
+    try:
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+    except FileNotFoundError:
+        _stats["diarization_misses"] += 1
+        return None
+    os.utime(path)
+    _stats["diarization_hits"] += 1
+    return arrays
+
+
+def put_diarization(job_id: str, arrays: dict[str, np.ndarray]) -> None:
+    """Store a job's diarization intermediates, then evict over budget."""
+    path = _diarization_path(job_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False)
+    try:
+        with tmp as f:
+            np.savez_compressed(f, **arrays)  # type: ignore[arg-type]
+        os.replace(tmp.name, path)
+    except BaseException:
+        Path(tmp.name).unlink(missing_ok=True)
+        raise
+    _evict(path.parent, "*.npz", get_settings().diarization_cache_max_mb * 1024 * 1024)
+
+
+def delete_diarization(job_id: str) -> None:
+    """Drop a job's diarization intermediates."""
+    _diarization_path(job_id).unlink(missing_ok=True)
+
+
+def _checkpoint_dir() -> Path:
+    return get_settings().data_dir / "cache" / "checkpoints"
+
+
+def get_checkpoint(key: str, stage: str) -> dict[str, Any] | None:
+    """Output of a finished pipeline stage of the job ``key``. None if absent."""
+    path = _checkpoint_dir() / key / f"{stage}.json"
+    try:
+        data: dict[str, Any] = orjson.loads(path.read_bytes())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return None
+    _stats["checkpoint_hits"] += 1
+    return data
+
+
+def put_checkpoint(key: str, stage: str, data: dict[str, Any]) -> None:
+    """Store a stage's output, then expire old checkpoints and evict over budget.
+
+    Checkpoints are an optimization: output that cannot be serialized is
+    logged and skipped rather than failing the job.
+    """
+    settings = get_settings()
+    try:
+        content = orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    except TypeError as e:
+        get_logger().warning(f"Checkpoint {stage} of {key} not stored: {e}")
+        return
+
+    root = _checkpoint_dir()
+    directory = root / key
+    directory.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=root, suffix=".tmp", delete=False) as f:
+        f.write(content)
+    os.replace(f.name, directory / f"{stage}.json")
+    _stats["checkpoint_stores"] += 1
+
+    expire_checkpoints(settings.checkpoint_retention_hours * 3600)
+    _evict(root, "*/*.json", settings.checkpoint_max_mb * 1024 * 1024)
+
+
+def delete_checkpoints(key: str) -> None:
+    """Drop every checkpoint of the job ``key`` (its result is stored)."""
+    shutil.rmtree(_checkpoint_dir() / key, ignore_errors=True)
+
+
+def expire_checkpoints(max_age_seconds: float) -> int:
+    """Delete checkpoints not written for ``max_age_seconds`` (abandoned jobs).
+
+    Returns:
+        Number of checkpoint files deleted.
+    """
+    cutoff = time.time() - max_age_seconds
+    expired = 0
+    for directory in _checkpoint_dir().glob("*/"):
+        for path in directory.glob("*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    expired += 1
+            except FileNotFoundError:
+                continue  # Deleted concurrently by another worker
+        try:
+            directory.rmdir()  # Only succeeds once it is empty
+        except OSError:
+            pass
+    return expired
+
+
+def rendition_key(transcript_id: str, version: str) -> str:
+    """Key of one version of a transcript's renditions (the base of their ETags).
+
+    ``version`` changes whenever the stored result does (``completed_at`` and
+    the options it was made with).
+    """
+    data = f"{RENDITION_FORMAT_VERSION}:{transcript_id}:{version}"
+    return hashlib.sha256(data.encode()).hexdigest()[:32]
+
+
+def _rendition_dir() -> Path:
+    return get_settings().data_dir / "cache" / "renditions"
+
+
+def rendition_path(transcript_id: str, key: str, fmt: str, encoding: str | None = None) -> Path:
+    suffix = _ENCODING_SUFFIXES[encoding] if encoding else ""
+    return _rendition_dir() / transcript_id / f"{key}.{fmt}{suffix}"
+
+
+def get_rendition(
+    transcript_id: str, key: str, fmt: str, encoding: str | None = None
+) -> Path | None:
+    """Path of a stored rendition, refreshing its LRU position. None on miss."""
+    path = rendition_path(transcript_id, key, fmt, encoding)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        _stats["rendition_misses"] += 1
+        return None
+    _stats["rendition_hits"] += 1
+    return path
+
+
+def put_rendition(transcript_id: str, key: str, fmt: str, chunks: Iterable[bytes]) -> None:
+    """Write a rendition and its encoded copies as the chunks arrive.
+
+    Renditions of older versions of the transcript are removed, then least
+    recently used files are evicted over budget (never the ones just written,
+    which the caller is about to serve).
+    """
+    root = _rendition_dir()
+    directory = root / transcript_id
+    directory.mkdir(parents=True, exist_ok=True)
+
+    # Temporary files stay out of the per-transcript directories (and eviction)
+    tmps = {
+        encoding: tempfile.NamedTemporaryFile(dir=root, suffix=".tmp", delete=False)
+        for encoding in (None, *RENDITION_ENCODINGS)
+    }
+    try:
+        gz = gzip.GzipFile(fileobj=tmps["gzip"], mode="wb", mtime=0)
+        br = brotli.Compressor() if "br" in tmps else None
+        for chunk in chunks:
+            tmps[None].write(chunk)
+            gz.write(chunk)
+            if br is not None:
+                tmps["br"].write(br.process(chunk))
+        gz.close()
+        if br is not None:
+            tmps["br"].write(br.finish())
+
+        for encoding, tmp in tmps.items():
+            tmp.close()
+            os.replace(tmp.name, rendition_path(transcript_id, key, fmt, encoding))
+    except BaseException:
+        for tmp in tmps.values():
+            tmp.close()
+            Path(tmp.name).unlink(missing_ok=True)
+        raise
+
+    for path in directory.iterdir():
+        if not path.name.startswith(f"{key}."):
+            path.unlink(missing_ok=True)  # Previous version of the transcript
+
+    written = {rendition_path(transcript_id, key, fmt, encoding) for encoding in tmps}
+    evict_renditions(get_settings().rendition_cache_max_mb * 1024 * 1024, keep=written)
+
+
+def delete_renditions(transcript_id: str) -> None:
+    """Drop every stored rendition of a transcript."""
+    shutil.rmtree(_rendition_dir() / transcript_id, ignore_errors=True)
+
+
+def evict_renditions(max_bytes: int, keep: Collection[Path] = ()) -> int:
+    """Delete the least recently used renditions until they fit ``max_bytes``.
+
+    Args:
+        keep: Files never evicted (they still count towards the budget).
+
+    Returns:
+        Number of files evicted.
+    """
+    return _evict(_rendition_dir(), "*/*", max_bytes, keep)
+
+
+def record_inflight_hit() -> None:
+    """Count a submission that attached to an identical running job."""
+    _stats["inflight_hits"] += 1
+
+
+def cache_stats() -> dict[str, Any]:
+    """Counters for this process plus the hit rate over all lookups."""
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "hit_rate": (_stats["hits"] + _stats["inflight_hits"]) / lookups if lookups else 0.0,
+    }
@@ -0,0 +1,290 @@
+"""Columnar transcript representation.
+
+The API shape nests every word dict inside its utterance as well as in the
+top-level ``words`` list, so building, storing and encoding it touched each
+word twice. ``TranscriptColumns`` keeps words and utterances as parallel
+arrays instead (times in ms, confidences, speaker indices) with utterances
+pointing at their words through an offsets array. It is built directly from
+the pipeline segments, stored as-is, and only expanded to word/utterance
+dicts when a client reads the transcript.
+"""
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+
+@dataclass
+class TranscriptColumns:
+    """Words and utterances as parallel columns.
+
+    Words of utterance ``i`` are ``words[utterance_offsets[i]:utterance_offsets[i + 1]]``.
+    Speaker columns index into ``speakers``; -1 means no speaker.
+    """
+
+    word_text: list[str]
+    word_start: np.ndarray  # int64 ms
+    word_end: np.ndarray  # int64 ms
+    word_confidence: np.ndarray  # float64
+    word_speaker: np.ndarray  # int32
+    utterance_text: list[str]
+    utterance_start: np.ndarray  # int64 ms
+    utterance_end: np.ndarray  # int64 ms
+    utterance_speaker: np.ndarray  # int32
+    utterance_offsets: np.ndarray  # int64, len(utterances) + 1
+    speakers: list[str]
+
+    @classmethod
+    def from_segments(
+        cls, segments: list[dict[str, Any]], speaker_labels: bool = False
+    ) -> "TranscriptColumns":
+        """Build from murmurai segments (with or without aligned words).
+
+        Words inherit their segment's speaker, and speakers are only kept
+        when diarization was requested.
+        """
+        speakers: list[str] = []
+        speaker_index: dict[str, int] = {}
+        word_text: list[str] = []
+        word_times: list[float] = []  # start, end interleaved
+        word_confidence: list[float] = []
+        utterance_text: list[str] = []
+        utterance_times: list[float] = []
+        utterance_speaker: list[int] = []
+        word_counts: list[int] = []
+
+        for segment in segments:
+            speaker = segment.get("speaker") if speaker_labels else None
+            if speaker and speaker not in speaker_index:
+                speaker_index[speaker] = len(speakers)
+                speakers.append(speaker)
+
+            words = segment.get("words", [])
+            for word in words:
+                word_text.append(word.get("word", ""))
+                word_times.append(word.get("start", 0))
+                word_times.append(word.get("end", 0))
+                word_confidence.append(word.get("score", 0.0))
+
+            utterance_text.append(segment.get("text", "").strip())
+            utterance_times.append(segment.get("start", 0))
+            utterance_times.append(segment.get("end", 0))
+            utterance_speaker.append(speaker_index[speaker] if speaker else -1)
+            word_counts.append(len(words))
+
+        # Seconds -> ms, truncated like int(seconds * 1000)
+        word_ms = (np.array(word_times, dtype=np.float64) * 1000).astype(np.int64)
+        utterance_ms = (np.array(utterance_times, dtype=np.float64) * 1000).astype(np.int64)
+        utterance_speakers = np.array(utterance_speaker, dtype=np.int32)
+        counts = np.array(word_counts, dtype=np.int64)
+
+        return cls(
+            word_text=word_text,
+            word_start=word_ms[0::2],
+            word_end=word_ms[1::2],
+            word_confidence=np.array(word_confidence, dtype=np.float64),
+            word_speaker=np.repeat(utterance_speakers, counts),
+            utterance_text=utterance_text,
+            utterance_start=utterance_ms[0::2],
+            utterance_end=utterance_ms[1::2],
+            utterance_speaker=utterance_speakers,
+            utterance_offsets=np.concatenate(([0], np.cumsum(counts))),
+            speakers=speakers,
+        )
+
+    @classmethod
+    def from_utterances(cls, utterances: list[dict[str, Any]]) -> "TranscriptColumns":
+        """Build from API-shaped utterances (transcripts stored before columns)."""
+        speakers: list[str] = []
+        speaker_index: dict[str, int] = {}
+
+        def index(speaker: str | None) -> int:
+            if not speaker:
+                return -1
+            if speaker not in speaker_index:
+                speaker_index[speaker] = len(speakers)
+                speakers.append(speaker)
+            return speaker_index[speaker]
+
+        words = [word for utterance in utterances for word in utterance.get("words") or []]
+        counts = [len(utterance.get("words") or []) for utterance in utterances]
+        return cls(
+            word_text=[word["text"] for word in words],
+            word_start=np.array([word["start"] for word in words], dtype=np.int64),
+            word_end=np.array([word["end"] for word in words], dtype=np.int64),
+            word_confidence=np.array(
+                [word.get("confidence", 0.0) for word in words], dtype=np.float64
+            ),
+            word_speaker=np.array([index(word.get("speaker")) for word in words], dtype=np.int32),
+            utterance_text=[utterance["text"] for utterance in utterances],
+            utterance_start=np.array([u["start"] for u in utterances], dtype=np.int64),
+            utterance_end=np.array([u["end"] for u in utterances], dtype=np.int64),
+            utterance_speaker=np.array(
+                [index(u.get("speaker")) for u in utterances], dtype=np.int32
+            ),
+            utterance_offsets=np.concatenate(([0], np.cumsum(counts, dtype=np.int64))),
+            speakers=speakers,
+        )
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.utterance_text)
+
+    @property
+    def confidence(self) -> float | None:
+        """Mean word confidence (None without word-level data)."""
+        if not len(self.word_confidence):
+            return None
+        return float(self.word_confidence.mean())
+
+    @property
+    def audio_duration(self) -> int:
+        """Last word end in ms, else last utterance end, else 0."""
+        if len(self.word_end):
+            return int(self.word_end.max())
+        if len(self.utterance_end):
+            return int(self.utterance_end.max())
+        return 0
+
+    def utterance_confidence(self) -> np.ndarray:
+        """Mean confidence per utterance (NaN for utterances without words)."""
+        counts = np.diff(self.utterance_offsets)
+        sums = np.zeros(len(counts), dtype=np.float64)
+        nonempty = counts > 0
+        if nonempty.any():
+            sums[nonempty] = np.add.reduceat(
+                self.word_confidence, self.utterance_offsets[:-1][nonempty]
+            )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return sums / counts
+
+    def words(self) -> list[dict[str, Any]]:
+        """Words in the API shape."""
+        speakers = [self.speakers[i] if i >= 0 else None for i in self.word_speaker.tolist()]
+        words = []
+        for text, start, end, confidence, speaker in zip(
+            self.word_text,
+            self.word_start.tolist(),
+            self.word_end.tolist(),
+            self.word_confidence.tolist(),
+            speakers,
+        ):
+            word: dict[str, Any] = {
+                "text": text,
+                "start": start,
+                "end": end,
+                "confidence": confidence,
+            }
+            if speaker:
+                word["speaker"] = speaker
+            words.append(word)
+        return words
+
+    def utterances(self, words: list[dict[str, Any]] | None = None) -> list[dict[str, Any]]:
+        """Utterances in the API shape, nesting (shared) dicts from ``words``."""
+        words = self.words() if words is None else words
+        offsets = self.utterance_offsets.tolist()
+        confidences = self.utterance_confidence().tolist()
+        utterances = []
+        for i, (text, start, end, speaker) in enumerate(
+            zip(
+                self.utterance_text,
+                self.utterance_start.tolist(),
+                self.utterance_end.tolist(),
+                self.utterance_speaker.tolist(),
+            )
+        ):
+            utterance: dict[str, Any] = {
+                "text": text,
+                "start": start,
+                "end": end,
+                "words": words[offsets[i] : offsets[i + 1]],
+            }
+            if speaker >= 0:
+                utterance["speaker"] = self.speakers[speaker]
+            if offsets[i + 1] > offsets[i]:
+                utterance["confidence"] = confidences[i]
+            utterances.append(utterance)
+        return utterances
+
+    def utterance_rows(self) -> Iterator[tuple[int, int, str | None, str]]:
+        """``(start, end, speaker, text)`` per utterance, without building word dicts."""
+        speakers = [self.speakers[i] if i >= 0 else None for i in self.utterance_speaker.tolist()]
+        return zip(
+            self.utterance_start.tolist(),
+            self.utterance_end.tolist(),
+            speakers,
+            self.utterance_text,
+        )
+
+    def segments(self) -> list[dict[str, Any]]:
+        """murmurai segments (seconds, words included) rebuilt from the columns.
+
+        The inverse of ``from_segments`` to the stored millisecond precision,
+        for re-running one stage (alignment, diarization) on a stored transcript.
+        """
+        # Half a millisecond in: ``from_segments`` truncates back to the same ms
+        offsets = self.utterance_offsets.tolist()
+        word_start = ((self.word_start + 0.5) / 1000).tolist()
+        word_end = ((self.word_end + 0.5) / 1000).tolist()
+        confidence = self.word_confidence.tolist()
+        segments = []
+        for i, (start, end, speaker, text) in enumerate(self.utterance_rows()):
+            segment: dict[str, Any] = {
+                "text": text,
+                "start": (start + 0.5) / 1000,
+                "end": (end + 0.5) / 1000,
+                "words": [
+                    {
+                        "word": self.word_text[j],
+                        "start": word_start[j],
+                        "end": word_end[j],
+                        "score": confidence[j],
+                    }
+                    for j in range(offsets[i], offsets[i + 1])
+                ],
+            }
+            if speaker:
+                segment["speaker"] = speaker
+            segments.append(segment)
+        return segments
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-serializable form: one list per column, words stored once."""
+        return {
+            "speakers": self.speakers,
+            "words": {
+                "text": self.word_text,
+                "start": self.word_start.tolist(),
+                "end": self.word_end.tolist(),
+                "confidence": self.word_confidence.tolist(),
+                "speaker": self.word_speaker.tolist(),
+            },
+            "utterances": {
+                "text": self.utterance_text,
+                "start": self.utterance_start.tolist(),
+                "end": self.utterance_end.tolist(),
+                "speaker": self.utterance_speaker.tolist(),
+                "offsets": self.utterance_offsets.tolist(),
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "TranscriptColumns":
+        words = data["words"]
+        utterances = data["utterances"]
+        return cls(
+            word_text=words["text"],
+            word_start=np.array(words["start"], dtype=np.int64),
+            word_end=np.array(words["end"], dtype=np.int64),
+            word_confidence=np.array(words["confidence"], dtype=np.float64),
+            word_speaker=np.array(words["speaker"], dtype=np.int32),
+            utterance_text=utterances["text"],
+            utterance_start=np.array(utterances["start"], dtype=np.int64),
+            utterance_end=np.array(utterances["end"], dtype=np.int64),
+            utterance_speaker=np.array(utterances["speaker"], dtype=np.int32),
+            utterance_offsets=np.array(utterances["offsets"], dtype=np.int64),
+            speakers=data["speakers"],
+        )
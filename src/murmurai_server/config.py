@@ -27,22 +27,86 @@ class Settings(BaseSettings):
     compute_type: str = "float16"
     batch_size: int = 16
     device: int = 0  # GPU index (0, 1, 2, etc. for multi-GPU systems)
+    device_type: str = "cuda"  # "cuda" or "cpu" (CPU nodes need compute_type=int8)
     language: str | None = None  # Default language (None = auto-detect, slower)
 
     @property
     def device_str(self) -> str:
-        """CUDA device string (e.g., 'cuda:0', 'cuda:1')."""
+        """Torch device string (e.g., 'cuda:0', 'cuda:1', 'cpu')."""
+        if self.device_type == "cpu":
+            return "cpu"
         return f"cuda:{self.device}"
 
     # HuggingFace (for diarization)
     hf_token: str | None = None
+    diarize_speech_only: bool = True  # Diarize only VAD speech regions (silence cut out)
+    speaker_match_threshold: float = 0.6  # Min cosine similarity to name an enrolled speaker
 
     # Storage
     data_dir: Path = Path("./data")
 
+    # Validate transcript responses with pydantic (off: trusted DB rows are encoded directly)
+    validate_responses: bool = False
+
     # Upload limits
     max_upload_size_mb: int = 2048  # 2GB default
 
+    # Result cache (identical audio + options answered without re-running the pipeline)
+    result_cache: bool = True
+    result_cache_max_mb: int = 1024
+
+    # Decoded audio cache (16 kHz float32 .npy files, memory-mapped by every stage)
+    pcm_cache: bool = True
+    pcm_cache_max_mb: int = 8192
+
+    # Diarization intermediates per job (segmentation + embeddings, for re-clustering)
+    diarization_cache: bool = True
+    diarization_cache_max_mb: int = 2048
+
+    # Stage checkpoints (ASR, alignment, diarization output): retried jobs resume after them
+    checkpoints: bool = True
+    checkpoint_max_mb: int = 4096
+    checkpoint_retention_hours: float = 24.0  # Checkpoints of jobs that never completed
+
+    # Export renditions (srt/vtt/tsv/txt/json/words rendered once, plus gzip/br variants)
+    rendition_cache: bool = True
+    rendition_cache_max_mb: int = 1024
+
+    # Job execution
+    embedded_worker: bool = True  # Run jobs in the API process (False = murmurai worker only)
+    worker_processes: int = 1  # Forked workers per `murmurai worker` (CPU only when > 1)
+    worker_threads: int | None = None  # CPU threads per worker (None = cores / processes)
+    worker_poll_interval: float = 1.0  # Seconds between queue polls when idle
+    max_job_attempts: int = 3  # Claims per job before a crashing input is marked as error
+    coordinator_url: str | None = None  # Remote worker: lease jobs from this API over HTTP
+    lease_seconds: int = 60  # Remote job lease; renewed by heartbeats every third of it
+
+    # Webhooks: persistent outbox, delivered by the API process with retries (see ``webhooks``)
+    webhook_secret: str | None = None  # Signs each delivery with HMAC-SHA256 when set
+    webhook_timeout: float = 30.0  # Seconds per delivery attempt
+    webhook_gzip: bool = False  # Gzip full-transcript payloads (Content-Encoding: gzip)
+    webhook_max_attempts: int = 8  # Attempts before a delivery is marked failed
+    webhook_retry_base_seconds: float = 10.0  # Backoff before the 2nd attempt, doubled after
+    webhook_retry_max_seconds: float = 3600.0  # Backoff cap
+    webhook_concurrency: int = 32  # Deliveries in flight per API process
+    webhook_host_concurrency: int = 4  # Deliveries in flight per receiving host
+    webhook_poll_interval: float = 1.0  # Seconds between outbox polls when idle
+
+    # Staged pipeline in `murmurai worker`: decode ahead on CPU, keep the GPU stage fed
+    pipeline_depth: int = 2  # Decoded jobs buffered ahead of the GPU stage (0 = serial jobs)
+    pipeline_decode_workers: int = 2  # Threads claiming and decoding upcoming jobs
+    pipeline_post_workers: int = 1  # Threads formatting results and writing them to the DB
+
+    # Long recordings: processed in windows cut at VAD pauses (RAM/VRAM bounded by one window)
+    window_seconds: int = 1800  # Audio longer than this is processed in windows (0 = never)
+    window_search_seconds: int = 60  # Span before each window end searched for a pause
+    window_speaker_distance: float = 0.7  # Max cosine distance matching speakers across windows
+
+    # Sharding: ASR of one long file split at pauses across model replicas, run in parallel
+    shard_replicas: int = 1  # Model replicas per worker (1 = no sharding)
+    shard_devices: list[int] = []  # Device index of each replica (default: device, device + 1, ...)
+    shard_min_seconds: int = 600  # Only audio longer than this is sharded
+
     # Pre-loading
     preload_languages: list[str] = []
 
@@ -99,12 +163,30 @@ class Settings(BaseSettings):
     # Logging
     log_format: str = "text"  # "text" (human-readable) or "json" (structured)
     log_level: str = "INFO"  # DEBUG, INFO, WARNING, ERROR
+    log_queue_size: int = 10_000  # Records buffered for the log writer thread (0 = synchronous)
+
+    # Prometheus metrics (GET /metrics, summed over the processes sharing data_dir)
+    metrics: bool = True
+    metrics_flush_interval: float = 10.0  # Seconds between writes of each process's metrics
+
+    # Tracing (OTLP/JSON spans written to data_dir/traces, see tracing.py)
+    tracing: bool = False
+    trace_flush_interval: float = 5.0  # Seconds between span exports of each process
+    trace_file_max_mb: int = 100  # Rotate a process's trace file at this size (0 = no files)
+    trace_otlp_endpoint: str | None = (
+        None  # Also POST spans here (e.g. http://collector:4318/v1/traces)
+    )
 
     @property
     def db_path(self) -> Path:
         """SQLite database path."""
         return self.data_dir / "transcripts.db"
 
+    @property
+    def audio_dir(self) -> Path:
+        """Directory holding queued audio until a worker consumes it."""
+        return self.data_dir / "audio"
+
     @property
     def max_upload_bytes(self) -> int:
         """Maximum upload size in bytes."""
@@ -1,12 +1,32 @@
 """SQLite database for transcript persistence."""
 
 import json
-from typing import Any
+from collections.abc import Callable, Coroutine, Iterable
+from functools import partial, wraps
+from typing import Any, ParamSpec, TypeVar
 
 import aiosqlite
+import orjson
 
+from murmurai_server import metrics
+from murmurai_server.columnar import TranscriptColumns
 from murmurai_server.config import get_settings
 
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+def _timed(fn: Callable[P, Coroutine[Any, Any, R]]) -> Callable[P, Coroutine[Any, Any, R]]:
+    """Record each call's latency in ``murmurai_db_query_duration_seconds`` (and a span)."""
+    query = fn.__name__
+
+    @wraps(fn)
+    async def timed(*args: P.args, **kwargs: P.kwargs) -> R:
+        with metrics.timer("murmurai_db_query_duration_seconds", query=query):
+            return await fn(*args, **kwargs)
+
+    return timed
+
 
 async def init_db() -> None:
     """Initialize SQLite database and create tables."""
@@ -31,6 +51,22 @@ async def init_db() -> None:
                 progress REAL DEFAULT 0.0,
                 webhook_url TEXT,
                 webhook_auth_header TEXT,
+                webhook_payload TEXT,
+                timings TEXT,
+                trace_context TEXT,
+                options TEXT,
+                audio_path TEXT,
+                worker_id TEXT,
+                started_at TIMESTAMP,
+                attempts INTEGER DEFAULT 0,
+                lease_expires_at TIMESTAMP,
+                audio_sha256 TEXT,
+                cache_key TEXT,
+                attached_to TEXT,
+                result_columns TEXT,
+                speech_regions TEXT,
+                speaker_embeddings TEXT,
+                speaker_identities TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 completed_at TIMESTAMP
             )
@@ -48,9 +84,91 @@ async def init_db() -> None:
             await db.execute("ALTER TABLE transcripts ADD COLUMN webhook_auth_header TEXT")
         except Exception:
             pass
+        # Job queue columns (consumed by murmurai worker)
+        for column in (
+            "options TEXT",
+            "audio_path TEXT",
+            "worker_id TEXT",
+            "started_at TIMESTAMP",
+            "attempts INTEGER DEFAULT 0",
+            "lease_expires_at TIMESTAMP",
+            "audio_sha256 TEXT",
+            "cache_key TEXT",
+            "attached_to TEXT",
+            "result_columns TEXT",
+            "speech_regions TEXT",
+            "speaker_embeddings TEXT",
+            "speaker_identities TEXT",
+            "webhook_payload TEXT",
+            "timings TEXT",
+            "trace_context TEXT",
+        ):
+            try:
+                await db.execute(f"ALTER TABLE transcripts ADD COLUMN {column}")
+            except Exception:
+                pass
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_transcripts_queue ON transcripts (status, created_at)"
+        )
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_transcripts_cache_key ON transcripts (cache_key)"
+        )
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_transcripts_attached_to ON transcripts (attached_to)"
+        )
+
+        # Webhook outbox (see ``webhooks``): one row per notification, one per attempt
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS webhook_deliveries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                transcript_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                host TEXT NOT NULL,
+                auth_header TEXT,
+                payload TEXT NOT NULL DEFAULT 'full',
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                delivered_at TIMESTAMP
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS webhook_attempts (
+                delivery_id INTEGER NOT NULL,
+                attempt INTEGER NOT NULL,
+                attempted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                status_code INTEGER,
+                error TEXT,
+                duration_ms INTEGER,
+                bytes_sent INTEGER
+            )
+        """)
+        for table, column in (
+            ("webhook_deliveries", "payload TEXT NOT NULL DEFAULT 'full'"),
+            ("webhook_attempts", "bytes_sent INTEGER"),
+        ):
+            try:
+                await db.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+            except Exception:
+                pass
+        await db.execute(
+            """CREATE INDEX IF NOT EXISTS idx_webhook_deliveries_due
+               ON webhook_deliveries (status, next_attempt_at)"""
+        )
+        await db.execute(
+            """CREATE INDEX IF NOT EXISTS idx_webhook_deliveries_transcript
+               ON webhook_deliveries (transcript_id)"""
+        )
+        await db.execute(
+            """CREATE INDEX IF NOT EXISTS idx_webhook_attempts_delivery
+               ON webhook_attempts (delivery_id)"""
+        )
         await db.commit()
 
 
+@_timed
 async def create_transcript(
     id: str,
     audio_url: str | None,
@@ -59,15 +177,31 @@ async def create_transcript(
     speakers_expected: int | None,
     webhook_url: str | None = None,
     webhook_auth_header: str | None = None,
+    webhook_payload: str | None = None,
+    timings: dict[str, Any] | None = None,
+    trace_context: dict[str, str] | None = None,
+    options: dict[str, Any] | None = None,
+    audio_path: str | None = None,
+    audio_sha256: str | None = None,
+    cache_key: str | None = None,
+    attached_to: str | None = None,
 ) -> dict[str, Any]:
-    """Create a new transcript record."""
+    """Create a new transcript record.
+
+    Records created with ``options`` and ``audio_path`` are runnable jobs that
+    any worker can claim with ``claim_next_transcript``. Records created with
+    ``attached_to`` are never claimed; they receive the result of that job
+    (see ``resolve_attached_transcripts``).
+    """
     settings = get_settings()
 
     async with aiosqlite.connect(settings.db_path) as db:
         await db.execute(
             """INSERT INTO transcripts
-               (id, audio_url, language_code, speaker_labels, speakers_expected, webhook_url, webhook_auth_header)
-               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+               (id, audio_url, language_code, speaker_labels, speakers_expected, webhook_url,
+                webhook_auth_header, webhook_payload, timings, trace_context, options,
+                audio_path, audio_sha256, cache_key, attached_to)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
             (
                 id,
                 audio_url,
@@ -76,6 +210,14 @@ async def create_transcript(
                 speakers_expected,
                 webhook_url,
                 webhook_auth_header,
+                webhook_payload,
+                orjson.dumps(timings).decode() if timings is not None else None,
+                json.dumps(trace_context) if trace_context is not None else None,
+                json.dumps(options) if options is not None else None,
+                audio_path,
+                audio_sha256,
+                cache_key,
+                attached_to,
             ),
         )
         await db.commit()
@@ -89,8 +231,9 @@ async def create_transcript(
     }
 
 
-async def get_transcript(id: str) -> dict[str, Any] | None:
-    """Get a transcript by ID."""
+@_timed
+async def get_transcript(id: str, timings: bool = False) -> dict[str, Any] | None:
+    """Get a transcript by ID (with its per-stage ``timings`` only if asked for)."""
     settings = get_settings()
 
     async with aiosqlite.connect(settings.db_path) as db:
@@ -104,10 +247,37 @@ async def get_transcript(id: str) -> dict[str, Any] | None:
         result = dict(row)
 
         # Parse JSON fields
-        if result.get("words"):
-            result["words"] = json.loads(result["words"])
-        if result.get("utterances"):
-            result["utterances"] = json.loads(result["utterances"])
+        if result.get("result_columns"):
+            columns = TranscriptColumns.from_dict(orjson.loads(result["result_columns"]))
+            result["words"] = columns.words()
+            result["utterances"] = columns.utterances(result["words"])
+        else:
+            # Transcripts stored before columnar results
+            if result.get("words"):
+                result["words"] = orjson.loads(result["words"])
+            if result.get("utterances"):
+                result["utterances"] = orjson.loads(result["utterances"])
+        result.pop("result_columns", None)
+        if result.get("options"):
+            result["options"] = json.loads(result["options"])
+        for field in ("speaker_embeddings", "speaker_identities"):
+            if result.get(field):
+                result[field] = orjson.loads(result[field])
+        # Embeddings are always stored (for enrollment) but only returned on request
+        if not (result.get("options") or {}).get("return_speaker_embeddings"):
+            result.pop("speaker_embeddings", None)
+        if timings and result.get("timings"):
+            result["timings"] = orjson.loads(result["timings"])
+        else:
+            result.pop("timings", None)
+
+        # Worker bookkeeping is not part of the transcript
+        result.pop("audio_path", None)
+        result.pop("worker_id", None)
+        result.pop("lease_expires_at", None)
+        result.pop("cache_key", None)
+        result.pop("speech_regions", None)
+        result.pop("trace_context", None)
 
         # Convert boolean
         result["speaker_labels"] = bool(result.get("speaker_labels", 0))
@@ -115,15 +285,150 @@ async def get_transcript(id: str) -> dict[str, Any] | None:
         return result
 
 
+@_timed
+async def get_transcript_export(id: str) -> dict[str, Any] | None:
+    """Get what the text/subtitle exports need: status, text and the stored columns.
+
+    ``columns`` is a zero-argument callable returning the ``TranscriptColumns``.
+    The stored JSON is only parsed when it is called (in the response's
+    thread), and word dicts are never built.
+    """
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        cursor = await db.execute(
+            "SELECT status, text, language_code, utterances, result_columns "
+            "FROM transcripts WHERE id = ?",
+            (id,),
+        )
+        row = await cursor.fetchone()
+
+    if not row:
+        return None
+    status, text, language_code, utterances, result_columns = row
+    return {
+        "status": status,
+        "text": text,
+        "language_code": language_code,
+        "columns": partial(_load_columns, utterances, result_columns),
+    }
+
+
+@_timed
+async def get_transcript_source(id: str) -> dict[str, Any] | None:
+    """Get what re-running one stage needs: status, language, options, audio digest, columns."""
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        cursor = await db.execute(
+            "SELECT status, language_code, options, audio_sha256, utterances, result_columns "
+            "FROM transcripts WHERE id = ?",
+            (id,),
+        )
+        row = await cursor.fetchone()
+
+    if not row:
+        return None
+    status, language_code, options, audio_sha256, utterances, result_columns = row
+    return {
+        "status": status,
+        "language_code": language_code,
+        "options": json.loads(options) if options else {},
+        "audio_sha256": audio_sha256,
+        "columns": _load_columns(utterances, result_columns),
+    }
+
+
+@_timed
+async def get_transcript_version(id: str) -> dict[str, Any] | None:
+    """Get ``status``, ``completed_at`` and ``options`` only (cheap lookup for exports)."""
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        cursor = await db.execute(
+            "SELECT status, completed_at, options FROM transcripts WHERE id = ?", (id,)
+        )
+        row = await cursor.fetchone()
+
+    if not row:
+        return None
+    return {
+        "status": row[0],
+        "completed_at": row[1],
+        "options": json.loads(row[2]) if row[2] else {},
+    }
+
+
+@_timed
+async def get_transcript_summary(id: str) -> dict[str, Any] | None:
+    """Get a transcript's status and metadata, without text, words or utterances."""
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            """SELECT id, status, audio_url, language_code, confidence, audio_duration, error,
+                      completed_at
+               FROM transcripts WHERE id = ?""",
+            (id,),
+        )
+        row = await cursor.fetchone()
+        return dict(row) if row else None
+
+
+@_timed
+async def get_speech_regions(id: str) -> list[tuple[float, float]] | None:
+    """Get the VAD speech regions stored with a job (None if not recorded)."""
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        cursor = await db.execute("SELECT speech_regions FROM transcripts WHERE id = ?", (id,))
+        row = await cursor.fetchone()
+
+    if not row or not row[0]:
+        return None
+    return [(start, end) for start, end in orjson.loads(row[0])]
+
+
+@_timed
+async def get_speaker_embeddings(id: str) -> dict[str, str] | None:
+    """Get the base64 embedding per speaker label of a transcript (None if it does not exist)."""
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        cursor = await db.execute("SELECT speaker_embeddings FROM transcripts WHERE id = ?", (id,))
+        row = await cursor.fetchone()
+
+    if not row:
+        return None
+    return orjson.loads(row[0]) if row[0] else {}
+
+
+def _load_columns(utterances: str | None, result_columns: str | None) -> TranscriptColumns:
+    if result_columns:
+        return TranscriptColumns.from_dict(orjson.loads(result_columns))
+    # Transcripts stored before columnar results
+    return TranscriptColumns.from_utterances(orjson.loads(utterances) if utterances else [])
+
+
+@_timed
 async def update_transcript(id: str, **kwargs: Any) -> None:
     """Update transcript fields."""
     settings = get_settings()
 
-    # Serialize JSON fields
-    if "words" in kwargs and kwargs["words"] is not None:
-        kwargs["words"] = json.dumps(kwargs["words"])
-    if "utterances" in kwargs and kwargs["utterances"] is not None:
-        kwargs["utterances"] = json.dumps(kwargs["utterances"])
+    # Serialize JSON fields (orjson: transcripts can hold 100k+ words)
+    for field in (
+        "options",
+        "words",
+        "utterances",
+        "result_columns",
+        "speech_regions",
+        "speaker_embeddings",
+        "speaker_identities",
+        "timings",
+    ):
+        if kwargs.get(field) is not None:
+            kwargs[field] = orjson.dumps(kwargs[field]).decode()
 
     # Handle completed_at timestamp
     if kwargs.get("status") == "completed":
@@ -135,6 +440,11 @@ async def update_transcript(id: str, **kwargs: Any) -> None:
     for key, value in kwargs.items():
         if key == "completed_at" and value == "datetime('now')":
             set_parts.append(f"{key} = datetime('now')")
+        elif key == "timings":
+            # Merged, so the worker's stages join the API's download/upload time
+            if value is not None:
+                set_parts.append("timings = json_patch(COALESCE(timings, '{}'), ?)")
+                values.append(value)
         else:
             set_parts.append(f"{key} = ?")
             values.append(value)
@@ -147,6 +457,282 @@ async def update_transcript(id: str, **kwargs: Any) -> None:
         await db.commit()
 
 
+@_timed
+async def claim_transcript(id: str, worker_id: str) -> bool:
+    """Move a queued transcript to processing. Returns True if this caller claimed it."""
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        cursor = await db.execute(
+            """UPDATE transcripts
+               SET status = 'processing', worker_id = ?, started_at = datetime('now'),
+                   attempts = attempts + 1
+               WHERE id = ? AND status = 'queued'
+               RETURNING attempts, (julianday('now') - julianday(created_at)) * 86400""",
+            (worker_id, id),
+        )
+        row = await cursor.fetchone()
+        await db.commit()
+
+    if not row:
+        return False
+    if row[0] == 1:
+        metrics.observe("murmurai_queue_wait_seconds", row[1])
+    return True
+
+
+@_timed
+async def claim_next_transcript(
+    worker_id: str, lease_seconds: float | None = None, count_attempt: bool = True
+) -> dict[str, Any] | None:
+    """Claim the oldest queued job for a worker.
+
+    The claim is a single UPDATE ... RETURNING statement, so concurrent workers
+    (threads or processes sharing the SQLite file) never receive the same job.
+
+    Args:
+        worker_id: Identifier of the claiming worker.
+        lease_seconds: For remote workers, how long the claim stays valid
+            without a heartbeat (see ``renew_lease``). None = no expiry.
+        count_attempt: False when the job is claimed ahead of running it
+            (pipeline prefetch); ``start_attempt`` then counts it once it
+            starts, so a crash never uses up attempts of jobs still waiting.
+
+    Returns:
+        Job dict with id, audio_url, audio_path, options, attempts, cache_key
+        and webhook fields, or None if the queue is empty.
+    """
+    settings = get_settings()
+    lease = f"+{lease_seconds} seconds" if lease_seconds is not None else None
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            """UPDATE transcripts
+               SET status = 'processing', worker_id = ?, started_at = datetime('now'),
+                   attempts = attempts + ?, lease_expires_at = datetime('now', ?)
+               WHERE id = (
+                   SELECT id FROM transcripts
+                   WHERE status = 'queued' AND audio_path IS NOT NULL AND attached_to IS NULL
+                     AND options IS NOT NULL
+                   ORDER BY created_at, rowid
+                   LIMIT 1
+               ) AND status = 'queued'
+               RETURNING id, audio_url, audio_path, audio_sha256, options, attempts, cache_key,
+                         webhook_url, webhook_auth_header, webhook_payload, trace_context,
+                         (julianday('now') - julianday(created_at)) * 86400 AS queued_seconds""",
+            (worker_id, int(count_attempt), lease),
+        )
+        row = await cursor.fetchone()
+        await db.commit()
+
+    if not row:
+        return None
+
+    job = dict(row)
+    queued_seconds = job.pop("queued_seconds")
+    if job["attempts"] == int(count_attempt):
+        # Retries count from the original submission, so only first claims are recorded
+        metrics.observe("murmurai_queue_wait_seconds", queued_seconds)
+    job["options"] = json.loads(job["options"])
+    if job["trace_context"]:
+        job["trace_context"] = json.loads(job["trace_context"])
+    return job
+
+
+@_timed
+async def start_attempt(id: str, worker_id: str) -> int | None:
+    """Count an attempt on a job claimed with ``count_attempt=False``.
+
+    Returns:
+        The job's attempts so far, or None if ``worker_id`` no longer holds it.
+    """
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        cursor = await db.execute(
+            """UPDATE transcripts SET attempts = attempts + 1
+               WHERE id = ? AND worker_id = ? AND status = 'processing'
+               RETURNING attempts""",
+            (id, worker_id),
+        )
+        row = await cursor.fetchone()
+        await db.commit()
+        return row[0] if row else None
+
+
+@_timed
+async def get_job(id: str) -> dict[str, Any] | None:
+    """Get the queue view of a transcript (status, owner, audio and webhook fields)."""
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            """SELECT id, status, worker_id, audio_path, attempts, lease_expires_at,
+                      cache_key, webhook_url, webhook_auth_header, webhook_payload
+               FROM transcripts WHERE id = ?""",
+            (id,),
+        )
+        row = await cursor.fetchone()
+        return dict(row) if row else None
+
+
+@_timed
+async def renew_lease(id: str, worker_id: str, lease_seconds: float) -> bool:
+    """Extend a remote worker's lease. Returns False if the worker no longer holds the job."""
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        cursor = await db.execute(
+            """UPDATE transcripts SET lease_expires_at = datetime('now', ?)
+               WHERE id = ? AND worker_id = ? AND status = 'processing'""",
+            (f"+{lease_seconds} seconds", id, worker_id),
+        )
+        await db.commit()
+        return cursor.rowcount > 0
+
+
+async def _requeue(
+    db: aiosqlite.Connection, where: str, params: tuple, max_attempts: int
+) -> tuple[int, list[dict[str, Any]]]:
+    """Requeue processing jobs matching ``where``; exhausted ones become errors."""
+    db.row_factory = aiosqlite.Row
+    cursor = await db.execute(
+        f"""UPDATE transcripts
+            SET status = 'error', error = 'Worker lost while processing (retries exhausted)',
+                worker_id = NULL, lease_expires_at = NULL, progress = 0.0
+            WHERE status = 'processing' AND {where} AND attempts >= ?
+            RETURNING id, audio_path, webhook_url, webhook_auth_header, webhook_payload""",
+        (*params, max_attempts),
+    )
+    failed = [dict(row) for row in await cursor.fetchall()]
+    cursor = await db.execute(
+        f"""UPDATE transcripts
+            SET status = 'queued', worker_id = NULL, lease_expires_at = NULL, progress = 0.0
+            WHERE status = 'processing' AND {where}""",
+        params,
+    )
+    requeued = cursor.rowcount
+    await db.commit()
+    for job in failed[:]:
+        failed += await _resolve_attached(db, job["id"])
+    return requeued, failed
+
+
+@_timed
+async def requeue_worker_jobs(
+    worker_id: str, max_attempts: int
+) -> tuple[int, list[dict[str, Any]]]:
+    """Return jobs held by a dead worker to the queue.
+
+    Jobs that already used ``max_attempts`` claims are marked as errors
+    instead, so an input that reliably crashes workers cannot loop forever.
+
+    Returns:
+        Number of jobs put back in the queue, and the transcripts that failed:
+        the exhausted jobs (with their ``audio_path``) and the transcripts
+        attached to them, with their webhook fields so the caller can notify
+        them (see ``worker.finish_lost_jobs``).
+    """
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        return await _requeue(db, "worker_id = ?", (worker_id,), max_attempts)
+
+
+@_timed
+async def reclaim_expired_leases(max_attempts: int) -> tuple[int, list[dict[str, Any]]]:
+    """Return jobs whose remote worker stopped sending heartbeats to the queue.
+
+    Returns:
+        Number of jobs put back in the queue, and the transcripts that failed
+        (as for ``requeue_worker_jobs``).
+    """
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        return await _requeue(db, "lease_expires_at < datetime('now')", (), max_attempts)
+
+
+@_timed
+async def get_queue_stats() -> dict[str, Any]:
+    """Number of queued and processing jobs, and the age of the oldest queued one."""
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        cursor = await db.execute(
+            """SELECT status, COUNT(*), MAX(julianday('now') - julianday(created_at)) * 86400
+               FROM transcripts
+               WHERE status IN ('queued', 'processing') AND attached_to IS NULL
+               GROUP BY status"""
+        )
+        rows = await cursor.fetchall()
+
+    stats: dict[str, Any] = {"queued": 0, "processing": 0, "oldest_queued_seconds": 0.0}
+    for status, count, oldest in rows:
+        stats[status] = count
+        if status == "queued":
+            stats["oldest_queued_seconds"] = oldest
+    return stats
+
+
+@_timed
+async def find_inflight_transcript(cache_key: str) -> str | None:
+    """Find a queued or processing job for the same audio and options."""
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        cursor = await db.execute(
+            """SELECT id FROM transcripts
+               WHERE cache_key = ? AND status IN ('queued', 'processing') AND attached_to IS NULL
+               ORDER BY created_at LIMIT 1""",
+            (cache_key,),
+        )
+        row = await cursor.fetchone()
+        return row[0] if row else None
+
+
+async def _resolve_attached(db: aiosqlite.Connection, id: str) -> list[dict[str, Any]]:
+    """Copy a finished job's outcome to the pending transcripts attached to it."""
+    db.row_factory = aiosqlite.Row
+    cursor = await db.execute(
+        """UPDATE transcripts
+           SET (status, text, words, utterances, result_columns, speech_regions,
+                speaker_embeddings, speaker_identities, confidence, audio_duration,
+                language_code, error, progress, completed_at) = (
+               SELECT status, text, words, utterances, result_columns, speech_regions,
+                      speaker_embeddings, speaker_identities, confidence, audio_duration,
+                      language_code, error, progress, completed_at
+               FROM transcripts WHERE id = ?
+           )
+           WHERE attached_to = ? AND status IN ('queued', 'processing')
+             AND (SELECT status FROM transcripts WHERE id = ?) IN ('completed', 'error')
+           RETURNING id, webhook_url, webhook_auth_header, webhook_payload""",
+        (id, id, id),
+    )
+    attached = [dict(row) for row in await cursor.fetchall()]
+    await db.commit()
+    return attached
+
+
+@_timed
+async def resolve_attached_transcripts(id: str) -> list[dict[str, Any]]:
+    """Finish transcripts that attached to job ``id`` with its result or error.
+
+    Does nothing while job ``id`` is still queued or processing.
+
+    Returns:
+        The resolved transcripts (id and webhook fields) so the caller can
+        notify them.
+    """
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        return await _resolve_attached(db, id)
+
+
+@_timed
 async def list_transcripts(
     limit: int = 100,
     offset: int = 0,
@@ -188,11 +774,148 @@ async def list_transcripts(
         return [dict(row) for row in rows], total
 
 
+@_timed
 async def delete_transcript(id: str) -> bool:
-    """Delete a transcript by ID. Returns True if deleted."""
+    """Delete a transcript (and its webhook deliveries) by ID. Returns True if deleted."""
     settings = get_settings()
 
     async with aiosqlite.connect(settings.db_path) as db:
         cursor = await db.execute("DELETE FROM transcripts WHERE id = ?", (id,))
+        await db.execute(
+            """DELETE FROM webhook_attempts WHERE delivery_id IN (
+                   SELECT id FROM webhook_deliveries WHERE transcript_id = ?
+               )""",
+            (id,),
+        )
+        await db.execute("DELETE FROM webhook_deliveries WHERE transcript_id = ?", (id,))
+        # Transcripts waiting on this job would otherwise never finish
+        await db.execute(
+            """UPDATE transcripts SET status = 'error', error = 'Original job was deleted'
+               WHERE attached_to = ? AND status IN ('queued', 'processing')""",
+            (id,),
+        )
         await db.commit()
         return cursor.rowcount > 0
+
+
+@_timed
+async def queue_webhook_deliveries(deliveries: list[dict[str, Any]]) -> None:
+    """Add notifications (transcript_id, url, host, auth_header, payload) to the webhook outbox."""
+    if not deliveries:
+        return
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        await db.executemany(
+            """INSERT INTO webhook_deliveries (transcript_id, url, host, auth_header, payload)
+               VALUES (:transcript_id, :url, :host, :auth_header, :payload)""",
+            deliveries,
+        )
+        await db.commit()
+
+
+@_timed
+async def claim_webhook_delivery(
+    lease_seconds: float, exclude_hosts: Iterable[str] = ()
+) -> dict[str, Any] | None:
+    """Claim the most overdue pending webhook delivery.
+
+    The claim moves ``next_attempt_at`` past the attempt's lease, so other
+    processes polling the outbox skip it while it is in flight (and retry it
+    if this process dies before recording the attempt).
+
+    Args:
+        lease_seconds: How long the claim holds.
+        exclude_hosts: Hosts not to claim for (their concurrency cap is reached).
+
+    Returns:
+        Delivery dict with id, transcript_id, url, host, auth_header, payload
+        and attempts, or None if nothing is due.
+    """
+    settings = get_settings()
+    hosts = list(exclude_hosts)
+    placeholders = ", ".join("?" * len(hosts))
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            f"""UPDATE webhook_deliveries SET next_attempt_at = datetime('now', ?)
+                WHERE id = (
+                    SELECT id FROM webhook_deliveries
+                    WHERE status = 'pending' AND next_attempt_at <= datetime('now')
+                      AND host NOT IN ({placeholders})
+                    ORDER BY next_attempt_at, id
+                    LIMIT 1
+                ) AND status = 'pending'
+                RETURNING id, transcript_id, url, host, auth_header, payload, attempts""",
+            (f"+{lease_seconds} seconds", *hosts),
+        )
+        row = await cursor.fetchone()
+        await db.commit()
+        return dict(row) if row else None
+
+
+@_timed
+async def record_webhook_attempt(
+    delivery_id: int,
+    attempt: int,
+    status: str,
+    status_code: int | None = None,
+    error: str | None = None,
+    duration_ms: int | None = None,
+    bytes_sent: int | None = None,
+    retry_in: float | None = None,
+) -> None:
+    """Record one delivery attempt and the delivery's new state.
+
+    Args:
+        status: ``delivered``, ``failed`` (no more retries) or ``pending``.
+        bytes_sent: Size of the request body on the wire (after compression).
+        retry_in: Seconds until the next attempt of a ``pending`` delivery.
+    """
+    settings = get_settings()
+    next_attempt = f"+{retry_in} seconds" if status == "pending" else None
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        await db.execute(
+            """INSERT INTO webhook_attempts
+               (delivery_id, attempt, status_code, error, duration_ms, bytes_sent)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (delivery_id, attempt, status_code, error, duration_ms, bytes_sent),
+        )
+        await db.execute(
+            """UPDATE webhook_deliveries
+               SET status = ?, attempts = ?, last_error = ?,
+                   next_attempt_at = datetime('now', ?),
+                   delivered_at = CASE WHEN ? = 'delivered' THEN datetime('now') END
+               WHERE id = ?""",
+            (status, attempt, error, next_attempt, status, delivery_id),
+        )
+        await db.commit()
+
+
+@_timed
+async def get_webhook_deliveries(transcript_id: str) -> list[dict[str, Any]]:
+    """A transcript's webhook deliveries, oldest first, each with its ``history`` of attempts."""
+    settings = get_settings()
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            """SELECT id, url, payload, status, attempts, next_attempt_at, last_error,
+                      created_at, delivered_at
+               FROM webhook_deliveries WHERE transcript_id = ? ORDER BY id""",
+            (transcript_id,),
+        )
+        deliveries = {row["id"]: {**dict(row), "history": []} for row in await cursor.fetchall()}
+        cursor = await db.execute(
+            """SELECT a.delivery_id, a.attempt, a.attempted_at, a.status_code, a.error,
+                      a.duration_ms, a.bytes_sent
+               FROM webhook_attempts a JOIN webhook_deliveries d ON d.id = a.delivery_id
+               WHERE d.transcript_id = ? ORDER BY a.delivery_id, a.attempt""",
+            (transcript_id,),
+        )
+        for row in await cursor.fetchall():
+            attempt = dict(row)
+            deliveries[attempt.pop("delivery_id")]["history"].append(attempt)
+    return list(deliveries.values())
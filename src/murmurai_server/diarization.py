@@ -0,0 +1,116 @@
+"""Diarization intermediates, for re-clustering with other speaker counts.
+
+The pyannote pipeline segments the audio into local speakers per chunk,
+extracts one embedding per (chunk, local speaker) and only then clusters
+them into speakers, which is the only step that depends on
+``min_speakers``/``max_speakers``. ``ArtifactHook`` captures the
+segmentation and the embeddings while a job is diarized, and the diarization
+cache keeps them per job (see ``cache.put_diarization``). ``recluster`` runs
+the remaining steps of ``SpeakerDiarization.apply`` on them with new speaker
+counts, so ``POST /v1/transcript/{id}/diarize`` skips both neural models.
+"""
+
+from typing import Any
+
+import numpy as np
+from pyannote.audio.pipelines.utils.diarization import set_num_speakers
+from pyannote.audio.utils.signal import binarize
+from pyannote.core import SlidingWindow, SlidingWindowFeature
+
+from murmurai_server.speech import Regions, expand_tracks
+
+
+class ArtifactHook:
+    """``hook`` for the pyannote pipeline keeping its segmentation and embeddings."""
+
+    def __init__(self) -> None:
+        self.segmentations: SlidingWindowFeature | None = None
+        self.embeddings: np.ndarray | None = None
+
+    def __call__(self, step: str, artifact: Any, file: Any = None, **progress: Any) -> None:
+        # Progress calls (with total/completed) carry partial results or None
+        if progress or artifact is None:
+            return
+        if step == "segmentation":
+            self.segmentations = artifact
+        elif step == "embeddings":
+            self.embeddings = artifact
+
+    def arrays(self, spans: Regions | None) -> dict[str, np.ndarray] | None:
+        """What ``recluster`` needs, as arrays (None if the pipeline stopped early)."""
+        if self.segmentations is None or self.embeddings is None:
+            return None
+        window = self.segmentations.sliding_window
+        arrays = {
+            "segmentations": np.asarray(self.segmentations.data, dtype=np.float32),
+            "window": np.array([window.start, window.duration, window.step]),
+            "embeddings": np.asarray(self.embeddings, dtype=np.float32),
+        }
+        if spans is not None:
+            arrays["spans"] = np.array(spans, dtype=np.float64).reshape(-1, 2)
+        return arrays
+
+
+def recluster(
+    pipeline: Any,
+    arrays: dict[str, np.ndarray],
+    min_speakers: int | None,
+    max_speakers: int | None,
+) -> tuple[list[tuple[float, float, str]], dict[str, Any]]:
+    """Cluster stored embeddings again: speaker turns and each label's embedding.
+
+    Mirrors ``SpeakerDiarization.apply`` (pyannote.audio 4) from the
+    binarization onwards. Turns are in recording time (expanded through the
+    stored speech ``spans`` when only speech was diarized).
+    """
+    num_speakers, min_speakers, max_speakers = set_num_speakers(
+        min_speakers=min_speakers, max_speakers=max_speakers
+    )
+
+    start, duration, step = arrays["window"].tolist()
+    segmentations = SlidingWindowFeature(
+        arrays["segmentations"], SlidingWindow(start=start, duration=duration, step=step)
+    )
+    embeddings = arrays["embeddings"]
+    model = pipeline._segmentation.model
+    if model.specifications.powerset:
+        binarized = segmentations
+    else:
+        binarized = binarize(
+            segmentations, onset=pipeline.segmentation.threshold, initial_state=False
+        )
+    count = pipeline.speaker_count(binarized, model.receptive_field, warm_up=(0.0, 0.0))
+
+    hard_clusters, _, centroids = pipeline.clustering(
+        embeddings=embeddings,
+        segmentations=binarized,
+        num_clusters=num_speakers,
+        min_clusters=min_speakers,
+        max_clusters=max_speakers,
+        file={"uri": "rediarize"},
+        frames=model.receptive_field,
+    )
+    count.data = np.minimum(count.data, max_speakers).astype(np.int8)
+    hard_clusters[np.sum(binarized.data, axis=1) == 0] = -2  # Inactive local speakers
+
+    discrete = pipeline.reconstruct(segmentations, hard_clusters, count)
+    annotation = pipeline.to_annotation(
+        discrete, min_duration_on=0.0, min_duration_off=pipeline.segmentation.min_duration_off
+    )
+
+    # Cluster indices -> SPEAKER_00, SPEAKER_01, ... in label order, like the pipeline
+    labels = annotation.labels()
+    mapping = dict(zip(labels, pipeline.classes(), strict=False))
+    tracks = [
+        (turn.start, turn.end, mapping[label])
+        for turn, _, label in annotation.itertracks(yield_label=True)
+    ]
+    if "spans" in arrays:
+        tracks = expand_tracks(tracks, [(s, e) for s, e in arrays["spans"].tolist()])
+
+    speaker_embeddings = {}
+    if centroids is not None:
+        for label in labels:
+            if label < len(centroids):
+                speaker_embeddings[mapping[label]] = centroids[label]
+    return tracks, speaker_embeddings
@@ -0,0 +1,268 @@
+"""Text and subtitle exports (SRT, WebVTT, TSV).
+
+Exports are generated from ``(start, end, speaker, text)`` rows and yielded
+in chunks of ``EXPORT_CHUNK_ROWS`` rows, so a long transcript is never held
+as one string while it is rendered. Rows are either the utterances as
+stored, or subtitle cues laid out from the word timings by
+``layout_cues`` (line width/count limits and per-word highlighting).
+"""
+
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from murmurai_server.columnar import TranscriptColumns
+
+EXPORT_CHUNK_ROWS = 500
+
+UtteranceRow = tuple[int, int, str | None, str]
+
+
+def _chunked(lines: Iterable[str], size: int = EXPORT_CHUNK_ROWS) -> Iterator[str]:
+    """Join lines into chunks of ``size`` lines."""
+    batch: list[str] = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def _rows(utterances: list[dict[str, Any]]) -> Iterator[UtteranceRow]:
+    for utterance in utterances:
+        yield utterance["start"], utterance["end"], utterance.get("speaker"), utterance["text"]
+
+
+def iter_srt(rows: Iterable[UtteranceRow]) -> Iterator[str]:
+    """Stream SRT subtitles (cues separated by a blank line)."""
+
+    def lines() -> Iterator[str]:
+        separator = ""
+        for i, (start, end, _speaker, text) in enumerate(rows, 1):
+            yield (
+                f"{separator}{i}\n"
+                f"{format_timestamp_srt(start)} --> {format_timestamp_srt(end)}\n{text}\n"
+            )
+            separator = "\n"
+
+    return _chunked(lines())
+
+
+def iter_vtt(rows: Iterable[UtteranceRow]) -> Iterator[str]:
+    """Stream WebVTT subtitles."""
+
+    def lines() -> Iterator[str]:
+        yield "WEBVTT\n"
+        for start, end, _speaker, text in rows:
+            yield f"\n{format_timestamp_vtt(start)} --> {format_timestamp_vtt(end)}\n{text}\n"
+
+    return _chunked(lines())
+
+
+def iter_tsv(rows: Iterable[UtteranceRow]) -> Iterator[str]:
+    """Stream TSV (header line, no trailing newline)."""
+
+    def lines() -> Iterator[str]:
+        yield "start\tend\tspeaker\ttext"  # Header
+        for start, end, speaker, text in rows:
+            # Escape tabs and newlines in text
+            text = text.replace("\t", " ").replace("\n", " ")
+            yield f"\n{start}\t{end}\t{speaker or ''}\t{text}"
+
+    return _chunked(lines())
+
+
+def generate_srt(utterances: list[dict[str, Any]]) -> str:
+    """Generate SRT subtitle format from utterances."""
+    return "".join(iter_srt(_rows(utterances)))
+
+
+def generate_vtt(utterances: list[dict[str, Any]]) -> str:
+    """Generate WebVTT subtitle format from utterances."""
+    return "".join(iter_vtt(_rows(utterances)))
+
+
+def format_timestamp_srt(ms: int) -> str:
+    """Format milliseconds as SRT timestamp (HH:MM:SS,mmm)."""
+    s, ms = divmod(ms, 1000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+
+def format_timestamp_vtt(ms: int) -> str:
+    """Format milliseconds as VTT timestamp (HH:MM:SS.mmm)."""
+    s, ms = divmod(ms, 1000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+
+def generate_tsv(utterances: list[dict[str, Any]]) -> str:
+    """Generate TSV format from utterances.
+
+    Format: start<tab>end<tab>speaker<tab>text
+    Times are in milliseconds.
+    """
+    return "".join(iter_tsv(_rows(utterances)))
+
+
+# Cue layout
+
+# A pause this long between two words always starts a new cue
+LONG_PAUSE_MS = 3000
+
+# Words are joined without spaces in these languages (as in murmurai_core)
+LANGUAGES_WITHOUT_SPACES = {"ja", "zh"}
+
+
+@dataclass(frozen=True)
+class SubtitleLayout:
+    """How subtitle cues are laid out (the export-only ``TranscribeOptions``).
+
+    Without ``max_line_width`` (and without highlighting) every utterance is
+    one cue, as stored. ``max_line_count`` only applies together with a width.
+    """
+
+    max_line_width: int | None = None
+    max_line_count: int | None = None
+    highlight_words: bool = False
+
+    @classmethod
+    def from_options(cls, options: dict[str, Any]) -> "SubtitleLayout":
+        return cls(
+            max_line_width=options.get("max_line_width"),
+            max_line_count=options.get("max_line_count"),
+            highlight_words=bool(options.get("highlight_words")),
+        )
+
+    @property
+    def is_default(self) -> bool:
+        return self.max_line_width is None and not self.highlight_words
+
+    def variant(self) -> str:
+        """Short name for caching renditions per layout ("" for the default)."""
+        if self.is_default:
+            return ""
+        width = self.max_line_width or 0
+        count = (self.max_line_count or 0) if self.max_line_width else 0
+        return f"w{width}c{count}{'h' if self.highlight_words else ''}"
+
+
+def layout_cues(
+    columns: TranscriptColumns, layout: SubtitleLayout, language: str | None = None
+) -> Iterator[UtteranceRow]:
+    """Lay out subtitle cues from word timings in a single pass over the words.
+
+    Words fill a line greedily up to ``max_line_width`` characters; a word
+    that does not fit opens a new line, or a new cue once the cue has
+    ``max_line_count`` lines. Cues never span utterances (so speakers are
+    never mixed) or pauses longer than ``LONG_PAUSE_MS``, and are timed from
+    their first word's start to their last word's end. Utterances without
+    word timings are emitted as a single cue.
+    """
+    width = layout.max_line_width or 0
+    max_lines = (layout.max_line_count or 0) if width else 0
+    joiner = "" if language in LANGUAGES_WITHOUT_SPACES else " "
+    spacing = len(joiner)
+
+    words = [text.strip() for text in columns.word_text]
+    starts = columns.word_start.tolist()
+    ends = columns.word_end.tolist()
+    offsets = columns.utterance_offsets.tolist()
+    speakers = [columns.speakers[i] if i >= 0 else None for i in columns.utterance_speaker.tolist()]
+
+    for u, (start, end, text) in enumerate(
+        zip(
+            columns.utterance_start.tolist(), columns.utterance_end.tolist(), columns.utterance_text
+        )
+    ):
+        speaker = speakers[u]
+        first, last = offsets[u], offsets[u + 1]
+        if first == last:
+            yield start, end, speaker, text
+            continue
+
+        lines: list[list[int]] = [[first]]
+        line_len = len(words[first])
+        for w in range(first + 1, last):
+            word_len = len(words[w])
+            if starts[w] - ends[w - 1] > LONG_PAUSE_MS:
+                yield from _cue_rows(lines, words, starts, ends, speaker, joiner, layout)
+                lines = [[w]]
+                line_len = word_len
+            elif width and line_len + spacing + word_len > width:
+                if max_lines and len(lines) >= max_lines:
+                    yield from _cue_rows(lines, words, starts, ends, speaker, joiner, layout)
+                    lines = [[w]]
+                else:
+                    lines.append([w])
+                line_len = word_len
+            else:
+                lines[-1].append(w)
+                line_len += spacing + word_len
+        yield from _cue_rows(lines, words, starts, ends, speaker, joiner, layout)
+
+
+def _cue_rows(
+    lines: list[list[int]],
+    words: list[str],
+    starts: list[int],
+    ends: list[int],
+    speaker: str | None,
+    joiner: str,
+    layout: SubtitleLayout,
+) -> Iterator[UtteranceRow]:
+    """One cue, or with highlighting one cue per word (plain cues fill the gaps)."""
+
+    def render(highlight: int = -1) -> str:
+        return "\n".join(
+            joiner.join(f"<u>{words[w]}</u>" if w == highlight else words[w] for w in line)
+            for line in lines
+        )
+
+    cue_start, cue_end = starts[lines[0][0]], ends[lines[-1][-1]]
+    if not layout.highlight_words:
+        yield cue_start, cue_end, speaker, render()
+        return
+
+    plain = render()
+    cursor = cue_start
+    for line in lines:
+        for w in line:
+            if starts[w] > cursor:
+                yield cursor, starts[w], speaker, plain
+            yield starts[w], ends[w], speaker, render(w)
+            cursor = max(cursor, ends[w])
+
+
+def subtitle_rows(
+    load_columns: Callable[[], TranscriptColumns],
+    layout: SubtitleLayout | None = None,
+    language: str | None = None,
+) -> Iterator[UtteranceRow]:
+    """Rows for an export: stored utterances, or cues for a non-default layout.
+
+    The columns are only loaded once iteration starts.
+    """
+    columns = load_columns()
+    if layout is None or layout.is_default:
+        yield from columns.utterance_rows()
+    else:
+        yield from layout_cues(columns, layout, language)
+
+
+# Media type per export format, and whether it is served as a download
+EXPORT_FORMATS: dict[str, tuple[str, bool]] = {
+    "srt": ("text/srt", False),
+    "vtt": ("text/vtt", False),
+    "txt": ("text/plain", False),
+    "tsv": ("text/tab-separated-values", True),
+    "json": ("application/json", True),
+    "words": ("application/json", False),
+}
+
+# Formats rendered from utterance rows
+ROW_RENDERERS = {"srt": iter_srt, "vtt": iter_vtt, "tsv": iter_tsv}
@@ -5,19 +5,51 @@ Supports two formats:
 - json: Structured JSON output (for production log aggregation)
 
 Set via MURMURAI_LOG_FORMAT=json environment variable.
+
+Logging calls only put the record on a bounded queue (``QueueHandler``);
+a listener thread formats and writes it, so a slow stdout (a log shipper
+falling behind) never blocks the event loop or a worker. When the queue
+is full, records are dropped and counted (``dropped_records``), and a
+warning with the count is logged once there is room again. Set
+``MURMURAI_LOG_QUEUE_SIZE=0`` to write synchronously instead.
 """
 
-import json
+import atexit
+import copy
 import logging
+import os
+import queue
 import sys
+import threading
+import time
 import uuid
 from contextvars import ContextVar
 from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any
 
+import orjson
+
 # Context variable for request correlation
 request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
 
+# Extra fields copied into JSON log lines
+_EXTRA_FIELDS = (
+    "duration_ms",
+    "audio_duration_ms",
+    "transcript_id",
+    "language",
+    "segments",
+    "words",
+    "timings",
+    "pipeline",
+)
+
+_listener: QueueListener | None = None
+_config: tuple[str, str, int] | None = None  # setup_logging arguments, for forked children
+_dropped_lock = threading.Lock()
+_dropped = 0
+
 
 def get_request_id() -> str | None:
     """Get the current request ID from context."""
@@ -32,41 +64,47 @@ def set_request_id(request_id: str | None = None) -> str:
     return request_id
 
 
+def _request_id(record: logging.LogRecord) -> str | None:
+    # Captured when the record was queued (formatting runs on the listener thread)
+    return record.__dict__.get("request_id") or get_request_id()
+
+
+def _exception(formatter: logging.Formatter, record: logging.LogRecord) -> str | None:
+    if record.exc_text:
+        return record.exc_text
+    if record.exc_info:
+        return formatter.formatException(record.exc_info)
+    return None
+
+
 class JSONFormatter(logging.Formatter):
     """JSON log formatter for structured logging."""
 
     def format(self, record: logging.LogRecord) -> str:
         log_data: dict[str, Any] = {
-            "timestamp": datetime.now(UTC).isoformat(),
+            "timestamp": datetime.fromtimestamp(record.created, UTC).isoformat(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
         }
 
         # Add request ID if available
-        request_id = get_request_id()
+        request_id = _request_id(record)
         if request_id:
             log_data["request_id"] = request_id
 
         # Add extra fields from record
-        if hasattr(record, "duration_ms"):
-            log_data["duration_ms"] = record.duration_ms
-        if hasattr(record, "audio_duration_ms"):
-            log_data["audio_duration_ms"] = record.audio_duration_ms
-        if hasattr(record, "transcript_id"):
-            log_data["transcript_id"] = record.transcript_id
-        if hasattr(record, "language"):
-            log_data["language"] = record.language
-        if hasattr(record, "segments"):
-            log_data["segments"] = record.segments
-        if hasattr(record, "words"):
-            log_data["words"] = record.words
+        fields = record.__dict__
+        for name in _EXTRA_FIELDS:
+            if name in fields:
+                log_data[name] = fields[name]
 
         # Add exception info if present
-        if record.exc_info:
-            log_data["exception"] = self.formatException(record.exc_info)
+        exception = _exception(self, record)
+        if exception:
+            log_data["exception"] = exception
 
-        return json.dumps(log_data)
+        return orjson.dumps(log_data, default=str).decode()
 
 
 class TextFormatter(logging.Formatter):
@@ -74,11 +112,11 @@ class TextFormatter(logging.Formatter):
 
     def format(self, record: logging.LogRecord) -> str:
         # Build prefix with request ID if available
-        request_id = get_request_id()
+        request_id = _request_id(record)
         prefix = f"[{request_id}] " if request_id else ""
 
         # Format: [murmurai] [request_id] message
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        timestamp = time.strftime("%H:%M:%S", time.localtime(record.created))
         base = f"[{timestamp}] [{record.levelname}] {prefix}{record.getMessage()}"
 
         # Add extra context inline if present
@@ -89,27 +127,94 @@ class TextFormatter(logging.Formatter):
             extras.append(f"audio={record.audio_duration_ms}ms")
         if hasattr(record, "language"):
             extras.append(f"lang={record.language}")
+        if hasattr(record, "timings"):
+            extras.append(f"total={record.timings['total_seconds']}s")
 
         if extras:
             base += f" ({', '.join(extras)})"
 
         # Add exception if present
-        if record.exc_info:
-            base += f"\n{self.formatException(record.exc_info)}"
+        exception = _exception(self, record)
+        if exception:
+            base += f"\n{exception}"
 
         return base
 
 
-def setup_logging(log_format: str = "text", log_level: str = "INFO") -> logging.Logger:
+class BoundedQueueHandler(QueueHandler):
+    """Queue records for the listener thread; drop (and count) them when the queue is full."""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]") -> None:
+        super().__init__(log_queue)
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve everything that depends on the calling thread now; formatting happens later
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        record.request_id = get_request_id()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        global _dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with _dropped_lock:
+                _dropped += 1
+                self._unreported += 1
+            return
+
+        if self._unreported:
+            with _dropped_lock:
+                count, self._unreported = self._unreported, 0
+            warning = logging.makeLogRecord(
+                {
+                    "name": record.name,
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": f"Dropped {count} log records (log queue full)",
+                }
+            )
+            try:
+                self.queue.put_nowait(warning)
+            except queue.Full:
+                with _dropped_lock:
+                    self._unreported += count
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # The stdlib uses put_nowait, which fails on a full queue; wait for the writer instead
+        self.queue.put(self._sentinel)
+
+
+def dropped_records() -> int:
+    """Log records dropped by this process because the queue was full."""
+    return _dropped
+
+
+def setup_logging(
+    log_format: str = "text", log_level: str = "INFO", queue_size: int = 10_000
+) -> logging.Logger:
     """Configure application logging.
 
     Args:
         log_format: "text" for human-readable, "json" for structured
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR)
+        queue_size: Records buffered for the listener thread (0 = write synchronously)
 
     Returns:
         Configured root logger for murmurai
     """
+    global _listener, _config
+    shutdown_logging()
+    _config = (log_format, log_level, queue_size)
+
     logger = logging.getLogger("murmurai")
     logger.setLevel(getattr(logging, log_level.upper(), logging.INFO))
 
@@ -126,7 +231,13 @@ def setup_logging(log_format: str = "text", log_level: str = "INFO") -> logging.
     else:
         handler.setFormatter(TextFormatter())
 
-    logger.addHandler(handler)
+    if queue_size > 0:
+        log_queue: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=queue_size)
+        _listener = _Listener(log_queue, handler, respect_handler_level=True)
+        _listener.start()
+        logger.addHandler(BoundedQueueHandler(log_queue))
+    else:
+        logger.addHandler(handler)
 
     # Prevent propagation to root logger (avoids duplicate logs)
     logger.propagate = False
@@ -134,6 +245,26 @@ def setup_logging(log_format: str = "text", log_level: str = "INFO") -> logging.
     return logger
 
 
+def shutdown_logging() -> None:
+    """Write out queued records and stop the listener thread (no-op if not running)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _after_fork() -> None:
+    # The listener thread does not survive fork(): start the child's own
+    global _listener
+    _listener = None
+    if _config is not None:
+        setup_logging(*_config)
+
+
+atexit.register(shutdown_logging)
+os.register_at_fork(after_in_child=_after_fork)
+
+
 def get_logger() -> logging.Logger:
     """Get the murmurai logger instance."""
     return logging.getLogger("murmurai")
@@ -0,0 +1,193 @@
+"""Windowed processing helpers for long recordings.
+
+Audio longer than ``window_seconds`` is transcribed, aligned and diarized
+one window at a time (see ``transcriber.run_models``), so the audio held in
+RAM and handed to the GPU never exceeds one window however long the input
+is. Windows are cut in pauses between the job's speech regions (see
+``speech``), found in a short span before each window's nominal end, so no
+speech straddles two windows and the per-window segments can simply be
+concatenated.
+
+Each window is diarized on its own, so its local labels (SPEAKER_00, ...)
+are mapped onto recording-wide speakers by comparing their embeddings with
+running centroids (``SpeakerRegistry``).
+"""
+
+import mmap
+from typing import Any
+
+import numpy as np
+
+
+def read_window(audio: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """Copy samples ``[start, stop)`` into memory.
+
+    Memory-mapped audio (the PCM cache) is read from its file instead of
+    through the map, so pages of earlier windows never accumulate in the
+    process.
+    """
+    # Only whole maps (views of one inherit the parent's offset)
+    if isinstance(audio, np.memmap) and isinstance(audio.base, mmap.mmap) and audio.filename:
+        return np.fromfile(
+            audio.filename,
+            dtype=audio.dtype,
+            count=stop - start,
+            offset=audio.offset + start * audio.itemsize,
+        )
+    return np.array(audio[start:stop], dtype=np.float32)
+
+
+def choose_cut(chunks: list[tuple[float, float]], span: float) -> float:
+    """Where to end a window, in seconds from the start of the searched span.
+
+    ``chunks`` are the VAD speech regions in the span, relative to its
+    start. The cut goes in the middle of the longest pause between them
+    (latest on ties); regions that touch are split where the VAD split
+    them. Without any speech the whole span is kept.
+    """
+    if not chunks:
+        return span
+    edges = [0.0] + [t for chunk in chunks for t in chunk] + [span]
+    best_gap = -1.0
+    cut = span
+    for i in range(0, len(edges), 2):
+        gap = edges[i + 1] - edges[i]
+        if gap >= best_gap:
+            best_gap = gap
+            cut = (edges[i] + edges[i + 1]) / 2
+    # A cut at the very start would leave an empty window
+    return cut if cut > 0 else span
+
+
+def offset_segments(segments: list[dict[str, Any]], seconds: float) -> list[dict[str, Any]]:
+    """Shift segment, word and char times (in place) by ``seconds``."""
+    if not seconds:
+        return segments
+    for segment in segments:
+        for item in (segment, *segment.get("words", ()), *segment.get("chars", ())):
+            for key in ("start", "end"):
+                if item.get(key) is not None:
+                    item[key] = round(item[key] + seconds, 3)
+    return segments
+
+
+def _normalize(embedding: Any) -> np.ndarray | None:
+    vector = np.asarray(embedding, dtype=np.float64).ravel()
+    norm = np.linalg.norm(vector)
+    if not vector.size or not np.isfinite(norm) or norm == 0:
+        return None
+    return vector / norm
+
+
+class SpeakerRegistry:
+    """Recording-wide speakers, matched across windows by embedding centroid.
+
+    Args:
+        max_distance: Largest cosine distance at which a window's speaker is
+            considered the same person as a known speaker.
+    """
+
+    def __init__(self, max_distance: float):
+        self.max_distance = max_distance
+        self.labels: list[str] = []
+        self._centroids: list[np.ndarray | None] = []
+        self._weights: list[float] = []
+        self._final_embeddings: dict[str, list[float]] = {}
+
+    def _add(self, vector: np.ndarray | None, weight: float) -> int:
+        self.labels.append(f"SPEAKER_{len(self.labels):02d}")
+        self._centroids.append(vector)
+        self._weights.append(weight if vector is not None else 0.0)
+        return len(self.labels) - 1
+
+    def match(self, embeddings: dict[str, Any], durations: dict[str, float]) -> dict[str, str]:
+        """Map one window's local labels to global labels.
+
+        Pairs are assigned greedily from the closest, one global speaker per
+        local speaker. Unmatched (or embedding-less) speakers become new
+        global speakers. Matched centroids are updated, weighted by speech
+        duration.
+        """
+        local = sorted(durations, key=lambda label: -durations[label])
+        vectors = {label: _normalize(embeddings.get(label, ())) for label in local}
+        known = [i for i, c in enumerate(self._centroids) if c is not None]
+
+        pairs = []
+        for label in local:
+            vector = vectors[label]
+            if vector is None:
+                continue
+            for i in known:
+                centroid = self._centroids[i]
+                assert centroid is not None
+                distance = 1.0 - float(vector @ centroid / np.linalg.norm(centroid))
+                if distance <= self.max_distance:
+                    pairs.append((distance, label, i))
+
+        mapping: dict[str, int] = {}
+        taken: set[int] = set()
+        for _, label, i in sorted(pairs):
+            if label not in mapping and i not in taken:
+                mapping[label] = i
+                taken.add(i)
+
+        for label in local:
+            vector, weight = vectors[label], durations[label]
+            if label not in mapping:
+                mapping[label] = self._add(vector, weight)
+            elif vector is not None:
+                i = mapping[label]
+                centroid = self._centroids[i]
+                assert centroid is not None
+                total = self._weights[i] + weight
+                self._centroids[i] = (centroid * self._weights[i] + vector * weight) / total
+                self._weights[i] = total
+        return {label: self.labels[i] for label, i in mapping.items()}
+
+    def merge_down(self, max_speakers: int | None) -> dict[str, str]:
+        """Merge the closest speakers until at most ``max_speakers`` remain.
+
+        Returns:
+            Mapping of every global label to its final label, renumbered
+            in order of first appearance.
+        """
+        groups = [[i] for i in range(len(self.labels))]
+        centroids = list(self._centroids)
+        weights = list(self._weights)
+        while max_speakers and len(groups) > max_speakers:
+            best = None
+            for a in range(len(groups)):
+                for b in range(a + 1, len(groups)):
+                    ca, cb = centroids[a], centroids[b]
+                    if ca is None or cb is None:
+                        distance = 2.0  # Merge embedding-less speakers last
+                    else:
+                        distance = 1.0 - float(ca @ cb / (np.linalg.norm(ca) * np.linalg.norm(cb)))
+                    if best is None or distance < best[0]:
+                        best = (distance, a, b)
+            assert best is not None
+            _, a, b = best
+            ca, cb = centroids[a], centroids[b]
+            if ca is not None and cb is not None:
+                centroids[a] = (ca * weights[a] + cb * weights[b]) / (weights[a] + weights[b])
+            elif ca is None:
+                centroids[a] = cb
+            weights[a] += weights[b]
+            groups[a] += groups.pop(b)
+            centroids.pop(b)
+            weights.pop(b)
+
+        final: dict[str, str] = {}
+        self._final_embeddings = {}
+        ordered = sorted(zip(groups, centroids), key=lambda item: min(item[0]))
+        for n, (group, centroid) in enumerate(ordered):
+            label = f"SPEAKER_{n:02d}"
+            for i in group:
+                final[self.labels[i]] = label
+            if centroid is not None:
+                self._final_embeddings[label] = centroid.tolist()
+        return final
+
+    def embeddings(self) -> dict[str, list[float]]:
+        """Final centroid per speaker (after ``merge_down``)."""
+        return self._final_embeddings
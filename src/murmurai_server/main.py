@@ -1,6 +1,7 @@
 """Main entry point for MurmurAI."""
 
 import argparse
+import os
 import sys
 
 import uvicorn
@@ -10,15 +11,19 @@ from murmurai_server.deps import startup_check
 
 
 def run() -> None:
-    """Main entry point - starts API server."""
+    """Main entry point - starts API server or queue workers."""
     parser = argparse.ArgumentParser(
         description="MurmurAI - GPU-powered transcription service",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""\
 Examples:
-  murmurai                        Start server with default settings
+  murmurai                        Start server with default settings (API + inference)
+  murmurai serve --workers 4      HTTP API only, 4 uvicorn workers (jobs go to the queue)
   murmurai --force                Start even if dependencies are missing
   murmurai --skip-check           Skip dependency check entirely
+  murmurai worker --processes 4   Run 4 supervised inference workers
+  murmurai worker --coordinator http://api:8880
+                                  Remote GPU worker leasing jobs over HTTP
 
 Environment variables:
   MURMURAI_API_KEY               API authentication key (required)
@@ -26,6 +31,7 @@ Environment variables:
   MURMURAI_PORT                  Server port (default: 8880)
   MURMURAI_MODEL                 Model name (default: large-v3-turbo)
   MURMURAI_HF_TOKEN              HuggingFace token for diarization
+  MURMURAI_EMBEDDED_WORKER       Run jobs in the API process (default: true)
 
 Full docs: https://github.com/namastexlabs/murmurai
 """,
@@ -46,6 +52,39 @@ Full docs: https://github.com/namastexlabs/murmurai
         help="Show version and exit",
     )
 
+    subparsers = parser.add_subparsers(dest="command")
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Run only the HTTP API; jobs are executed by `murmurai worker`",
+    )
+    serve_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of uvicorn worker processes (default: 1)",
+    )
+    worker_parser = subparsers.add_parser(
+        "worker",
+        help="Run supervised inference workers consuming the job queue (pair with `serve`)",
+    )
+    worker_parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Supervised worker processes (CPU workers share one model copy, default: 1)",
+    )
+    worker_parser.add_argument(
+        "--coordinator",
+        default=None,
+        help="Lease jobs over HTTP from this API instead of the local database",
+    )
+    worker_parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="CPU threads per worker (default: available cores / processes)",
+    )
+
     args = parser.parse_args()
 
     if args.version:
@@ -63,8 +102,27 @@ Full docs: https://github.com/namastexlabs/murmurai
     # Ensure data directory exists
     settings.data_dir.mkdir(parents=True, exist_ok=True)
 
+    if args.command == "worker":
+        from murmurai_server.worker import run_worker_pool
+
+        if args.coordinator:
+            settings.coordinator_url = args.coordinator
+        print(f"MurmurAI worker starting ({settings.coordinator_url or settings.data_dir})")
+        run_worker_pool(processes=args.processes, threads=args.threads)
+        return
+
+    workers = 1
+    if args.command == "serve":
+        # Inherited by uvicorn worker processes, which re-read settings on import
+        os.environ["MURMURAI_EMBEDDED_WORKER"] = "false"
+        get_settings.cache_clear()
+        workers = args.workers
+
     print(f"MurmurAI starting on http://{settings.host}:{settings.port}")
-    print(f"Model: {settings.model}")
+    if args.command == "serve":
+        print(f"Mode: HTTP only ({workers} workers) - run `murmurai worker` for inference")
+    else:
+        print(f"Model: {settings.model}")
     print(f"Data directory: {settings.data_dir}")
     print(f"API docs: http://{settings.host}:{settings.port}/docs")
 
@@ -74,6 +132,7 @@ Full docs: https://github.com/namastexlabs/murmurai
         host=settings.host,
         port=settings.port,
         reload=False,
+        workers=workers,
     )
 
 
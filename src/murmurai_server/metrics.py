@@ -0,0 +1,553 @@
+"""Prometheus metrics.
+
+``GET /metrics`` serves the instruments below in the Prometheus text format.
+They are plain counters and fixed-bucket histograms kept in this module (no
+client library): recording a value is a dict lookup, a bisect and a few
+additions under a lock, so it is cheap enough for every request, query and
+pipeline stage.
+
+Jobs run in worker processes and requests in uvicorn processes, so each
+process also writes its values to ``data_dir/metrics/<host>-<pid>-<token>.json``
+every ``metrics_flush_interval`` seconds (``start_flusher``), and ``render``
+adds up the files of every process sharing the data directory. The random
+token keeps a process that reuses an old PID from overwriting its counters.
+Gauges are dropped once a file is three flush intervals old. ``render``
+folds the counters and histograms of exited processes (a PID of this host
+that is gone, or a file untouched for ``EXITED_AFTER_SECONDS``) into
+``exited.json`` and removes their files, so counters never go backwards and
+the directory does not grow with every process that ever ran.
+
+The same instruments also feed the breakdown of the job running on the
+current thread (``JobStats``, activated with ``job_stats``): stage times,
+model loads and model cache hits, plus peak GPU memory and RSS. Workers
+store it with the transcript as ``timings``.
+"""
+
+import bisect
+import fcntl
+import os
+import resource
+import secrets
+import socket
+import sys
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import orjson
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from murmurai_server import tracing
+from murmurai_server.config import get_settings
+from murmurai_server.logging import dropped_records, get_logger
+
+Labels = tuple[tuple[str, str], ...]
+
+_HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+_STAGE_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+_WAIT_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 600.0, 1800.0, 3600.0)
+
+# name -> (help, buckets)
+HISTOGRAMS: dict[str, tuple[str, tuple[float, ...]]] = {
+    "murmurai_http_request_duration_seconds": (
+        "HTTP request latency by route template",
+        _HTTP_BUCKETS,
+    ),
+    "murmurai_queue_wait_seconds": (
+        "Time from submission until a worker claims the job",
+        _WAIT_BUCKETS,
+    ),
+    "murmurai_stage_duration_seconds": (
+        "Job stage latency (decode, asr, align, diarize, format, db_write, webhook)",
+        _STAGE_BUCKETS,
+    ),
+    "murmurai_realtime_factor": (
+        "Model stage (ASR, alignment, diarization) seconds per second of audio",
+        (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0),
+    ),
+    "murmurai_model_load_seconds": ("Model load time on cache misses", _STAGE_BUCKETS),
+    "murmurai_db_query_duration_seconds": ("SQLite query latency by function", _DB_BUCKETS),
+}
+
+# name -> help
+COUNTERS: dict[str, str] = {
+    "murmurai_model_cache_requests_total": "Model cache lookups by model kind and result",
+    "murmurai_model_cache_evictions_total": "Models evicted from the model cache",
+    "murmurai_cache_events_total": "Result, PCM, rendition, diarization and checkpoint cache events",
+    "murmurai_log_records_dropped_total": "Log records dropped because the log queue was full",
+}
+
+# name -> help (sampled by each process when it flushes)
+GAUGES: dict[str, str] = {
+    "murmurai_gpu_memory_allocated_bytes": "GPU memory allocated by tensors, per process",
+    "murmurai_gpu_memory_reserved_bytes": "GPU memory reserved by the caching allocator, per process",
+    "murmurai_queue_jobs": "Jobs in the queue by status",
+    "murmurai_queue_oldest_seconds": "Age of the oldest queued job",
+}
+
+_lock = threading.Lock()
+_counters: dict[tuple[str, Labels], float] = {}
+_histograms: dict[tuple[str, Labels], list[float]] = {}  # bucket counts..., sum, count
+_flusher: threading.Thread | None = None
+_token = secrets.token_hex(4)  # Tells this process's file from an earlier one with the same PID
+_current_job: ContextVar["JobStats | None"] = ContextVar("current_job", default=None)
+
+
+def _labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def inc(name: str, value: float = 1.0, **labels: str) -> None:
+    """Add ``value`` to a counter."""
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0.0) + value
+    if (job := _current_job.get()) is not None:
+        job.add(name, labels, value)
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    """Record one observation in a histogram."""
+    buckets = HISTOGRAMS[name][1]
+    key = (name, _labels(labels))
+    with _lock:
+        series = _histograms.get(key)
+        if series is None:
+            series = _histograms[key] = [0.0] * (len(buckets) + 3)
+        series[bisect.bisect_left(buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+
+# Histograms whose timers are also trace spans -> span name prefix
+_SPANS = {
+    "murmurai_stage_duration_seconds": "stage",
+    "murmurai_model_load_seconds": "model_load",
+    "murmurai_db_query_duration_seconds": "db",
+}
+
+
+@contextmanager
+def timer(name: str, **labels: str) -> Iterator[None]:
+    """Observe the wall time of the block in histogram ``name`` (also if it raises).
+
+    Stage, model-load and query timers also record a trace span
+    (``stage.asr``, ``db.get_transcript``, ...) when tracing is enabled.
+    """
+    start = time.perf_counter()
+    try:
+        if name in _SPANS:
+            with tracing.span(".".join((_SPANS[name], *labels.values())), **labels):
+                yield
+        else:
+            yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe(name, elapsed, **labels)
+        if (job := _current_job.get()) is not None:
+            job.add(name, labels, elapsed)
+
+
+@dataclass
+class JobStats:
+    """Where one job's time and memory went (stored as the transcript's ``timings``)."""
+
+    stages: dict[str, float] = field(default_factory=dict)  # Seconds per stage
+    model_load: dict[str, float] = field(default_factory=dict)  # Seconds per cold model load
+    model_cache: dict[str, str] = field(default_factory=dict)  # Model kind -> hit or miss
+    audio_seconds: float | None = None
+    peak_gpu_memory_bytes: int | None = None
+    peak_rss_bytes: int | None = None
+    started: float = field(default_factory=time.monotonic)
+
+    def add(self, name: str, labels: dict[str, str], value: float) -> None:
+        """Fold one recorded value into the breakdown (called by ``timer`` and ``inc``)."""
+        if name == "murmurai_stage_duration_seconds":
+            self.stages[labels["stage"]] = self.stages.get(labels["stage"], 0.0) + value
+        elif name == "murmurai_model_load_seconds":
+            self.model_load[labels["model"]] = self.model_load.get(labels["model"], 0.0) + value
+        elif name == "murmurai_model_cache_requests_total":
+            # One miss (a window or shard that loaded the model) makes the job a miss
+            if self.model_cache.get(labels["model"]) != "miss":
+                self.model_cache[labels["model"]] = labels["result"]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "total_seconds": round(time.monotonic() - self.started, 3),
+            "stages": {stage: round(t, 3) for stage, t in self.stages.items()},
+            "model_load": {model: round(t, 3) for model, t in self.model_load.items()},
+            "model_cache": dict(self.model_cache),
+            "audio_seconds": self.audio_seconds,
+            "peak_gpu_memory_bytes": self.peak_gpu_memory_bytes,
+            "peak_rss_bytes": self.peak_rss_bytes,
+        }
+
+
+def current_job() -> JobStats | None:
+    """Stats of the job running on this thread, if any."""
+    return _current_job.get()
+
+
+@contextmanager
+def job_stats(stats: JobStats, peaks: bool = False) -> Iterator[JobStats]:
+    """Attribute stage timings and model lookups on this thread to ``stats``.
+
+    Args:
+        peaks: Also record this process's peak GPU memory and RSS over the
+            block (the model stage). Peaks are process-wide, so they include
+            anything else the process runs at the same time.
+    """
+    token = _current_job.set(stats)
+    if peaks:
+        _reset_peaks()
+    try:
+        yield stats
+    finally:
+        if peaks:
+            stats.peak_gpu_memory_bytes, stats.peak_rss_bytes = _read_peaks()
+        _current_job.reset(token)
+
+
+def _cuda() -> Any:
+    """``torch.cuda`` if this process has initialized CUDA (never initializes it)."""
+    torch = sys.modules.get("torch")
+    if torch is None or not torch.cuda.is_initialized():
+        return None
+    return torch.cuda
+
+
+def _reset_peaks() -> None:
+    if (cuda := _cuda()) is not None:
+        for device in range(cuda.device_count()):
+            cuda.reset_peak_memory_stats(device)
+    try:
+        # Linux: resets VmHWM (peak RSS) to the current RSS
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        pass
+
+
+def _read_peaks() -> tuple[int | None, int | None]:
+    gpu = None
+    if (cuda := _cuda()) is not None:
+        gpu = sum(cuda.max_memory_allocated(device) for device in range(cuda.device_count()))
+    try:
+        status = Path("/proc/self/status").read_text()
+        rss = next(
+            int(line.split()[1]) * 1024 for line in status.splitlines() if line.startswith("VmHWM:")
+        )
+    except (OSError, StopIteration):
+        # Peak over the process lifetime (KiB on Linux)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return gpu, rss
+
+
+def _reset() -> None:
+    global _flusher, _token
+    _counters.clear()
+    _histograms.clear()
+    _flusher = None
+    _token = secrets.token_hex(4)
+
+
+# Forked workers start from zero instead of counting the parent's values again
+os.register_at_fork(after_in_child=_reset)
+
+
+def _sample_gauges() -> list[tuple[str, dict[str, str], float]]:
+    """GPU memory of this process (only if it has initialized CUDA)."""
+    cuda = _cuda()
+    if cuda is None:
+        return []
+    gauges = []
+    for device in range(cuda.device_count()):
+        labels = {"device": str(device)}
+        allocated = float(cuda.memory_allocated(device))
+        reserved = float(cuda.memory_reserved(device))
+        gauges.append(("murmurai_gpu_memory_allocated_bytes", labels, allocated))
+        gauges.append(("murmurai_gpu_memory_reserved_bytes", labels, reserved))
+    return gauges
+
+
+def snapshot() -> dict[str, Any]:
+    """This process's counters, histograms and sampled gauges."""
+    from murmurai_server.cache import cache_stats
+
+    with _lock:
+        counters = [[name, dict(labels), value] for (name, labels), value in _counters.items()]
+        histograms = [[name, dict(labels), list(s)] for (name, labels), s in _histograms.items()]
+    counters += [
+        ["murmurai_cache_events_total", {"event": event}, float(value)]
+        for event, value in cache_stats().items()
+        if event != "hit_rate"
+    ]
+    counters.append(["murmurai_log_records_dropped_total", {}, float(dropped_records())])
+    return {"counters": counters, "histograms": histograms, "gauges": _sample_gauges()}
+
+
+def _metrics_dir() -> Path:
+    return get_settings().data_dir / "metrics"
+
+
+def _process_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{_token}"
+
+
+def flush(directory: Path | None = None) -> None:
+    """Write this process's snapshot for ``render`` (atomically, so readers never see half)."""
+    directory = directory or _metrics_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{_process_name()}.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(orjson.dumps(snapshot()))
+    tmp.replace(path)
+
+
+def start_flusher() -> None:
+    """Flush this process's metrics every ``metrics_flush_interval`` seconds (once per process)."""
+    global _flusher
+    settings = get_settings()
+    if not settings.metrics or _flusher is not None:
+        return
+
+    directory = _metrics_dir()
+
+    def run() -> None:
+        while True:
+            try:
+                flush(directory)
+            except Exception as e:
+                get_logger().debug(f"Could not write metrics: {e}")
+            time.sleep(settings.metrics_flush_interval)
+
+    _flusher = threading.Thread(target=run, name="metrics-flush", daemon=True)
+    _flusher.start()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+# Counters and histograms of processes whose files were folded away (see _fold_exited)
+EXITED_FILE = "exited.json"
+# A file of another host not written for this long belongs to a process that exited
+EXITED_AFTER_SECONDS = 3600.0
+
+
+def _add(
+    counters: dict[tuple[str, Labels], float],
+    histograms: dict[tuple[str, Labels], list[float]],
+    data: dict[str, Any],
+) -> None:
+    """Add the counters and histograms of a snapshot to the running totals."""
+    for name, labels, value in data["counters"]:
+        key = (name, _labels(labels))
+        counters[key] = counters.get(key, 0.0) + value
+    for name, labels, series in data["histograms"]:
+        key = (name, _labels(labels))
+        total = histograms.get(key)
+        if total is None or len(total) != len(series):
+            histograms[key] = list(series)
+        else:
+            histograms[key] = [a + b for a, b in zip(total, series, strict=True)]
+
+
+def _read(path: Path) -> dict[str, Any] | None:
+    try:
+        data: dict[str, Any] = orjson.loads(path.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return None  # Replaced or removed while reading
+    return data
+
+
+def _has_exited(path: Path, now: float) -> bool:
+    """Whether the process that wrote ``path`` is gone."""
+    host, _, rest = path.stem.rpartition("-")[0].rpartition("-")
+    pid = int(rest) if rest.isdigit() else None
+    if host == socket.gethostname() and pid is not None:
+        if pid == os.getpid():
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass  # Alive, owned by another user
+    try:
+        age = now - path.stat().st_mtime
+    except OSError:
+        return False
+    # A running process rewrites its file every flush interval (a reused PID lands here too)
+    return age > max(EXITED_AFTER_SECONDS, 10 * get_settings().metrics_flush_interval)
+
+
+def _fold_exited(directory: Path) -> None:
+    """Move the counters and histograms of exited processes into ``EXITED_FILE``.
+
+    The aggregate lists the files it absorbed, and is written before they are
+    removed, so a concurrent ``render`` counts each of them exactly once.
+    """
+    now = time.time()
+    with open(directory / ".fold.lock", "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return  # Another process is folding
+        exited = [
+            path
+            for path in directory.glob("*.json")
+            if path.name != EXITED_FILE and _has_exited(path, now)
+        ]
+        if not exited:
+            return
+
+        counters: dict[tuple[str, Labels], float] = {}
+        histograms: dict[tuple[str, Labels], list[float]] = {}
+        aggregate = _read(directory / EXITED_FILE) or {"counters": [], "histograms": []}
+        _add(counters, histograms, aggregate)
+        # Names only matter while their files may still be read
+        folded = [
+            name for name in aggregate.get("folded", []) if (directory / f"{name}.json").exists()
+        ]
+        for path in exited:
+            data = _read(path)
+            if data is not None:
+                _add(counters, histograms, data)
+                folded.append(path.stem)
+
+        tmp = directory / f"{EXITED_FILE}.tmp"
+        tmp.write_bytes(
+            orjson.dumps(
+                {
+                    "counters": [[n, dict(labels), v] for (n, labels), v in counters.items()],
+                    "histograms": [[n, dict(labels), s] for (n, labels), s in histograms.items()],
+                    "folded": folded,
+                }
+            )
+        )
+        tmp.replace(directory / EXITED_FILE)
+        for path in exited:
+            path.unlink(missing_ok=True)
+
+
+def render(extra_gauges: Iterable[tuple[str, dict[str, str], float]] = ()) -> str:
+    """Metrics of every process sharing the data directory, in the text format.
+
+    Args:
+        extra_gauges: Gauges computed by the caller (queue state from the database).
+    """
+    settings = get_settings()
+    flush()
+    directory = _metrics_dir()
+    _fold_exited(directory)
+    stale_before = time.time() - 3 * settings.metrics_flush_interval
+    counters: dict[tuple[str, Labels], float] = {}
+    histograms: dict[tuple[str, Labels], list[float]] = {}
+    gauges: dict[tuple[str, Labels], float] = {}
+
+    processes = []
+    for path in sorted(directory.glob("*.json")):
+        if path.name == EXITED_FILE:
+            continue
+        data = _read(path)
+        try:
+            fresh = path.stat().st_mtime >= stale_before
+        except OSError:
+            continue
+        if data is not None:
+            processes.append((path.stem, data, fresh))
+    # Read last: a file folded by another process since it was read above is listed here
+    exited = _read(directory / EXITED_FILE)
+    if exited is not None:
+        _add(counters, histograms, exited)
+    folded = set(exited.get("folded", [])) if exited else set()
+
+    for name, data, fresh in processes:
+        if name in folded:
+            continue
+        _add(counters, histograms, data)
+        if fresh:
+            for metric, labels, value in data["gauges"]:
+                gauges[(metric, _labels({**labels, "process": name}))] = value
+    for name, labels, value in extra_gauges:
+        gauges[(name, _labels(labels))] = value
+
+    lines: list[str] = []
+    for name, help_text in COUNTERS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{name}{_format_labels(dict(labels))} {_format_value(value)}")
+    for name, help_text in GAUGES.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        for (metric, labels), value in sorted(gauges.items()):
+            if metric == name:
+                lines.append(f"{name}{_format_labels(dict(labels))} {_format_value(value)}")
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for (metric, labels), series in sorted(histograms.items()):
+            if metric != name or len(series) != len(buckets) + 3:
+                continue
+            cumulative = 0.0
+            for bound, count in zip((*buckets, "+Inf"), series[:-2], strict=True):
+                cumulative += count
+                bucket_labels = _format_labels({**dict(labels), "le": str(bound)})
+                lines.append(f"{name}_bucket{bucket_labels} {_format_value(cumulative)}")
+            suffix = _format_labels(dict(labels))
+            lines.append(f"{name}_sum{suffix} {_format_value(series[-2])}")
+            lines.append(f"{name}_count{suffix} {_format_value(series[-1])}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Record HTTP request latency by route template (``/v1/transcript/{transcript_id}``).
+
+    A plain ASGI middleware (no per-request task or body buffering). Requests
+    that match no route are recorded as ``unmatched``, so scanners cannot
+    create a series per path.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            observe(
+                "murmurai_http_request_duration_seconds",
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status),
+            )
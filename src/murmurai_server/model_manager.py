@@ -12,6 +12,7 @@ import murmurai as murmurai_core  # type: ignore[import-untyped]
 import torch
 from pyannote.audio import Pipeline
 
+from murmurai_server import metrics
 from murmurai_server.config import get_settings
 from murmurai_server.logging import get_logger
 
@@ -38,6 +39,12 @@ DEFAULT_VAD_OPTIONS = {
 }
 
 
+def _count_lookup(model: str, hit: bool) -> None:
+    """Count a model cache hit or miss (``murmurai_model_cache_requests_total``)."""
+    result = "hit" if hit else "miss"
+    metrics.inc("murmurai_model_cache_requests_total", model=model, result=result)
+
+
 class ModelManager:
     """Singleton manager for GPU models with hybrid caching.
 
@@ -49,6 +56,7 @@ class ModelManager:
 
     _default_model: Any = None
     _custom_models: dict[str, Any] = {}  # Cache by options hash (max 3)
+    _replicas: dict[str, list[Any]] = {}  # Extra models for sharding, by options hash
     _align_models: dict[str, tuple[Any, Any]] = {}
     _diarize_models: dict[str, Any] = {}  # Cache by model name
     _lock = threading.Lock()
@@ -82,7 +90,7 @@ class ModelManager:
         Returns:
             FasterWhisperPipeline model configured with specified options.
 
-        Note: Uses "cuda" not "cuda:N" because faster_whisper/ctranslate2
+        Note: Uses "cuda"/"cpu" not "cuda:N" because faster_whisper/ctranslate2
         doesn't support device index in string. torch.cuda.set_device()
         is called at startup to select the correct GPU.
         """
@@ -99,6 +107,7 @@ class ModelManager:
     def _get_default_model(cls) -> Any:
         """Get or load the default model with settings from .env."""
         with cls._lock:
+            _count_lookup("asr", hit=cls._default_model is not None)
             if cls._default_model is None:
                 settings = get_settings()
                 logger = get_logger()
@@ -107,14 +116,16 @@ class ModelManager:
                 logger.info(
                     f"  ASR options: beam_size={settings.beam_size}, temps={settings.temperatures}"
                 )
-                cls._default_model = murmurai_core.load_model(
-                    settings.model,
-                    device="cuda",
-                    compute_type=settings.compute_type,
-                    asr_options=settings.asr_options,
-                    vad_options=settings.vad_options,
-                    vad_method=settings.vad_method,
-                )
+                with metrics.timer("murmurai_model_load_seconds", model="asr"):
+                    cls._default_model = murmurai_core.load_model(
+                        settings.model,
+                        device=settings.device_type,
+                        compute_type=settings.compute_type,
+                        asr_options=settings.asr_options,
+                        vad_options=settings.vad_options,
+                        vad_method=settings.vad_method,
+                        threads=settings.worker_threads or 4,
+                    )
                 logger.info("Default model loaded successfully")
             return cls._default_model
 
@@ -133,6 +144,7 @@ class ModelManager:
 
         with cls._lock:
             # Check cache
+            _count_lookup("asr", hit=options_key in cls._custom_models)
             if options_key in cls._custom_models:
                 logger.debug(f"Using cached custom model: {options_key}")
                 return cls._custom_models[options_key]
@@ -144,20 +156,23 @@ class ModelManager:
                 f"  ASR: beam_size={full_asr.get('beam_size')}, temps={full_asr.get('temperatures')}"
             )
 
-            model = murmurai_core.load_model(
-                settings.model,
-                device="cuda",
-                compute_type=settings.compute_type,
-                asr_options=full_asr,
-                vad_options=full_vad,
-                vad_method=vad_method,
-            )
+            with metrics.timer("murmurai_model_load_seconds", model="asr"):
+                model = murmurai_core.load_model(
+                    settings.model,
+                    device=settings.device_type,
+                    compute_type=settings.compute_type,
+                    asr_options=full_asr,
+                    vad_options=full_vad,
+                    vad_method=vad_method,
+                    threads=settings.worker_threads or 4,
+                )
 
             # Cache management: limit to 3 custom models
             if len(cls._custom_models) >= 3:
                 oldest_key = next(iter(cls._custom_models))
                 logger.info(f"Evicting oldest custom model from cache: {oldest_key}")
                 del cls._custom_models[oldest_key]
+                metrics.inc("murmurai_model_cache_evictions_total", model="asr")
                 gc.collect()
                 torch.cuda.empty_cache()
 
@@ -165,18 +180,79 @@ class ModelManager:
             logger.info(f"Custom model loaded and cached: {options_key}")
             return model
 
+    @classmethod
+    def get_replicas(
+        cls,
+        asr_options: dict | None = None,
+        vad_options: dict | None = None,
+        vad_method: str = "pyannote",
+    ) -> list[Any]:
+        """Get ``shard_replicas`` copies of a model for sharded transcription.
+
+        The first is the model ``get_model`` returns; replica ``i`` is loaded
+        on ``shard_devices[i]`` (default: the GPUs after ``device``, wrapping
+        around). On CPU every replica runs its own ``worker_threads`` threads.
+        Only the replicas of the most recently used options are kept.
+        """
+        settings = get_settings()
+        model = cls.get_model(asr_options, vad_options, vad_method)
+        if model is cls._default_model:
+            options_key = "default"
+            full_asr, full_vad = settings.asr_options, settings.vad_options
+        else:
+            full_asr = {**DEFAULT_ASR_OPTIONS, **(asr_options or {})}
+            full_vad = {**DEFAULT_VAD_OPTIONS, **(vad_options or {})}
+            options_key = cls._hash_options(full_asr, full_vad, vad_method)
+
+        with cls._lock:
+            if options_key not in cls._replicas and cls._replicas:
+                evicted = sum(len(replicas) for replicas in cls._replicas.values())
+                metrics.inc("murmurai_model_cache_evictions_total", evicted, model="asr_replica")
+                cls._replicas.clear()
+                gc.collect()
+                torch.cuda.empty_cache()
+            replicas = cls._replicas.setdefault(options_key, [])
+
+            if settings.shard_devices:
+                devices = settings.shard_devices
+            elif settings.device_type == "cpu":
+                devices = [0]
+            else:
+                count = torch.cuda.device_count() or 1
+                devices = [(settings.device + i) % count for i in range(count)]
+
+            logger = get_logger()
+            for i in range(len(replicas) + 1, settings.shard_replicas):
+                device_index = devices[i % len(devices)]
+                logger.info(f"Loading model replica {i} ({settings.device_type}:{device_index})...")
+                replicas.append(
+                    murmurai_core.load_model(
+                        settings.model,
+                        device=settings.device_type,
+                        device_index=device_index,
+                        compute_type=settings.compute_type,
+                        asr_options=full_asr,
+                        vad_options=full_vad,
+                        vad_method=vad_method,
+                        threads=settings.worker_threads or 4,
+                    )
+                )
+            return [model, *replicas[: settings.shard_replicas - 1]]
+
     @classmethod
     def get_align_model(cls, language: str) -> tuple[Any, Any]:
         """Get or load alignment model for a specific language."""
         with cls._lock:
+            _count_lookup("align", hit=language in cls._align_models)
             if language not in cls._align_models:
                 logger = get_logger()
                 logger.info(f"Loading alignment model for language: {language}...")
                 try:
-                    model, metadata = murmurai_core.load_align_model(
-                        language_code=language,
-                        device="cuda",
-                    )
+                    with metrics.timer("murmurai_model_load_seconds", model="align"):
+                        model, metadata = murmurai_core.load_align_model(
+                            language_code=language,
+                            device=get_settings().device_type,
+                        )
                 except ValueError as e:
                     raise RuntimeError(
                         f"Failed to load alignment model for '{language}'. "
@@ -200,15 +276,17 @@ class ModelManager:
         2. Set MURMURAI_HF_TOKEN in .env
         """
         with cls._lock:
+            _count_lookup("diarize", hit=model_name in cls._diarize_models)
             if model_name not in cls._diarize_models:
                 settings = get_settings()
                 logger = get_logger()
                 logger.info(f"Loading diarization model: {model_name}...")
 
-                pipeline = Pipeline.from_pretrained(
-                    model_name,
-                    token=settings.hf_token,
-                )
+                with metrics.timer("murmurai_model_load_seconds", model="diarize"):
+                    pipeline = Pipeline.from_pretrained(
+                        model_name,
+                        token=settings.hf_token,
+                    )
 
                 if pipeline is None:
                     raise RuntimeError(
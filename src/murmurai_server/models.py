@@ -1,6 +1,6 @@
 """Pydantic models for API request/response."""
 
-from typing import Literal
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field, HttpUrl
 
@@ -90,6 +90,26 @@ class TranscriptParams(BaseModel):
     # Webhook callback
     webhook_url: HttpUrl | None = Field(None, description="URL to POST results when complete")
     webhook_auth_header: str | None = Field(None, description="Authorization header for webhook")
+    webhook_payload: Literal["full", "summary", "id_only"] = Field(
+        "full", description="Webhook body: full transcript, summary (no text or words) or id_only"
+    )
+
+
+class AlignParams(BaseModel):
+    """Request body for aligning a completed transcript again (word timestamps)."""
+
+    return_char_alignments: bool = Field(False, description="Include character-level alignments")
+    interpolate_method: Literal["nearest", "linear", "ignore"] = Field(
+        "nearest", description="Method for interpolating word boundaries"
+    )
+
+
+class DiarizeParams(BaseModel):
+    """Request body for diarizing a completed transcript again."""
+
+    speakers_expected: int | None = Field(None, ge=1, description="Expected number of speakers")
+    min_speakers: int | None = Field(None, ge=1, description="Minimum expected speakers")
+    max_speakers: int | None = Field(None, ge=1, description="Maximum expected speakers")
 
 
 class TranscriptWord(BaseModel):
@@ -105,14 +125,21 @@ class TranscriptWord(BaseModel):
 class TranscriptUtterance(BaseModel):
     """Speaker utterance (segment) data."""
 
-    speaker: str
+    speaker: str | None = None  # Only with speaker_labels
     text: str
     start: int  # milliseconds
     end: int  # milliseconds
-    confidence: float
+    confidence: float | None = None  # Only with word-level data
     words: list[TranscriptWord] | None = None
 
 
+class SpeakerMatch(BaseModel):
+    """Enrolled speaker recognised in a transcript."""
+
+    name: str
+    similarity: float  # Cosine similarity of the voices (0.0 to 1.0)
+
+
 class Transcript(BaseModel):
     """Full transcript response."""
 
@@ -127,6 +154,24 @@ class Transcript(BaseModel):
     audio_duration: int | None = None  # milliseconds
     progress: float = 0.0  # 0.0 to 1.0
     error: str | None = None
+    speaker_identities: dict[str, SpeakerMatch] | None = None  # Speaker label -> known speaker
+    speaker_embeddings: dict[str, str] | None = None  # Base64 float16, if requested
+    timings: dict[str, Any] | None = None  # Per-stage seconds and peak memory, if requested
+
+
+# Transcript fields and their defaults, for responses that skip validation
+_TRANSCRIPT_DEFAULTS = {
+    name: None if field.is_required() else field.default
+    for name, field in Transcript.model_fields.items()
+}
+
+
+def transcript_fields(row: dict[str, Any]) -> dict[str, Any]:
+    """A stored transcript row projected onto the ``Transcript`` fields.
+
+    Drops internal columns (options, attempts, webhook settings and secrets).
+    """
+    return {name: row.get(name, default) for name, default in _TRANSCRIPT_DEFAULTS.items()}
 
 
 class TranscriptListItem(BaseModel):
@@ -156,6 +201,67 @@ class TranscriptList(BaseModel):
     pagination: Pagination
 
 
+class SpeakerEnrollment(BaseModel):
+    """Request body for enrolling a known speaker.
+
+    The voice comes either from a diarized speaker of a completed transcript
+    (``transcript_id`` + ``speaker``) or from an ``embedding`` directly.
+    """
+
+    name: str = Field(min_length=1, description="Name of the speaker")
+    transcript_id: str | None = Field(None, description="Transcript the speaker was diarized in")
+    speaker: str | None = Field(None, description="Speaker label in it, e.g. SPEAKER_00")
+    embedding: str | None = Field(None, description="Base64 float16 speaker embedding")
+
+
+class EnrolledSpeaker(BaseModel):
+    """One enrollment in the speaker index."""
+
+    id: str
+    name: str
+    created_at: str
+    transcript_id: str | None = None
+    speaker: str | None = None
+
+
+class SpeakerList(BaseModel):
+    """Response for list speakers endpoint."""
+
+    speakers: list[EnrolledSpeaker]
+
+
+class WebhookAttempt(BaseModel):
+    """One attempt at delivering a webhook."""
+
+    attempt: int
+    attempted_at: str
+    status_code: int | None = None  # None when no response was received
+    error: str | None = None
+    duration_ms: int | None = None
+    bytes_sent: int | None = None  # Request body size on the wire (after compression)
+
+
+class WebhookDelivery(BaseModel):
+    """A webhook notification of a transcript and its delivery attempts."""
+
+    id: int
+    url: str
+    payload: Literal["full", "summary", "id_only"]
+    status: Literal["pending", "delivered", "failed"]
+    attempts: int
+    next_attempt_at: str | None = None
+    last_error: str | None = None
+    created_at: str
+    delivered_at: str | None = None
+    history: list[WebhookAttempt]
+
+
+class WebhookDeliveryList(BaseModel):
+    """Response for the webhook deliveries endpoint."""
+
+    deliveries: list[WebhookDelivery]
+
+
 class HealthResponse(BaseModel):
     """Health check response."""
 
@@ -168,3 +274,46 @@ class ReadyResponse(BaseModel):
     status: str
     gpu: str
     model: str
+
+
+class LeaseRequest(BaseModel):
+    """Remote worker request for the next queued job."""
+
+    worker_id: str
+
+
+class JobLease(BaseModel):
+    """Job leased to a remote worker."""
+
+    id: str
+    options: dict[str, Any]
+    attempts: int
+    cache_key: str | None = None  # Keys the job's stage checkpoints on the worker
+    audio_sha256: str | None = None  # Keys the worker's PCM cache without hashing the audio
+    trace_context: dict[str, str] | None = None  # Request ID and trace the job continues
+    lease_seconds: int
+    audio_url: str  # Coordinator path to stream the audio from
+    filename: str
+
+
+class HeartbeatRequest(BaseModel):
+    """Remote worker lease renewal."""
+
+    worker_id: str
+    progress: float | None = None
+
+
+class JobResult(BaseModel):
+    """Completed job posted back by a remote worker."""
+
+    worker_id: str
+    result: dict[str, Any]
+    timings: dict[str, Any] | None = None
+
+
+class JobFailure(BaseModel):
+    """Failed job posted back by a remote worker."""
+
+    worker_id: str
+    error: str
+    timings: dict[str, Any] | None = None
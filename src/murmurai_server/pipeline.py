@@ -0,0 +1,346 @@
+"""Staged job pipeline for queue workers.
+
+A job used to run download, decode, ASR, alignment, diarization and
+formatting as one serial unit, leaving the GPU idle during the CPU-only
+parts. ``JobPipeline`` splits it into three stages connected by bounded
+queues::
+
+    claim + decode       (pipeline_decode_workers threads)
+      -> gpu queue       (pipeline_depth)
+    ASR / align / diarize (one thread - the caller's - owns the models)
+      -> post queue      (pipeline_depth)
+    format + save + queue webhooks (pipeline_post_workers threads)
+
+While the GPU stage runs job N, the decode threads claim and decode the
+next jobs, and finished jobs are formatted and written to SQLite off the
+GPU thread. At most ``decode_workers + depth`` jobs are claimed ahead.
+They carry this worker's id, so a crash returns them to the queue along
+with the running one; only jobs that reached the GPU stage have an
+attempt counted against ``max_job_attempts``.
+
+Per-stage occupancy (busy time / wall time / threads) is logged every
+``STATS_INTERVAL`` seconds and on exit. A starved GPU stage next to a busy
+decode stage means more decode workers are needed; a full gpu queue means
+the GPU is the bottleneck. Each job carries its own ``metrics.JobStats``
+through the stages, saved as the transcript's ``timings``, and each stage
+continues the trace of the request that submitted the job.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from murmurai_server import metrics, tracing
+from murmurai_server.config import get_settings
+from murmurai_server.database import claim_next_transcript, start_attempt, update_transcript
+from murmurai_server.logging import get_logger
+from murmurai_server.transcriber import (
+    TranscribeOptions,
+    decode_audio,
+    finish_result,
+    run_models,
+)
+from murmurai_server.webhooks import enqueue_webhooks
+
+# Seconds between occupancy log lines
+STATS_INTERVAL = 60.0
+
+
+@dataclass
+class StageStats:
+    """Busy time and throughput of one pipeline stage."""
+
+    workers: int
+    busy_seconds: float = 0.0
+    jobs: int = 0
+    errors: int = 0
+
+
+@dataclass
+class PipelineJob:
+    """A claimed job moving through the stages."""
+
+    row: dict[str, Any]  # As returned by claim_next_transcript
+    options: TranscribeOptions
+    audio: Any = None  # Decoded samples (decode -> gpu)
+    raw: dict[str, Any] | None = None  # run_models output (gpu -> post)
+    error: str | None = None
+    stats: metrics.JobStats = field(default_factory=metrics.JobStats)
+
+    @property
+    def id(self) -> str:
+        return str(self.row["id"])
+
+    @contextmanager
+    def traced(self, stage: str) -> Iterator[None]:
+        """Run one stage as a span of the submitting request's trace."""
+        with (
+            tracing.extract(self.row.get("trace_context")),
+            tracing.span(f"pipeline.{stage}", transcript_id=self.id),
+        ):
+            yield
+
+
+class JobPipeline:
+    """Run queued jobs through decode -> GPU -> post-processing stages."""
+
+    def __init__(
+        self,
+        worker_id: str,
+        should_stop: Callable[[], bool] = lambda: False,
+        decode_workers: int | None = None,
+        post_workers: int | None = None,
+        depth: int | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.worker_id = worker_id
+        self.should_stop = should_stop
+        self.decode_workers = decode_workers or settings.pipeline_decode_workers
+        self.post_workers = post_workers or settings.pipeline_post_workers
+        depth = depth or settings.pipeline_depth
+
+        self._gpu_queue: queue.Queue[PipelineJob | None] = queue.Queue(maxsize=depth)
+        self._post_queue: queue.Queue[PipelineJob | None] = queue.Queue(maxsize=depth)
+        self._lock = threading.Lock()
+        self._claimed = 0
+        self._max_jobs: int | None = None
+        self._started = time.monotonic()
+        self._stats = {
+            "decode": StageStats(self.decode_workers),
+            "gpu": StageStats(1),
+            "post": StageStats(self.post_workers),
+        }
+
+    def run(self, max_jobs: int | None = None) -> int:
+        """Process jobs until ``should_stop()`` (or ``max_jobs`` were claimed).
+
+        Runs the GPU stage on the calling thread. Jobs already claimed when
+        stopping are finished before returning.
+
+        Returns:
+            Number of jobs processed (completed or failed).
+        """
+        self._max_jobs = max_jobs
+        self._started = time.monotonic()
+        decoders = [
+            threading.Thread(target=self._decode_loop, name=f"decode-{i}", daemon=True)
+            for i in range(self.decode_workers)
+        ]
+        posters = [
+            threading.Thread(target=self._post_loop, name=f"post-{i}", daemon=True)
+            for i in range(self.post_workers)
+        ]
+        for thread in decoders + posters:
+            thread.start()
+
+        try:
+            self._gpu_loop()
+        finally:
+            for thread in decoders:
+                thread.join()
+            for _ in posters:
+                self._post_queue.put(None)
+            for thread in posters:
+                thread.join()
+            self._log_stats()
+        return self._claimed
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Per-stage occupancy, job counts and queue depths since ``run`` started."""
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        queued = {"decode": 0, "gpu": self._gpu_queue.qsize(), "post": self._post_queue.qsize()}
+        return {
+            name: {
+                "occupancy": stage.busy_seconds / (elapsed * stage.workers),
+                "busy_seconds": stage.busy_seconds,
+                "jobs": stage.jobs,
+                "errors": stage.errors,
+                "queued": queued[name],
+            }
+            for name, stage in self._stats.items()
+        }
+
+    @contextmanager
+    def _timed(self, stage: str) -> Iterator[None]:
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._stats[stage].busy_seconds += time.monotonic() - start
+                self._stats[stage].jobs += 1
+
+    def _count_error(self, stage: str) -> None:
+        with self._lock:
+            self._stats[stage].errors += 1
+
+    def _claim(self) -> dict[str, Any] | None:
+        """Claim the next job, or None if the queue is empty or max_jobs were claimed."""
+        with self._lock:
+            if self._max_jobs is not None and self._claimed >= self._max_jobs:
+                return None
+            # Reserve the slot before claiming so concurrent decoders never overshoot
+            self._claimed += 1
+        row = None
+        try:
+            # The attempt is counted when the GPU stage starts (see _gpu_loop)
+            row = asyncio.run(claim_next_transcript(self.worker_id, count_attempt=False))
+        finally:
+            if row is None:
+                with self._lock:
+                    self._claimed -= 1
+        return row
+
+    def _done_claiming(self) -> bool:
+        with self._lock:
+            limit_reached = self._max_jobs is not None and self._claimed >= self._max_jobs
+        return limit_reached or self.should_stop()
+
+    def _decode_loop(self) -> None:
+        logger = get_logger()
+        poll_interval = get_settings().worker_poll_interval
+        try:
+            while not self._done_claiming():
+                try:
+                    row = self._claim()
+                except Exception:
+                    # A transient database error must not take this decoder down
+                    logger.exception(f"Worker {self.worker_id} failed to claim a job")
+                    time.sleep(poll_interval)
+                    continue
+                if row is None:
+                    time.sleep(poll_interval)
+                    continue
+                logger.info(f"Worker {self.worker_id} claimed job {row['id']}")
+
+                try:
+                    options = TranscribeOptions.from_dict(row["options"])
+                except Exception as e:
+                    logger.exception(f"Job {row['id']} has invalid options")
+                    self._count_error("decode")
+                    job = PipelineJob(row=row, options=TranscribeOptions(), error=str(e))
+                    self._post_queue.put(job)
+                    continue
+
+                job = PipelineJob(row=row, options=options)
+                with self._timed("decode"), job.traced("decode"), metrics.job_stats(job.stats):
+                    try:
+                        job.audio = decode_audio(Path(row["audio_path"]), row["audio_sha256"])
+                    except Exception as e:
+                        job.error = str(e)
+                        self._count_error("decode")
+
+                # Failed jobs skip the GPU and go straight to post-processing
+                (self._post_queue if job.error else self._gpu_queue).put(job)
+        finally:
+            self._gpu_queue.put(None)  # One end marker per decoder
+
+    def _gpu_loop(self) -> None:
+        logger = get_logger()
+        running_decoders = self.decode_workers
+        last_log = time.monotonic()
+        while running_decoders:
+            job = self._gpu_queue.get()
+            if job is None:
+                running_decoders -= 1
+                continue
+
+            def progress(value: float, transcript_id: str = job.id) -> None:
+                asyncio.run(update_transcript(transcript_id, progress=value))
+
+            lost = False
+            with (
+                self._timed("gpu"),
+                job.traced("gpu"),
+                metrics.job_stats(job.stats, peaks=True),
+            ):
+                try:
+                    # Only now does a crash of this worker count against the job
+                    lost = asyncio.run(start_attempt(job.id, self.worker_id)) is None
+                    if not lost:
+                        progress(0.1)
+                        job.raw = run_models(
+                            job.audio,
+                            job.options,
+                            progress,
+                            name=job.id,
+                            job_id=job.id,
+                            checkpoint_key=job.row.get("cache_key") or job.id,
+                        )
+                except Exception as e:
+                    job.error = str(e)
+                    self._count_error("gpu")
+            job.audio = None  # Release the samples before the next job
+            if lost:
+                # Requeued while prefetched: its next owner saves it and needs the audio
+                logger.warning(f"Worker {self.worker_id} no longer holds job {job.id}, dropping it")
+            else:
+                self._post_queue.put(job)
+
+            if time.monotonic() - last_log >= STATS_INTERVAL:
+                self._log_stats()
+                last_log = time.monotonic()
+        logger.debug(f"Worker {self.worker_id} GPU stage drained")
+
+    def _post_loop(self) -> None:
+        # Imported here: worker imports this module for worker_loop
+        from murmurai_server.worker import save_error, save_result
+
+        logger = get_logger()
+        while (job := self._post_queue.get()) is not None:
+            with self._timed("post"), job.traced("post"):
+                attached: list[dict[str, Any]] = []
+                try:
+                    if job.raw is not None:
+                        with metrics.job_stats(job.stats):
+                            result = finish_result(job.raw, job.options)
+                        attached = asyncio.run(
+                            save_result(job.id, result, timings=job.stats.to_dict())
+                        )
+                    else:
+                        attached = asyncio.run(
+                            save_error(
+                                job.id, job.error or "Unknown error", timings=job.stats.to_dict()
+                            )
+                        )
+                except Exception as e:
+                    self._count_error("post")
+                    try:
+                        attached = asyncio.run(
+                            save_error(job.id, str(e), timings=job.stats.to_dict())
+                        )
+                    except Exception:
+                        logger.exception(f"Failed to save error for job {job.id}")
+                finally:
+                    Path(job.row["audio_path"]).unlink(missing_ok=True)
+
+                try:
+                    asyncio.run(enqueue_webhooks([job.row, *attached]))
+                except Exception:
+                    logger.exception(f"Failed to queue webhooks for job {job.id}")
+
+    def _log_stats(self) -> None:
+        stats = self.stats()
+        summary = ", ".join(
+            f"{name} {s['occupancy']:.0%} ({int(s['jobs'])} jobs, {int(s['queued'])} queued)"
+            for name, s in stats.items()
+        )
+        get_logger().info(
+            f"Worker {self.worker_id} pipeline occupancy: {summary}",
+            extra={
+                "pipeline": {
+                    name: {
+                        "occupancy": round(s["occupancy"], 3),
+                        "jobs": int(s["jobs"]),
+                        "queued": int(s["queued"]),
+                    }
+                    for name, s in stats.items()
+                }
+            },
+        )
@@ -1,12 +1,17 @@
 """FastAPI server for MurmurAI transcription."""
 
+import asyncio
+import hashlib
 import logging as stdlib_logging
 import sys
 import tempfile
+import time
 import uuid
 import warnings
-from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+from collections.abc import AsyncGenerator, Iterator
+from contextlib import asynccontextmanager, suppress
+from datetime import UTC, datetime
+from email.utils import format_datetime, parsedate_to_datetime
 from pathlib import Path
 from typing import Annotated, Any
 
@@ -21,7 +26,7 @@ warnings.filterwarnings("ignore", message=".*Lightning automatically upgraded.*"
 stdlib_logging.getLogger("pytorch_lightning").setLevel(stdlib_logging.WARNING)
 stdlib_logging.getLogger("pyannote").setLevel(stdlib_logging.WARNING)
 
-import httpx  # noqa: E402
+import orjson  # noqa: E402
 import torch  # noqa: E402
 from fastapi import (  # noqa: E402
     BackgroundTasks,
@@ -30,29 +35,101 @@ from fastapi import (  # noqa: E402
     File,
     Form,
     HTTPException,
+    Query,
+    Request,
     UploadFile,
 )
-from fastapi.responses import JSONResponse, PlainTextResponse  # noqa: E402
+from fastapi.concurrency import run_in_threadpool  # noqa: E402
+from fastapi.responses import (  # noqa: E402
+    FileResponse,
+    Response,
+    StreamingResponse,
+)
 
+from murmurai_server import metrics, tracing  # noqa: E402
 from murmurai_server.auth import verify_api_key  # noqa: E402
+from murmurai_server.cache import (  # noqa: E402
+    RENDITION_ENCODINGS,
+    cache_stats,
+    cached_pcm,
+    delete_diarization,
+    delete_renditions,
+    get_cached_result,
+    get_rendition,
+    put_rendition,
+    record_inflight_hit,
+    rendition_key,
+    rendition_path,
+    result_cache_key,
+)
 from murmurai_server.config import get_settings  # noqa: E402
 from murmurai_server.database import (  # noqa: E402
+    claim_next_transcript,
     create_transcript,
     delete_transcript,
+    find_inflight_transcript,
+    get_job,
+    get_queue_stats,
+    get_speaker_embeddings,
+    get_speech_regions,
     get_transcript,
+    get_transcript_export,
+    get_transcript_source,
+    get_transcript_version,
+    get_webhook_deliveries,
     init_db,
     list_transcripts,
+    reclaim_expired_leases,
+    renew_lease,
+    resolve_attached_transcripts,
     update_transcript,
 )
+from murmurai_server.exports import (  # noqa: E402
+    EXPORT_FORMATS,
+    ROW_RENDERERS,
+    SubtitleLayout,
+    subtitle_rows,
+)
 from murmurai_server.logging import get_logger, setup_logging  # noqa: E402
 from murmurai_server.models import (  # noqa: E402
+    AlignParams,
+    DiarizeParams,
+    EnrolledSpeaker,
     HealthResponse,
+    HeartbeatRequest,
+    JobFailure,
+    JobLease,
+    JobResult,
+    LeaseRequest,
     Pagination,
     ReadyResponse,
+    SpeakerEnrollment,
+    SpeakerList,
     Transcript,
     TranscriptList,
+    WebhookDeliveryList,
+    transcript_fields,
+)
+from murmurai_server.speakers import (  # noqa: E402
+    decode_embedding,
+    delete_enrollment,
+    enroll,
+    identify,
+    load_index,
+)
+from murmurai_server.transcriber import (  # noqa: E402
+    TranscribeOptions,
+    download_audio,
+    realign,
+    rediarize,
+)
+from murmurai_server.webhooks import delivery_loop, enqueue_webhooks  # noqa: E402
+from murmurai_server.worker import (  # noqa: E402
+    finish_lost_jobs,
+    process_transcription,
+    save_error,
+    save_result,
 )
-from murmurai_server.transcriber import TranscribeOptions, download_audio, transcribe  # noqa: E402
 
 
 @asynccontextmanager
@@ -61,7 +138,11 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     settings = get_settings()
 
     # Setup structured logging
-    setup_logging(log_format=settings.log_format, log_level=settings.log_level)
+    setup_logging(
+        log_format=settings.log_format,
+        log_level=settings.log_level,
+        queue_size=settings.log_queue_size,
+    )
     logger = get_logger()
 
     # Security warning for default API key (print for high visibility)
@@ -92,23 +173,38 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         logger.info(f"Using GPU [{settings.device}]: {torch.cuda.get_device_name(settings.device)}")
 
     await init_db()
+    settings.audio_dir.mkdir(parents=True, exist_ok=True)
+    metrics.start_flusher()
+    tracing.start_exporter()
 
-    # Preload model (takes 30-60s but makes first request fast)
-    from murmurai_server.model_manager import ModelManager
+    # Webhooks of every job are delivered from here, whichever process ran it
+    webhooks = asyncio.create_task(delivery_loop())
 
-    ModelManager.preload()
+    if not settings.embedded_worker:
+        # Jobs run in separate `murmurai worker` processes - nothing to load here
+        logger.info("Embedded worker disabled - jobs are queued for `murmurai worker`")
+    else:
+        # Preload model (takes 30-60s but makes first request fast)
+        from murmurai_server.model_manager import ModelManager
 
-    # Preload alignment models for configured languages
-    if settings.preload_languages:
-        logger.info(f"Preloading alignment models for: {settings.preload_languages}")
-        for lang in settings.preload_languages:
-            try:
-                ModelManager.get_align_model(lang)
-                logger.info(f"  Alignment model loaded: {lang}")
-            except Exception as e:
-                logger.warning(f"  Failed to load alignment model {lang}: {e}")
+        ModelManager.preload()
+
+        # Preload alignment models for configured languages
+        if settings.preload_languages:
+            logger.info(f"Preloading alignment models for: {settings.preload_languages}")
+            for lang in settings.preload_languages:
+                try:
+                    ModelManager.get_align_model(lang)
+                    logger.info(f"  Alignment model loaded: {lang}")
+                except Exception as e:
+                    logger.warning(f"  Failed to load alignment model {lang}: {e}")
 
-    yield
+    try:
+        yield
+    finally:
+        webhooks.cancel()
+        with suppress(asyncio.CancelledError):
+            await webhooks
 
 
 app = FastAPI(
@@ -123,6 +219,8 @@ app = FastAPI(
         "filter": True,  # Enable search filter
     },
 )
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(tracing.TracingMiddleware)  # Outermost: the request ID covers everything
 
 
 # Health endpoints (no auth required)
@@ -148,97 +246,23 @@ def ready() -> dict[str, str]:
     }
 
 
-# Background transcription task
-
-
-def process_transcription(
-    transcript_id: str,
-    audio_path: Path,
-    options: TranscribeOptions,
-    audio_url: str | None,
-    webhook_url: str | None,
-    webhook_auth_header: str | None,
-) -> None:
-    """Background task for transcription processing."""
-    import asyncio
-
-    async def update_progress(progress: float) -> None:
-        await update_transcript(transcript_id, progress=progress)
-
-    def sync_progress_callback(progress: float) -> None:
-        asyncio.run(update_progress(progress))
-
-    try:
-        # Update status to processing
-        asyncio.run(update_transcript(transcript_id, status="processing", progress=0.05))
-
-        # Run transcription pipeline with progress updates
-        result = transcribe(
-            audio_path=audio_path,
-            options=options,
-            progress_callback=sync_progress_callback,
-        )
-
-        # Save completed result
-        asyncio.run(
-            update_transcript(
-                transcript_id,
-                status="completed",
-                text=result["text"],
-                words=result["words"],
-                utterances=result["utterances"],
-                confidence=result["confidence"],
-                audio_duration=result["audio_duration"],
-                language_code=result["language_code"],
-                progress=1.0,
-            )
-        )
-
-        # Send webhook if configured
-        if webhook_url:
-            asyncio.run(send_webhook(transcript_id, webhook_url, webhook_auth_header))
-
-    except Exception as e:
-        # Save error status
-        asyncio.run(
-            update_transcript(
-                transcript_id,
-                status="error",
-                error=str(e),
-                progress=0.0,
-            )
-        )
-
-        # Send webhook even on error
-        if webhook_url:
-            asyncio.run(send_webhook(transcript_id, webhook_url, webhook_auth_header))
-
-    finally:
-        # Cleanup temp file
-        if audio_path and audio_path.exists():
-            audio_path.unlink(missing_ok=True)
-
+# Transcript endpoints (auth required)
 
-async def send_webhook(transcript_id: str, webhook_url: str, auth_header: str | None) -> None:
-    """Send webhook notification with transcript result."""
-    logger = get_logger()
-    try:
-        result = await get_transcript(transcript_id)
-        if not result:
-            return
 
-        headers = {}
-        if auth_header:
-            headers["Authorization"] = auth_header
+def json_response(content: Any, headers: dict[str, str] | None = None) -> Response:
+    """JSON response encoded with orjson (several times faster on large transcripts)."""
+    return Response(orjson.dumps(content), media_type="application/json", headers=headers)
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            await client.post(webhook_url, json=result, headers=headers)
-    except Exception as e:
-        # Log but don't fail on webhook errors
-        logger.warning(f"Webhook failed for {transcript_id}: {e}")
 
+def transcript_response(result: dict[str, Any]) -> Response:
+    """Encode a stored transcript in the ``Transcript`` response shape.
 
-# Transcript endpoints (auth required)
+    Rows are written by our own workers, so pydantic validation is skipped
+    and the fields are just projected, unless ``validate_responses`` is set.
+    """
+    if get_settings().validate_responses:
+        return json_response(Transcript.model_validate(result).model_dump(mode="json"))
+    return json_response(transcript_fields(result))
 
 
 @app.post(
@@ -332,7 +356,10 @@ async def submit_transcript(
     webhook_auth_header: Annotated[
         str | None, Form(description="Webhook Authorization header", examples=[""])
     ] = None,
-) -> dict[str, Any]:
+    webhook_payload: Annotated[
+        str, Form(description="Webhook body: full, summary (no text or words) or id_only")
+    ] = "full",
+) -> dict[str, Any] | Response:
     """Submit a new transcription job.
 
     Accepts either:
@@ -370,8 +397,17 @@ async def submit_transcript(
     # Validate input
     if not file and not audio_url:
         raise HTTPException(status_code=400, detail="Either file or audio_url is required")
+    if webhook_payload not in ("full", "summary", "id_only"):
+        raise HTTPException(
+            status_code=400, detail="webhook_payload must be full, summary or id_only"
+        )
 
     transcript_id = str(uuid.uuid4())
+    settings.audio_dir.mkdir(parents=True, exist_ok=True)
+
+    # Hash the audio while saving it (result cache key)
+    audio_digest = hashlib.sha256()
+    started = time.monotonic()
 
     # Handle file upload
     if file:
@@ -382,30 +418,25 @@ async def submit_transcript(
                 detail=f"File too large. Maximum size: {settings.max_upload_size_mb}MB",
             )
 
-        # Save to temp file
+        # Save to the queue's audio directory (shared with worker processes)
         suffix = Path(file.filename or "audio").suffix or ".mp3"
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-        content = await file.read()
-        temp_file.write(content)
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=settings.audio_dir)
+        while chunk := await file.read(1024 * 1024):
+            audio_digest.update(chunk)
+            temp_file.write(chunk)
         temp_file.close()
         audio_path = Path(temp_file.name)
         audio_url_for_db = f"file://{file.filename}"
+        stage = "upload"
     else:
         # Download from URL (in background task)
         assert audio_url is not None  # Validated above
-        audio_path = await download_audio(audio_url)
+        audio_path = await download_audio(
+            audio_url, directory=settings.audio_dir, digest=audio_digest
+        )
         audio_url_for_db = audio_url
-
-    # Create database record
-    result = await create_transcript(
-        id=transcript_id,
-        audio_url=audio_url_for_db,
-        language=language_code,
-        speaker_labels=speaker_labels,
-        speakers_expected=speakers_expected_int,
-        webhook_url=webhook_url,
-        webhook_auth_header=webhook_auth_header,
-    )
+        stage = "download"
+    stage_seconds = round(time.monotonic() - started, 3)
 
     # Build options (all params already have defaults from Form)
     options = TranscribeOptions(
@@ -444,16 +475,65 @@ async def submit_transcript(
         highlight_words=highlight_words,
     )
 
-    # Queue background task
-    background_tasks.add_task(
-        process_transcription,
-        transcript_id=transcript_id,
-        audio_path=audio_path,
-        options=options,
-        audio_url=audio_url_for_db,
-        webhook_url=webhook_url,
-        webhook_auth_header=webhook_auth_header,
-    )
+    audio_sha256 = audio_digest.hexdigest()
+    cache_key = result_cache_key(audio_sha256, options)
+    record: dict[str, Any] = {
+        "id": transcript_id,
+        "audio_url": audio_url_for_db,
+        "language": language_code,
+        "speaker_labels": speaker_labels,
+        "speakers_expected": speakers_expected_int,
+        "webhook_url": webhook_url,
+        "webhook_auth_header": webhook_auth_header,
+        "webhook_payload": webhook_payload,
+        "options": options.to_dict(),
+        "audio_sha256": audio_sha256,
+        "cache_key": cache_key,
+        "timings": {"stages": {stage: stage_seconds}},
+        "trace_context": tracing.inject(),  # Whoever runs the job continues this trace
+    }
+
+    if settings.result_cache:
+        # Same audio + options transcribed before: complete immediately
+        cached = get_cached_result(cache_key)
+        if cached is not None:
+            audio_path.unlink(missing_ok=True)
+            await create_transcript(**record)
+            await save_result(transcript_id, cached, cache=False)
+            await enqueue_webhooks([{**record, "id": transcript_id}])
+            return transcript_response(await get_transcript(transcript_id) or record)
+
+        # Same audio + options currently running: share its result
+        primary_id = await find_inflight_transcript(cache_key)
+        if primary_id:
+            audio_path.unlink(missing_ok=True)
+            result = await create_transcript(**record, attached_to=primary_id)
+            record_inflight_hit()
+            # The primary may have finished between the lookup and the insert
+            attached = await resolve_attached_transcripts(primary_id)
+            if attached:
+                await enqueue_webhooks(attached)
+                return transcript_response(await get_transcript(transcript_id) or record)
+            return result
+
+    # Create database record (queued job: any worker can claim it from here)
+    result = await create_transcript(**record, audio_path=str(audio_path))
+
+    # Run in this process unless dedicated workers consume the queue
+    if settings.embedded_worker:
+        background_tasks.add_task(
+            process_transcription,
+            transcript_id=transcript_id,
+            audio_path=audio_path,
+            options=options,
+            audio_url=audio_url_for_db,
+            webhook_url=webhook_url,
+            webhook_auth_header=webhook_auth_header,
+            webhook_payload=webhook_payload,
+            cache_key=cache_key,
+            trace_context=record["trace_context"],
+            audio_sha256=audio_sha256,
+        )
 
     return result
 
@@ -463,116 +543,242 @@ async def submit_transcript(
     response_model=Transcript,
     dependencies=[Depends(verify_api_key)],
 )
-async def get_transcript_endpoint(transcript_id: str) -> dict[str, Any]:
+async def get_transcript_endpoint(
+    transcript_id: str,
+    include_timings: Annotated[
+        bool, Query(description="Include per-stage timings and peak memory of the job")
+    ] = False,
+) -> Response:
     """Get transcript status and result."""
-    result = await get_transcript(transcript_id)
+    result = await get_transcript(transcript_id, timings=include_timings)
     if not result:
         raise HTTPException(status_code=404, detail="Transcript not found")
-    return result
+    return transcript_response(result)
+
+
+def _negotiate_encoding(accept_encoding: str) -> str | None:
+    """Preferred stored Content-Encoding the client accepts (None = identity)."""
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for encoding in RENDITION_ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def _not_modified(request: Request, etag: str, last_modified: datetime | None) -> bool:
+    """Evaluate If-None-Match (weak comparison), else If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=UTC)
+        return last_modified <= since
+    return False
+
+
+async def _export_body(
+    transcript_id: str, fmt: str, layout: SubtitleLayout | None = None
+) -> Iterator[bytes]:
+    """Rendered export as byte chunks (stored rows are parsed while iterating)."""
+    if fmt in ("json", "words"):
+        result = await get_transcript(transcript_id)
+        if not result:
+            raise HTTPException(status_code=404, detail="Transcript not found")
+        content = (
+            transcript_fields(result) if fmt == "json" else {"words": result.get("words") or []}
+        )
+        return iter([orjson.dumps(content)])
+
+    export = await get_transcript_export(transcript_id)
+    if not export:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    if fmt == "txt":
+        return iter([(export["text"] or "").encode()])
+    rows = subtitle_rows(export["columns"], layout, export["language_code"])
+    return (chunk.encode() for chunk in ROW_RENDERERS[fmt](rows))
+
+
+async def export_response(
+    transcript_id: str,
+    fmt: str,
+    request: Request,
+    layout_options: dict[str, Any] | None = None,
+) -> Response:
+    """Serve an export of a completed transcript.
+
+    With the rendition cache on, each format is rendered once per transcript
+    version (and subtitle layout) and served from disk (pre-compressed when
+    the client accepts it) with an ETag and Last-Modified. Conditional
+    requests that match get a 304 without the transcript being read at all.
+
+    Args:
+        layout_options: Subtitle layout overrides (None values fall back to
+            the options the transcript was submitted with).
+    """
+    version = await get_transcript_version(transcript_id)
+    if not version:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    if version["status"] != "completed":
+        raise HTTPException(status_code=400, detail="Transcript not ready")
+
+    layout = None
+    variant = fmt
+    if fmt in ("srt", "vtt"):
+        overrides = {k: v for k, v in (layout_options or {}).items() if v is not None}
+        layout = SubtitleLayout.from_options({**version["options"], **overrides})
+        if not layout.is_default:
+            variant = f"{fmt}.{layout.variant()}"
+
+    media_type, attachment = EXPORT_FORMATS[fmt]
+    headers = {}
+    if attachment:
+        headers["Content-Disposition"] = f'attachment; filename="{transcript_id}.{fmt}"'
+
+    if not get_settings().rendition_cache:
+        body = await _export_body(transcript_id, fmt, layout)
+        return StreamingResponse(body, media_type=media_type, headers=headers)
+
+    completed_at = version["completed_at"]
+    # Stages re-run in place (e.g. /align) change the options, maybe not completed_at's second
+    options = orjson.dumps(version["options"], option=orjson.OPT_SORT_KEYS).decode()
+    key = rendition_key(transcript_id, f"{completed_at or ''}:{options}")
+    encoding = _negotiate_encoding(request.headers.get("accept-encoding", ""))
+    etag = f'"{key}-{variant}-{encoding}"' if encoding else f'"{key}-{variant}"'
+    headers["ETag"] = etag
+    headers["Vary"] = "Accept-Encoding"
+    last_modified = None
+    if completed_at:
+        # SQLite datetime('now') is UTC
+        last_modified = datetime.fromisoformat(completed_at).replace(tzinfo=UTC)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    path = get_rendition(transcript_id, key, variant, encoding)
+    if path is None:
+        body = await _export_body(transcript_id, fmt, layout)
+        await run_in_threadpool(put_rendition, transcript_id, key, variant, body)
+        path = rendition_path(transcript_id, key, variant, encoding)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return FileResponse(path, media_type=media_type, headers=headers)
 
 
 @app.get(
     "/v1/transcript/{transcript_id}/srt",
     dependencies=[Depends(verify_api_key)],
 )
-async def get_srt(transcript_id: str) -> PlainTextResponse:
-    """Export transcript as SRT subtitles."""
-    result = await get_transcript(transcript_id)
-    if not result:
-        raise HTTPException(status_code=404, detail="Transcript not found")
-    if result["status"] != "completed":
-        raise HTTPException(status_code=400, detail="Transcript not ready")
-
-    srt_content = generate_srt(result.get("utterances") or [])
-    return PlainTextResponse(srt_content, media_type="text/srt")
+async def get_srt(
+    transcript_id: str,
+    request: Request,
+    max_line_width: Annotated[int | None, Query(ge=1)] = None,
+    max_line_count: Annotated[int | None, Query(ge=1)] = None,
+    highlight_words: bool | None = None,
+) -> Response:
+    """Export transcript as SRT subtitles.
+
+    Layout options default to those the transcript was submitted with.
+    """
+    layout = {
+        "max_line_width": max_line_width,
+        "max_line_count": max_line_count,
+        "highlight_words": highlight_words,
+    }
+    return await export_response(transcript_id, "srt", request, layout)
 
 
 @app.get(
     "/v1/transcript/{transcript_id}/vtt",
     dependencies=[Depends(verify_api_key)],
 )
-async def get_vtt(transcript_id: str) -> PlainTextResponse:
-    """Export transcript as WebVTT subtitles."""
-    result = await get_transcript(transcript_id)
-    if not result:
-        raise HTTPException(status_code=404, detail="Transcript not found")
-    if result["status"] != "completed":
-        raise HTTPException(status_code=400, detail="Transcript not ready")
-
-    vtt_content = generate_vtt(result.get("utterances") or [])
-    return PlainTextResponse(vtt_content, media_type="text/vtt")
+async def get_vtt(
+    transcript_id: str,
+    request: Request,
+    max_line_width: Annotated[int | None, Query(ge=1)] = None,
+    max_line_count: Annotated[int | None, Query(ge=1)] = None,
+    highlight_words: bool | None = None,
+) -> Response:
+    """Export transcript as WebVTT subtitles.
+
+    Layout options default to those the transcript was submitted with.
+    """
+    layout = {
+        "max_line_width": max_line_width,
+        "max_line_count": max_line_count,
+        "highlight_words": highlight_words,
+    }
+    return await export_response(transcript_id, "vtt", request, layout)
 
 
 @app.get(
     "/v1/transcript/{transcript_id}/txt",
     dependencies=[Depends(verify_api_key)],
 )
-async def get_txt(transcript_id: str) -> PlainTextResponse:
+async def get_txt(transcript_id: str, request: Request) -> Response:
     """Export transcript as plain text."""
-    result = await get_transcript(transcript_id)
-    if not result:
-        raise HTTPException(status_code=404, detail="Transcript not found")
-    if result["status"] != "completed":
-        raise HTTPException(status_code=400, detail="Transcript not ready")
-
-    return PlainTextResponse(result.get("text") or "", media_type="text/plain")
+    return await export_response(transcript_id, "txt", request)
 
 
 @app.get(
     "/v1/transcript/{transcript_id}/json",
     dependencies=[Depends(verify_api_key)],
 )
-async def get_json(transcript_id: str) -> JSONResponse:
+async def get_json(transcript_id: str, request: Request) -> Response:
     """Export full transcript as JSON download."""
-    result = await get_transcript(transcript_id)
-    if not result:
-        raise HTTPException(status_code=404, detail="Transcript not found")
-    if result["status"] != "completed":
-        raise HTTPException(status_code=400, detail="Transcript not ready")
-
-    return JSONResponse(
-        content=result,
-        headers={"Content-Disposition": f'attachment; filename="{transcript_id}.json"'},
-    )
+    return await export_response(transcript_id, "json", request)
 
 
 @app.get(
     "/v1/transcript/{transcript_id}/tsv",
     dependencies=[Depends(verify_api_key)],
 )
-async def get_tsv(transcript_id: str) -> PlainTextResponse:
+async def get_tsv(transcript_id: str, request: Request) -> Response:
     """Export transcript as tab-separated values.
 
     Format: start<tab>end<tab>speaker<tab>text
     Times are in milliseconds.
     """
-    result = await get_transcript(transcript_id)
-    if not result:
-        raise HTTPException(status_code=404, detail="Transcript not found")
-    if result["status"] != "completed":
-        raise HTTPException(status_code=400, detail="Transcript not ready")
-
-    tsv_content = generate_tsv(result.get("utterances") or [])
-    return PlainTextResponse(
-        tsv_content,
-        media_type="text/tab-separated-values",
-        headers={"Content-Disposition": f'attachment; filename="{transcript_id}.tsv"'},
-    )
+    return await export_response(transcript_id, "tsv", request)
 
 
 @app.get(
     "/v1/transcript/{transcript_id}/words",
     dependencies=[Depends(verify_api_key)],
 )
-async def get_words(transcript_id: str) -> JSONResponse:
+async def get_words(transcript_id: str, request: Request) -> Response:
     """Export word-level timestamps."""
-    result = await get_transcript(transcript_id)
-    if not result:
-        raise HTTPException(status_code=404, detail="Transcript not found")
-    if result["status"] != "completed":
-        raise HTTPException(status_code=400, detail="Transcript not ready")
+    return await export_response(transcript_id, "words", request)
 
-    return JSONResponse(content={"words": result.get("words") or []})
+
+@app.get(
+    "/v1/transcript/{transcript_id}/webhooks",
+    response_model=WebhookDeliveryList,
+    dependencies=[Depends(verify_api_key)],
+)
+async def get_webhook_deliveries_endpoint(transcript_id: str) -> dict[str, Any]:
+    """Webhook deliveries of a transcript with every attempt (status code, error, duration)."""
+    if await get_job(transcript_id) is None:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    return {"deliveries": await get_webhook_deliveries(transcript_id)}
 
 
 @app.get(
@@ -602,62 +808,305 @@ async def delete_transcript_endpoint(transcript_id: str) -> dict[str, str]:
     deleted = await delete_transcript(transcript_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Transcript not found")
+    delete_renditions(transcript_id)
+    delete_diarization(transcript_id)
     return {"id": transcript_id, "status": "deleted"}
 
 
-# Subtitle generation helpers
+def _require_embedded_worker(operation: str) -> None:
+    """Refuse model work in the API process when jobs run in ``murmurai worker`` only."""
+    if not get_settings().embedded_worker:
+        raise HTTPException(
+            status_code=503,
+            detail=f"{operation} needs the embedded worker (MURMURAI_EMBEDDED_WORKER=true)",
+        )
 
 
-def generate_srt(utterances: list[dict[str, Any]]) -> str:
-    """Generate SRT subtitle format from utterances."""
-    lines = []
-    for i, utterance in enumerate(utterances, 1):
-        start = format_timestamp_srt(utterance["start"])
-        end = format_timestamp_srt(utterance["end"])
-        text = utterance["text"]
-        lines.append(f"{i}\n{start} --> {end}\n{text}\n")
-    return "\n".join(lines)
+@app.post(
+    "/v1/transcript/{transcript_id}/align",
+    response_model=Transcript,
+    dependencies=[Depends(verify_api_key)],
+)
+async def align_transcript(transcript_id: str, request: AlignParams | None = None) -> Response:
+    """Add word timestamps to a completed transcript without running ASR again.
 
+    The stored utterances are aligned against the decoded audio still in the
+    PCM cache, and the transcript is updated in place. The alignment model
+    runs in this process, so this needs the embedded worker.
+    """
+    _require_embedded_worker("Alignment")
+    request = request or AlignParams.model_validate({})
+    source = await get_transcript_source(transcript_id)
+    if not source:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    if source["status"] != "completed":
+        raise HTTPException(status_code=409, detail="Transcript is not completed")
+    audio = cached_pcm(source["audio_sha256"]) if source["audio_sha256"] else None
+    if audio is None:
+        raise HTTPException(
+            status_code=410, detail="Decoded audio is no longer cached, submit the audio again"
+        )
 
-def generate_vtt(utterances: list[dict[str, Any]]) -> str:
-    """Generate WebVTT subtitle format from utterances."""
-    lines = ["WEBVTT\n"]
-    for utterance in utterances:
-        start = format_timestamp_vtt(utterance["start"])
-        end = format_timestamp_vtt(utterance["end"])
-        text = utterance["text"]
-        lines.append(f"{start} --> {end}\n{text}\n")
-    return "\n".join(lines)
+    options = TranscribeOptions.from_dict(
+        {**source["options"], **request.model_dump(), "word_timestamps": True}
+    )
+    result = await run_in_threadpool(
+        realign, audio, source["columns"], source["language_code"], options
+    )
+    await update_transcript(
+        transcript_id,
+        status="completed",
+        text=result["text"],
+        confidence=result.get("confidence"),
+        audio_duration=result["audio_duration"],
+        result_columns=result["columns"],
+        options=options.to_dict(),
+    )
+    delete_renditions(transcript_id)
+    return transcript_response(await get_transcript(transcript_id) or {})
 
 
-def format_timestamp_srt(ms: int) -> str:
-    """Format milliseconds as SRT timestamp (HH:MM:SS,mmm)."""
-    s, ms = divmod(ms, 1000)
-    m, s = divmod(s, 60)
-    h, m = divmod(m, 60)
-    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+@app.post(
+    "/v1/transcript/{transcript_id}/diarize",
+    response_model=Transcript,
+    dependencies=[Depends(verify_api_key)],
+)
+async def diarize_transcript(transcript_id: str, request: DiarizeParams) -> Response:
+    """Assign speakers again with other speaker counts, without ASR or alignment.
 
+    Only the clustering re-runs while the first run's segmentation and
+    embeddings are cached; otherwise the cached decoded audio is diarized.
+    Either runs in this process, so this needs the embedded worker.
+    """
+    _require_embedded_worker("Diarization")
+    source = await get_transcript_source(transcript_id)
+    if not source:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    if source["status"] != "completed":
+        raise HTTPException(status_code=409, detail="Transcript is not completed")
+    if (
+        request.min_speakers
+        and request.max_speakers
+        and request.min_speakers > request.max_speakers
+    ):
+        raise HTTPException(status_code=400, detail="min_speakers is larger than max_speakers")
+
+    options = TranscribeOptions.from_dict(
+        {**source["options"], **request.model_dump(), "speaker_labels": True}
+    )
+    audio = cached_pcm(source["audio_sha256"]) if source["audio_sha256"] else None
+    regions = await get_speech_regions(transcript_id)
+    try:
+        result = await run_in_threadpool(
+            rediarize,
+            transcript_id,
+            source["columns"],
+            source["language_code"],
+            options,
+            audio,
+            regions,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    if result is None:
+        raise HTTPException(
+            status_code=410, detail="Decoded audio is no longer cached, submit the audio again"
+        )
 
-def format_timestamp_vtt(ms: int) -> str:
-    """Format milliseconds as VTT timestamp (HH:MM:SS.mmm)."""
-    s, ms = divmod(ms, 1000)
-    m, s = divmod(s, 60)
-    h, m = divmod(m, 60)
-    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+    embeddings = result.get("speaker_embeddings")
+    identities = embeddings and identify(embeddings, get_settings().speaker_match_threshold)
+    await update_transcript(
+        transcript_id,
+        status="completed",
+        speaker_labels=1,
+        speakers_expected=request.speakers_expected,
+        result_columns=result["columns"],
+        speaker_embeddings=embeddings,
+        speaker_identities=identities or None,
+        options=options.to_dict(),
+    )
+    delete_renditions(transcript_id)
+    return transcript_response(await get_transcript(transcript_id) or {})
 
 
-def generate_tsv(utterances: list[dict[str, Any]]) -> str:
-    """Generate TSV format from utterances.
+@app.post(
+    "/v1/speakers",
+    response_model=EnrolledSpeaker,
+    dependencies=[Depends(verify_api_key)],
+)
+async def enroll_speaker(request: SpeakerEnrollment) -> dict[str, Any]:
+    """Enroll a known speaker; later transcripts name matching voices in ``speaker_identities``."""
+    if (request.embedding is None) == (request.transcript_id is None):
+        raise HTTPException(
+            status_code=400, detail="Provide either embedding or transcript_id and speaker"
+        )
 
-    Format: start<tab>end<tab>speaker<tab>text
-    Times are in milliseconds.
+    if request.embedding is not None:
+        encoded = request.embedding
+    else:
+        embeddings = await get_speaker_embeddings(request.transcript_id or "")
+        if embeddings is None:
+            raise HTTPException(status_code=404, detail="Transcript not found")
+        if not request.speaker or request.speaker not in embeddings:
+            raise HTTPException(
+                status_code=400,
+                detail=f"No embedding for speaker {request.speaker!r} in this transcript",
+            )
+        encoded = embeddings[request.speaker]
+
+    try:
+        return await run_in_threadpool(
+            enroll,
+            request.name,
+            decode_embedding(encoded),
+            transcript_id=request.transcript_id,
+            speaker=request.speaker,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@app.get(
+    "/v1/speakers",
+    response_model=SpeakerList,
+    dependencies=[Depends(verify_api_key)],
+)
+async def list_speakers_endpoint() -> dict[str, Any]:
+    """List enrolled speakers."""
+    _, speakers = load_index()
+    return {"speakers": speakers}
+
+
+@app.delete(
+    "/v1/speakers/{speaker_id}",
+    dependencies=[Depends(verify_api_key)],
+)
+async def delete_speaker_endpoint(speaker_id: str) -> dict[str, str]:
+    """Delete an enrolled speaker."""
+    if not await run_in_threadpool(delete_enrollment, speaker_id):
+        raise HTTPException(status_code=404, detail="Speaker not found")
+    return {"id": speaker_id, "status": "deleted"}
+
+
+@app.get(
+    "/v1/cache/stats",
+    dependencies=[Depends(verify_api_key)],
+)
+async def get_cache_stats() -> dict[str, Any]:
+    """Result cache counters for this API process."""
+    return cache_stats()
+
+
+@app.get(
+    "/metrics",
+    dependencies=[Depends(verify_api_key)],
+    include_in_schema=False,
+)
+async def get_metrics() -> Response:
+    """Prometheus metrics of every process sharing the data directory (see ``metrics``)."""
+    if not get_settings().metrics:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    queue = await get_queue_stats()
+    gauges = [
+        ("murmurai_queue_jobs", {"status": "queued"}, float(queue["queued"])),
+        ("murmurai_queue_jobs", {"status": "processing"}, float(queue["processing"])),
+        ("murmurai_queue_oldest_seconds", {}, float(queue["oldest_queued_seconds"])),
+    ]
+    text = await run_in_threadpool(metrics.render, gauges)
+    return Response(text, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# Internal worker endpoints (remote workers lease jobs from this coordinator)
+
+
+async def get_leased_job(transcript_id: str, worker_id: str) -> dict[str, Any]:
+    """Get a job held by ``worker_id``; 409 if its lease was reclaimed."""
+    job = await get_job(transcript_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != "processing" or job["worker_id"] != worker_id:
+        raise HTTPException(status_code=409, detail="Lease lost")
+    return job
+
+
+@app.post(
+    "/v1/internal/jobs/lease",
+    response_model=JobLease,
+    responses={204: {"description": "Queue is empty"}},
+    dependencies=[Depends(verify_api_key)],
+)
+async def lease_job(request: LeaseRequest) -> Any:
+    """Lease the oldest queued job to a remote worker.
+
+    Jobs whose lease expired (worker stopped sending heartbeats) are returned
+    to the queue first, so they are retried by whichever worker asks next.
     """
-    lines = ["start\tend\tspeaker\ttext"]  # Header
-    for utterance in utterances:
-        start = utterance["start"]
-        end = utterance["end"]
-        speaker = utterance.get("speaker", "")
-        # Escape tabs and newlines in text
-        text = utterance["text"].replace("\t", " ").replace("\n", " ")
-        lines.append(f"{start}\t{end}\t{speaker}\t{text}")
-    return "\n".join(lines)
+    settings = get_settings()
+    _, failed = await reclaim_expired_leases(max_attempts=settings.max_job_attempts)
+    await finish_lost_jobs(failed)
+
+    job = await claim_next_transcript(request.worker_id, lease_seconds=settings.lease_seconds)
+    if job is None:
+        return Response(status_code=204)
+
+    return {
+        "id": job["id"],
+        "options": job["options"],
+        "attempts": job["attempts"],
+        "cache_key": job["cache_key"],
+        "audio_sha256": job["audio_sha256"],
+        "trace_context": job["trace_context"],
+        "lease_seconds": settings.lease_seconds,
+        "audio_url": f"/v1/internal/jobs/{job['id']}/audio",
+        "filename": Path(job["audio_path"]).name,
+    }
+
+
+@app.post(
+    "/v1/internal/jobs/{transcript_id}/heartbeat",
+    dependencies=[Depends(verify_api_key)],
+)
+async def heartbeat_job(transcript_id: str, request: HeartbeatRequest) -> dict[str, str]:
+    """Renew a remote worker's lease and record its progress."""
+    settings = get_settings()
+    if not await renew_lease(transcript_id, request.worker_id, settings.lease_seconds):
+        raise HTTPException(status_code=409, detail="Lease lost")
+    if request.progress is not None:
+        await update_transcript(transcript_id, progress=request.progress)
+    return {"id": transcript_id, "status": "processing"}
+
+
+@app.get(
+    "/v1/internal/jobs/{transcript_id}/audio",
+    dependencies=[Depends(verify_api_key)],
+)
+async def get_job_audio(transcript_id: str, worker_id: str) -> FileResponse:
+    """Stream a leased job's audio to its worker."""
+    job = await get_leased_job(transcript_id, worker_id)
+    return FileResponse(job["audio_path"], media_type="application/octet-stream")
+
+
+@app.post(
+    "/v1/internal/jobs/{transcript_id}/complete",
+    dependencies=[Depends(verify_api_key)],
+)
+async def complete_job(transcript_id: str, request: JobResult) -> dict[str, str]:
+    """Store a remote worker's result and release the job."""
+    job = await get_leased_job(transcript_id, request.worker_id)
+    attached = await save_result(transcript_id, request.result, timings=request.timings)
+    Path(job["audio_path"]).unlink(missing_ok=True)
+    await enqueue_webhooks([job, *attached])
+    return {"id": transcript_id, "status": "completed"}
+
+
+@app.post(
+    "/v1/internal/jobs/{transcript_id}/fail",
+    dependencies=[Depends(verify_api_key)],
+)
+async def fail_job(transcript_id: str, request: JobFailure) -> dict[str, str]:
+    """Record a remote worker's failure and release the job."""
+    job = await get_leased_job(transcript_id, request.worker_id)
+    attached = await save_error(transcript_id, request.error, timings=request.timings)
+    Path(job["audio_path"]).unlink(missing_ok=True)
+    await enqueue_webhooks([job, *attached])
+    return {"id": transcript_id, "status": "error"}
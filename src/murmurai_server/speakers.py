@@ -0,0 +1,191 @@
+"""Speaker embeddings: compact encoding and the index of enrolled speakers.
+
+Embeddings are stored and returned as base64 little-endian float16
+(``encode_embedding``), a fraction of the size of a JSON float list.
+
+Enrolled speakers live in ``data_dir/speakers``. ``speakers.json`` holds
+their metadata and names the matrix file (``embeddings-<suffix>.npy``)
+with one L2-normalised float32 row per enrollment, in the same order.
+Writes go to a new matrix file and then replace ``speakers.json``
+atomically, so readers (memory-mapping the matrix) always see a matching
+pair. Enrollments are serialised per process; concurrent enrollments from
+several API processes can lose one of them.
+
+``identify`` labels a transcript's diarized speakers with the closest
+enrolled names, by batched cosine similarity.
+"""
+
+import base64
+import json
+import os
+import tempfile
+import threading
+import uuid
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from murmurai_server.config import get_settings
+
+EMBEDDING_DTYPE = np.dtype("<f2")
+
+_lock = threading.Lock()
+_loaded: dict[Path, tuple[int, np.ndarray, list[dict[str, Any]]]] = {}
+
+
+def encode_embedding(vector: Any) -> str:
+    """Base64 of the embedding as little-endian float16."""
+    return base64.b64encode(np.asarray(vector, dtype=EMBEDDING_DTYPE).tobytes()).decode()
+
+
+def decode_embedding(text: str) -> np.ndarray:
+    """Inverse of ``encode_embedding`` (as float32). Raises ValueError if malformed."""
+    try:
+        data = base64.b64decode(text, validate=True)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid base64 embedding: {e}") from e
+    if not data or len(data) % EMBEDDING_DTYPE.itemsize:
+        raise ValueError("Embedding must be a non-empty sequence of float16 values")
+    return np.frombuffer(data, dtype=EMBEDDING_DTYPE).astype(np.float32)
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray | None:
+    norm = np.linalg.norm(vector)
+    if not np.isfinite(norm) or norm == 0:
+        return None
+    return (vector / norm).astype(np.float32)
+
+
+def _index_dir() -> Path:
+    return get_settings().data_dir / "speakers"
+
+
+def load_index() -> tuple[np.ndarray, list[dict[str, Any]]]:
+    """Enrolled embeddings (memory-mapped rows) and their metadata, row for row."""
+    directory = _index_dir()
+    meta_path = directory / "speakers.json"
+    for _ in range(3):
+        try:
+            stamp = meta_path.stat().st_mtime_ns
+            cached = _loaded.get(directory)
+            if cached and cached[0] == stamp:
+                return cached[1], cached[2]
+            with open(meta_path) as f:
+                index = json.load(f)
+            matrix = np.load(directory / index["matrix"], mmap_mode="r")
+        except FileNotFoundError:
+            if not meta_path.exists():
+                return np.zeros((0, 0), dtype=np.float32), []
+            continue  # Replaced by a newer generation meanwhile
+        _loaded[directory] = (stamp, matrix, index["speakers"])
+        return matrix, index["speakers"]
+    raise RuntimeError("Speaker index changed while loading, try again")
+
+
+def _write_index(matrix: np.ndarray, speakers: list[dict[str, Any]]) -> None:
+    directory = _index_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    previous = None
+    if (directory / "speakers.json").exists():
+        with open(directory / "speakers.json") as f:
+            previous = json.load(f)["matrix"]
+
+    name = f"embeddings-{uuid.uuid4().hex[:12]}.npy"
+    np.save(directory / name, matrix)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump({"matrix": name, "speakers": speakers}, f)
+    os.replace(tmp, directory / "speakers.json")
+    if previous:
+        (directory / previous).unlink(missing_ok=True)
+
+
+def enroll(
+    name: str, embedding: Any, transcript_id: str | None = None, speaker: str | None = None
+) -> dict[str, Any]:
+    """Add one embedding of a known speaker ``name`` to the index.
+
+    A name can be enrolled several times (e.g. from several calls); a
+    diarized speaker matches the name through its closest enrollment.
+
+    Raises:
+        ValueError: Zero/invalid embedding, or dimensions differing from the index.
+    """
+    vector = _normalize(np.asarray(embedding, dtype=np.float32).ravel())
+    if vector is None:
+        raise ValueError("Embedding is empty or zero")
+
+    with _lock:
+        matrix, speakers = load_index()
+        if speakers and matrix.shape[1] != len(vector):
+            raise ValueError(
+                f"Embedding has {len(vector)} dimensions, enrolled speakers have {matrix.shape[1]}"
+            )
+        entry = {
+            "id": uuid.uuid4().hex,
+            "name": name,
+            "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "transcript_id": transcript_id,
+            "speaker": speaker,
+        }
+        rows = np.vstack([matrix, vector[None, :]]) if speakers else vector[None, :]
+        _write_index(rows, [*speakers, entry])
+    return entry
+
+
+def delete_enrollment(enrollment_id: str) -> bool:
+    """Remove one enrollment. Returns False if it does not exist."""
+    with _lock:
+        matrix, speakers = load_index()
+        keep = [i for i, entry in enumerate(speakers) if entry["id"] != enrollment_id]
+        if len(keep) == len(speakers):
+            return False
+        _write_index(np.asarray(matrix[keep], dtype=np.float32), [speakers[i] for i in keep])
+    return True
+
+
+def identify(embeddings: dict[str, str], threshold: float) -> dict[str, dict[str, Any]]:
+    """Match diarized speakers to enrolled names.
+
+    Args:
+        embeddings: Base64 embedding per diarized label (``SPEAKER_00``, ...).
+        threshold: Minimum cosine similarity for a match.
+
+    Returns:
+        ``{label: {"name", "similarity"}}`` for matched labels. Pairs are
+        taken greedily from the most similar, one name per label and one
+        label per name.
+    """
+    matrix, speakers = load_index()
+    if not speakers or not embeddings:
+        return {}
+
+    labels, rows = [], []
+    for label, text in embeddings.items():
+        vector = _normalize(decode_embedding(text))
+        if vector is not None and len(vector) == matrix.shape[1]:
+            labels.append(label)
+            rows.append(vector)
+    if not rows:
+        return {}
+
+    # Cosine similarity of every label with every enrollment, best enrollment per name
+    scores = np.stack(rows) @ np.asarray(matrix, dtype=np.float32).T
+    names = sorted({entry["name"] for entry in speakers})
+    name_index = np.array([names.index(entry["name"]) for entry in speakers])
+    by_name = np.full((len(labels), len(names)), -np.inf, dtype=np.float32)
+    np.maximum.at(by_name.T, name_index, scores.T)
+
+    matches: dict[str, dict[str, Any]] = {}
+    taken: set[int] = set()
+    for flat in np.argsort(-by_name, axis=None):
+        i, j = divmod(int(flat), len(names))
+        similarity = float(by_name[i, j])
+        if similarity < threshold:
+            break
+        if labels[i] not in matches and j not in taken:
+            matches[labels[i]] = {"name": names[j], "similarity": round(similarity, 4)}
+            taken.add(j)
+    return matches
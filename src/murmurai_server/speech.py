@@ -0,0 +1,72 @@
+"""Speech timeline shared by ASR chunking and diarization.
+
+VAD runs once per job, over the whole recording (``transcriber.run_models``).
+Its speech regions chunk ASR, decide where windows and shards are cut, and
+restrict diarization to speech: the padded regions are joined into one
+compact waveform and the turns found in it are mapped back to recording
+time. The regions are stored with the transcript (``speech_regions``).
+"""
+
+from bisect import bisect_right
+
+import numpy as np
+
+from murmurai_server.cache import SAMPLE_RATE
+from murmurai_server.longform import read_window
+
+Regions = list[tuple[float, float]]
+
+DIARIZE_PADDING = 0.25  # Seconds of context kept on each side of a region for diarization
+
+
+def clip_regions(regions: Regions, start: float, stop: float) -> Regions:
+    """Regions overlapping ``[start, stop)`` seconds, clipped and relative to ``start``."""
+    return [
+        (max(s, start) - start, min(e, stop) - start) for s, e in regions if e > start and s < stop
+    ]
+
+
+def pad_regions(regions: Regions, padding: float, duration: float) -> Regions:
+    """Regions widened by ``padding`` on both sides (within the audio), overlaps merged."""
+    padded: Regions = []
+    for s, e in regions:
+        s, e = max(0.0, s - padding), min(duration, e + padding)
+        if padded and s <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], max(padded[-1][1], e))
+        elif e > s:
+            padded.append((s, e))
+    return padded
+
+
+def _span_samples(spans: Regions) -> list[tuple[int, int]]:
+    return [(round(s * SAMPLE_RATE), round(e * SAMPLE_RATE)) for s, e in spans]
+
+
+def compact_audio(audio: np.ndarray, spans: Regions) -> np.ndarray:
+    """The samples of ``spans`` (seconds) joined end to end."""
+    parts = [read_window(audio, a, b) for a, b in _span_samples(spans)]
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+
+def expand_tracks(
+    tracks: list[tuple[float, float, str]], spans: Regions
+) -> list[tuple[float, float, str]]:
+    """Map (start, end, label) turns on ``compact_audio`` back to recording time.
+
+    A turn crossing the join between two spans is split there.
+    """
+    samples = _span_samples(spans)
+    offsets = [0.0]
+    for a, b in samples:
+        offsets.append(offsets[-1] + (b - a) / SAMPLE_RATE)
+
+    expanded = []
+    for start, end, label in tracks:
+        i = max(0, bisect_right(offsets, start) - 1)
+        while i < len(samples) and offsets[i] < end:
+            lo, hi = max(start, offsets[i]), min(end, offsets[i + 1])
+            if hi > lo:
+                origin = samples[i][0] / SAMPLE_RATE
+                expanded.append((origin + lo - offsets[i], origin + hi - offsets[i], label))
+            i += 1
+    return expanded
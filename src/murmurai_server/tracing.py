@@ -0,0 +1,359 @@
+"""Request tracing.
+
+Every HTTP request gets a request ID (``X-Request-ID`` if the caller sent
+one, echoed in the response) that the log formatters print, and, with
+``tracing`` enabled, a server span continuing the caller's W3C
+``traceparent``. The stage, model-load and database timers of ``metrics``
+open child spans, so one trace shows a job's decode, ASR, alignment,
+diarization, formatting and every query it made.
+
+Jobs leave the request: they are queued in SQLite and run by another
+thread, process or host. ``inject`` captures the request ID and span as a
+carrier stored on the transcript row (``trace_context``), and whoever runs
+the job resumes it with ``extract``.
+
+Spans are plain records kept in this module (no client library). A daemon
+thread (``start_exporter``) writes them every ``trace_flush_interval``
+seconds as OTLP/JSON, one ``ExportTraceServiceRequest`` per line, to
+``data_dir/traces/<host>-<pid>.jsonl`` (the OpenTelemetry Collector's
+``otlpjsonfile`` receiver reads these files), and POSTs the same body to
+``trace_otlp_endpoint`` if set. A file reaching ``trace_file_max_mb`` is
+rotated to ``.jsonl.1`` (replacing the previous one). With tracing off, ``span`` is a no-op and
+only request IDs are propagated.
+"""
+
+import atexit
+import os
+import re
+import secrets
+import socket
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+import orjson
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from murmurai_server.config import get_settings
+from murmurai_server.logging import get_logger, request_id_var
+
+# OTLP span kinds
+INTERNAL = 1
+SERVER = 2
+
+# Spans held for the exporter; beyond this (exporter not keeping up) new spans are dropped
+MAX_BUFFERED_SPANS = 10_000
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+# (trace_id, span_id) of the innermost span, local or remote
+_current: ContextVar[tuple[str, str] | None] = ContextVar("current_span", default=None)
+_lock = threading.Lock()
+_finished: list["Span"] = []
+_dropped = 0
+_exporter: threading.Thread | None = None
+
+
+@dataclass
+class Span:
+    """One timed operation in a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    kind: int = INTERNAL
+    attributes: dict[str, Any] = field(default_factory=dict)
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int = 0
+    error: str | None = None
+
+    def to_otlp(self) -> dict[str, Any]:
+        """The span in the OTLP/JSON encoding."""
+        span: dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _attributes(self.attributes),
+            "status": {"code": 2, "message": self.error} if self.error is not None else {},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def enabled() -> bool:
+    return get_settings().tracing
+
+
+def _attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            encoded.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            encoded.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            encoded.append({"key": key, "value": {"doubleValue": value}})
+        elif value is not None:
+            encoded.append({"key": key, "value": {"stringValue": str(value)}})
+    return encoded
+
+
+def _child_span(name: str, kind: int = INTERNAL, **attributes: Any) -> Span:
+    """A new span under the current one (or the root of a new trace)."""
+    parent = _current.get()
+    return Span(
+        name=name,
+        trace_id=parent[0] if parent else secrets.token_hex(16),
+        span_id=secrets.token_hex(8),
+        parent_id=parent[1] if parent else None,
+        kind=kind,
+        attributes=attributes,
+    )
+
+
+def _end(span: Span) -> None:
+    """End ``span`` and queue it for export."""
+    global _dropped
+    span.end_ns = time.time_ns()
+    with _lock:
+        if len(_finished) < MAX_BUFFERED_SPANS:
+            _finished.append(span)
+        else:
+            _dropped += 1
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Record the block as a span (child of the current one). No-op with tracing off."""
+    if not enabled():
+        yield None
+        return
+    current = _child_span(name, **attributes)
+    token = _current.set((current.trace_id, current.span_id))
+    try:
+        yield current
+    except Exception as e:
+        current.error = str(e) or type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        _end(current)
+
+
+def traceparent() -> str | None:
+    """W3C ``traceparent`` of the current span, if any."""
+    current = _current.get()
+    return f"00-{current[0]}-{current[1]}-01" if current else None
+
+
+def inject() -> dict[str, str] | None:
+    """Carrier for resuming the current request ID and span elsewhere (see ``extract``)."""
+    carrier = {}
+    if (request_id := request_id_var.get()) is not None:
+        carrier["request_id"] = request_id
+    if (parent := traceparent()) is not None:
+        carrier["traceparent"] = parent
+    return carrier or None
+
+
+def _parse_traceparent(value: str | None) -> tuple[str, str] | None:
+    match = _TRACEPARENT.match(value or "")
+    if not match or match[1] == "0" * 32 or match[2] == "0" * 16:
+        return None
+    return match[1], match[2]
+
+
+@contextmanager
+def extract(carrier: dict[str, str] | None) -> Iterator[None]:
+    """Resume the request ID and span captured by ``inject`` for the block."""
+    carrier = carrier or {}
+    request_token = request_id_var.set(carrier.get("request_id"))
+    span_token = _current.set(_parse_traceparent(carrier.get("traceparent")))
+    try:
+        yield
+    finally:
+        _current.reset(span_token)
+        request_id_var.reset(request_token)
+
+
+def _process_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def export_request(spans: list[Span]) -> dict[str, Any]:
+    """An OTLP ``ExportTraceServiceRequest`` (JSON encoding) for ``spans``."""
+    resource = {
+        "service.name": "murmurai",
+        "host.name": socket.gethostname(),
+        "process.pid": os.getpid(),
+    }
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _attributes(resource)},
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "murmurai_server"},
+                        "spans": [s.to_otlp() for s in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+def _traces_dir() -> Path:
+    return get_settings().data_dir / "traces"
+
+
+def _append(directory: Path, line: bytes, max_bytes: int) -> None:
+    """Append to this process's trace file, rotating it first if it would exceed ``max_bytes``."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{_process_name()}.jsonl"
+    try:
+        full = path.stat().st_size + len(line) > max_bytes
+    except FileNotFoundError:
+        full = False
+    if full:
+        path.replace(path.with_name(f"{path.name}.1"))
+    with open(path, "ab") as f:
+        f.write(line)
+
+
+def flush(directory: Path | None = None) -> int:
+    """Export the finished spans of this process. Returns how many were written."""
+    global _dropped
+    with _lock:
+        spans = _finished[:]
+        _finished.clear()
+        dropped, _dropped = _dropped, 0
+    if dropped:
+        get_logger().warning(f"Dropped {dropped} trace spans (exporter falling behind)")
+    if not spans:
+        return 0
+
+    settings = get_settings()
+    body = orjson.dumps(export_request(spans))
+    if settings.trace_file_max_mb > 0:
+        _append(directory or _traces_dir(), body + b"\n", settings.trace_file_max_mb * 1024 * 1024)
+    if settings.trace_otlp_endpoint:
+        try:
+            httpx.post(
+                settings.trace_otlp_endpoint,
+                content=body,
+                headers={"Content-Type": "application/json"},
+                timeout=10.0,
+            ).raise_for_status()
+        except httpx.HTTPError as e:
+            get_logger().debug(f"Could not send traces to {settings.trace_otlp_endpoint}: {e}")
+    return len(spans)
+
+
+def start_exporter() -> None:
+    """Export spans every ``trace_flush_interval`` seconds (once per process)."""
+    global _exporter
+    settings = get_settings()
+    if not settings.tracing or _exporter is not None:
+        return
+
+    directory = _traces_dir()
+
+    def run() -> None:
+        while True:
+            time.sleep(settings.trace_flush_interval)
+            try:
+                flush(directory)
+            except Exception as e:
+                get_logger().debug(f"Could not write traces: {e}")
+
+    _exporter = threading.Thread(target=run, name="trace-export", daemon=True)
+    _exporter.start()
+    atexit.register(flush, directory)
+
+
+def _reset() -> None:
+    global _exporter, _dropped
+    _finished.clear()
+    _dropped = 0
+    _exporter = None
+
+
+# Forked workers export their own spans, not the parent's again
+os.register_at_fork(after_in_child=_reset)
+
+
+class TracingMiddleware:
+    """Give each request an ID (``X-Request-ID``) and a server span.
+
+    The span continues an incoming ``traceparent`` and ends with the response
+    body, so work in background tasks run after the response is not counted
+    in the request's duration (it is still part of the trace).
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64]
+        request_id = request_id or secrets.token_hex(4)
+        carrier = {"request_id": request_id}
+        if b"traceparent" in headers:
+            carrier["traceparent"] = headers[b"traceparent"].decode("latin-1")
+
+        with extract(carrier):
+            server_span = _child_span("HTTP", SERVER) if enabled() else None
+            if server_span is not None:
+                _current.set((server_span.trace_id, server_span.span_id))  # Reset by extract
+            status = 500
+
+            def finish() -> None:
+                nonlocal server_span
+                if server_span is None:
+                    return
+                route = getattr(scope.get("route"), "path", "unmatched")
+                server_span.name = f"{scope['method']} {route}"
+                server_span.attributes.update(
+                    {
+                        "http.request.method": scope["method"],
+                        "http.route": route,
+                        "http.response.status_code": status,
+                        "murmurai.request_id": request_id,
+                    }
+                )
+                if status >= 500:
+                    server_span.error = f"HTTP {status}"
+                _end(server_span)
+                server_span = None
+
+            async def send_with_request_id(message: Message) -> None:
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-request-id", request_id.encode("latin-1")),
+                    ]
+                await send(message)
+                if message["type"] == "http.response.body" and not message.get("more_body"):
+                    finish()
+
+            try:
+                await self.app(scope, receive, send_with_request_id)
+            finally:
+                finish()
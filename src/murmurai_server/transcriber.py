@@ -1,17 +1,20 @@
 """Transcription pipeline wrapper."""
 
+import copy
 import ipaddress
 import os
 import shutil
 import socket
 import tempfile
-from dataclasses import dataclass
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, fields
 from pathlib import Path
 from typing import Any
 from urllib.parse import urlparse
 
 import httpx
-import pandas as pd
+import numpy as np
 
 # SSRF Protection: Block internal/private IP ranges and metadata endpoints
 BLOCKED_HOSTS = {
@@ -101,10 +104,39 @@ def _ensure_ffmpeg() -> None:
 _ensure_ffmpeg()
 
 import murmurai as murmurai_core  # type: ignore[import-untyped]  # noqa: E402
-
+from murmurai.diarize import Segment as SegmentX  # type: ignore[import-untyped]  # noqa: E402
+from murmurai.vads import Pyannote, Silero, Vad  # type: ignore[import-untyped]  # noqa: E402
+from murmurai.vads.pyannote import Binarize  # type: ignore[import-untyped]  # noqa: E402
+
+from murmurai_server import metrics  # noqa: E402
+from murmurai_server.cache import (  # noqa: E402
+    SAMPLE_RATE,
+    get_checkpoint,
+    get_diarization,
+    load_pcm,
+    put_checkpoint,
+    put_diarization,
+)
+from murmurai_server.columnar import TranscriptColumns  # noqa: E402
 from murmurai_server.config import get_settings  # noqa: E402
+from murmurai_server.diarization import ArtifactHook, recluster  # noqa: E402
 from murmurai_server.logging import get_logger  # noqa: E402
+from murmurai_server.longform import (  # noqa: E402
+    SpeakerRegistry,
+    choose_cut,
+    offset_segments,
+    read_window,
+)
 from murmurai_server.model_manager import ModelManager  # noqa: E402
+from murmurai_server.speakers import encode_embedding  # noqa: E402
+from murmurai_server.speech import (  # noqa: E402
+    DIARIZE_PADDING,
+    Regions,
+    clip_regions,
+    compact_audio,
+    expand_tracks,
+    pad_regions,
+)
 
 
 @dataclass
@@ -162,6 +194,16 @@ class TranscribeOptions:
     max_line_count: int | None = None
     highlight_words: bool = False
 
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize options for persistence in the job queue."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "TranscribeOptions":
+        """Rebuild options from a persisted dict, ignoring unknown keys."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
     def has_custom_asr_options(self) -> bool:
         """Check if any ASR options differ from defaults."""
         return (
@@ -231,35 +273,111 @@ class TranscribeOptions:
         }
 
 
-def convert_pyannote_to_murmurai(diarization: Any) -> pd.DataFrame:
-    """Convert pyannote Annotation to diarize_segments format.
-
-    Args:
-        diarization: pyannote.core.Annotation or pyannote 4.x DiarizeOutput.
-
-    Returns:
-        pandas DataFrame with columns: start, end, speaker
+@dataclass
+class SpeakerTurns:
+    """Diarization turns as parallel arrays, sorted by start time."""
+
+    starts: np.ndarray  # float64 seconds
+    ends: np.ndarray  # float64 seconds
+    speakers: np.ndarray  # int index into labels
+    labels: list[str]  # Sorted speaker labels
+
+    @classmethod
+    def from_diarization(cls, diarization: Any) -> "SpeakerTurns":
+        """Build from a pyannote.core.Annotation or pyannote 4.x DiarizeOutput."""
+        # pyannote 4.x returns DiarizeOutput, extract the annotation
+        annotation = getattr(diarization, "speaker_diarization", diarization)
+        tracks = [
+            (turn.start, turn.end, speaker)
+            for turn, _, speaker in annotation.itertracks(yield_label=True)
+        ]
+        return cls.from_tracks(tracks)
+
+    @classmethod
+    def from_tracks(cls, tracks: list[tuple[float, float, str]]) -> "SpeakerTurns":
+        """Build from (start, end, speaker) tuples."""
+        labels = sorted({speaker for _, _, speaker in tracks})
+        index = {label: i for i, label in enumerate(labels)}
+        starts = np.array([t[0] for t in tracks], dtype=np.float64)
+        ends = np.array([t[1] for t in tracks], dtype=np.float64)
+        speakers = np.array([index[t[2]] for t in tracks], dtype=np.int64)
+
+        order = np.argsort(starts, kind="stable")
+        return cls(starts[order], ends[order], speakers[order], labels)
+
+
+def _dominant_speakers(turns: SpeakerTurns, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Speaker index with the largest total overlap for each interval (-1 = no overlap).
+
+    Candidate turns for an interval are found with two binary searches: turns
+    starting before its end (``starts`` are sorted) and, via the running
+    maximum of turn ends, turns that may still be open at its start. Only
+    those (interval, turn) pairs are materialized. Ties go to the lowest
+    label, like the pandas groupby in ``murmurai_core.assign_word_speakers``.
     """
-    # pyannote 4.x returns DiarizeOutput, extract the annotation
-    annotation = getattr(diarization, "speaker_diarization", diarization)
+    result = np.full(len(starts), -1, dtype=np.int64)
+    if not len(turns.starts) or not len(starts):
+        return result
+
+    running_end = np.maximum.accumulate(turns.ends)
+    lo = np.searchsorted(running_end, starts, side="right")
+    hi = np.searchsorted(turns.starts, ends, side="left")
+    counts = np.maximum(hi - lo, 0)
+
+    # One row per candidate (interval, turn) pair
+    item = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    turn = np.repeat(lo, counts) + offsets
+
+    overlap = np.minimum(turns.ends[turn], ends[item]) - np.maximum(
+        turns.starts[turn], starts[item]
+    )
+    hit = overlap > 0
+    item, speaker, overlap = item[hit], turns.speakers[turn[hit]], overlap[hit]
+    if not len(item):
+        return result
+
+    # Total overlap per (interval, speaker), summed in turn order
+    keys, inverse = np.unique(item * len(turns.labels) + speaker, return_inverse=True)
+    totals = np.bincount(inverse, weights=overlap)
+    key_item, key_speaker = np.divmod(keys, len(turns.labels))
+
+    # Per interval: largest total first, lowest speaker index on ties
+    order = np.lexsort((key_speaker, -totals, key_item))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = key_item[order][1:] != key_item[order][:-1]
+    best = order[first]
+    result[key_item[best]] = key_speaker[best]
+    return result
+
+
+def assign_speakers(turns: SpeakerTurns, result: dict[str, Any]) -> dict[str, Any]:
+    """Label segments and timed words with the speaker they overlap most.
+
+    Vectorized equivalent of ``murmurai_core.assign_word_speakers`` (without
+    ``fill_nearest``): every segment and word is matched against all turns
+    at once instead of scanning a DataFrame per word.
+    """
+    segments = result["segments"]
+    words = [w for seg in segments for w in seg.get("words", ()) if "start" in w]
 
-    segments = []
-    for turn, _, speaker in annotation.itertracks(yield_label=True):
-        segments.append(
-            {
-                "start": turn.start,
-                "end": turn.end,
-                "speaker": speaker,
-            }
-        )
-    return pd.DataFrame(segments)
+    items = segments + words
+    starts = np.array([item["start"] for item in items], dtype=np.float64)
+    ends = np.array([item["end"] for item in items], dtype=np.float64)
 
+    for item, speaker in zip(items, _dominant_speakers(turns, starts, ends).tolist()):
+        if speaker >= 0:
+            item["speaker"] = turns.labels[speaker]
+    return result
 
-async def download_audio(url: str) -> Path:
+
+async def download_audio(url: str, directory: Path | None = None, digest: Any = None) -> Path:
     """Download audio from URL to temporary file with streaming.
 
     Args:
         url: URL to download audio from.
+        directory: Directory for the downloaded file (system temp dir if None).
+        digest: Optional hashlib object updated with the downloaded bytes.
 
     Returns:
         Path to the downloaded temporary file.
@@ -280,8 +398,10 @@ async def download_audio(url: str) -> Path:
             suffix = url_path.suffix if url_path.suffix else ".mp3"
 
             # Create temp file and stream content
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=directory)
             async for chunk in response.aiter_bytes():
+                if digest is not None:
+                    digest.update(chunk)
                 temp_file.write(chunk)
             temp_file.close()
 
@@ -292,23 +412,92 @@ def transcribe(
     audio_path: Path,
     options: TranscribeOptions,
     progress_callback: Any = None,
+    job_id: str | None = None,
+    checkpoint_key: str | None = None,
+    audio_sha256: str | None = None,
 ) -> dict[str, Any]:
     """Run transcription pipeline.
 
+    Equivalent to ``decode_audio`` -> ``run_models`` -> ``finish_result``;
+    queue workers run those stages on separate threads (see ``pipeline``).
+
     Args:
         audio_path: Path to audio file.
         options: Transcription options.
         progress_callback: Optional callback(progress: float) for progress updates.
+        job_id: Transcript ID (see ``run_models``).
+        checkpoint_key: Key of the job's stage checkpoints (see ``run_models``).
+        audio_sha256: Digest of the audio file, if already known (see ``decode_audio``).
 
     Returns:
         Formatted transcript result with words and utterances.
     """
+    audio = decode_audio(audio_path, audio_sha256)
+
+    if progress_callback:
+        progress_callback(0.1)  # Audio loaded
+
+    raw = run_models(
+        audio,
+        options,
+        progress_callback,
+        name=audio_path.name,
+        job_id=job_id,
+        checkpoint_key=checkpoint_key,
+    )
+    return finish_result(raw, options, progress_callback)
+
+
+def decode_audio(audio_path: Path, audio_sha256: str | None = None) -> np.ndarray:
+    """Decode audio to 16 kHz mono float32 (memory-mapped from the PCM cache if enabled).
+
+    ``audio_sha256`` (hashed by the API on upload) keys the PCM cache without
+    reading the file again.
+    """
+    with metrics.timer("murmurai_stage_duration_seconds", stage="decode"):
+        if get_settings().pcm_cache:
+            audio: np.ndarray = load_pcm(audio_path, audio_sha256)
+        else:
+            audio = murmurai_core.load_audio(str(audio_path))
+    if (job := metrics.current_job()) is not None:
+        job.audio_seconds = round(len(audio) / SAMPLE_RATE, 3)
+    return audio
+
+
+def run_models(
+    audio: np.ndarray,
+    options: TranscribeOptions,
+    progress_callback: Any = None,
+    name: str = "audio",
+    job_id: str | None = None,
+    checkpoint_key: str | None = None,
+) -> dict[str, Any]:
+    """Run ASR, alignment and diarization (the GPU stage) on decoded audio.
+
+    With a ``checkpoint_key`` (and ``checkpoints`` enabled) the output of
+    each stage is stored as it finishes, and stages already checkpointed
+    under that key are skipped, so a retried job resumes at the stage that
+    failed. Windowed recordings (see ``longform``) are not checkpointed.
+
+    Args:
+        audio: Decoded audio from ``decode_audio``.
+        options: Transcription options.
+        progress_callback: Optional callback(progress: float) for progress updates.
+        name: Label for log messages.
+        job_id: Transcript ID, to keep diarization intermediates for ``rediarize``.
+        checkpoint_key: Key of the job's stage checkpoints (its result cache key).
+
+    Returns:
+        Raw pipeline output for ``finish_result``: the murmurai result dict,
+        detected language and speaker embeddings (when diarized).
+    """
     settings = get_settings()
     logger = get_logger()
+    started = time.perf_counter()
 
     # Log job start
     logger.info(
-        f"Job started: {audio_path.name}",
+        f"Job started: {name}",
         extra={
             "language": options.language or "auto-detect",
             "speaker_labels": options.speaker_labels,
@@ -335,22 +524,23 @@ def transcribe(
                 f"  VAD: onset={vad_options.get('vad_onset')}, offset={vad_options.get('vad_offset')}"
             )
 
+    checkpoint = checkpoint_key if settings.checkpoints else None
+    asr_checkpoint = get_checkpoint(checkpoint, "transcribe") if checkpoint else None
+    if asr_checkpoint:
+        logger.info(f"Resuming {name} from checkpoints")
+
     # Get model (fast path if defaults, slow path if custom options)
-    model = ModelManager.get_model(
-        asr_options=asr_options,
-        vad_options=vad_options,
-        vad_method=options.vad_method,
-    )
+    model = None
+    if asr_checkpoint is None:
+        model = ModelManager.get_model(
+            asr_options=asr_options,
+            vad_options=vad_options,
+            vad_method=options.vad_method,
+        )
 
     # Use request language, fall back to config default, then auto-detect
     effective_language = options.language or settings.language
 
-    # Load audio
-    audio = murmurai_core.load_audio(str(audio_path))
-
-    if progress_callback:
-        progress_callback(0.1)  # Audio loaded
-
     # Build transcription kwargs (only runtime params supported by transcribe())
     transcribe_kwargs: dict[str, Any] = {
         "batch_size": settings.batch_size,
@@ -363,8 +553,27 @@ def transcribe(
     if options.chunk_size != 30:
         transcribe_kwargs["chunk_size"] = options.chunk_size
 
-    # Transcribe (ASR/VAD options are baked into the model)
-    result = model.transcribe(audio, **transcribe_kwargs)
+    if asr_checkpoint is not None:
+        regions = [(s, e) for s, e in asr_checkpoint["speech_regions"]]
+        result = asr_checkpoint["result"]
+    else:
+        # Speech regions: VAD runs once, for ASR chunking and diarization (see ``speech``)
+        regions = speech_regions(model, audio, options.chunk_size)
+
+        # Long recordings are processed window by window (see ``longform``)
+        window = settings.window_seconds * SAMPLE_RATE
+        if window and len(audio) > window + settings.window_search_seconds * SAMPLE_RATE:
+            raw = _run_windowed(
+                model, audio, regions, options, transcribe_kwargs, progress_callback
+            )
+            _observe_realtime_factor(started, audio)
+            return {**raw, "speech_regions": _rounded(regions)}
+
+        # Transcribe (ASR/VAD options are baked into the model)
+        with metrics.timer("murmurai_stage_duration_seconds", stage="asr"):
+            result = _transcribe(model, audio, regions, options, transcribe_kwargs)
+        if checkpoint:
+            put_checkpoint(checkpoint, "transcribe", {"result": result, "speech_regions": regions})
 
     if progress_callback:
         progress_callback(0.5)  # Transcription done
@@ -374,168 +583,510 @@ def transcribe(
 
     # Align for word-level timestamps (if enabled)
     if options.word_timestamps:
-        align_model, metadata = ModelManager.get_align_model(detected_language)
-        result = murmurai_core.align(
+        aligned = get_checkpoint(checkpoint, "align") if checkpoint else None
+        if aligned is not None:
+            result = aligned["result"]
+        else:
+            result = _align(result, audio, detected_language, options)
+            if checkpoint:
+                put_checkpoint(checkpoint, "align", {"result": result})
+
+    if progress_callback:
+        progress_callback(0.8)  # Alignment done
+
+    # Speaker diarization (if requested)
+    speaker_embeddings = None
+    if options.speaker_labels:
+        min_spk, max_spk = _speaker_range(options)
+        diarized = get_checkpoint(checkpoint, "diarize") if checkpoint else None
+        if diarized is not None:
+            tracks = [(s, e, label) for s, e, label in diarized["tracks"]]
+            embeddings = {
+                label: np.asarray(vector, dtype=np.float32)
+                for label, vector in diarized["embeddings"].items()
+            }
+        else:
+            # Embeddings are always kept: they identify enrolled speakers (see ``speakers``)
+            tracks, embeddings = _diarize(
+                audio, regions, options, min_spk, max_spk, return_embeddings=True, job_id=job_id
+            )
+            if checkpoint:
+                put_checkpoint(checkpoint, "diarize", {"tracks": tracks, "embeddings": embeddings})
+        speaker_embeddings = embeddings or None
+
+        # Assign each segment and word the speaker it overlaps most
+        result = assign_speakers(SpeakerTurns.from_tracks(tracks), result)
+
+    if progress_callback:
+        progress_callback(0.95)  # Diarization done
+
+    if asr_checkpoint is None:
+        _observe_realtime_factor(started, audio)
+    return {
+        "result": result,
+        "language": detected_language,
+        "speaker_embeddings": speaker_embeddings,
+        "speech_regions": _rounded(regions),
+    }
+
+
+def _observe_realtime_factor(started: float, audio: np.ndarray) -> None:
+    """Record model-stage seconds per second of audio since ``started``."""
+    if len(audio):
+        elapsed = time.perf_counter() - started
+        metrics.observe("murmurai_realtime_factor", elapsed / (len(audio) / SAMPLE_RATE))
+
+
+def _rounded(regions: Regions) -> list[list[float]]:
+    return [[round(s, 3), round(e, 3)] for s, e in regions]
+
+
+def _speaker_range(options: TranscribeOptions) -> tuple[int | None, int | None]:
+    """Min/max speakers for diarization (``speakers_expected`` fills both)."""
+    min_spk = options.min_speakers
+    max_spk = options.max_speakers
+    if options.speakers_expected is not None:
+        min_spk = min_spk or options.speakers_expected
+        max_spk = max_spk or options.speakers_expected
+    return min_spk, max_spk
+
+
+def _align(
+    result: dict[str, Any], audio: np.ndarray, language: str, options: TranscribeOptions
+) -> dict[str, Any]:
+    align_model, metadata = ModelManager.get_align_model(language)
+    with metrics.timer("murmurai_stage_duration_seconds", stage="align"):
+        aligned: dict[str, Any] = murmurai_core.align(
             result["segments"],
             align_model,
             metadata,
             audio,
-            device="cuda",
+            device=get_settings().device_type,
             return_char_alignments=options.return_char_alignments,
             interpolate_method=options.interpolate_method,
         )
+    return aligned
 
-    if progress_callback:
-        progress_callback(0.8)  # Alignment done
 
-    # Speaker diarization (if requested)
-    speaker_embeddings = None
-    if options.speaker_labels:
-        diarize_pipeline = ModelManager.get_diarize_model(options.diarize_model)
+def _diarize(
+    audio: np.ndarray,
+    regions: Regions,
+    options: TranscribeOptions,
+    min_speakers: int | None,
+    max_speakers: int | None,
+    return_embeddings: bool,
+    job_id: str | None = None,
+) -> tuple[list[tuple[float, float, str]], dict[str, Any]]:
+    """Diarize ``audio``: speaker turns as (start, end, label) and each label's embedding.
+
+    With ``diarize_speech_only`` the pipeline only hears the padded speech
+    ``regions``, joined end to end; turns are mapped back to ``audio`` time.
+    With a ``job_id`` (and ``diarization_cache``), the segmentation and
+    embeddings are kept for ``rediarize``.
+    """
+    settings = get_settings()
+    speech_only = settings.diarize_speech_only
+    spans = None
+    if speech_only:
+        spans = pad_regions(regions, DIARIZE_PADDING, len(audio) / SAMPLE_RATE)
+        if not spans:
+            return [], {}
+        audio = compact_audio(audio, spans)
+
+    diarize_pipeline = ModelManager.get_diarize_model(options.diarize_model)
+
+    # Pass waveform dict to avoid file re-read
+    # pyannote 4.x expects torch Tensor, murmurai returns numpy array
+    import torch
+
+    waveform = torch.from_numpy(audio[None, :])
+    hook = ArtifactHook() if job_id and settings.diarization_cache else None
+    with metrics.timer("murmurai_stage_duration_seconds", stage="diarize"):
+        diarization = diarize_pipeline(
+            {"waveform": waveform, "sample_rate": SAMPLE_RATE},
+            min_speakers=min_speakers,
+            max_speakers=max_speakers,
+            return_embeddings=return_embeddings,
+            **({"hook": hook} if hook else {}),
+        )
+    if hook and job_id and (arrays := hook.arrays(spans)) is not None:
+        put_diarization(job_id, arrays)
 
-        # Determine min/max speakers
-        min_spk = options.min_speakers
-        max_spk = options.max_speakers
-        if options.speakers_expected is not None:
-            min_spk = min_spk or options.speakers_expected
-            max_spk = max_spk or options.speakers_expected
+    # pyannote 4.x returns DiarizeOutput, extract the annotation
+    annotation = getattr(diarization, "speaker_diarization", diarization)
+    tracks = [
+        (turn.start, turn.end, label) for turn, _, label in annotation.itertracks(yield_label=True)
+    ]
+    if spans is not None:
+        tracks = expand_tracks(tracks, spans)
+    return tracks, _speaker_embeddings(diarization)
+
+
+def _speaker_embeddings(diarization: Any) -> dict[str, Any]:
+    """Embedding per speaker label of a diarization output."""
+    if isinstance(getattr(diarization, "embeddings", None), dict):
+        return dict(diarization.embeddings)
+    # pyannote 4.x: one row per label, in ``labels()`` order
+    annotation = getattr(diarization, "speaker_diarization", diarization)
+    embeddings = getattr(diarization, "speaker_embeddings", None)
+    if embeddings is None:
+        return {}
+    return {label: embeddings[i] for i, label in enumerate(annotation.labels())}
 
-        # Pass waveform dict to avoid file re-read
-        # pyannote 4.x expects torch Tensor, murmurai returns numpy array
-        import torch
 
-        waveform = torch.from_numpy(audio[None, :])
-        diarization = diarize_pipeline(
-            {"waveform": waveform, "sample_rate": 16000},
-            min_speakers=min_spk,
-            max_speakers=max_spk,
-            return_embeddings=options.return_speaker_embeddings,
+class _TimelineVad(Vad):
+    """Stands in for a model's VAD in ``transcribe``, answering with known regions."""
+
+    def __init__(self, regions: Regions):
+        self.regions = regions
+
+    def __call__(self, audio: Any, **kwargs: Any) -> list[Any]:
+        return [SegmentX(s, e, "UNKNOWN") for s, e in self.regions]
+
+    @staticmethod
+    def preprocess_audio(audio: Any) -> None:
+        return None  # The regions are already known
+
+    @staticmethod
+    def merge_chunks(segments: Any, chunk_size: int, onset: float, offset: float | None) -> Any:
+        return Vad.merge_chunks(segments, chunk_size, onset, offset) if segments else []
+
+
+def speech_regions(model: Any, audio: np.ndarray, chunk_size: int) -> Regions:
+    """Speech regions of ``audio`` in seconds, as the model's VAD finds them.
+
+    These are the regions ``model.transcribe`` merges into ASR chunks:
+    Silero's segments, or pyannote's frame scores binarized with the
+    model's onset/offset and ``chunk_size`` as the longest region.
+    """
+    vad = model.vad_model
+    preprocess = vad.preprocess_audio if isinstance(vad, Vad) else Pyannote.preprocess_audio
+    output = vad({"waveform": preprocess(audio), "sample_rate": SAMPLE_RATE})
+    if not isinstance(vad, Silero):
+        binarize = Binarize(
+            max_duration=chunk_size,
+            onset=model._vad_params["vad_onset"],
+            offset=model._vad_params["vad_offset"],
         )
+        output = binarize(output).get_timeline()
+    return [(float(segment.start), float(segment.end)) for segment in output]
 
-        # Extract speaker embeddings if requested
-        if options.return_speaker_embeddings and hasattr(diarization, "embeddings"):
-            speaker_embeddings = {
-                speaker: emb.tolist() for speaker, emb in diarization.embeddings.items()
-            }
 
-        # Convert pyannote output to murmurai format
-        diarize_segments = convert_pyannote_to_murmurai(diarization)
-        result = murmurai_core.assign_word_speakers(diarize_segments, result)
+def _transcribe_regions(
+    model: Any, audio: np.ndarray, regions: Regions, transcribe_kwargs: dict[str, Any]
+) -> dict[str, Any]:
+    """``model.transcribe`` chunked from ``regions`` instead of running VAD again.
 
-    if progress_callback:
-        progress_callback(0.95)  # Diarization done
+    The cached model is shared by concurrent jobs, so the VAD is swapped on
+    a shallow copy (same weights) rather than on the model itself.
+    """
+    job_model = copy.copy(model)
+    job_model.vad_model = _TimelineVad(regions)
+    result: dict[str, Any] = job_model.transcribe(audio, **transcribe_kwargs)
+    return result
 
-    formatted = format_result(
-        result,
-        detected_language,
-        speaker_embeddings,
-        speaker_labels=options.speaker_labels,
-        word_timestamps=options.word_timestamps,
+
+def _transcribe(
+    model: Any,
+    audio: np.ndarray,
+    regions: Regions,
+    options: TranscribeOptions,
+    transcribe_kwargs: dict[str, Any],
+) -> dict[str, Any]:
+    """Transcribe ``audio`` (speech ``regions``), split across model replicas if long.
+
+    With ``shard_replicas`` > 1, audio longer than ``shard_min_seconds`` is
+    cut at pauses into one shard per replica. The shards are transcribed in
+    parallel threads (ctranslate2 and torch release the GIL) and their
+    segments joined in order at recording time.
+    """
+    settings = get_settings()
+    if settings.shard_replicas < 2 or len(audio) <= settings.shard_min_seconds * SAMPLE_RATE:
+        return _transcribe_regions(model, audio, regions, transcribe_kwargs)
+
+    replicas = ModelManager.get_replicas(
+        asr_options=options.build_asr_options(),
+        vad_options=options.build_vad_options(),
+        vad_method=options.vad_method,
+    )
+    # Detect once, on the first 30 s as an unsharded run would
+    language = transcribe_kwargs["language"] or replicas[0].detect_language(
+        read_window(audio, 0, min(len(audio), 30 * SAMPLE_RATE))
     )
+    kwargs = {**transcribe_kwargs, "language": language}
+    bounds = _shard_bounds(len(audio), regions, len(replicas))
+    get_logger().debug(f"  ASR in {len(bounds)} shards across {len(replicas)} replicas")
+
+    def run(replica: Any, start: int, stop: int) -> list[dict[str, Any]]:
+        offset = start / SAMPLE_RATE
+        shard_regions = clip_regions(regions, offset, stop / SAMPLE_RATE)
+        result = _transcribe_regions(
+            replica, read_window(audio, start, stop), shard_regions, kwargs
+        )
+        return offset_segments(result["segments"], offset)
+
+    with ThreadPoolExecutor(len(replicas), thread_name_prefix="shard") as pool:
+        parts = pool.map(run, replicas, *zip(*bounds, strict=True))
+        segments = [segment for part in parts for segment in part]
+    return {"segments": segments, "language": language}
+
+
+def _shard_bounds(total: int, regions: Regions, shards: int) -> list[tuple[int, int]]:
+    """Sample ranges of ``shards`` near-equal shards of ``total`` samples, cut in pauses.
+
+    Each cut is the pause ``choose_cut`` picks in a ``window_search_seconds``
+    span centred on the equal split point.
+    """
+    search = get_settings().window_search_seconds * SAMPLE_RATE
+    cuts = [0]
+    for k in range(1, shards):
+        begin = max(cuts[-1], total * k // shards - search // 2)
+        end = min(total, begin + search)
+        span = clip_regions(regions, begin / SAMPLE_RATE, end / SAMPLE_RATE)
+        cuts.append(begin + int(choose_cut(span, (end - begin) / SAMPLE_RATE) * SAMPLE_RATE))
+    cuts.append(total)
+    return [(start, stop) for start, stop in zip(cuts, cuts[1:], strict=False) if stop > start]
+
+
+def _run_windowed(
+    model: Any,
+    audio: np.ndarray,
+    regions: Regions,
+    options: TranscribeOptions,
+    transcribe_kwargs: dict[str, Any],
+    progress_callback: Any = None,
+) -> dict[str, Any]:
+    """``run_models`` for long audio: one window at a time, cut at pauses.
+
+    Each window is read from disk, transcribed, aligned and diarized on its
+    own; segments are shifted to recording time and concatenated, and
+    window speakers are reconciled through their embeddings.
+    """
+    settings = get_settings()
+    logger = get_logger()
+    total = len(audio)
+    window = settings.window_seconds * SAMPLE_RATE
+    search = settings.window_search_seconds * SAMPLE_RATE
+    _, max_spk = _speaker_range(options)
+    registry = SpeakerRegistry(settings.window_speaker_distance)
+
+    segments: list[dict[str, Any]] = []
+    tracks: list[tuple[float, float, str]] = []
+    language = None
+    start = 0
+    while start < total:
+        stop = start + window
+        if stop + search >= total:
+            stop = total
+        else:
+            span = clip_regions(regions, (stop - search) / SAMPLE_RATE, stop / SAMPLE_RATE)
+            stop = stop - search + int(choose_cut(span, search / SAMPLE_RATE) * SAMPLE_RATE)
+
+        samples = read_window(audio, start, stop)
+        offset = start / SAMPLE_RATE
+        window_regions = clip_regions(regions, offset, stop / SAMPLE_RATE)
+        logger.debug(f"  Window {offset:.0f}s-{stop / SAMPLE_RATE:.0f}s")
+
+        with metrics.timer("murmurai_stage_duration_seconds", stage="asr"):
+            result = _transcribe(model, samples, window_regions, options, transcribe_kwargs)
+        if language is None:
+            # Later windows reuse the first window's language
+            language = result["language"]
+            transcribe_kwargs = {**transcribe_kwargs, "language": language}
+        if options.word_timestamps and result["segments"]:
+            result = _align(result, samples, language, options)
+
+        if options.speaker_labels:
+            # min_speakers applies to the recording, not to every window
+            window_tracks, embeddings = _diarize(
+                samples, window_regions, options, None, max_spk, return_embeddings=True
+            )
+            durations: dict[str, float] = {}
+            for s, e, label in window_tracks:
+                durations[label] = durations.get(label, 0.0) + e - s
+            mapping = registry.match(embeddings, durations)
+            tracks.extend((s + offset, e + offset, mapping[label]) for s, e, label in window_tracks)
+
+        segments.extend(offset_segments(result["segments"], offset))
+        del samples
+        start = stop
+        if progress_callback:
+            progress_callback(0.1 + 0.85 * stop / total)
+
+    result = {"segments": segments}
+    speaker_embeddings = None
+    if options.speaker_labels:
+        final = registry.merge_down(max_spk)
+        turns = SpeakerTurns.from_tracks([(s, e, final[label]) for s, e, label in tracks])
+        result = assign_speakers(turns, result)
+        speaker_embeddings = registry.embeddings() or None
+
+    return {
+        "result": result,
+        "language": language,
+        "speaker_embeddings": speaker_embeddings,
+    }
+
+
+def finish_result(
+    raw: dict[str, Any],
+    options: TranscribeOptions,
+    progress_callback: Any = None,
+) -> dict[str, Any]:
+    """Format the output of ``run_models`` into the API transcript shape (CPU only)."""
+    result = raw["result"]
+    with metrics.timer("murmurai_stage_duration_seconds", stage="format"):
+        formatted = format_result(
+            result,
+            raw["language"],
+            raw["speaker_embeddings"],
+            speaker_labels=options.speaker_labels,
+            word_timestamps=options.word_timestamps,
+        )
+    if raw.get("speech_regions") is not None:
+        formatted["speech_regions"] = raw["speech_regions"]
 
     if progress_callback:
         progress_callback(1.0)  # Complete
 
-    # Log job completion
+    # Log job completion (with the job's timings when a worker tracks them)
     segment_count = len(result.get("segments", []))
-    word_count = len(formatted.get("words", []))
-    logger.info(
+    word_count = len(formatted["columns"]["words"]["text"])
+    job = metrics.current_job()
+    get_logger().info(
         f"Job completed: {segment_count} segments, {word_count} words",
         extra={
             "segments": segment_count,
             "words": word_count,
-            "language": detected_language,
+            "language": raw["language"],
+            **({"timings": job.to_dict()} if job is not None else {}),
         },
     )
 
     return formatted
 
 
+def realign(
+    audio: np.ndarray, columns: TranscriptColumns, language: str, options: TranscribeOptions
+) -> dict[str, Any]:
+    """Run only the alignment stage again on a stored transcript.
+
+    The stored utterances are the segments to align, so ASR is not repeated.
+    Speakers are re-assigned from the stored utterance turns, since
+    alignment may split segments.
+
+    Args:
+        audio: Decoded audio the transcript was made from.
+        columns: Stored transcript columns.
+        language: Language of the transcript (selects the alignment model).
+        options: Options with the alignment settings to use.
+
+    Returns:
+        Formatted transcript, as ``format_result`` (without embeddings).
+    """
+    segments = [
+        {"text": s["text"], "start": s["start"], "end": s["end"]} for s in columns.segments()
+    ]
+    result = _align({"segments": segments}, audio, language, options)
+
+    tracks = [(s["start"], s["end"], s["speaker"]) for s in columns.segments() if "speaker" in s]
+    if tracks:
+        result = assign_speakers(SpeakerTurns.from_tracks(tracks), result)
+    return format_result(result, language, speaker_labels=bool(tracks), word_timestamps=True)
+
+
+def rediarize(
+    job_id: str,
+    columns: TranscriptColumns,
+    language: str,
+    options: TranscribeOptions,
+    audio: np.ndarray | None,
+    regions: Regions | None,
+) -> dict[str, Any] | None:
+    """Diarize a stored transcript again (new speaker counts in ``options``).
+
+    Only the clustering re-runs when the job's diarization intermediates are
+    still cached (see ``diarization``). Otherwise the decoded ``audio`` is
+    diarized again, which still skips ASR and alignment.
+
+    Returns:
+        Formatted transcript with speaker embeddings, as ``format_result``,
+        or None if neither the intermediates nor the audio are available.
+
+    Raises:
+        ValueError: The recording was processed in windows (see ``longform``).
+    """
+    settings = get_settings()
+    min_spk, max_spk = _speaker_range(options)
+    arrays = get_diarization(job_id) if settings.diarization_cache else None
+    if arrays is not None:
+        pipeline = ModelManager.get_diarize_model(options.diarize_model)
+        tracks, embeddings = recluster(pipeline, arrays, min_spk, max_spk)
+    elif audio is None:
+        return None
+    else:
+        window = settings.window_seconds * SAMPLE_RATE
+        if window and len(audio) > window + settings.window_search_seconds * SAMPLE_RATE:
+            raise ValueError("Recordings processed in windows cannot be diarized again")
+        if regions is None:
+            regions = [(0.0, len(audio) / SAMPLE_RATE)]  # Stored before speech regions
+        tracks, embeddings = _diarize(
+            audio, regions, options, min_spk, max_spk, return_embeddings=True, job_id=job_id
+        )
+
+    segments = columns.segments()
+    for segment in segments:
+        segment.pop("speaker", None)  # Segments no new turn overlaps get no speaker
+    result = assign_speakers(SpeakerTurns.from_tracks(tracks), {"segments": segments})
+    return format_result(
+        result,
+        language,
+        embeddings or None,
+        speaker_labels=True,
+        word_timestamps=len(columns.word_text) > 0,
+    )
+
+
 def format_result(
     result: dict[str, Any],
     language: str,
-    speaker_embeddings: dict[str, list[float]] | None = None,
+    speaker_embeddings: dict[str, Any] | None = None,
     speaker_labels: bool = False,
     word_timestamps: bool = False,
 ) -> dict[str, Any]:
-    """Format result to API response format.
+    """Format result for storage.
+
+    Words and utterances are kept as columns (see ``TranscriptColumns``) and
+    expanded to the API's word/utterance dicts when the transcript is read.
 
     Args:
         result: Raw result with segments.
         language: Detected/specified language code.
-        speaker_embeddings: Optional speaker embedding vectors.
+        speaker_embeddings: Optional embedding vector per speaker label, stored
+            as base64 float16 (``speakers.encode_embedding``).
         speaker_labels: Whether speaker diarization was requested.
         word_timestamps: Whether word-level timestamps were requested.
 
     Returns:
-        Formatted transcript with words and utterances.
+        Formatted transcript with text, metrics and ``columns``.
     """
-    words: list[dict[str, Any]] = []
-    utterances: list[dict[str, Any]] = []
-
-    for segment in result.get("segments", []):
-        # Only include speaker if diarization was requested
-        speaker = segment.get("speaker") if speaker_labels else None
-        utterance_words: list[dict[str, Any]] = []
-
-        for word in segment.get("words", []):
-            word_data: dict[str, Any] = {
-                "text": word.get("word", ""),
-                "start": int(word.get("start", 0) * 1000),  # Convert to ms
-                "end": int(word.get("end", 0) * 1000),
-                "confidence": word.get("score", 0.0),
-            }
-            # Only include speaker if diarization was requested and speaker exists
-            if speaker:
-                word_data["speaker"] = speaker
-            words.append(word_data)
-            utterance_words.append(word_data)
-
-        # Build utterance from segment
-        utterance: dict[str, Any] = {
-            "text": segment.get("text", "").strip(),
-            "start": int(segment.get("start", 0) * 1000),
-            "end": int(segment.get("end", 0) * 1000),
-            "words": utterance_words,
-        }
-
-        # Only include speaker if diarization was requested and speaker exists
-        if speaker:
-            utterance["speaker"] = speaker
-
-        # Only include confidence if we have word-level data
-        if utterance_words:
-            utterance["confidence"] = sum(w["confidence"] for w in utterance_words) / len(
-                utterance_words
-            )
-
-        utterances.append(utterance)
-
-    # Calculate overall metrics
-    full_text = " ".join(s.get("text", "").strip() for s in result.get("segments", []))
-
-    # Audio duration: use word-level if available, otherwise use utterance end times
-    if words:
-        audio_duration = max((w["end"] for w in words), default=0)
-    elif utterances:
-        audio_duration = max((u["end"] for u in utterances), default=0)
-    else:
-        audio_duration = 0
+    columns = TranscriptColumns.from_segments(result.get("segments", []), speaker_labels)
 
     formatted: dict[str, Any] = {
-        "text": full_text,
-        "words": words,
-        "utterances": utterances,
-        "audio_duration": audio_duration,
+        "text": columns.text,
+        "columns": columns.to_dict(),
+        "audio_duration": columns.audio_duration,
         "language_code": language,
     }
 
     # Only include confidence if we have word-level data
-    if words:
-        formatted["confidence"] = sum(w["confidence"] for w in words) / len(words)
+    if columns.confidence is not None:
+        formatted["confidence"] = columns.confidence
 
     # Include speaker embeddings if available
     if speaker_embeddings:
-        formatted["speaker_embeddings"] = speaker_embeddings
+        formatted["speaker_embeddings"] = {
+            speaker: encode_embedding(vector) for speaker, vector in speaker_embeddings.items()
+        }
 
     return formatted
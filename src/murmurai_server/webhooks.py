@@ -0,0 +1,220 @@
+"""Webhook outbox and delivery loop.
+
+Workers used to POST the webhook themselves when a job finished, holding
+the inference thread for up to the client timeout and giving up after one
+failure. Now finishing a job only inserts a row into the
+``webhook_deliveries`` table (``enqueue_webhooks``); ``delivery_loop``,
+running in the API process, sends them from one pooled HTTP client.
+
+Each delivery is claimed atomically (``database.claim_webhook_delivery``),
+so several API processes can poll the same outbox. Failed attempts (network
+errors and non-2xx responses) are retried with exponential backoff and
+jitter until ``webhook_max_attempts``. At most ``webhook_concurrency``
+deliveries are in flight per process, and at most
+``webhook_host_concurrency`` per receiving host, so one slow receiver
+cannot hold every slot. Every attempt is recorded, and
+``GET /v1/transcript/{id}/webhooks`` shows the history.
+
+With ``webhook_secret`` set, each request carries
+``X-MurmurAI-Timestamp`` and ``X-MurmurAI-Signature: sha256=<hex>``, the
+HMAC-SHA256 of ``<timestamp>.<body>`` (see ``signature_headers``).
+Delivery is at least once: receivers can deduplicate on
+``X-MurmurAI-Delivery``.
+
+The body depends on the job's ``webhook_payload``: ``full`` (the whole
+transcript, as ``GET /v1/transcript/{id}`` returns it), ``summary`` (status
+and metadata, no text or words) or ``id_only``; receivers of the smaller
+payloads fetch the transcript when they need it. With ``webhook_gzip`` set,
+full payloads are sent with ``Content-Encoding: gzip`` (the signature is over
+the uncompressed body). Each attempt records its ``bytes_sent``.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import hmac
+import random
+import time
+from collections import Counter
+from functools import partial
+from typing import Any
+from urllib.parse import urlparse
+
+import httpx
+import orjson
+
+from murmurai_server import metrics
+from murmurai_server.config import get_settings
+from murmurai_server.database import (
+    claim_webhook_delivery,
+    get_transcript,
+    get_transcript_summary,
+    queue_webhook_deliveries,
+    record_webhook_attempt,
+)
+from murmurai_server.logging import get_logger
+from murmurai_server.models import transcript_fields
+
+
+async def enqueue_webhooks(jobs: list[dict[str, Any]]) -> None:
+    """Queue a notification for every job in ``jobs`` that has a webhook configured."""
+    await queue_webhook_deliveries(
+        [
+            {
+                "transcript_id": job["id"],
+                "url": job["webhook_url"],
+                "host": urlparse(job["webhook_url"]).netloc,
+                "auth_header": job["webhook_auth_header"],
+                "payload": job.get("webhook_payload") or "full",
+            }
+            for job in jobs
+            if job["webhook_url"]
+        ]
+    )
+
+
+def signature_headers(body: bytes, secret: str, timestamp: int | None = None) -> dict[str, str]:
+    """HMAC-SHA256 signature headers for a delivery body."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256)
+    return {
+        "X-MurmurAI-Timestamp": str(timestamp),
+        "X-MurmurAI-Signature": f"sha256={digest.hexdigest()}",
+    }
+
+
+async def payload_body(delivery: dict[str, Any]) -> bytes | None:
+    """The JSON body for a delivery's payload mode, or None if the transcript is gone."""
+    if delivery["payload"] == "id_only":
+        content = await get_transcript_summary(delivery["transcript_id"])
+        if content is not None:
+            content = {"id": content["id"], "status": content["status"]}
+    elif delivery["payload"] == "summary":
+        content = await get_transcript_summary(delivery["transcript_id"])
+    else:
+        content = await get_transcript(delivery["transcript_id"])
+        if content is not None:
+            content = transcript_fields(content)
+    return orjson.dumps(content) if content is not None else None
+
+
+def retry_delay(attempt: int) -> float:
+    """Seconds before the attempt after ``attempt`` (1-based): doubling, capped, jittered."""
+    settings = get_settings()
+    delay = min(
+        settings.webhook_retry_max_seconds,
+        settings.webhook_retry_base_seconds * 2 ** (attempt - 1),
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def deliver(client: httpx.AsyncClient, delivery: dict[str, Any]) -> str:
+    """Make one attempt at a claimed delivery and record it.
+
+    Returns:
+        The delivery's new status (``delivered``, ``pending`` or ``failed``).
+    """
+    settings = get_settings()
+    attempt = delivery["attempts"] + 1
+    status_code = None
+    error = None
+    bytes_sent = None
+    started = time.monotonic()
+
+    body = await payload_body(delivery)
+    if body is None:
+        error = "Transcript was deleted"
+    else:
+        headers = {
+            "Content-Type": "application/json",
+            "X-MurmurAI-Delivery": str(delivery["id"]),
+        }
+        if delivery["auth_header"]:
+            headers["Authorization"] = delivery["auth_header"]
+        if settings.webhook_secret:
+            headers.update(signature_headers(body, settings.webhook_secret))
+        if settings.webhook_gzip and delivery["payload"] == "full":
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        bytes_sent = len(body)
+        try:
+            response = await client.post(delivery["url"], content=body, headers=headers)
+            status_code = response.status_code
+            if not response.is_success:
+                error = f"HTTP {status_code}"
+        except httpx.HTTPError as e:
+            error = str(e) or type(e).__name__
+
+    if error is None:
+        status = "delivered"
+    elif body is None or attempt >= settings.webhook_max_attempts:
+        status = "failed"
+        get_logger().warning(
+            f"Webhook for {delivery['transcript_id']} failed after {attempt} attempts: {error}"
+        )
+    else:
+        status = "pending"
+        get_logger().debug(f"Webhook for {delivery['transcript_id']} failed: {error}")
+
+    elapsed = time.monotonic() - started
+    metrics.observe("murmurai_stage_duration_seconds", elapsed, stage="webhook")
+    await record_webhook_attempt(
+        delivery["id"],
+        attempt,
+        status,
+        status_code=status_code,
+        error=error,
+        duration_ms=int(elapsed * 1000),
+        bytes_sent=bytes_sent,
+        retry_in=retry_delay(attempt) if status == "pending" else None,
+    )
+    return status
+
+
+async def delivery_loop() -> None:
+    """Deliver due webhooks until cancelled (runs for the lifetime of the API process).
+
+    Deliveries in flight when the loop is cancelled stay claimed until their
+    lease runs out, and are then attempted again.
+    """
+    settings = get_settings()
+    logger = get_logger()
+    lease = settings.webhook_timeout * 2
+    limits = httpx.Limits(
+        max_connections=settings.webhook_concurrency,
+        max_keepalive_connections=settings.webhook_concurrency,
+    )
+    in_flight: set[asyncio.Task] = set()
+    per_host: Counter[str] = Counter()
+
+    def done(task: asyncio.Task, host: str) -> None:
+        in_flight.discard(task)
+        per_host[host] -= 1
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Webhook delivery crashed: {task.exception()}")
+
+    async with httpx.AsyncClient(timeout=settings.webhook_timeout, limits=limits) as client:
+        try:
+            while True:
+                try:
+                    while len(in_flight) < settings.webhook_concurrency:
+                        saturated = [
+                            host
+                            for host, count in per_host.items()
+                            if count >= settings.webhook_host_concurrency
+                        ]
+                        delivery = await claim_webhook_delivery(lease, exclude_hosts=saturated)
+                        if delivery is None:
+                            break
+                        host = delivery["host"]
+                        per_host[host] += 1
+                        task = asyncio.create_task(deliver(client, delivery))
+                        in_flight.add(task)
+                        task.add_done_callback(partial(done, host=host))
+                except Exception as e:
+                    logger.warning(f"Webhook outbox unavailable: {e}")
+                await asyncio.sleep(settings.webhook_poll_interval)
+        finally:
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
@@ -0,0 +1,586 @@
+"""Transcription job execution and queue-consuming worker processes.
+
+Jobs are persisted by the API as ``queued`` transcripts (options + audio path)
+and claimed atomically from SQLite. They run either inside the API process
+(``embedded_worker=True``, via FastAPI background tasks) or in dedicated
+``murmurai worker`` processes.
+
+``murmurai worker --processes N`` forks N supervised children. On CPU the
+parent loads models once through ``ModelManager`` first, so the children
+inherit the weights copy-on-write and RAM grows by per-job working memory
+only. On CUDA (contexts do not survive fork()) every child loads its own.
+Crashed children are restarted and their jobs retried.
+"""
+
+import asyncio
+import gc
+import os
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+import orjson
+
+from murmurai_server import metrics, tracing
+from murmurai_server.cache import delete_checkpoints, put_cached_result
+from murmurai_server.config import get_settings
+from murmurai_server.database import (
+    claim_next_transcript,
+    claim_transcript,
+    get_job,
+    init_db,
+    requeue_worker_jobs,
+    resolve_attached_transcripts,
+    update_transcript,
+)
+from murmurai_server.logging import get_logger, setup_logging, shutdown_logging
+from murmurai_server.pipeline import JobPipeline
+from murmurai_server.speakers import identify
+from murmurai_server.transcriber import TranscribeOptions, transcribe
+from murmurai_server.webhooks import enqueue_webhooks
+
+# Set in forked children so SIGTERM finishes the current job before exiting
+_stopping = False
+
+
+def process_transcription(
+    transcript_id: str,
+    audio_path: Path,
+    options: TranscribeOptions,
+    audio_url: str | None,
+    webhook_url: str | None,
+    webhook_auth_header: str | None,
+    webhook_payload: str | None = None,
+    claimed: bool = False,
+    worker_id: str | None = None,
+    cache_key: str | None = None,
+    trace_context: dict[str, str] | None = None,
+    audio_sha256: str | None = None,
+) -> None:
+    """Run a transcription job and persist the result.
+
+    Args:
+        claimed: True if the caller already claimed the job from the queue.
+            Otherwise it is claimed here, and skipped if another worker won.
+        worker_id: Identifier recorded on the transcript while processing;
+            defaults to this process's ``worker_id_for`` identity.
+        cache_key: The job's result cache key, which also keys its stage
+            checkpoints (so a resubmission after an error resumes too).
+        trace_context: The submitting request's ``tracing.inject()`` carrier;
+            the job's logs and spans continue its request ID and trace.
+        audio_sha256: Digest of the audio file, computed on upload.
+    """
+    worker_id = worker_id or worker_id_for(os.getpid())
+    with (
+        tracing.extract(trace_context),
+        tracing.span("job", transcript_id=transcript_id, worker_id=worker_id),
+    ):
+
+        async def update_progress(progress: float) -> None:
+            await update_transcript(transcript_id, progress=progress)
+
+        def sync_progress_callback(progress: float) -> None:
+            asyncio.run(update_progress(progress))
+
+        if not claimed and not asyncio.run(claim_transcript(transcript_id, worker_id)):
+            get_logger().debug(f"Job {transcript_id} already claimed by another worker")
+            return
+
+        stats = metrics.JobStats()
+        try:
+            # Update status to processing
+            asyncio.run(update_transcript(transcript_id, status="processing", progress=0.05))
+
+            # Run transcription pipeline with progress updates
+            with metrics.job_stats(stats, peaks=True):
+                result = transcribe(
+                    audio_path=audio_path,
+                    options=options,
+                    progress_callback=sync_progress_callback,
+                    job_id=transcript_id,
+                    checkpoint_key=cache_key or transcript_id,
+                    audio_sha256=audio_sha256,
+                )
+
+            # Save completed result (and hand it to identical submissions waiting on it)
+            attached = asyncio.run(save_result(transcript_id, result, timings=stats.to_dict()))
+
+        except Exception as e:
+            # Save error status
+            attached = asyncio.run(save_error(transcript_id, str(e), timings=stats.to_dict()))
+
+        finally:
+            # Cleanup audio file
+            if audio_path and audio_path.exists():
+                audio_path.unlink(missing_ok=True)
+
+        # Queue webhooks if configured (on success and on error), delivered by the API process
+        job = {
+            "id": transcript_id,
+            "webhook_url": webhook_url,
+            "webhook_auth_header": webhook_auth_header,
+            "webhook_payload": webhook_payload,
+        }
+        asyncio.run(enqueue_webhooks([job, *attached]))
+
+
+async def save_result(
+    transcript_id: str,
+    result: dict[str, Any],
+    cache: bool = True,
+    timings: dict[str, Any] | None = None,
+) -> list[dict[str, Any]]:
+    """Persist a completed transcription result (as returned by ``transcribe``).
+
+    Words and utterances are stored once, as columns; ``get_transcript``
+    expands them to the API shape. Diarized speakers are matched against the
+    enrolled speakers here (``speakers.identify``), so an enrollment applies
+    to every job saved after it.
+
+    The result is also stored in the result cache (unless ``cache`` is False,
+    e.g. when it came from the cache) and copied to transcripts that attached
+    to this job while it was running. The job's stage checkpoints are no
+    longer needed and are deleted. ``timings`` (``JobStats.to_dict()``) is
+    merged into the transcript's stored timings.
+
+    Returns:
+        The attached transcripts that were completed (for webhook delivery).
+    """
+    if "columns" in result:
+        content = {"result_columns": result["columns"]}
+    else:
+        # Results in the API shape (workers from before columnar results)
+        content = {"words": result["words"], "utterances": result["utterances"]}
+    if result.get("speech_regions") is not None:
+        content["speech_regions"] = result["speech_regions"]
+    if result.get("speaker_embeddings"):
+        content["speaker_embeddings"] = result["speaker_embeddings"]
+        content["speaker_identities"] = (
+            identify(result["speaker_embeddings"], get_settings().speaker_match_threshold) or None
+        )
+
+    with metrics.timer("murmurai_stage_duration_seconds", stage="db_write"):
+        await update_transcript(
+            transcript_id,
+            status="completed",
+            text=result["text"],
+            confidence=result.get("confidence"),
+            audio_duration=result["audio_duration"],
+            language_code=result["language_code"],
+            progress=1.0,
+            timings=timings,
+            **content,
+        )
+
+    job = await get_job(transcript_id)
+    if cache and job and job["cache_key"] and get_settings().result_cache:
+        put_cached_result(job["cache_key"], result)
+    if job:
+        delete_checkpoints(job["cache_key"] or transcript_id)
+
+    return await resolve_attached_transcripts(transcript_id)
+
+
+async def save_error(
+    transcript_id: str, error: str, timings: dict[str, Any] | None = None
+) -> list[dict[str, Any]]:
+    """Persist a failed transcription.
+
+    Returns:
+        The attached transcripts that were failed as well (for webhook delivery).
+    """
+    with metrics.timer("murmurai_stage_duration_seconds", stage="db_write"):
+        await update_transcript(
+            transcript_id,
+            status="error",
+            error=error,
+            progress=0.0,
+            timings=timings,
+        )
+    return await resolve_attached_transcripts(transcript_id)
+
+
+async def finish_lost_jobs(failed: list[dict[str, Any]]) -> None:
+    """Queue the webhooks of jobs failed by ``requeue_worker_jobs`` and drop their audio."""
+    for job in failed:
+        if job.get("audio_path"):
+            Path(job["audio_path"]).unlink(missing_ok=True)
+    await enqueue_webhooks(failed)
+
+
+def run_job(job: dict[str, Any], worker_id: str) -> None:
+    """Execute a job dict returned by ``claim_next_transcript``."""
+    process_transcription(
+        transcript_id=job["id"],
+        audio_path=Path(job["audio_path"]),
+        options=TranscribeOptions.from_dict(job["options"]),
+        audio_url=job["audio_url"],
+        webhook_url=job["webhook_url"],
+        webhook_auth_header=job["webhook_auth_header"],
+        webhook_payload=job["webhook_payload"],
+        claimed=True,
+        worker_id=worker_id,
+        cache_key=job["cache_key"],
+        trace_context=job["trace_context"],
+        audio_sha256=job["audio_sha256"],
+    )
+
+
+def run_next_job(worker_id: str) -> bool:
+    """Claim and execute the oldest queued job. Returns False if the queue was empty."""
+    job = asyncio.run(claim_next_transcript(worker_id))
+    if job is None:
+        return False
+    get_logger().info(f"Worker {worker_id} claimed job {job['id']}")
+    run_job(job, worker_id)
+    return True
+
+
+def _coordinator_client() -> httpx.Client:
+    """HTTP client for the coordinator's internal job endpoints."""
+    settings = get_settings()
+    assert settings.coordinator_url is not None
+    return httpx.Client(
+        base_url=settings.coordinator_url,
+        headers={"Authorization": settings.api_key},
+        timeout=60.0,
+    )
+
+
+def run_next_remote_job(worker_id: str, client: httpx.Client) -> bool:
+    """Lease a job from the coordinator, run it locally and post the result back.
+
+    The audio is streamed from the coordinator into a temp file. While the job
+    runs, a heartbeat thread renews the lease (and reports progress) every
+    third of the lease period. If heartbeats stop, the coordinator reclaims
+    the job and another worker retries it; a late result is then rejected.
+
+    Returns:
+        False if the queue was empty or the coordinator was unreachable.
+    """
+    logger = get_logger()
+    try:
+        response = client.post("/v1/internal/jobs/lease", json={"worker_id": worker_id})
+        if response.status_code == 204:
+            return False
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.warning(f"Coordinator unavailable: {e}")
+        return False
+
+    job = response.json()
+    with (
+        tracing.extract(job.get("trace_context")),
+        tracing.span("job", transcript_id=job["id"], worker_id=worker_id),
+    ):
+        _run_remote_job(job, worker_id, client)
+    return True
+
+
+def _run_remote_job(job: dict[str, Any], worker_id: str, client: httpx.Client) -> None:
+    """Run a leased job and post its outcome to the coordinator."""
+    logger = get_logger()
+    transcript_id = job["id"]
+    logger.info(f"Worker {worker_id} leased job {transcript_id} (attempt {job['attempts']})")
+
+    progress = {"value": 0.05}
+    stop = threading.Event()
+
+    def heartbeat() -> None:
+        while not stop.wait(job["lease_seconds"] / 3):
+            try:
+                r = client.post(
+                    f"/v1/internal/jobs/{transcript_id}/heartbeat",
+                    json={"worker_id": worker_id, "progress": progress["value"]},
+                )
+            except httpx.HTTPError as e:
+                logger.warning(f"Heartbeat failed for {transcript_id}: {e}")
+                continue
+            if r.status_code == 409:
+                logger.warning(f"Lease lost for {transcript_id}; result will be discarded")
+                return
+
+    def on_progress(value: float) -> None:
+        progress["value"] = value
+
+    def report(outcome: str, **kwargs: Any) -> httpx.Response | None:
+        try:
+            return client.post(f"/v1/internal/jobs/{transcript_id}/{outcome}", **kwargs)
+        except httpx.HTTPError as e:
+            # The lease expires and the coordinator hands the job out again
+            logger.warning(f"Could not report {transcript_id} to the coordinator: {e}")
+            return None
+
+    thread = threading.Thread(target=heartbeat, name=f"heartbeat-{transcript_id}", daemon=True)
+    thread.start()
+    audio_path: Path | None = None
+    stats = metrics.JobStats()
+    try:
+        suffix = Path(job["filename"]).suffix
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as f:
+            audio_path = Path(f.name)
+            with client.stream(
+                "GET", job["audio_url"], params={"worker_id": worker_id}
+            ) as audio_response:
+                audio_response.raise_for_status()
+                for chunk in audio_response.iter_bytes():
+                    f.write(chunk)
+
+        with metrics.job_stats(stats, peaks=True):
+            result = transcribe(
+                audio_path=audio_path,
+                options=TranscribeOptions.from_dict(job["options"]),
+                progress_callback=on_progress,
+                checkpoint_key=job.get("cache_key") or transcript_id,
+                audio_sha256=job.get("audio_sha256"),
+            )
+    except Exception as e:
+        outcome = report(
+            "fail", json={"worker_id": worker_id, "error": str(e), "timings": stats.to_dict()}
+        )
+    else:
+        body = {"worker_id": worker_id, "result": result, "timings": stats.to_dict()}
+        outcome = report(
+            "complete",
+            content=orjson.dumps(body),
+            headers={"Content-Type": "application/json"},
+        )
+        # Checkpoints live on this node; the coordinator now has the result
+        delete_checkpoints(job.get("cache_key") or transcript_id)
+    finally:
+        stop.set()
+        thread.join()
+        if audio_path is not None:
+            audio_path.unlink(missing_ok=True)
+
+    if outcome is None:
+        return
+    if outcome.status_code == 409:
+        logger.warning(f"Coordinator rejected result for {transcript_id}: lease expired")
+    elif outcome.is_error:
+        logger.warning(
+            f"Coordinator refused result for {transcript_id}: HTTP {outcome.status_code}"
+        )
+
+
+def worker_loop(worker_id: str, max_jobs: int | None = None) -> int:
+    """Poll the queue and execute jobs until stopped.
+
+    Local queue jobs run through the staged ``JobPipeline`` (decode ahead,
+    GPU, post-processing) unless ``pipeline_depth`` is 0. Jobs leased from
+    the coordinator (``coordinator_url`` set) run one at a time.
+
+    Args:
+        worker_id: Identifier recorded on claimed transcripts.
+        max_jobs: Exit after this many jobs (None = run until signalled).
+
+    Returns:
+        Number of jobs executed.
+    """
+    settings = get_settings()
+    metrics.start_flusher()
+    tracing.start_exporter()
+    if not settings.coordinator_url and settings.pipeline_depth > 0:
+        return JobPipeline(worker_id, should_stop=lambda: _stopping).run(max_jobs)
+
+    client = _coordinator_client() if settings.coordinator_url else None
+    done = 0
+    try:
+        while not _stopping and (max_jobs is None or done < max_jobs):
+            ran = run_next_remote_job(worker_id, client) if client else run_next_job(worker_id)
+            if ran:
+                done += 1
+            else:
+                time.sleep(settings.worker_poll_interval)
+    finally:
+        if client is not None:
+            client.close()
+    return done
+
+
+def worker_cpu_slices(processes: int, threads: int) -> list[set[int]]:
+    """Split the CPUs available to this process into one affinity set per worker.
+
+    Workers get disjoint slices while there are enough cores; beyond that,
+    slices wrap around so every worker still gets ``threads`` CPUs.
+    """
+    cores = sorted(os.sched_getaffinity(0))
+    return [
+        {cores[(i * threads + j) % len(cores)] for j in range(threads)} for i in range(processes)
+    ]
+
+
+def _pin_worker(cpus: set[int], threads: int) -> None:
+    """Restrict the current process to ``cpus`` and size intra-op thread pools."""
+    import torch
+
+    os.sched_setaffinity(0, cpus)
+    torch.set_num_threads(threads)
+    # Read by OpenMP/MKL in libraries that initialize lazily after fork
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+
+
+def worker_id_for(pid: int) -> str:
+    """Queue identity of a worker process (unique across hosts sharing a queue)."""
+    return f"{socket.gethostname()}:{pid}"
+
+
+def _handle_stop(signum: int, frame: Any) -> None:
+    global _stopping
+    _stopping = True
+
+
+def _run_child(cpus: set[int] | None, threads: int) -> None:
+    """Entry point of a forked worker. Never returns."""
+    signal.signal(signal.SIGTERM, _handle_stop)
+    signal.signal(signal.SIGINT, _handle_stop)
+    worker_id = worker_id_for(os.getpid())
+    code = 0
+    try:
+        if cpus is not None:
+            _pin_worker(cpus, threads)
+        # No-op on CPU (inherited from the parent); loads this worker's own copy on CUDA
+        from murmurai_server.model_manager import ModelManager
+
+        ModelManager.preload()
+        get_logger().info(f"Worker {worker_id} started (cpus={sorted(cpus or [])})")
+        worker_loop(worker_id)
+    except Exception:
+        get_logger().exception(f"Worker {worker_id} crashed")
+        code = 1
+    finally:
+        shutdown_logging()  # os._exit skips atexit: write out queued log records first
+        sys.stdout.flush()
+        os._exit(code)
+
+
+def supervise(
+    processes: int,
+    cpu_slices: list[set[int]] | None,
+    threads: int,
+    restart_delay: float = 1.0,
+) -> None:
+    """Fork worker processes and keep them alive until SIGTERM/SIGINT.
+
+    A worker that exits with a non-zero status or is killed by a signal
+    (segfault in ctranslate2, OOM killer, ...) is restarted, and the job it
+    was processing goes back to the queue (or to ``error`` once it has used
+    up ``max_job_attempts``). Restarts back off exponentially while workers
+    keep crashing right after startup.
+    """
+    settings = get_settings()
+    logger = get_logger()
+    children: dict[int, tuple[int, float]] = {}  # pid -> (index, start time)
+    delay = restart_delay
+
+    def spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_child(cpu_slices[index] if cpu_slices else None, threads)
+        children[pid] = (index, time.monotonic())
+
+    def stop(signum: int, frame: Any) -> None:
+        global _stopping
+        _stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for index in range(processes):
+        spawn(index)
+    logger.info(f"Started {processes} workers ({threads} threads each): {sorted(children)}")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        if pid not in children:
+            continue
+        index, started = children.pop(pid)
+
+        # Remote workers have no database; the coordinator reclaims their lease instead
+        requeued = 0
+        if not settings.coordinator_url:
+            requeued, failed = asyncio.run(
+                requeue_worker_jobs(worker_id_for(pid), max_attempts=settings.max_job_attempts)
+            )
+            asyncio.run(finish_lost_jobs(failed))
+        if status == 0 or _stopping:
+            logger.info(f"Worker {index} (pid={pid}) exited")
+            continue
+
+        # Back off only while workers keep dying right after startup
+        if time.monotonic() - started >= 10.0:
+            delay = restart_delay
+        logger.warning(
+            f"Worker {index} (pid={pid}) died with status {status}; "
+            f"{requeued} job(s) returned to queue, restarting in {delay:.0f}s"
+        )
+        time.sleep(delay)
+        delay = min(delay * 2, 30.0)
+        if not _stopping:
+            spawn(index)
+
+
+def run_worker_pool(processes: int | None = None, threads: int | None = None) -> None:
+    """Run supervised queue workers.
+
+    On CPU (``device_type=cpu``) models are loaded once in the parent and the
+    forked children share them copy-on-write, each pinned to its own cores.
+    On CUDA the parent never touches the GPU; each child loads its own models,
+    so a crashed worker takes only its own CUDA context down with it.
+
+    Args:
+        processes: Number of worker processes (default: settings.worker_processes).
+        threads: CPU threads per worker (default: settings.worker_threads,
+            else available cores divided by processes).
+    """
+    settings = get_settings()
+    setup_logging(
+        log_format=settings.log_format,
+        log_level=settings.log_level,
+        queue_size=settings.log_queue_size,
+    )
+    logger = get_logger()
+
+    processes = processes or settings.worker_processes
+    cores = len(os.sched_getaffinity(0))
+    threads = threads or settings.worker_threads or max(1, cores // processes)
+    # ModelManager reads this when building ctranslate2 models (cpu_threads)
+    settings.worker_threads = threads
+
+    if settings.coordinator_url:
+        # Stateless remote worker: jobs, audio and results go through the coordinator
+        logger.info(f"Leasing jobs from coordinator at {settings.coordinator_url}")
+    else:
+        settings.data_dir.mkdir(parents=True, exist_ok=True)
+        asyncio.run(init_db())
+
+    cpu_slices = None
+    if settings.device_type == "cpu":
+        # Load weights in the parent so children share them copy-on-write
+        from murmurai_server.model_manager import ModelManager
+
+        ModelManager.preload()
+
+        # Move everything allocated so far out of GC tracking: collections would
+        # otherwise touch every object header and un-share the pages after fork.
+        gc.collect()
+        gc.freeze()
+        cpu_slices = worker_cpu_slices(processes, threads)
+    else:
+        logger.info(f"CUDA workers load models individually ({processes} copies on GPU)")
+
+    supervise(processes, cpu_slices, threads)
@@ -0,0 +1,239 @@
+"""Tests for the transcript result cache."""
+
+import gzip
+import os
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from murmurai_server.cache import (
+    cache_stats,
+    delete_checkpoints,
+    delete_renditions,
+    evict_pcm,
+    evict_results,
+    expire_checkpoints,
+    file_sha256,
+    get_cached_result,
+    get_checkpoint,
+    get_rendition,
+    load_pcm,
+    put_cached_result,
+    put_checkpoint,
+    put_rendition,
+    rendition_key,
+    result_cache_key,
+)
+from murmurai_server.transcriber import TranscribeOptions
+
+
+class TestResultCacheKey:
+    """Tests for cache key derivation."""
+
+    def test_same_inputs_same_key(self, test_settings):
+        """Test that equal audio and options give a stable key."""
+        options = TranscribeOptions(language="en", beam_size=5)
+        assert result_cache_key("abc", options) == result_cache_key("abc", options)
+
+    def test_audio_and_options_change_key(self, test_settings):
+        """Test that a different digest or transcription option changes the key."""
+        key = result_cache_key("abc", TranscribeOptions(language="en"))
+        assert key != result_cache_key("abd", TranscribeOptions(language="en"))
+        assert key != result_cache_key("abc", TranscribeOptions(language="de"))
+
+    def test_export_options_ignored(self, test_settings):
+        """Test that subtitle rendering options do not split the cache."""
+        assert result_cache_key("abc", TranscribeOptions()) == result_cache_key(
+            "abc", TranscribeOptions(max_line_width=20, highlight_words=True)
+        )
+
+    def test_server_model_changes_key(self, test_settings):
+        """Test that the server's default model is part of the key."""
+        key = result_cache_key("abc", TranscribeOptions())
+        test_settings.model = "tiny"
+        assert key != result_cache_key("abc", TranscribeOptions())
+
+
+class TestResultCacheStore:
+    """Tests for storing and evicting cached results."""
+
+    def test_put_get_roundtrip(self, test_settings):
+        """Test that a stored result is returned on lookup."""
+        assert get_cached_result("missing") is None
+        put_cached_result("k1", {"text": "hello"})
+        assert get_cached_result("k1") == {"text": "hello"}
+
+    def test_evicts_least_recently_used(self, test_settings):
+        """Test that the oldest entries go first once over budget."""
+        for i, key in enumerate(["old", "mid", "new"]):
+            put_cached_result(key, {"text": "x" * 100})
+            path = test_settings.data_dir / "cache" / "results" / f"{key}.json"
+            os.utime(path, (1000 + i, 1000 + i))
+
+        assert evict_results(250) == 1
+        assert get_cached_result("old") is None
+        assert get_cached_result("mid") is not None
+        assert get_cached_result("new") is not None
+
+
+def _write_wav(path: Path, seconds: float = 0.5, rate: int = 16000) -> Path:
+    samples = (np.sin(np.arange(int(seconds * rate)) / 10) * 20000).astype(np.int16)
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.tobytes())
+    return path
+
+
+class TestPcmCache:
+    """Tests for the decoded audio cache."""
+
+    def test_matches_load_audio(self, test_settings, tmp_path: Path):
+        """Test that cached PCM is identical to murmurai_core.load_audio."""
+        from murmurai_server.transcriber import murmurai_core
+
+        audio = _write_wav(tmp_path / "tone.wav")
+        pcm = load_pcm(audio)
+
+        assert isinstance(pcm, np.memmap)
+        assert pcm.dtype == np.float32
+        np.testing.assert_array_equal(pcm, murmurai_core.load_audio(str(audio)))
+
+    def test_second_load_reuses_file(self, test_settings, tmp_path: Path):
+        """Test that a repeat load maps the cached file instead of decoding again."""
+        audio = _write_wav(tmp_path / "tone.wav")
+        digest = file_sha256(audio)
+        first = load_pcm(audio)
+        hits = cache_stats()["pcm_hits"]
+
+        assert np.array_equal(load_pcm(audio), first)
+        assert cache_stats()["pcm_hits"] == hits + 1
+
+        # Once decoded, the digest alone is enough
+        audio.unlink()
+        assert np.array_equal(load_pcm(audio, audio_sha256=digest), first)
+        assert cache_stats()["pcm_hits"] == hits + 2
+
+    def test_copy_on_write(self, test_settings, tmp_path: Path):
+        """Test that writing to the map never modifies the cached file."""
+        audio = _write_wav(tmp_path / "tone.wav")
+        pcm = load_pcm(audio)
+        pcm[:] = 0
+
+        assert load_pcm(audio).any()
+
+    def test_decode_failure(self, test_settings, tmp_path: Path):
+        """Test that undecodable input raises and leaves no cache entry."""
+        bad = tmp_path / "bad.wav"
+        bad.write_bytes(b"not audio")
+
+        with pytest.raises(RuntimeError, match="Failed to load audio"):
+            load_pcm(bad)
+        assert not list((test_settings.data_dir / "cache" / "pcm").iterdir())
+
+    def test_evicts_least_recently_used(self, test_settings, tmp_path: Path):
+        """Test that decoded audio is evicted oldest first."""
+        paths = []
+        for i in range(3):
+            pcm = load_pcm(_write_wav(tmp_path / f"{i}.wav", seconds=0.1 * (i + 1)))
+            paths.append(Path(pcm.filename))
+            os.utime(paths[-1], (1000 + i, 1000 + i))
+
+        size = sum(p.stat().st_size for p in paths[1:])
+        assert evict_pcm(size) == 1
+        assert [p.exists() for p in paths] == [False, True, True]
+
+
+class TestRenditionCache:
+    """Tests for stored export renditions."""
+
+    def test_put_get_with_gzip_variant(self, test_settings):
+        """Test that chunks are stored as-is and gzip-compressed."""
+        key = rendition_key("t1", "2024-01-01 00:00:00")
+        assert get_rendition("t1", key, "srt") is None
+
+        put_rendition("t1", key, "srt", iter([b"1\n", b"00:00:00,000 --> 00:00:01,000\nHi\n"]))
+
+        body = b"1\n00:00:00,000 --> 00:00:01,000\nHi\n"
+        path = get_rendition("t1", key, "srt")
+        assert path is not None and path.read_bytes() == body
+        gz = get_rendition("t1", key, "srt", "gzip")
+        assert gz is not None and gzip.decompress(gz.read_bytes()) == body
+
+    def test_new_version_replaces_old(self, test_settings):
+        """Test that storing a new version drops the previous version's files."""
+        old = rendition_key("t1", "2024-01-01 00:00:00")
+        new = rendition_key("t1", "2024-01-02 00:00:00")
+        assert old != new
+        put_rendition("t1", old, "srt", [b"old"])
+        put_rendition("t1", old, "vtt", [b"old"])
+        put_rendition("t1", new, "srt", [b"new"])
+
+        assert get_rendition("t1", old, "vtt") is None
+        assert get_rendition("t1", new, "srt") is not None
+
+        delete_renditions("t1")
+        assert get_rendition("t1", new, "srt") is None
+
+    def test_eviction_keeps_the_new_rendition(self, test_settings):
+        """Test that going over budget evicts older renditions, never the one just written."""
+        test_settings.rendition_cache_max_mb = 0
+        put_rendition("t1", "k1", "srt", [b"first"])
+        put_rendition("t2", "k2", "srt", [b"second"])
+
+        assert get_rendition("t1", "k1", "srt") is None
+        path = get_rendition("t2", "k2", "srt")
+        assert path is not None and path.read_bytes() == b"second"
+        assert get_rendition("t2", "k2", "srt", "gzip") is not None
+
+    def test_failed_render_leaves_nothing(self, test_settings):
+        """Test that an exception while rendering stores no partial files."""
+
+        def chunks():
+            yield b"partial"
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            put_rendition("t1", "k", "srt", chunks())
+        renditions = test_settings.data_dir / "cache" / "renditions"
+        assert [p for p in renditions.rglob("*") if p.is_file()] == []
+
+
+class TestCheckpoints:
+    """Tests for pipeline stage checkpoints."""
+
+    def test_put_get_with_numpy_values(self, test_settings):
+        """Test that stage output with numpy values loads back as JSON types."""
+        assert get_checkpoint("job", "diarize") is None
+
+        put_checkpoint(
+            "job",
+            "diarize",
+            {"tracks": [(0.0, 1.5, "SPEAKER_00")], "embeddings": {"SPEAKER_00": np.ones(2)}},
+        )
+
+        assert get_checkpoint("job", "diarize") == {
+            "tracks": [[0.0, 1.5, "SPEAKER_00"]],
+            "embeddings": {"SPEAKER_00": [1.0, 1.0]},
+        }
+        delete_checkpoints("job")
+        assert get_checkpoint("job", "diarize") is None
+
+    def test_unserializable_output_is_skipped(self, test_settings):
+        """Test that a stage output JSON cannot hold is not stored (and does not raise)."""
+        put_checkpoint("job", "align", {"result": object()})
+        assert get_checkpoint("job", "align") is None
+
+    def test_expire_old_checkpoints(self, test_settings):
+        """Test that checkpoints past the retention are deleted with their directory."""
+        put_checkpoint("old", "transcribe", {"result": {}})
+        put_checkpoint("new", "transcribe", {"result": {}})
+        root = test_settings.data_dir / "cache" / "checkpoints"
+        os.utime(root / "old" / "transcribe.json", (0, 0))
+
+        assert expire_checkpoints(3600) == 1
+        assert not (root / "old").exists()
+        assert get_checkpoint("new", "transcribe") == {"result": {}}
@@ -3,11 +3,15 @@
 import pytest
 
 from murmurai_server.database import (
+    claim_next_transcript,
+    claim_transcript,
     create_transcript,
     delete_transcript,
+    get_speech_regions,
     get_transcript,
     init_db,
     list_transcripts,
+    requeue_worker_jobs,
     update_transcript,
 )
 
@@ -251,3 +255,162 @@ async def test_delete_transcript_not_found(initialized_db):
     """Test deleting a non-existent transcript."""
     deleted = await delete_transcript("non-existent")
     assert deleted is False
+
+
+@pytest.mark.asyncio
+async def test_claim_next_transcript_fifo(initialized_db):
+    """Test that workers claim queued jobs oldest-first, exactly once."""
+    for i in range(2):
+        await create_transcript(
+            id=f"job-{i}",
+            audio_url=None,
+            language=None,
+            speaker_labels=False,
+            speakers_expected=None,
+            options={"language": "en"},
+            audio_path=f"/tmp/job-{i}.mp3",
+        )
+
+    first = await claim_next_transcript("worker-a")
+    second = await claim_next_transcript("worker-b")
+    assert first is not None and second is not None
+    assert [first["id"], second["id"]] == ["job-0", "job-1"]
+    assert first["options"] == {"language": "en"}
+    assert first["audio_path"] == "/tmp/job-0.mp3"
+    assert await claim_next_transcript("worker-c") is None
+
+    result = await get_transcript("job-0")
+    assert result["status"] == "processing"
+    assert "audio_path" not in result
+
+
+@pytest.mark.asyncio
+async def test_claim_next_transcript_skips_legacy_rows(initialized_db):
+    """Test that rows without persisted options are never handed to workers."""
+    await create_transcript(
+        id="legacy",
+        audio_url="https://example.com/legacy.mp3",
+        language=None,
+        speaker_labels=False,
+        speakers_expected=None,
+    )
+
+    assert await claim_next_transcript("worker-a") is None
+
+
+@pytest.mark.asyncio
+async def test_claim_transcript_only_once(initialized_db):
+    """Test that a specific job can only be claimed while queued."""
+    await create_transcript(
+        id="claim-once",
+        audio_url=None,
+        language=None,
+        speaker_labels=False,
+        speakers_expected=None,
+        options={},
+        audio_path="/tmp/claim-once.mp3",
+    )
+
+    assert await claim_transcript("claim-once", "api") is True
+    assert await claim_transcript("claim-once", "worker-a") is False
+
+
+@pytest.mark.asyncio
+async def test_requeue_worker_jobs(initialized_db, test_settings):
+    """Test that a dead worker's jobs are retried until attempts run out."""
+    for job_id in ("retry-me", "give-up"):
+        await create_transcript(
+            id=job_id,
+            audio_url=None,
+            language=None,
+            speaker_labels=False,
+            speakers_expected=None,
+            options={},
+            audio_path=f"/tmp/{job_id}.mp3",
+        )
+    await create_transcript(
+        id="same-audio",
+        audio_url=None,
+        language=None,
+        speaker_labels=False,
+        speakers_expected=None,
+        webhook_url="https://hooks.example.com/done",
+        attached_to="give-up",
+    )
+    assert await claim_transcript("retry-me", "host:1") is True
+    assert await claim_transcript("give-up", "host:1") is True
+    await update_transcript("give-up", attempts=3)
+
+    requeued, failed = await requeue_worker_jobs("host:1", max_attempts=3)
+    assert requeued == 1
+    # The exhausted job and the transcript attached to it, for webhooks and audio cleanup
+    assert [(row["id"], row.get("audio_path")) for row in failed] == [
+        ("give-up", "/tmp/give-up.mp3"),
+        ("same-audio", None),
+    ]
+    assert failed[1]["webhook_url"] == "https://hooks.example.com/done"
+    assert (await get_transcript("same-audio"))["status"] == "error"
+
+    retried = await get_transcript("retry-me")
+    assert retried["status"] == "queued"
+    assert retried["attempts"] == 1
+    failed = await get_transcript("give-up")
+    assert failed["status"] == "error"
+    assert "retries exhausted" in failed["error"]
+
+
+@pytest.mark.asyncio
+async def test_columnar_result_roundtrip(initialized_db):
+    """Test that results stored as columns are read back in the API shape."""
+    from murmurai_server.transcriber import format_result
+    from murmurai_server.worker import save_result
+
+    await create_transcript(
+        id="columnar-1",
+        audio_url=None,
+        language="en",
+        speaker_labels=True,
+        speakers_expected=None,
+    )
+    segments = [
+        {
+            "start": 0.0,
+            "end": 1.0,
+            "text": "hi there",
+            "speaker": "SPEAKER_00",
+            "words": [
+                {"word": "hi", "start": 0.0, "end": 0.4, "score": 0.9},
+                {"word": "there", "start": 0.5, "end": 1.0, "score": 0.7},
+            ],
+        }
+    ]
+    await save_result(
+        "columnar-1", format_result({"segments": segments}, "en", speaker_labels=True)
+    )
+
+    result = await get_transcript("columnar-1")
+    assert result["status"] == "completed"
+    assert "result_columns" not in result
+    assert [w["text"] for w in result["words"]] == ["hi", "there"]
+    assert result["utterances"][0]["words"] == result["words"]
+    assert result["utterances"][0]["speaker"] == "SPEAKER_00"
+
+
+@pytest.mark.asyncio
+async def test_speech_regions_stored_with_job(initialized_db):
+    """Test that a job's speech regions are stored but not part of the transcript."""
+    from murmurai_server.transcriber import format_result
+    from murmurai_server.worker import save_result
+
+    await create_transcript(
+        id="regions-1",
+        audio_url=None,
+        language="en",
+        speaker_labels=False,
+        speakers_expected=None,
+    )
+    result = format_result({"segments": []}, "en")
+    await save_result("regions-1", {**result, "speech_regions": [[0.5, 2.0], [3.25, 4.0]]})
+
+    assert await get_speech_regions("regions-1") == [(0.5, 2.0), (3.25, 4.0)]
+    assert "speech_regions" not in await get_transcript("regions-1")
@@ -0,0 +1,115 @@
+"""Tests for re-clustering stored diarization intermediates."""
+
+from types import SimpleNamespace
+
+import numpy as np
+from pyannote.audio.pipelines.speaker_diarization import SpeakerDiarization
+from pyannote.core import SlidingWindow, SlidingWindowFeature
+
+from murmurai_server.cache import get_diarization, put_diarization
+from murmurai_server.diarization import ArtifactHook, recluster
+
+FRAME = 0.1
+CHUNK, STEP = 5.0, 2.5
+
+
+def _artifacts(seconds: float = 30.0) -> dict[str, np.ndarray]:
+    """Voice A speaks for the first half, voice B for the second (local speakers 0 and 1)."""
+    chunks = int((seconds - CHUNK) / STEP) + 1
+    frames = int(CHUNK / FRAME)
+    segmentations = np.zeros((chunks, frames, 3), dtype=np.float32)
+    for c in range(chunks):
+        times = c * STEP + (np.arange(frames) + 0.5) * FRAME
+        segmentations[c, :, 0] = times < seconds / 2
+        segmentations[c, :, 1] = times >= seconds / 2
+    embeddings = np.zeros((chunks, 3, 2), dtype=np.float32)
+    embeddings[:, 0] = [1.0, 0.0]
+    embeddings[:, 1] = [0.0, 1.0]
+    return {
+        "segmentations": segmentations,
+        "window": np.array([0.0, CHUNK, STEP]),
+        "embeddings": embeddings,
+    }
+
+
+def _pipeline(calls: list[dict]) -> SpeakerDiarization:
+    """The real pipeline's reconstruction steps, with a stub clustering and no models."""
+
+    def clustering(embeddings, segmentations, num_clusters, min_clusters, max_clusters, **kwargs):
+        calls.append({"min": min_clusters, "max": max_clusters, "num": num_clusters})
+        voices = np.argmax(embeddings, axis=2)
+        clusters = voices if max_clusters >= 2 else np.zeros_like(voices)
+        centroids = np.eye(2)[: clusters.max() + 1]
+        return clusters, None, centroids
+
+    pipeline = SpeakerDiarization.__new__(SpeakerDiarization)
+    pipeline._segmentation = SimpleNamespace(
+        model=SimpleNamespace(
+            specifications=SimpleNamespace(powerset=True),
+            receptive_field=SlidingWindow(start=0.0, duration=FRAME, step=FRAME),
+        )
+    )
+    pipeline.segmentation = SimpleNamespace(min_duration_off=0.0)
+    pipeline.clustering = clustering
+    return pipeline
+
+
+def test_artifact_hook_keeps_final_outputs():
+    """Test that progress calls are ignored and the full step outputs kept."""
+    hook = ArtifactHook()
+    segmentations = SlidingWindowFeature(
+        np.zeros((2, 5, 3)), SlidingWindow(start=0.0, duration=5.0, step=2.5)
+    )
+    hook("segmentation", None, file={}, total=4, completed=1)
+    hook("segmentation", segmentations, file={})
+    hook("speaker_counting", object(), file={})
+    hook("embeddings", np.ones((1, 2)), file={}, total=4, completed=1)
+    assert hook.arrays(None) is None  # No embeddings yet
+    hook("embeddings", np.ones((2, 3, 4)), file={})
+
+    arrays = hook.arrays([(1.0, 2.0)])
+    assert arrays is not None
+    assert arrays["segmentations"].shape == (2, 5, 3)
+    assert arrays["window"].tolist() == [0.0, 5.0, 2.5]
+    assert arrays["spans"].tolist() == [[1.0, 2.0]]
+
+
+def test_recluster_with_new_speaker_counts():
+    """Test that the same intermediates give one or two speakers as asked."""
+    calls: list[dict] = []
+    pipeline = _pipeline(calls)
+    arrays = _artifacts()
+
+    tracks, embeddings = recluster(pipeline, arrays, None, None)
+    assert sorted({label for _, _, label in tracks}) == ["SPEAKER_00", "SPEAKER_01"]
+    first = [(s, e) for s, e, label in tracks if label == "SPEAKER_00"]
+    assert first[0][0] < 0.2 and abs(first[-1][1] - 15.0) < 0.2
+    assert embeddings["SPEAKER_01"].tolist() == [0.0, 1.0]
+
+    tracks, embeddings = recluster(pipeline, arrays, 1, 1)
+    assert {label for _, _, label in tracks} == {"SPEAKER_00"}
+    assert list(embeddings) == ["SPEAKER_00"]
+    assert calls[-1] == {"min": 1, "max": 1, "num": 1}
+
+
+def test_recluster_maps_spans_to_recording_time():
+    """Test that turns on compacted speech come back in recording time."""
+    arrays = {**_artifacts(), "spans": np.array([[100.0, 115.0], [200.0, 215.0]])}
+
+    tracks, _ = recluster(_pipeline([]), arrays, None, None)
+
+    starts = {label: min(s for s, _, lbl in tracks if lbl == label) for _, _, label in tracks}
+    assert abs(starts["SPEAKER_00"] - 100.0) < 0.2
+    assert abs(starts["SPEAKER_01"] - 200.0) < 0.2
+
+
+def test_diarization_cache_roundtrip(test_settings):
+    """Test that stored intermediates load back unchanged."""
+    arrays = _artifacts()
+    put_diarization("job-1", arrays)
+
+    loaded = get_diarization("job-1")
+    assert loaded is not None
+    assert set(loaded) == set(arrays)
+    np.testing.assert_array_equal(loaded["embeddings"], arrays["embeddings"])
+    assert get_diarization("job-2") is None
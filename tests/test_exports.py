@@ -0,0 +1,101 @@
+"""Tests for subtitle export rendering and cue layout."""
+
+from murmurai_server.columnar import TranscriptColumns
+from murmurai_server.exports import (
+    SubtitleLayout,
+    iter_vtt,
+    layout_cues,
+    subtitle_rows,
+)
+
+
+def _columns(*utterances: list[tuple[str, float, float]], speaker: str | None = None):
+    """Columns from utterances given as (word, start, end) lists, times in seconds."""
+    segments = [
+        {
+            "start": words[0][1] if words else 0.0,
+            "end": words[-1][2] if words else 1.0,
+            "text": " ".join(w for w, _, _ in words) or "no words",
+            "speaker": speaker,
+            "words": [{"word": w, "start": s, "end": e, "score": 0.9} for w, s, e in words],
+        }
+        for words in utterances
+    ]
+    return TranscriptColumns.from_segments(segments, speaker_labels=True)
+
+
+FOUR_WORDS = [("aaa", 0.0, 0.5), ("bbb", 0.5, 1.0), ("ccc", 1.0, 1.5), ("ddd", 1.5, 2.0)]
+
+
+class TestLayoutCues:
+    """Tests for laying out cues from word timings."""
+
+    def test_default_layout_keeps_utterances(self):
+        """Test that the default layout emits the stored utterances unchanged."""
+        columns = _columns(FOUR_WORDS, [("eee", 3.0, 3.5)])
+        rows = list(subtitle_rows(lambda: columns, SubtitleLayout()))
+        assert rows == list(columns.utterance_rows())
+
+    def test_wraps_lines_at_width(self):
+        """Test that words wrap onto a new line of the same cue without a line limit."""
+        cues = list(layout_cues(_columns(FOUR_WORDS), SubtitleLayout(max_line_width=7)))
+        assert cues == [(0, 2000, None, "aaa bbb\nccc ddd")]
+
+    def test_splits_cues_at_line_count(self):
+        """Test that a full cue is closed and timed from its own words."""
+        layout = SubtitleLayout(max_line_width=7, max_line_count=1)
+        cues = list(layout_cues(_columns(FOUR_WORDS, speaker="A"), layout))
+        assert cues == [(0, 1000, "A", "aaa bbb"), (1000, 2000, "A", "ccc ddd")]
+
+    def test_long_pause_and_utterance_boundaries(self):
+        """Test that cues never span a long pause or two utterances."""
+        words = [("one", 0.0, 0.5), ("two", 5.0, 5.5)]
+        cues = list(
+            layout_cues(_columns(words, [("three", 6.0, 6.5)]), SubtitleLayout(max_line_width=80))
+        )
+        assert [text for _, _, _, text in cues] == ["one", "two", "three"]
+
+    def test_highlight_words(self):
+        """Test one cue per word, with plain cues filling gaps between words."""
+        words = [("hi", 0.0, 0.5), ("there", 1.0, 1.5)]
+        cues = list(layout_cues(_columns(words), SubtitleLayout(highlight_words=True)))
+        assert cues == [
+            (0, 500, None, "<u>hi</u> there"),
+            (500, 1000, None, "hi there"),
+            (1000, 1500, None, "hi <u>there</u>"),
+        ]
+
+    def test_utterance_without_words(self):
+        """Test that unaligned utterances are kept as one cue."""
+        cues = list(layout_cues(_columns([]), SubtitleLayout(max_line_width=10)))
+        assert cues == [(0, 1000, None, "no words")]
+
+    def test_language_without_spaces(self):
+        """Test that words are joined without spaces for Chinese/Japanese."""
+        words = [("你好", 0.0, 0.5), ("世界", 0.5, 1.0)]
+        cues = list(layout_cues(_columns(words), SubtitleLayout(max_line_width=4), "zh"))
+        assert cues == [(0, 1000, None, "你好世界")]
+
+    def test_count_without_width_is_default(self):
+        """Test that a line count alone does not change the layout."""
+        layout = SubtitleLayout(max_line_count=2)
+        assert layout.is_default
+        assert layout.variant() == ""
+        assert SubtitleLayout(max_line_width=42, max_line_count=2).variant() == "w42c2"
+
+
+class TestRendering:
+    """Tests for rendering rows into subtitle files."""
+
+    def test_vtt_from_cues(self):
+        """Test that laid-out cues render as WebVTT with multi-line text."""
+        layout = SubtitleLayout(max_line_width=7)
+        vtt = "".join(iter_vtt(layout_cues(_columns(FOUR_WORDS), layout)))
+        assert vtt == "WEBVTT\n\n00:00:00.000 --> 00:00:02.000\naaa bbb\nccc ddd\n"
+
+    def test_legacy_utterances_roundtrip(self):
+        """Test that API-shaped utterances convert back to the same columns."""
+        columns = _columns(FOUR_WORDS, [("eee", 3.0, 3.5)], speaker="B")
+        legacy = TranscriptColumns.from_utterances(columns.utterances())
+
+        assert legacy.to_dict() == columns.to_dict()
@@ -0,0 +1,67 @@
+"""Tests for the queued log pipeline and formatters."""
+
+import logging
+import queue
+
+import orjson
+import pytest
+
+from murmurai_server.logging import (
+    BoundedQueueHandler,
+    dropped_records,
+    get_logger,
+    request_id_var,
+    set_request_id,
+    setup_logging,
+    shutdown_logging,
+)
+
+
+@pytest.fixture(autouse=True)
+def stop_listener():
+    """Stop the listener thread started by a test and clear its request ID."""
+    yield
+    shutdown_logging()
+    get_logger().handlers.clear()
+    request_id_var.set(None)
+
+
+@pytest.mark.parametrize("log_format", ["json", "text"])
+def test_queued_records_keep_caller_context(capsys, log_format):
+    """Test that the request ID and exception of the logging thread survive the queue."""
+    setup_logging(log_format=log_format, queue_size=100)
+    set_request_id("req-1")
+    try:
+        raise ValueError("bad audio")
+    except ValueError:
+        get_logger().exception("Job %s failed", "job-1", extra={"transcript_id": "job-1"})
+    set_request_id("req-2")  # Changed before the listener formats the record
+    shutdown_logging()
+
+    line = capsys.readouterr().out
+    if log_format == "json":
+        data = orjson.loads(line)
+        assert data["message"] == "Job job-1 failed"
+        assert data["request_id"] == "req-1"
+        assert data["transcript_id"] == "job-1"
+        assert data["exception"].endswith("ValueError: bad audio")
+    else:
+        assert "[ERROR] [req-1] Job job-1 failed\nTraceback" in line
+
+
+def test_full_queue_drops_and_reports():
+    """Test that records beyond the queue size are dropped, counted and then reported."""
+    log_queue: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=2)
+    handler = BoundedQueueHandler(log_queue)
+    before = dropped_records()
+
+    for i in range(4):
+        handler.handle(logging.makeLogRecord({"msg": f"record {i}", "levelno": logging.INFO}))
+    assert dropped_records() - before == 2
+    assert [log_queue.get_nowait().msg for _ in range(2)] == ["record 0", "record 1"]
+
+    handler.handle(logging.makeLogRecord({"msg": "record 4", "levelno": logging.INFO}))
+    assert [log_queue.get_nowait().msg for _ in range(2)] == [
+        "record 4",
+        "Dropped 2 log records (log queue full)",
+    ]
@@ -0,0 +1,240 @@
+"""Tests for windowed processing of long recordings."""
+
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+from pyannote.core import Annotation, Segment
+
+from murmurai_server import transcriber
+from murmurai_server.cache import SAMPLE_RATE
+from murmurai_server.longform import (
+    SpeakerRegistry,
+    choose_cut,
+    offset_segments,
+    read_window,
+)
+from murmurai_server.transcriber import TranscribeOptions, run_models
+
+
+def test_choose_cut_longest_pause():
+    """Test that windows end in the middle of the longest pause."""
+    assert choose_cut([(0.0, 10.0), (14.0, 20.0), (21.0, 58.0)], 60.0) == 12.0
+    # Trailing silence counts as a pause; ties go to the latest
+    assert choose_cut([(0.0, 50.0)], 60.0) == 55.0
+    assert choose_cut([(2.0, 30.0), (32.0, 60.0)], 60.0) == 31.0
+
+
+def test_choose_cut_without_pause():
+    """Test that a span without speech, or without any pause, is kept whole."""
+    assert choose_cut([], 60.0) == 60.0
+    assert choose_cut([(0.0, 60.0)], 60.0) == 60.0
+
+
+def test_read_window_from_memmap(tmp_path: Path):
+    """Test that windows read from the file match slices of the map."""
+    samples = np.random.default_rng(0).standard_normal(10_000).astype(np.float32)
+    np.save(tmp_path / "audio.npy", samples)
+    audio = np.load(tmp_path / "audio.npy", mmap_mode="c")
+
+    window = read_window(audio, 1234, 5678)
+    assert not isinstance(window, np.memmap)
+    np.testing.assert_array_equal(window, samples[1234:5678])
+    np.testing.assert_array_equal(read_window(samples, 10, 20), samples[10:20])
+
+
+def test_offset_segments():
+    """Test that segment, word and char times move to recording time."""
+    segments = [
+        {
+            "start": 1.0,
+            "end": 2.5,
+            "words": [{"word": "a", "start": 1.0, "end": 1.2}, {"word": "42"}],
+            "chars": [{"char": "a", "start": 1.0, "end": 1.1}],
+        }
+    ]
+    offset_segments(segments, 600.0)
+
+    assert (segments[0]["start"], segments[0]["end"]) == (601.0, 602.5)
+    assert segments[0]["words"] == [{"word": "a", "start": 601.0, "end": 601.2}, {"word": "42"}]
+    assert segments[0]["chars"][0]["end"] == 601.1
+
+
+class TestSpeakerRegistry:
+    """Tests for reconciling window speakers through embeddings."""
+
+    def test_matches_swapped_labels(self):
+        """Test that the same voices keep their labels whatever a window calls them."""
+        registry = SpeakerRegistry(max_distance=0.5)
+        first = registry.match(
+            {"SPEAKER_00": [1.0, 0.0], "SPEAKER_01": [0.0, 1.0]},
+            {"SPEAKER_00": 10.0, "SPEAKER_01": 5.0},
+        )
+        second = registry.match(
+            {"SPEAKER_00": [0.1, 1.0], "SPEAKER_01": [1.0, 0.1], "SPEAKER_02": [-1.0, 0.0]},
+            {"SPEAKER_00": 3.0, "SPEAKER_01": 3.0, "SPEAKER_02": 1.0},
+        )
+
+        assert first == {"SPEAKER_00": "SPEAKER_00", "SPEAKER_01": "SPEAKER_01"}
+        assert second == {
+            "SPEAKER_00": "SPEAKER_01",
+            "SPEAKER_01": "SPEAKER_00",
+            "SPEAKER_02": "SPEAKER_02",
+        }
+
+    def test_merge_down_to_max_speakers(self):
+        """Test that the closest speakers merge and labels renumber by first appearance."""
+        registry = SpeakerRegistry(max_distance=0.1)
+        registry.match({"A": [1.0, 0.0, 0.0]}, {"A": 1.0})
+        registry.match({"B": [0.0, 1.0, 0.0]}, {"B": 1.0})
+        registry.match(
+            {"C": [0.0, 0.8, 0.6], "D": [], "E": [0.0, 0.0, 1.0]}, {"C": 1.0, "D": 1.0, "E": 0.5}
+        )
+
+        final = registry.merge_down(max_speakers=4)
+
+        # SPEAKER_02 (C) joins SPEAKER_01 (B); the embedding-less D is merged last
+        assert final == {
+            "SPEAKER_00": "SPEAKER_00",
+            "SPEAKER_01": "SPEAKER_01",
+            "SPEAKER_02": "SPEAKER_01",
+            "SPEAKER_03": "SPEAKER_02",
+            "SPEAKER_04": "SPEAKER_03",
+        }
+        assert set(registry.embeddings()) == {"SPEAKER_00", "SPEAKER_01", "SPEAKER_03"}
+
+
+VOICES = {"A": [1.0, 0.0, 0.0], "B": [0.0, 1.0, 0.0]}
+
+
+class _Model:
+    """ASR stub: one segment per speech region handed to it through the VAD."""
+
+    def __init__(self):
+        self.vad_model = None
+        self.windows: list[int] = []
+
+    def transcribe(self, audio, **kwargs):
+        self.windows.append(len(audio))
+        return {
+            "language": kwargs["language"] or "en",
+            "segments": [
+                {"text": "speech", "start": region.start, "end": region.end}
+                for region in self.vad_model(audio)
+            ],
+        }
+
+
+def _diarize_pipeline(calls: list[int]):
+    """Diarization stub: two speakers per window, local labels swapped every other window."""
+
+    def diarize(file, min_speakers=None, max_speakers=None, return_embeddings=False):
+        duration = file["waveform"].shape[1] / SAMPLE_RATE
+        order = ("A", "B") if len(calls) % 2 == 0 else ("B", "A")
+        calls.append(len(calls))
+        annotation = Annotation()
+        annotation[Segment(0, duration / 2)] = "SPEAKER_00"
+        annotation[Segment(duration / 2, duration)] = "SPEAKER_01"
+        embeddings = np.array([VOICES[voice] for voice in order])
+        return SimpleNamespace(speaker_diarization=annotation, speaker_embeddings=embeddings)
+
+    return diarize
+
+
+# Two regions per window; pauses at 7-9 s and 15-17 s for the cuts
+WINDOWED_REGIONS = [(0.5, 3.5), (4.5, 7.0), (9.0, 11.5), (12.5, 15.0), (17.0, 22.0), (24.0, 29.5)]
+
+
+def test_windowed_run(test_settings, tmp_path: Path, monkeypatch):
+    """Test that windows are cut at pauses, shifted and their speakers reconciled."""
+    test_settings.window_seconds = 10
+    test_settings.window_search_seconds = 4
+    np.save(tmp_path / "audio.npy", np.zeros(30 * SAMPLE_RATE, dtype=np.float32))
+    audio = np.load(tmp_path / "audio.npy", mmap_mode="c")
+
+    model = _Model()
+    calls: list[int] = []
+    monkeypatch.setattr(transcriber.ModelManager, "get_model", lambda **kwargs: model)
+    monkeypatch.setattr(
+        transcriber.ModelManager, "get_diarize_model", lambda name: _diarize_pipeline(calls)
+    )
+    monkeypatch.setattr(transcriber, "speech_regions", lambda *args: WINDOWED_REGIONS)
+
+    output = run_models(
+        audio, TranscribeOptions(speaker_labels=True, return_speaker_embeddings=True)
+    )
+
+    # The last window takes the rest (less than a search span beyond the nominal end)
+    assert model.windows == [8 * SAMPLE_RATE, 8 * SAMPLE_RATE, 14 * SAMPLE_RATE]
+    segments = output["result"]["segments"]
+    assert [(s["start"], s["end"]) for s in segments] == WINDOWED_REGIONS
+    # Window 2 calls B SPEAKER_00; voices keep their labels
+    assert [s["speaker"] for s in segments] == [
+        "SPEAKER_00",
+        "SPEAKER_01",
+        "SPEAKER_01",
+        "SPEAKER_00",
+        "SPEAKER_00",
+        "SPEAKER_01",
+    ]
+    assert output["language"] == "en"
+    assert set(output["speaker_embeddings"]) == {"SPEAKER_00", "SPEAKER_01"}
+    assert output["speech_regions"] == [list(region) for region in WINDOWED_REGIONS]
+
+
+class _Engine(_Model):
+    """ASR replica stub that waits until every replica has a shard in flight."""
+
+    def __init__(self, barrier: threading.Barrier):
+        super().__init__()
+        self.barrier = barrier
+        self.shards: list[tuple[int, str]] = []
+
+    def detect_language(self, audio):
+        return "de"
+
+    def transcribe(self, audio, language=None, **kwargs):
+        self.barrier.wait()
+        self.shards.append((len(audio), language))
+        return super().transcribe(audio, language=language, **kwargs)
+
+
+def test_sharded_transcription(test_settings, tmp_path: Path, monkeypatch):
+    """Test that long audio is cut at pauses, transcribed in parallel and merged in order."""
+    test_settings.shard_replicas = 3
+    test_settings.shard_min_seconds = 10
+    test_settings.window_search_seconds = 4
+    np.save(tmp_path / "audio.npy", np.zeros(60 * SAMPLE_RATE, dtype=np.float32))
+    audio = np.load(tmp_path / "audio.npy", mmap_mode="c")
+
+    barrier = threading.Barrier(3, timeout=10)
+    engines = [_Engine(barrier) for _ in range(3)]
+    monkeypatch.setattr(transcriber.ModelManager, "get_model", lambda **kwargs: engines[0])
+    monkeypatch.setattr(transcriber.ModelManager, "get_replicas", lambda **kwargs: engines)
+    # One second of speech every two seconds: the widest pauses near 20 s and 40 s end there
+    regions = [(t + 0.5, t + 1.5) for t in range(0, 60, 2)]
+    monkeypatch.setattr(transcriber, "speech_regions", lambda *args: regions)
+
+    output = run_models(audio, TranscribeOptions())
+
+    assert [engine.shards for engine in engines] == [
+        [(20 * SAMPLE_RATE, "de")],
+        [(20 * SAMPLE_RATE, "de")],
+        [(20 * SAMPLE_RATE, "de")],
+    ]
+    segments = output["result"]["segments"]
+    assert [(s["start"], s["end"]) for s in segments] == regions
+    assert output["language"] == "de"
+
+
+def test_short_audio_is_not_sharded(test_settings, monkeypatch):
+    """Test that audio under shard_min_seconds runs on the single model."""
+    test_settings.shard_replicas = 2
+    engine = _Engine(threading.Barrier(1))
+    monkeypatch.setattr(transcriber.ModelManager, "get_model", lambda **kwargs: engine)
+    monkeypatch.setattr(transcriber, "speech_regions", lambda *args: [(1.0, 2.0)])
+
+    run_models(np.zeros(5 * SAMPLE_RATE, dtype=np.float32), TranscribeOptions(language="en"))
+
+    assert engine.shards == [(5 * SAMPLE_RATE, "en")]
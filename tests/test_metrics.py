@@ -0,0 +1,208 @@
+"""Tests for Prometheus metrics."""
+
+import os
+import socket
+import subprocess
+import time
+
+import orjson
+import pytest
+from httpx import AsyncClient
+
+from murmurai_server import metrics
+from murmurai_server.database import claim_next_transcript, create_transcript
+from murmurai_server.worker import save_error
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """Start every test from an empty registry."""
+    metrics._reset()
+    yield
+    metrics._reset()
+
+
+def _lines(text: str, prefix: str) -> list[str]:
+    return [line for line in text.splitlines() if line.startswith(prefix)]
+
+
+def test_render_histograms_and_counters(test_settings):
+    """Test the text format: cumulative buckets, sum, count and labelled counters."""
+    for value in (0.05, 0.3, 42.0):
+        metrics.observe("murmurai_stage_duration_seconds", value, stage="asr")
+    metrics.inc("murmurai_model_cache_requests_total", model="asr", result="hit")
+    metrics.inc("murmurai_model_cache_requests_total", model="asr", result="hit")
+
+    text = metrics.render()
+
+    assert "# TYPE murmurai_stage_duration_seconds histogram" in text
+    buckets = _lines(text, 'murmurai_stage_duration_seconds_bucket{stage="asr"')
+    assert buckets[0] == 'murmurai_stage_duration_seconds_bucket{stage="asr",le="0.1"} 1'
+    assert 'murmurai_stage_duration_seconds_bucket{stage="asr",le="0.5"} 2' in buckets
+    assert buckets[-1] == 'murmurai_stage_duration_seconds_bucket{stage="asr",le="+Inf"} 3'
+    assert 'murmurai_stage_duration_seconds_sum{stage="asr"} 42.35' in text
+    assert 'murmurai_stage_duration_seconds_count{stage="asr"} 3' in text
+    assert 'murmurai_model_cache_requests_total{model="asr",result="hit"} 2' in text
+
+
+def test_render_adds_up_processes(test_settings):
+    """Test that other processes' files are summed, and stale gauges dropped."""
+    test_settings.metrics_flush_interval = 10.0
+    metrics.observe("murmurai_realtime_factor", 0.1)
+    directory = test_settings.data_dir / "metrics"
+    directory.mkdir(parents=True)
+
+    buckets = metrics.HISTOGRAMS["murmurai_realtime_factor"][1]
+    series = [0.0] * (len(buckets) + 3)
+    series[0], series[-2], series[-1] = 1, 0.01, 1
+    snapshot = {
+        "counters": [["murmurai_model_cache_evictions_total", {"model": "asr"}, 1]],
+        "histograms": [["murmurai_realtime_factor", {}, series]],
+        "gauges": [["murmurai_gpu_memory_allocated_bytes", {"device": "0"}, 1024.0]],
+    }
+    for name, age in (("gpu-1", 0), ("gpu-2", 3600)):  # gpu-2 exited an hour ago
+        path = directory / f"{name}.json"
+        path.write_bytes(orjson.dumps(snapshot))
+        os.utime(path, (time.time() - age, time.time() - age))
+
+    text = metrics.render()
+
+    assert 'murmurai_model_cache_evictions_total{model="asr"} 2' in text
+    assert "murmurai_realtime_factor_count 3" in text
+    assert _lines(text, "murmurai_gpu_memory_allocated_bytes{") == [
+        'murmurai_gpu_memory_allocated_bytes{device="0",process="gpu-1"} 1024'
+    ]
+
+
+def test_exited_processes_are_folded(test_settings):
+    """Test that files of exited processes are merged into one, keeping the totals."""
+    directory = test_settings.data_dir / "metrics"
+    directory.mkdir(parents=True)
+    exited = subprocess.Popen(["true"])
+    exited.wait()
+    snapshot = {
+        "counters": [["murmurai_model_cache_evictions_total", {"model": "asr"}, 1]],
+        "histograms": [],
+        "gauges": [],
+    }
+    host = socket.gethostname()
+    old = time.time() - 2 * metrics.EXITED_AFTER_SECONDS
+    for name, mtime in (
+        (f"{host}-{exited.pid}-0a0a0a0a", None),  # Gone from this host
+        ("gpu-host-7-1b1b1b1b", old),  # Another host, not written for hours
+        ("gpu-host-8-2c2c2c2c", None),  # Another host, still running
+    ):
+        path = directory / f"{name}.json"
+        path.write_bytes(orjson.dumps(snapshot))
+        if mtime:
+            os.utime(path, (mtime, mtime))
+
+    for _ in range(2):
+        text = metrics.render()
+        assert 'murmurai_model_cache_evictions_total{model="asr"} 3' in text
+
+    names = sorted(path.name for path in directory.glob("*.json"))
+    assert names == [
+        metrics.EXITED_FILE,
+        "gpu-host-8-2c2c2c2c.json",
+        f"{metrics._process_name()}.json",
+    ]
+
+
+def test_process_files_are_not_reused(test_settings):
+    """Test that a process with the PID of an earlier one writes a file of its own."""
+    metrics.flush()
+    first = metrics._process_name()
+    metrics._reset()  # As in a new process
+    metrics.flush()
+
+    assert metrics._process_name() != first
+    assert len(list((test_settings.data_dir / "metrics").glob("*.json"))) == 2
+
+
+@pytest.mark.asyncio
+async def test_queue_wait_recorded_on_first_claim(initialized_db, test_settings):
+    """Test that claiming a job records how long it waited."""
+    await create_transcript(
+        id="job-1",
+        audio_url=None,
+        language="en",
+        speaker_labels=False,
+        speakers_expected=None,
+        options={},
+        audio_path="/tmp/job-1.wav",
+    )
+    assert await claim_next_transcript("worker-1") is not None
+
+    assert "murmurai_queue_wait_seconds_count 1" in metrics.render()
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(async_client: AsyncClient, auth_headers: dict):
+    """Test /metrics: auth, request latency by route template, DB latency and queue depth."""
+    await create_transcript(
+        id="job-1",
+        audio_url=None,
+        language="en",
+        speaker_labels=False,
+        speakers_expected=None,
+        options={},
+        audio_path="/tmp/job-1.wav",
+    )
+    assert (await async_client.get("/metrics")).status_code == 401
+    response = await async_client.get("/v1/transcript/missing", headers=auth_headers)
+    assert response.status_code == 404
+
+    response = await async_client.get("/metrics", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert (
+        'murmurai_http_request_duration_seconds_count{method="GET",'
+        'route="/v1/transcript/{transcript_id}",status="404"} 1'
+    ) in text
+    assert 'murmurai_db_query_duration_seconds_count{query="get_transcript"} 1' in text
+    assert 'murmurai_queue_jobs{status="queued"} 1' in text
+    assert 'murmurai_queue_jobs{status="processing"} 0' in text
+
+
+def test_job_stats_collects_the_running_job(test_settings):
+    """Test that timers and cache lookups inside job_stats land in the job's breakdown."""
+    stats = metrics.JobStats()
+    with metrics.job_stats(stats, peaks=True):
+        with metrics.timer("murmurai_stage_duration_seconds", stage="asr"):
+            pass
+        metrics.inc("murmurai_model_cache_requests_total", model="asr", result="hit")
+        metrics.inc("murmurai_model_cache_requests_total", model="align", result="miss")
+        metrics.inc("murmurai_model_cache_requests_total", model="align", result="hit")
+    metrics.observe("murmurai_stage_duration_seconds", 1.0, stage="format")  # Not in a job
+
+    timings = stats.to_dict()
+    assert list(timings["stages"]) == ["asr"]
+    assert timings["model_cache"] == {"asr": "hit", "align": "miss"}
+    assert timings["peak_rss_bytes"] > 0
+    assert metrics.current_job() is None
+
+
+@pytest.mark.asyncio
+async def test_timings_are_merged_and_opt_in(async_client: AsyncClient, auth_headers: dict):
+    """Test that worker timings join the API's upload time and are returned on request."""
+    await create_transcript(
+        id="job-1",
+        audio_url=None,
+        language="en",
+        speaker_labels=False,
+        speakers_expected=None,
+        timings={"stages": {"upload": 0.25}},
+    )
+    await save_error("job-1", "boom", timings={"stages": {"decode": 1.5}, "audio_seconds": 3.0})
+
+    response = await async_client.get("/v1/transcript/job-1", headers=auth_headers)
+    assert response.json()["timings"] is None
+
+    response = await async_client.get(
+        "/v1/transcript/job-1", params={"include_timings": "true"}, headers=auth_headers
+    )
+    timings = response.json()["timings"]
+    assert timings["stages"] == {"upload": 0.25, "decode": 1.5}
+    assert timings["audio_seconds"] == 3.0
@@ -0,0 +1,229 @@
+"""Tests for the staged job pipeline."""
+
+import asyncio
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import orjson
+import pytest
+
+from murmurai_server.database import (
+    create_transcript,
+    get_transcript,
+    init_db,
+    requeue_worker_jobs,
+)
+from murmurai_server.logging import JSONFormatter
+from murmurai_server.pipeline import JobPipeline
+from murmurai_server.transcriber import TranscribeOptions
+
+STUB_RESULT = {
+    "text": "hello",
+    "words": [],
+    "utterances": [],
+    "confidence": None,
+    "audio_duration": 1000,
+    "language_code": "en",
+}
+
+
+@pytest.fixture
+def queued_jobs(test_settings, tmp_path: Path):
+    """Four queued jobs with placeholder audio files."""
+    asyncio.run(init_db())
+    paths = []
+    for i in range(4):
+        audio = tmp_path / f"job-{i}.wav"
+        audio.touch()
+        asyncio.run(
+            create_transcript(
+                id=f"job-{i}",
+                audio_url=None,
+                language="en",
+                speaker_labels=False,
+                speakers_expected=None,
+                options=TranscribeOptions(language="en").to_dict(),
+                audio_path=str(audio),
+                audio_sha256=f"digest-{i}",
+            )
+        )
+        paths.append(audio)
+    return paths
+
+
+def _slow(seconds: float, value=None):
+    def stage(*args, **kwargs):
+        time.sleep(seconds)
+        return value
+
+    return stage
+
+
+def test_decode_overlaps_gpu_stage(queued_jobs: list[Path], caplog):
+    """Test that decoding the next jobs runs while the GPU stage is busy."""
+    pipeline = JobPipeline("pipe-test", decode_workers=2, depth=2)
+    start = time.monotonic()
+    with (
+        patch("murmurai_server.pipeline.decode_audio", side_effect=_slow(0.2)) as decode,
+        patch("murmurai_server.pipeline.run_models", side_effect=_slow(0.2, {})),
+        patch("murmurai_server.pipeline.finish_result", return_value=STUB_RESULT),
+    ):
+        assert pipeline.run(max_jobs=4) == 4
+    elapsed = time.monotonic() - start
+    # The upload's digest keys the PCM cache, so the file is not hashed again
+    assert sorted(call.args for call in decode.call_args_list) == [
+        (audio, f"digest-{i}") for i, audio in enumerate(queued_jobs)
+    ]
+
+    # Serial: 4 x (0.2 decode + 0.2 GPU) = 1.6s; pipelined: ~0.2 + 4 x 0.2 = 1.0s
+    assert elapsed < 1.4
+    for i, audio in enumerate(queued_jobs):
+        assert asyncio.run(get_transcript(f"job-{i}"))["status"] == "completed"
+        assert not audio.exists()
+
+    stats = pipeline.stats()
+    assert stats["gpu"]["jobs"] == 4
+    assert stats["gpu"]["occupancy"] > 0.6
+    assert stats["decode"]["jobs"] == 4
+
+    # Occupancy reaches JSON logs as a field, not just in the message
+    [record] = [r for r in caplog.records if "pipeline occupancy" in r.getMessage()]
+    logged = orjson.loads(JSONFormatter().format(record))["pipeline"]
+    assert logged["gpu"]["jobs"] == 4 and logged["gpu"]["occupancy"] > 0.6
+
+
+def test_stage_failures_mark_jobs_as_error(queued_jobs: list[Path]):
+    """Test that a failing stage fails only its job and the pipeline continues."""
+
+    def decode(path: Path, audio_sha256=None):
+        if path.name == "job-0.wav":
+            raise RuntimeError("Failed to load audio")
+        return path.name
+
+    def run_models(audio, options, progress=None, name="", job_id=None, checkpoint_key=None):
+        if audio == "job-1.wav":
+            raise RuntimeError("CUDA out of memory")
+        return {}
+
+    with (
+        patch("murmurai_server.pipeline.decode_audio", side_effect=decode),
+        patch("murmurai_server.pipeline.run_models", side_effect=run_models),
+        patch("murmurai_server.pipeline.finish_result", return_value=STUB_RESULT),
+    ):
+        pipeline = JobPipeline("pipe-test")
+        assert pipeline.run(max_jobs=4) == 4
+
+    results = [asyncio.run(get_transcript(f"job-{i}")) for i in range(4)]
+    assert [r["status"] for r in results] == ["error", "error", "completed", "completed"]
+    assert results[0]["error"] == "Failed to load audio"
+    assert results[1]["error"] == "CUDA out of memory"
+    assert pipeline.stats()["decode"]["errors"] == 1
+    assert pipeline.stats()["gpu"]["errors"] == 1
+    assert not any(audio.exists() for audio in queued_jobs)
+
+
+def test_crash_spends_attempts_only_of_started_jobs(queued_jobs: list[Path]):
+    """Test that jobs prefetched but not yet on the GPU keep their attempts after a crash."""
+    stop = False
+    crash: dict = {}
+
+    def run_models(*args, **kwargs):
+        # Crash on the first job once the decode threads have claimed ahead
+        nonlocal stop
+        if stop:
+            return {}
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            rows = [asyncio.run(get_transcript(f"job-{i}")) for i in range(4)]
+            if sum(r["status"] == "processing" for r in rows) == 4:
+                break
+            time.sleep(0.01)
+        crash["requeued"], _ = asyncio.run(requeue_worker_jobs("pipe-test", max_attempts=1))
+        crash["rows"] = [asyncio.run(get_transcript(f"job-{i}")) for i in range(4)]
+        stop = True
+        raise RuntimeError("worker died")
+
+    with (
+        patch("murmurai_server.pipeline.decode_audio", return_value=None),
+        patch("murmurai_server.pipeline.run_models", side_effect=run_models),
+        patch("murmurai_server.pipeline.finish_result", return_value=STUB_RESULT),
+    ):
+        JobPipeline("pipe-test", should_stop=lambda: stop, decode_workers=2, depth=1).run()
+
+    # job-0 was on the GPU (its one attempt is used up); the others were only prefetched
+    assert crash["requeued"] == 3
+    rows = crash["rows"]
+    assert rows[0]["status"] == "error"
+    assert "retries exhausted" in rows[0]["error"]
+    assert [(r["status"], r["attempts"]) for r in rows[1:]] == [("queued", 0)] * 3
+
+    # The prefetched jobs were dropped, not run: they stay queued with their audio
+    after = [asyncio.run(get_transcript(f"job-{i}")) for i in range(1, 4)]
+    assert [(r["status"], r["attempts"]) for r in after] == [("queued", 0)] * 3
+    assert all(audio.exists() for audio in queued_jobs[1:])
+
+
+def test_claim_and_options_failures_keep_decoder_running(queued_jobs: list[Path], test_settings):
+    """Test that a failed claim is retried and a job with bad options is failed alone."""
+    from murmurai_server import pipeline as pipeline_module
+
+    test_settings.worker_poll_interval = 0.01
+    real_claim = pipeline_module.claim_next_transcript
+    real_from_dict = TranscribeOptions.from_dict
+    calls = 0
+
+    async def claim(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("database is locked")
+        return await real_claim(*args, **kwargs)
+
+    def from_dict(data):
+        if calls == 2:
+            raise TypeError("bad options")
+        return real_from_dict(data)
+
+    with (
+        patch("murmurai_server.pipeline.claim_next_transcript", side_effect=claim),
+        patch.object(TranscribeOptions, "from_dict", side_effect=from_dict),
+        patch("murmurai_server.pipeline.decode_audio", return_value=None),
+        patch("murmurai_server.pipeline.run_models", return_value={}),
+        patch("murmurai_server.pipeline.finish_result", return_value=STUB_RESULT),
+    ):
+        pipeline = JobPipeline("pipe-test", decode_workers=1)
+        assert pipeline.run(max_jobs=4) == 4
+
+    results = [asyncio.run(get_transcript(f"job-{i}")) for i in range(4)]
+    assert [r["status"] for r in results] == ["error", "completed", "completed", "completed"]
+    assert results[0]["error"] == "bad options"
+    assert pipeline.stats()["decode"]["errors"] == 1
+
+
+def test_post_stage_survives_database_errors(queued_jobs: list[Path]):
+    """Test that failing to save or notify one job does not stop the post stage."""
+    from murmurai_server import worker
+
+    real_save_result = worker.save_result
+
+    async def save_result(transcript_id, result, timings=None):
+        if transcript_id == "job-0":
+            raise RuntimeError("database is locked")
+        return await real_save_result(transcript_id, result, timings=timings)
+
+    with (
+        patch("murmurai_server.pipeline.decode_audio", return_value=None),
+        patch("murmurai_server.pipeline.run_models", return_value={}),
+        patch("murmurai_server.pipeline.finish_result", return_value=STUB_RESULT),
+        patch("murmurai_server.worker.save_result", side_effect=save_result),
+        patch("murmurai_server.worker.save_error", side_effect=RuntimeError("disk full")),
+        patch("murmurai_server.pipeline.enqueue_webhooks", side_effect=RuntimeError("disk full")),
+    ):
+        pipeline = JobPipeline("pipe-test")
+        assert pipeline.run(max_jobs=4) == 4
+
+    results = [asyncio.run(get_transcript(f"job-{i}")) for i in range(4)]
+    assert [r["status"] for r in results[1:]] == ["completed"] * 3
+    assert pipeline.stats()["post"]["errors"] == 1
+    assert not any(audio.exists() for audio in queued_jobs)
@@ -6,7 +6,8 @@ from unittest.mock import AsyncMock, patch
 import pytest
 from httpx import AsyncClient
 
-from murmurai_server.database import create_transcript, update_transcript
+from murmurai_server.database import create_transcript, get_transcript, update_transcript
+from murmurai_server.models import Transcript
 
 
 class TestHealthEndpoints:
@@ -158,6 +159,61 @@ class TestTranscriptEndpoints:
         assert data["id"] == "get-test-id"
         assert data["audio_url"] == "https://example.com/get.mp3"
 
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("validate", [False, True])
+    async def test_get_transcript_response_shape(
+        self, async_client: AsyncClient, auth_headers: dict, test_settings, validate: bool
+    ):
+        """Test that completed transcripts encode to the Transcript shape in both modes."""
+        from murmurai_server.transcriber import format_result
+        from murmurai_server.worker import save_result
+
+        test_settings.validate_responses = validate
+        await create_transcript(
+            id="shape-test-id",
+            audio_url=None,
+            language="en",
+            speaker_labels=False,
+            speakers_expected=None,
+            webhook_url="https://example.com/hook",
+            webhook_auth_header="Bearer secret",
+        )
+        segments = [
+            {
+                "start": 0.0,
+                "end": 1.0,
+                "text": "hi there",
+                "words": [{"word": "hi", "start": 0.0, "end": 0.4, "score": 0.9}],
+            }
+        ]
+        await save_result("shape-test-id", format_result({"segments": segments}, "en"))
+
+        response = await async_client.get("/v1/transcript/shape-test-id", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        data = response.json()
+        assert set(data) == {
+            "id",
+            "status",
+            "audio_url",
+            "language_code",
+            "text",
+            "words",
+            "utterances",
+            "confidence",
+            "audio_duration",
+            "progress",
+            "error",
+            "speaker_identities",
+            "speaker_embeddings",
+            "timings",
+        }
+        assert data["status"] == "completed"
+        assert data["words"][0]["text"] == "hi"
+        assert data["utterances"][0]["text"] == "hi there"
+        assert data["utterances"][0].get("speaker") is None
+
     @pytest.mark.asyncio
     async def test_get_transcript_not_found(self, async_client: AsyncClient, auth_headers: dict):
         """Test GET /v1/transcript/{id} returns 404 for missing."""
@@ -320,6 +376,51 @@ class TestSubtitleEndpoints:
         assert "WEBVTT" in response.text
         assert "Test Text" in response.text
 
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("fmt", ["srt", "vtt", "tsv"])
+    async def test_streamed_export_matches_utterances(
+        self, async_client: AsyncClient, auth_headers: dict, initialized_db, fmt: str
+    ):
+        """Test streamed exports of a columnar result span several chunks unchanged."""
+        from murmurai_server import exports
+        from murmurai_server.columnar import TranscriptColumns
+        from murmurai_server.database import get_transcript
+
+        segments = [
+            {
+                "start": i * 2.0,
+                "end": i * 2.0 + 1.5,
+                "text": f" line\t{i} ",
+                "speaker": f"SPEAKER_{i % 3:02d}" if i % 4 else None,
+                "words": [{"word": "line", "start": i * 2.0, "end": i * 2.0 + 1.5, "score": 0.9}],
+            }
+            for i in range(exports.EXPORT_CHUNK_ROWS * 2 + 7)
+        ]
+        await create_transcript(
+            id=f"stream-{fmt}",
+            audio_url=None,
+            language=None,
+            speaker_labels=True,
+            speakers_expected=None,
+        )
+        await update_transcript(
+            f"stream-{fmt}",
+            status="completed",
+            text="",
+            result_columns=TranscriptColumns.from_segments(segments, True).to_dict(),
+        )
+
+        response = await async_client.get(
+            f"/v1/transcript/stream-{fmt}/{fmt}",
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 200
+        transcript = await get_transcript(f"stream-{fmt}")
+        assert transcript is not None
+        generate = getattr(exports, f"generate_{fmt}")
+        assert response.text == generate(transcript["utterances"])
+
     @pytest.mark.asyncio
     async def test_get_txt_completed(
         self, async_client: AsyncClient, auth_headers: dict, initialized_db
@@ -402,3 +503,613 @@ class TestSubtitleEndpoints:
         data = response.json()
         assert "words" in data
         assert len(data["words"]) == 1
+
+
+class TestExportRenditions:
+    """Tests for cached export renditions and conditional requests."""
+
+    async def _completed(self, transcript_id: str, text: str) -> None:
+        await create_transcript(
+            id=transcript_id,
+            audio_url=None,
+            language=None,
+            speaker_labels=False,
+            speakers_expected=None,
+        )
+        await update_transcript(
+            transcript_id,
+            status="completed",
+            text=text,
+            utterances=[{"text": text, "start": 0, "end": 1000}],
+        )
+
+    @pytest.mark.asyncio
+    async def test_etag_and_304(self, async_client: AsyncClient, auth_headers: dict):
+        """Test that exports carry an ETag and a matching If-None-Match gets 304."""
+        await self._completed("etag-id", "Hello")
+
+        first = await async_client.get("/v1/transcript/etag-id/srt", headers=auth_headers)
+        assert first.status_code == 200
+        assert "Hello" in first.text
+        etag = first.headers["etag"]
+        assert first.headers["last-modified"]
+
+        again = await async_client.get(
+            "/v1/transcript/etag-id/srt", headers={**auth_headers, "If-None-Match": etag}
+        )
+        assert again.status_code == 304
+        assert again.headers["etag"] == etag
+        assert again.content == b""
+
+        other = await async_client.get("/v1/transcript/etag-id/vtt", headers=auth_headers)
+        assert other.headers["etag"] != etag
+
+    @pytest.mark.asyncio
+    async def test_gzip_variant(self, async_client: AsyncClient, auth_headers: dict):
+        """Test that the pre-compressed variant is sent when accepted."""
+        await self._completed("gzip-id", "Compressed")
+
+        plain = await async_client.get(
+            "/v1/transcript/gzip-id/json", headers={**auth_headers, "Accept-Encoding": "identity"}
+        )
+        zipped = await async_client.get(
+            "/v1/transcript/gzip-id/json", headers={**auth_headers, "Accept-Encoding": "gzip"}
+        )
+
+        assert "content-encoding" not in plain.headers
+        assert zipped.headers["content-encoding"] == "gzip"
+        assert zipped.headers["vary"] == "Accept-Encoding"
+        assert zipped.headers["etag"] != plain.headers["etag"]
+        assert zipped.json() == plain.json()
+        assert plain.json()["text"] == "Compressed"
+        assert set(plain.json()) == set(Transcript.model_fields)  # No internal columns
+
+    @pytest.mark.asyncio
+    async def test_new_result_changes_rendition(
+        self, async_client: AsyncClient, auth_headers: dict
+    ):
+        """Test that a re-completed transcript is re-rendered under a new ETag."""
+        await self._completed("rerender-id", "Before")
+        first = await async_client.get("/v1/transcript/rerender-id/txt", headers=auth_headers)
+
+        with patch(
+            "murmurai_server.server.get_transcript_version",
+            new=AsyncMock(
+                return_value={"status": "completed", "completed_at": "2099-01-01", "options": {}}
+            ),
+        ):
+            await update_transcript("rerender-id", text="After")
+            second = await async_client.get(
+                "/v1/transcript/rerender-id/txt",
+                headers={**auth_headers, "If-None-Match": first.headers["etag"]},
+            )
+
+        assert second.status_code == 200
+        assert second.text == "After"
+
+    @pytest.mark.asyncio
+    async def test_subtitle_layout(self, async_client: AsyncClient, auth_headers: dict):
+        """Test that stored layout options apply and query parameters override them."""
+        await create_transcript(
+            id="layout-id",
+            audio_url=None,
+            language=None,
+            speaker_labels=False,
+            speakers_expected=None,
+            options={"max_line_width": 7, "max_line_count": 1},
+        )
+        words = [
+            {"text": text, "start": i * 500, "end": i * 500 + 500, "confidence": 0.9}
+            for i, text in enumerate(["aaa", "bbb", "ccc"])
+        ]
+        await update_transcript(
+            "layout-id",
+            status="completed",
+            text="aaa bbb ccc",
+            utterances=[{"text": "aaa bbb ccc", "start": 0, "end": 1500, "words": words}],
+        )
+
+        stored = await async_client.get("/v1/transcript/layout-id/srt", headers=auth_headers)
+        wide = await async_client.get(
+            "/v1/transcript/layout-id/srt?max_line_width=80", headers=auth_headers
+        )
+
+        assert stored.text == (
+            "1\n00:00:00,000 --> 00:00:01,000\naaa bbb\n\n2\n00:00:01,000 --> 00:00:01,500\nccc\n"
+        )
+        assert wide.text == "1\n00:00:00,000 --> 00:00:01,500\naaa bbb ccc\n"
+        assert wide.headers["etag"] != stored.headers["etag"]
+
+    @pytest.mark.asyncio
+    async def test_cache_disabled(
+        self, async_client: AsyncClient, auth_headers: dict, test_settings
+    ):
+        """Test that exports are streamed without validators when the cache is off."""
+        test_settings.rendition_cache = False
+        await self._completed("nocache-id", "Uncached")
+
+        response = await async_client.get("/v1/transcript/nocache-id/tsv", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+        assert response.text.endswith("Uncached")
+        assert not (test_settings.data_dir / "cache" / "renditions").exists()
+
+
+class TestInternalJobEndpoints:
+    """Tests for the remote worker lease protocol."""
+
+    async def _queue_job(self, job_id: str, tmp_path: Path) -> Path:
+        audio = tmp_path / f"{job_id}.wav"
+        audio.write_bytes(b"RIFF-test-audio")
+        await create_transcript(
+            id=job_id,
+            audio_url=None,
+            language="en",
+            speaker_labels=False,
+            speakers_expected=None,
+            options={"language": "en"},
+            audio_path=str(audio),
+            audio_sha256="digest",
+            trace_context={"request_id": "req-1"},
+        )
+        return audio
+
+    @pytest.mark.asyncio
+    async def test_lease_empty_queue(
+        self, async_client: AsyncClient, auth_headers: dict, initialized_db
+    ):
+        """Test that leasing from an empty queue returns 204."""
+        response = await async_client.post(
+            "/v1/internal/jobs/lease", headers=auth_headers, json={"worker_id": "w1"}
+        )
+        assert response.status_code == 204
+
+    @pytest.mark.asyncio
+    async def test_lease_heartbeat_audio_complete(
+        self, async_client: AsyncClient, auth_headers: dict, initialized_db, tmp_path: Path
+    ):
+        """Test the full lease -> heartbeat -> audio -> complete cycle."""
+        audio = await self._queue_job("lease-job", tmp_path)
+
+        lease = await async_client.post(
+            "/v1/internal/jobs/lease", headers=auth_headers, json={"worker_id": "w1"}
+        )
+        assert lease.status_code == 200
+        job = lease.json()
+        assert job["id"] == "lease-job"
+        assert job["options"] == {"language": "en"}
+        assert job["attempts"] == 1
+        assert job["audio_sha256"] == "digest"
+        assert job["trace_context"] == {"request_id": "req-1"}
+
+        beat = await async_client.post(
+            "/v1/internal/jobs/lease-job/heartbeat",
+            headers=auth_headers,
+            json={"worker_id": "w1", "progress": 0.5},
+        )
+        assert beat.status_code == 200
+
+        data = await async_client.get(
+            job["audio_url"], headers=auth_headers, params={"worker_id": "w1"}
+        )
+        assert data.content == b"RIFF-test-audio"
+
+        done = await async_client.post(
+            "/v1/internal/jobs/lease-job/complete",
+            headers=auth_headers,
+            json={
+                "worker_id": "w1",
+                "result": {
+                    "text": "hi",
+                    "words": [],
+                    "utterances": [],
+                    "audio_duration": 100,
+                    "language_code": "en",
+                },
+            },
+        )
+        assert done.status_code == 200
+        assert not audio.exists()
+
+        result = await async_client.get("/v1/transcript/lease-job", headers=auth_headers)
+        assert result.json()["status"] == "completed"
+        assert result.json()["text"] == "hi"
+
+    @pytest.mark.asyncio
+    async def test_other_worker_is_rejected(
+        self, async_client: AsyncClient, auth_headers: dict, initialized_db, tmp_path: Path
+    ):
+        """Test that only the lease holder can heartbeat or post results."""
+        await self._queue_job("owned-job", tmp_path)
+        await async_client.post(
+            "/v1/internal/jobs/lease", headers=auth_headers, json={"worker_id": "w1"}
+        )
+
+        beat = await async_client.post(
+            "/v1/internal/jobs/owned-job/heartbeat",
+            headers=auth_headers,
+            json={"worker_id": "w2"},
+        )
+        assert beat.status_code == 409
+        fail = await async_client.post(
+            "/v1/internal/jobs/owned-job/fail",
+            headers=auth_headers,
+            json={"worker_id": "w2", "error": "boom"},
+        )
+        assert fail.status_code == 409
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_is_reclaimed(
+        self, async_client: AsyncClient, auth_headers: dict, initialized_db, tmp_path: Path
+    ):
+        """Test that a job whose worker went silent is leased to the next worker."""
+        await self._queue_job("stale-job", tmp_path)
+        await async_client.post(
+            "/v1/internal/jobs/lease", headers=auth_headers, json={"worker_id": "w1"}
+        )
+        await update_transcript("stale-job", lease_expires_at="2000-01-01 00:00:00")
+
+        lease = await async_client.post(
+            "/v1/internal/jobs/lease", headers=auth_headers, json={"worker_id": "w2"}
+        )
+        assert lease.status_code == 200
+        assert lease.json()["id"] == "stale-job"
+        assert lease.json()["attempts"] == 2
+
+        late = await async_client.post(
+            "/v1/internal/jobs/stale-job/heartbeat",
+            headers=auth_headers,
+            json={"worker_id": "w1"},
+        )
+        assert late.status_code == 409
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_out_of_attempts_is_notified(
+        self,
+        async_client: AsyncClient,
+        auth_headers: dict,
+        initialized_db,
+        test_settings,
+        tmp_path: Path,
+    ):
+        """Test that a silent worker's job on its last attempt fails with a webhook, audio gone."""
+        from murmurai_server.database import get_webhook_deliveries
+
+        test_settings.max_job_attempts = 1
+        audio = await self._queue_job("last-try", tmp_path)
+        await update_transcript("last-try", webhook_url="https://hooks.example.com/done")
+        await async_client.post(
+            "/v1/internal/jobs/lease", headers=auth_headers, json={"worker_id": "w1"}
+        )
+        await update_transcript("last-try", lease_expires_at="2000-01-01 00:00:00")
+
+        lease = await async_client.post(
+            "/v1/internal/jobs/lease", headers=auth_headers, json={"worker_id": "w2"}
+        )
+        assert lease.status_code == 204
+        assert (await get_transcript("last-try"))["status"] == "error"
+        assert [d["status"] for d in await get_webhook_deliveries("last-try")] == ["pending"]
+        assert not audio.exists()
+
+
+class TestResultCache:
+    """Tests for content-hash deduplication of submissions."""
+
+    RESULT = {
+        "text": "cached words",
+        "words": [],
+        "utterances": [],
+        "confidence": None,
+        "audio_duration": 1000,
+        "language_code": "en",
+    }
+
+    async def _submit(self, client: AsyncClient, headers: dict, **data: str) -> dict:
+        response = await client.post(
+            "/v1/transcript",
+            headers=headers,
+            files={"file": ("clip.wav", b"RIFF-same-bytes", "audio/wav")},
+            data=data,
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    @pytest.mark.asyncio
+    async def test_resubmission_completes_from_cache(
+        self, async_client: AsyncClient, auth_headers: dict, test_settings
+    ):
+        """Test that identical audio + options is answered without a new job."""
+        from murmurai_server.database import claim_next_transcript
+        from murmurai_server.worker import save_result
+
+        test_settings.embedded_worker = False
+        first = await self._submit(async_client, auth_headers)
+        assert first["status"] == "queued"
+        assert (await claim_next_transcript("w1"))["id"] == first["id"]
+        await save_result(first["id"], self.RESULT)
+
+        second = await self._submit(async_client, auth_headers)
+        assert second["id"] != first["id"]
+        assert second["status"] == "completed"
+        assert second["text"] == "cached words"
+        assert await claim_next_transcript("w1") is None
+
+        # Export-only options share the entry, transcription options do not
+        assert (await self._submit(async_client, auth_headers, max_line_width="20"))[
+            "status"
+        ] == "completed"
+        assert (await self._submit(async_client, auth_headers, language_code="de"))[
+            "status"
+        ] == "queued"
+
+        stats = await async_client.get("/v1/cache/stats", headers=auth_headers)
+        assert stats.status_code == 200
+        assert stats.json()["hits"] >= 2
+
+    @pytest.mark.asyncio
+    async def test_duplicate_attaches_to_inflight_job(
+        self, async_client: AsyncClient, auth_headers: dict, test_settings
+    ):
+        """Test that a duplicate of a running job is completed with its result."""
+        from murmurai_server.database import claim_next_transcript
+        from murmurai_server.worker import save_result
+
+        test_settings.embedded_worker = False
+        first = await self._submit(async_client, auth_headers)
+        second = await self._submit(async_client, auth_headers)
+        assert second["status"] == "queued"
+
+        # Only the primary is ever handed to a worker
+        assert (await claim_next_transcript("w1"))["id"] == first["id"]
+        assert await claim_next_transcript("w1") is None
+
+        attached = await save_result(first["id"], self.RESULT)
+        assert [job["id"] for job in attached] == [second["id"]]
+
+        result = await async_client.get(f"/v1/transcript/{second['id']}", headers=auth_headers)
+        assert result.json()["status"] == "completed"
+        assert result.json()["text"] == "cached words"
+
+
+class TestRealignment:
+    """Tests for adding word timestamps to a completed transcript."""
+
+    SEGMENTS = [
+        {"start": 0.0, "end": 1.0, "text": "hello there", "speaker": "SPEAKER_00"},
+        {"start": 1.5, "end": 2.0, "text": "hi", "speaker": "SPEAKER_01"},
+    ]
+
+    async def _completed(self, transcript_id: str, audio_sha256: str | None) -> None:
+        from murmurai_server.transcriber import format_result
+        from murmurai_server.worker import save_result
+
+        await create_transcript(
+            id=transcript_id,
+            audio_url=None,
+            language="en",
+            speaker_labels=True,
+            speakers_expected=None,
+            options={"speaker_labels": True},
+            audio_sha256=audio_sha256,
+        )
+        await save_result(
+            transcript_id,
+            format_result({"segments": self.SEGMENTS}, "en", speaker_labels=True),
+            cache=False,
+        )
+
+    @staticmethod
+    def _align(result, audio, language, options):
+        """Alignment stub: one word per token, spread evenly over its segment."""
+        segments = []
+        for segment in result["segments"]:
+            tokens = segment["text"].split()
+            step = (segment["end"] - segment["start"]) / len(tokens)
+            words = [
+                {
+                    "word": token,
+                    "start": segment["start"] + i * step,
+                    "end": segment["start"] + (i + 1) * step,
+                    "score": 0.9,
+                }
+                for i, token in enumerate(tokens)
+            ]
+            segments.append({**segment, "words": words})
+        return {"segments": segments}
+
+    @pytest.mark.asyncio
+    async def test_align_adds_words_in_place(
+        self, async_client: AsyncClient, auth_headers: dict, test_settings, monkeypatch
+    ):
+        """Test that stored utterances are aligned without ASR and keep their speakers."""
+        import numpy as np
+
+        from murmurai_server import transcriber
+
+        pcm = test_settings.data_dir / "cache" / "pcm"
+        pcm.mkdir(parents=True)
+        np.save(pcm / "abc.npy", np.zeros(16000 * 3, dtype=np.float32))
+        await self._completed("align-1", "abc")
+        calls = []
+        monkeypatch.setattr(
+            transcriber, "_align", lambda *args: calls.append(args[3]) or self._align(*args)
+        )
+
+        before = await async_client.get("/v1/transcript/align-1/srt", headers=auth_headers)
+        response = await async_client.post(
+            "/v1/transcript/align-1/align",
+            json={"interpolate_method": "linear"},
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [(w["text"], w["start"], w["speaker"]) for w in data["words"]] == [
+            ("hello", 0, "SPEAKER_00"),
+            ("there", 500, "SPEAKER_00"),
+            ("hi", 1500, "SPEAKER_01"),
+        ]
+        assert data["confidence"] == pytest.approx(0.9)
+        assert calls[0].interpolate_method == "linear"
+        stored = await get_transcript("align-1")
+        assert stored is not None and stored["options"]["word_timestamps"] is True
+        after = await async_client.get("/v1/transcript/align-1/srt", headers=auth_headers)
+        assert after.headers["etag"] != before.headers["etag"]
+
+    @pytest.mark.asyncio
+    async def test_align_without_cached_audio(self, async_client: AsyncClient, auth_headers: dict):
+        """Test that alignment is refused once the decoded audio was evicted."""
+        await self._completed("align-2", "evicted")
+
+        response = await async_client.post("/v1/transcript/align-2/align", headers=auth_headers)
+        assert response.status_code == 410
+
+    @pytest.mark.asyncio
+    async def test_align_requires_completed_transcript(
+        self, async_client: AsyncClient, auth_headers: dict
+    ):
+        """Test that only completed transcripts are aligned, and unknown ones are 404."""
+        await create_transcript(
+            id="align-3",
+            audio_url=None,
+            language="en",
+            speaker_labels=False,
+            speakers_expected=None,
+        )
+
+        response = await async_client.post("/v1/transcript/align-3/align", headers=auth_headers)
+        assert response.status_code == 409
+        response = await async_client.post("/v1/transcript/missing/align", headers=auth_headers)
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_align_needs_embedded_worker(
+        self, async_client: AsyncClient, auth_headers: dict, test_settings, monkeypatch
+    ):
+        """Test that the API process does not load models when jobs run in workers only."""
+        from murmurai_server import server
+
+        test_settings.embedded_worker = False
+        await self._completed("align-4", "abc")
+        monkeypatch.setattr(server, "realign", lambda *args: pytest.fail("aligned in the API"))
+
+        response = await async_client.post("/v1/transcript/align-4/align", headers=auth_headers)
+        assert response.status_code == 503
+
+
+class TestRediarization:
+    """Tests for assigning speakers again with other speaker counts."""
+
+    SEGMENTS = [
+        {"start": 0.0, "end": 1.0, "text": "hello there", "speaker": "SPEAKER_00"},
+        {"start": 1.5, "end": 2.0, "text": "hi", "speaker": "SPEAKER_01"},
+    ]
+
+    async def _completed(self, transcript_id: str, audio_sha256: str | None = None) -> None:
+        from murmurai_server.transcriber import format_result
+        from murmurai_server.worker import save_result
+
+        await create_transcript(
+            id=transcript_id,
+            audio_url=None,
+            language="en",
+            speaker_labels=True,
+            speakers_expected=None,
+            options={"speaker_labels": True},
+            audio_sha256=audio_sha256,
+        )
+        await save_result(
+            transcript_id,
+            format_result({"segments": self.SEGMENTS}, "en", speaker_labels=True),
+            cache=False,
+        )
+
+    @pytest.mark.asyncio
+    async def test_diarize_reclusters_cached_intermediates(
+        self, async_client: AsyncClient, auth_headers: dict, monkeypatch
+    ):
+        """Test that stored embeddings are clustered again and speakers re-assigned."""
+        import numpy as np
+
+        from murmurai_server import transcriber
+
+        await self._completed("diarize-1")
+        calls = []
+
+        def recluster(pipeline, arrays, min_speakers, max_speakers):
+            calls.append((min_speakers, max_speakers))
+            return [(0.0, 2.5, "SPEAKER_00")], {"SPEAKER_00": np.ones(4)}
+
+        monkeypatch.setattr(transcriber, "get_diarization", lambda job_id: {"window": None})
+        monkeypatch.setattr(transcriber.ModelManager, "get_diarize_model", lambda model: None)
+        monkeypatch.setattr(transcriber, "recluster", recluster)
+
+        response = await async_client.post(
+            "/v1/transcript/diarize-1/diarize",
+            json={"speakers_expected": 1},
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [u["speaker"] for u in data["utterances"]] == ["SPEAKER_00", "SPEAKER_00"]
+        assert [u["text"] for u in data["utterances"]] == ["hello there", "hi"]
+        assert calls == [(1, 1)]
+
+    @pytest.mark.asyncio
+    async def test_diarize_without_intermediates_or_audio(
+        self, async_client: AsyncClient, auth_headers: dict
+    ):
+        """Test that re-diarization is refused once nothing to diarize is cached."""
+        await self._completed("diarize-2", "evicted")
+
+        response = await async_client.post(
+            "/v1/transcript/diarize-2/diarize", json={}, headers=auth_headers
+        )
+        assert response.status_code == 410
+
+    @pytest.mark.asyncio
+    async def test_diarize_needs_embedded_worker(
+        self, async_client: AsyncClient, auth_headers: dict, test_settings, monkeypatch
+    ):
+        """Test that the API process does not diarize when jobs run in workers only."""
+        from murmurai_server import server
+
+        test_settings.embedded_worker = False
+        await self._completed("diarize-5")
+        monkeypatch.setattr(server, "rediarize", lambda *args: pytest.fail("diarized in the API"))
+
+        response = await async_client.post(
+            "/v1/transcript/diarize-5/diarize", json={}, headers=auth_headers
+        )
+        assert response.status_code == 503
+
+    @pytest.mark.asyncio
+    async def test_diarize_rejects_bad_requests(
+        self, async_client: AsyncClient, auth_headers: dict
+    ):
+        """Test unknown, incomplete and inverted speaker-range requests."""
+        await create_transcript(
+            id="diarize-3",
+            audio_url=None,
+            language="en",
+            speaker_labels=False,
+            speakers_expected=None,
+        )
+        await self._completed("diarize-4")
+
+        response = await async_client.post(
+            "/v1/transcript/missing/diarize", json={}, headers=auth_headers
+        )
+        assert response.status_code == 404
+        response = await async_client.post(
+            "/v1/transcript/diarize-3/diarize", json={}, headers=auth_headers
+        )
+        assert response.status_code == 409
+        response = await async_client.post(
+            "/v1/transcript/diarize-4/diarize",
+            json={"min_speakers": 3, "max_speakers": 2},
+            headers=auth_headers,
+        )
+        assert response.status_code == 400
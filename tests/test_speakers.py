@@ -0,0 +1,193 @@
+"""Tests for the speaker embedding index and speaker identification."""
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+
+from murmurai_server.database import create_transcript
+from murmurai_server.speakers import (
+    decode_embedding,
+    delete_enrollment,
+    encode_embedding,
+    enroll,
+    identify,
+    load_index,
+)
+from murmurai_server.transcriber import format_result
+
+ALICE = [1.0, 0.2, 0.0, 0.0]
+BOB = [0.0, 0.1, 1.0, 0.3]
+
+
+def test_embedding_roundtrip():
+    """Test that embeddings encode to base64 float16 and decode back closely."""
+    vector = np.random.default_rng(0).standard_normal(256).astype(np.float32)
+    encoded = encode_embedding(vector)
+
+    assert len(encoded) == 684  # 512 bytes of float16 in base64
+    np.testing.assert_allclose(decode_embedding(encoded), vector, rtol=1e-3, atol=1e-3)
+
+
+def test_decode_embedding_rejects_malformed():
+    """Test that invalid base64 or a partial float16 raise ValueError."""
+    with pytest.raises(ValueError):
+        decode_embedding("not base64!")
+    with pytest.raises(ValueError):
+        decode_embedding("AA==")  # One byte is not a float16
+    with pytest.raises(ValueError):
+        decode_embedding("")
+
+
+def test_enroll_and_identify(test_settings):
+    """Test that diarized speakers are named after their closest enrolled voices."""
+    enroll("alice", ALICE)
+    enroll("bob", BOB)
+    enroll("bob", [0.0, 0.0, 1.0, 0.0])  # A second sample of the same voice
+
+    matches = identify(
+        {
+            "SPEAKER_00": encode_embedding([0.1, 0.0, 0.9, 0.2]),
+            "SPEAKER_01": encode_embedding([0.9, 0.3, 0.0, 0.1]),
+            "SPEAKER_02": encode_embedding([0.0, 0.0, 0.0, 1.0]),  # Stranger
+        },
+        threshold=0.6,
+    )
+
+    assert set(matches) == {"SPEAKER_00", "SPEAKER_01"}
+    assert matches["SPEAKER_00"]["name"] == "bob"
+    assert matches["SPEAKER_01"]["name"] == "alice"
+    assert 0.9 < matches["SPEAKER_01"]["similarity"] <= 1.0
+
+
+def test_identify_assigns_each_name_once(test_settings):
+    """Test that two labels close to one voice do not both get its name."""
+    enroll("alice", ALICE)
+
+    matches = identify(
+        {
+            "SPEAKER_00": encode_embedding([0.9, 0.3, 0.0, 0.0]),
+            "SPEAKER_01": encode_embedding(ALICE),
+        },
+        threshold=0.5,
+    )
+
+    assert matches == {"SPEAKER_01": {"name": "alice", "similarity": pytest.approx(1.0, abs=1e-3)}}
+
+
+def test_identify_without_enrollments(test_settings):
+    """Test that nothing is identified before anyone is enrolled."""
+    assert identify({"SPEAKER_00": encode_embedding(ALICE)}, threshold=0.0) == {}
+
+
+def test_enroll_validates_embedding(test_settings):
+    """Test that zero vectors and mismatched dimensions are rejected."""
+    with pytest.raises(ValueError):
+        enroll("nobody", [0.0, 0.0])
+    enroll("alice", ALICE)
+    with pytest.raises(ValueError, match="dimensions"):
+        enroll("bob", [1.0, 0.0])
+
+
+def test_delete_enrollment_rewrites_index(test_settings):
+    """Test that deleting keeps the remaining rows aligned with their metadata."""
+    alice = enroll("alice", ALICE)
+    enroll("bob", BOB)
+
+    assert delete_enrollment(alice["id"]) is True
+    assert delete_enrollment(alice["id"]) is False
+
+    matrix, speakers = load_index()
+    assert [entry["name"] for entry in speakers] == ["bob"]
+    assert matrix.shape == (1, 4)
+    np.testing.assert_allclose(matrix[0], np.array(BOB) / np.linalg.norm(BOB), rtol=1e-6)
+    # Only the current matrix generation is kept
+    assert len(list((test_settings.data_dir / "speakers").glob("embeddings-*.npy"))) == 1
+
+
+class TestSpeakerEndpoints:
+    """Tests for the speaker enrollment API."""
+
+    async def _diarized_transcript(self, transcript_id: str, return_embeddings: bool) -> None:
+        from murmurai_server.worker import save_result
+
+        await create_transcript(
+            id=transcript_id,
+            audio_url=None,
+            language="en",
+            speaker_labels=True,
+            speakers_expected=None,
+            options={"return_speaker_embeddings": return_embeddings},
+        )
+        segments = [{"start": 0.0, "end": 1.0, "text": "hello", "speaker": "SPEAKER_00"}]
+        result = format_result(
+            {"segments": segments}, "en", {"SPEAKER_00": ALICE}, speaker_labels=True
+        )
+        await save_result(transcript_id, result)
+
+    @pytest.mark.asyncio
+    async def test_enroll_from_transcript_then_identify(
+        self, async_client: AsyncClient, auth_headers: dict
+    ):
+        """Test enrolling a diarized speaker and recognising them in a later transcript."""
+        await self._diarized_transcript("call-1", return_embeddings=False)
+
+        response = await async_client.post(
+            "/v1/speakers",
+            json={"name": "alice", "transcript_id": "call-1", "speaker": "SPEAKER_00"},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        speaker_id = response.json()["id"]
+
+        await self._diarized_transcript("call-2", return_embeddings=True)
+        data = (await async_client.get("/v1/transcript/call-2", headers=auth_headers)).json()
+        assert data["speaker_identities"]["SPEAKER_00"]["name"] == "alice"
+        assert decode_embedding(data["speaker_embeddings"]["SPEAKER_00"]).shape == (4,)
+
+        # Embeddings are stored either way, but only returned when requested
+        data = (await async_client.get("/v1/transcript/call-1", headers=auth_headers)).json()
+        assert data["speaker_embeddings"] is None
+
+        listed = (await async_client.get("/v1/speakers", headers=auth_headers)).json()
+        assert [s["id"] for s in listed["speakers"]] == [speaker_id]
+        assert listed["speakers"][0]["transcript_id"] == "call-1"
+
+        response = await async_client.delete(f"/v1/speakers/{speaker_id}", headers=auth_headers)
+        assert response.json() == {"id": speaker_id, "status": "deleted"}
+
+    @pytest.mark.asyncio
+    async def test_enroll_from_embedding(self, async_client: AsyncClient, auth_headers: dict):
+        """Test enrolling a speaker from a base64 embedding."""
+        response = await async_client.post(
+            "/v1/speakers",
+            json={"name": "bob", "embedding": encode_embedding(BOB)},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["name"] == "bob"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "body,status",
+        [
+            ({"name": "x"}, 400),
+            ({"name": "x", "embedding": "AAA=", "transcript_id": "call-1"}, 400),
+            ({"name": "x", "embedding": "AAA="}, 400),
+            ({"name": "x", "transcript_id": "missing", "speaker": "SPEAKER_00"}, 404),
+            ({"name": "x", "transcript_id": "call-1", "speaker": "SPEAKER_09"}, 400),
+        ],
+    )
+    async def test_enroll_errors(
+        self, async_client: AsyncClient, auth_headers: dict, body: dict, status: int
+    ):
+        """Test that enrollment rejects ambiguous, malformed or unknown sources."""
+        await self._diarized_transcript("call-1", return_embeddings=False)
+
+        response = await async_client.post("/v1/speakers", json=body, headers=auth_headers)
+        assert response.status_code == status
+
+    @pytest.mark.asyncio
+    async def test_delete_unknown_speaker(self, async_client: AsyncClient, auth_headers: dict):
+        """Test DELETE /v1/speakers/{id} returns 404 for unknown enrollments."""
+        response = await async_client.delete("/v1/speakers/nope", headers=auth_headers)
+        assert response.status_code == 404
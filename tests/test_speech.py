@@ -0,0 +1,113 @@
+"""Tests for the speech timeline shared by ASR chunking and diarization."""
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from murmurai.vads import Pyannote, Silero
+from pyannote.core import SlidingWindow, SlidingWindowFeature
+
+from murmurai_server.cache import SAMPLE_RATE
+from murmurai_server.speech import clip_regions, compact_audio, expand_tracks, pad_regions
+from murmurai_server.transcriber import _TimelineVad, _transcribe_regions, speech_regions
+
+
+def test_clip_regions():
+    """Test that regions are clipped to a range and made relative to its start."""
+    regions = [(1.0, 3.0), (4.0, 6.0), (8.0, 9.0)]
+    assert clip_regions(regions, 2.0, 5.0) == [(0.0, 1.0), (2.0, 3.0)]
+    assert clip_regions(regions, 6.0, 8.0) == []
+
+
+def test_pad_regions_merges_and_stays_in_audio():
+    """Test that padded regions merge when they meet and stop at the audio edges."""
+    regions = [(0.1, 1.0), (1.4, 2.0), (5.0, 9.9)]
+    assert pad_regions(regions, 0.25, 10.0) == [(0.0, 2.25), (4.75, 10.0)]
+
+
+def test_compact_and_expand_roundtrip():
+    """Test that turns found on the compacted speech map back to recording time."""
+    audio = np.arange(10 * SAMPLE_RATE, dtype=np.float32)
+    spans = [(1.0, 3.0), (6.0, 7.5)]
+
+    compact = compact_audio(audio, spans)
+    assert len(compact) == int(3.5 * SAMPLE_RATE)
+    assert compact[2 * SAMPLE_RATE] == audio[6 * SAMPLE_RATE]
+
+    # A turn across the join is split at it
+    tracks = [(0.5, 1.0, "A"), (1.5, 2.5, "B"), (3.0, 3.5, "A")]
+    assert expand_tracks(tracks, spans) == [
+        (1.5, 2.0, "A"),
+        (2.5, 3.0, "B"),
+        (6.0, 6.5, "B"),
+        (7.0, 7.5, "A"),
+    ]
+
+
+def _model(vad, onset=0.5, offset=0.363):
+    return SimpleNamespace(vad_model=vad, _vad_params={"vad_onset": onset, "vad_offset": offset})
+
+
+def _scores(seed: int, seconds: int = 600) -> SlidingWindowFeature:
+    """Pyannote-style frame scores: bursts of speech with pauses of varying length."""
+    rng = np.random.default_rng(seed)
+    frames = SlidingWindow(start=0.0, duration=0.017, step=0.017)
+    data = np.zeros((int(seconds / 0.017), 1), dtype=np.float32)
+    i = 0
+    while i < len(data):
+        speech = rng.integers(20, 2000)
+        data[i : i + speech, 0] = rng.uniform(0.55, 1.0, size=len(data[i : i + speech]))
+        i += speech + rng.integers(5, 600)
+    return SlidingWindowFeature(data, frames)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_timeline_chunks_match_pyannote(seed: int):
+    """Test that ASR chunks from stored regions equal those of the model's own VAD."""
+    scores = _scores(seed)
+    vad = Pyannote.__new__(Pyannote)
+    vad.vad_pipeline = lambda audio: scores
+    audio = np.zeros(SAMPLE_RATE, dtype=np.float32)
+
+    regions = speech_regions(_model(vad), audio, chunk_size=30)
+    timeline = _TimelineVad(regions)
+
+    expected = Pyannote.merge_chunks(scores, 30, onset=0.5, offset=0.363)
+    assert timeline.merge_chunks(timeline(audio), 30, 0.5, 0.363) == expected
+
+
+def test_timeline_chunks_match_silero():
+    """Test the same parity for Silero, whose VAD returns the regions directly."""
+    from murmurai.diarize import Segment as SegmentX
+
+    segments = [SegmentX(t, t + 2.5, "UNKNOWN") for t in np.arange(0.0, 300.0, 3.7)]
+    stub = type("SileroStub", (Silero,), {"__call__": lambda self, audio: segments})
+    vad = stub.__new__(stub)
+
+    regions = speech_regions(_model(vad), np.zeros(SAMPLE_RATE, dtype=np.float32), 30)
+    timeline = _TimelineVad(regions)
+
+    expected = Silero.merge_chunks(segments, 30)
+    assert timeline.merge_chunks(timeline(None), 30, 0.5, None) == expected
+
+
+def test_concurrent_jobs_keep_their_own_regions():
+    """Test that jobs sharing a cached model transcribe their own regions, leaving its VAD alone."""
+    barrier = Barrier(2)
+
+    class Model:
+        vad_model = "model vad"
+
+        def transcribe(self, audio, **kwargs):
+            barrier.wait(timeout=5)  # Both jobs are inside transcribe at once
+            return [(s.start, s.end) for s in self.vad_model(audio)]
+
+    model = Model()
+    jobs = [[(0.0, 1.0)], [(5.0, 6.0), (7.0, 8.0)]]
+    with ThreadPoolExecutor(2) as pool:
+        results = list(pool.map(lambda r: _transcribe_regions(model, None, r, {}), jobs))
+
+    assert results == jobs
+    assert model.vad_model == "model vad"
@@ -0,0 +1,159 @@
+"""Tests for request IDs, spans and the OTLP/JSON file exporter."""
+
+import asyncio
+from unittest.mock import patch
+
+import orjson
+import pytest
+from httpx import AsyncClient
+
+from murmurai_server import tracing
+from murmurai_server.database import claim_next_transcript, create_transcript, init_db
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture(autouse=True)
+def reset_tracing():
+    """Start every test with no buffered spans."""
+    tracing._reset()
+    yield
+    tracing._reset()
+
+
+def _exported(test_settings) -> list[dict]:
+    """Flush and read back every span written by this process."""
+    tracing.flush()
+    spans = []
+    for path in (test_settings.data_dir / "traces").glob("*.jsonl"):
+        for line in path.read_bytes().splitlines():
+            for resource in orjson.loads(line)["resourceSpans"]:
+                for scope in resource["scopeSpans"]:
+                    spans.extend(scope["spans"])
+    return spans
+
+
+def _attribute(span: dict, key: str) -> dict:
+    return next(a["value"] for a in span["attributes"] if a["key"] == key)
+
+
+def test_span_encoding(test_settings):
+    """Test nesting, OTLP attribute types and error status."""
+    test_settings.tracing = True
+    with pytest.raises(RuntimeError), tracing.span("outer", attempts=2, ratio=0.5, cached=False):
+        with tracing.span("inner", model="asr"):
+            pass
+        raise RuntimeError("boom")
+    assert tracing.traceparent() is None
+
+    inner, outer = _exported(test_settings)
+    assert inner["traceId"] == outer["traceId"]
+    assert inner["parentSpanId"] == outer["spanId"]
+    assert "parentSpanId" not in outer
+    assert outer["attributes"] == [
+        {"key": "attempts", "value": {"intValue": "2"}},
+        {"key": "ratio", "value": {"doubleValue": 0.5}},
+        {"key": "cached", "value": {"boolValue": False}},
+    ]
+    assert outer["status"] == {"code": 2, "message": "boom"}
+    assert inner["status"] == {}
+    assert int(outer["endTimeUnixNano"]) >= int(inner["endTimeUnixNano"])
+
+
+@pytest.mark.asyncio
+async def test_request_continues_incoming_trace(
+    async_client: AsyncClient, auth_headers: dict, test_settings
+):
+    """Test that the request ID is echoed and spans join the caller's trace."""
+    test_settings.tracing = True
+    headers = {
+        **auth_headers,
+        "X-Request-ID": "req-42",
+        "traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01",
+    }
+    response = await async_client.get("/v1/transcript/missing", headers=headers)
+    assert response.status_code == 404
+    assert response.headers["x-request-id"] == "req-42"
+
+    generated = await async_client.get("/health")
+    assert len(generated.headers["x-request-id"]) == 8
+
+    spans = {span["name"]: span for span in _exported(test_settings)}
+    server = spans["GET /v1/transcript/{transcript_id}"]
+    assert server["traceId"] == TRACE_ID
+    assert server["parentSpanId"] == PARENT_ID
+    assert server["kind"] == tracing.SERVER
+    assert _attribute(server, "murmurai.request_id") == {"stringValue": "req-42"}
+    assert _attribute(server, "http.response.status_code") == {"intValue": "404"}
+    query = spans["db.get_transcript"]
+    assert query["traceId"] == TRACE_ID
+    assert query["parentSpanId"] == server["spanId"]
+
+
+def test_job_continues_submitting_trace(test_settings, tmp_path):
+    """Test that a worker running a queued job resumes the request ID and trace."""
+    from murmurai_server.worker import run_job
+
+    test_settings.tracing = True
+    carrier = {"request_id": "req-7", "traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}
+    audio = tmp_path / "job.wav"
+    audio.touch()
+    asyncio.run(init_db())
+    asyncio.run(
+        create_transcript(
+            id="job-1",
+            audio_url=None,
+            language="en",
+            speaker_labels=False,
+            speakers_expected=None,
+            trace_context=carrier,
+            options={},
+            audio_path=str(audio),
+        )
+    )
+    job = asyncio.run(claim_next_transcript("worker-1"))
+    assert job is not None and job["trace_context"] == carrier
+
+    request_ids = []
+
+    def transcribe(**kwargs):
+        request_ids.append(tracing.request_id_var.get())
+        raise RuntimeError("boom")
+
+    with patch("murmurai_server.worker.transcribe", side_effect=transcribe):
+        run_job(job, "worker-1")
+
+    assert request_ids == ["req-7"]
+    assert tracing.request_id_var.get() is None
+    spans = [span for span in _exported(test_settings) if span["traceId"] == TRACE_ID]
+    [root] = [span for span in spans if span["name"] == "job"]
+    assert root["parentSpanId"] == PARENT_ID
+    [write] = [span for span in spans if span["name"] == "stage.db_write"]
+    assert write["parentSpanId"] == root["spanId"]
+    parents = {span["parentSpanId"] for span in spans if span["name"] == "db.update_transcript"}
+    assert parents == {root["spanId"], write["spanId"]}  # Status update, then the error
+
+
+def test_trace_file_is_rotated(test_settings):
+    """Test that a process's trace file is rotated at the size limit, keeping one old file."""
+    test_settings.tracing = True
+    test_settings.trace_file_max_mb = 1
+    directory = test_settings.data_dir / "traces"
+    for _ in range(4):
+        for _ in range(2000):  # About 600 KB of spans per export
+            with tracing.span("db.get_transcript", transcript_id="x" * 32):
+                pass
+        tracing.flush()
+
+    current = directory / f"{tracing._process_name()}.jsonl"
+    assert sorted(path.name for path in directory.iterdir()) == [current.name, f"{current.name}.1"]
+    assert current.stat().st_size <= 1024 * 1024
+    assert (directory / f"{current.name}.1").stat().st_size <= 1024 * 1024
+
+    size = current.stat().st_size
+    test_settings.trace_file_max_mb = 0  # Endpoint only
+    with tracing.span("db.get_transcript"):
+        pass
+    assert tracing.flush() == 1
+    assert current.stat().st_size == size
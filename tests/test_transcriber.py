@@ -0,0 +1,250 @@
+"""Tests for transcription pipeline helpers."""
+
+import copy
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from pyannote.core import Annotation, Segment
+
+from murmurai_server import transcriber
+from murmurai_server.transcriber import (
+    SpeakerTurns,
+    TranscribeOptions,
+    assign_speakers,
+    murmurai_core,
+    run_models,
+)
+
+
+def _meeting(seed: int, minutes: int = 3, speakers: int = 4) -> tuple[list, dict]:
+    """Synthetic meeting: overlapping speaker turns and timed words."""
+    rng = random.Random(seed)
+    labels = [f"SPEAKER_{i:02d}" for i in range(speakers)]
+    tracks = []
+    t = 0.0
+    while t < minutes * 60:
+        length = rng.uniform(0.5, 20)
+        tracks.append((t, t + length, rng.choice(labels)))
+        if rng.random() < 0.2:  # Overlapping speech
+            tracks.append((t + length / 2, t + length * 1.5, rng.choice(labels)))
+        t += length + rng.uniform(-0.5, 2)
+
+    segments = []
+    t = 0.0
+    while t < minutes * 60:
+        words = []
+        for _ in range(rng.randint(1, 30)):
+            start = round(t, 3)
+            t += rng.uniform(0.05, 0.8)
+            words.append({"word": "w", "start": start, "end": round(t, 3), "score": 0.9})
+            t += rng.uniform(0, 0.3)
+        if rng.random() < 0.1:
+            words.append({"word": "42"})  # Untimed (not alignable)
+        segments.append({"start": words[0]["start"], "end": round(t, 3), "words": words})
+        t += rng.uniform(0, 5)
+
+    tracks.sort(key=lambda track: (track[0], track[1]))
+    return tracks, {"segments": segments}
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_assign_speakers_matches_murmurai_core(seed: int):
+    """Test that the vectorized assigner gives the same labels as the pandas path."""
+    tracks, result = _meeting(seed)
+    expected = murmurai_core.assign_word_speakers(
+        pd.DataFrame(tracks, columns=["start", "end", "speaker"]), copy.deepcopy(result)
+    )
+
+    assert assign_speakers(SpeakerTurns.from_tracks(tracks), result) == expected
+
+
+def test_assign_speakers_ties_and_gaps():
+    """Test tie-breaking by label and words outside every turn."""
+    tracks = [(0.0, 2.0, "SPEAKER_01"), (0.0, 2.0, "SPEAKER_00"), (5.0, 6.0, "SPEAKER_01")]
+    result = {
+        "segments": [
+            {
+                "start": 0.5,
+                "end": 4.0,
+                "words": [
+                    {"word": "a", "start": 0.5, "end": 1.0},
+                    {"word": "b", "start": 3.0, "end": 4.0},
+                ],
+            }
+        ]
+    }
+
+    segment = assign_speakers(SpeakerTurns.from_tracks(tracks), result)["segments"][0]
+    assert segment["speaker"] == "SPEAKER_00"
+    assert segment["words"][0]["speaker"] == "SPEAKER_00"
+    assert "speaker" not in segment["words"][1]
+
+
+def test_assign_speakers_without_turns():
+    """Test that an empty diarization leaves the transcript unlabeled."""
+    result = {"segments": [{"start": 0.0, "end": 1.0, "words": []}]}
+    assert assign_speakers(SpeakerTurns.from_tracks([]), result) == result
+
+
+SEGMENTS = [
+    {
+        "start": 0.5,
+        "end": 1.2345,
+        "text": " Hello world. ",
+        "speaker": "SPEAKER_01",
+        "words": [
+            {"word": "Hello", "start": 0.5, "end": 0.9, "score": 0.8},
+            {"word": "world.", "start": 0.95, "end": 1.2345, "score": 0.6},
+        ],
+    },
+    {"start": 2.0, "end": 3.0, "text": "Forty two", "speaker": "SPEAKER_00", "words": []},
+    {
+        "start": 3.0,
+        "end": 4.0,
+        "text": "Bye",
+        "words": [{"word": "Bye"}],
+    },
+]
+
+
+def test_format_result_columns_expand_to_api_shape():
+    """Test that columnar results expand to the API words/utterances."""
+    from murmurai_server.columnar import TranscriptColumns
+    from murmurai_server.transcriber import format_result
+
+    formatted = format_result({"segments": SEGMENTS}, "en", speaker_labels=True)
+    assert formatted["text"] == "Hello world. Forty two Bye"
+    assert formatted["audio_duration"] == 1234  # Last word end
+    assert formatted["confidence"] == pytest.approx((0.8 + 0.6 + 0.0) / 3)
+    assert "words" not in formatted
+
+    columns = TranscriptColumns.from_dict(formatted["columns"])
+    words = columns.words()
+    assert words == [
+        {"text": "Hello", "start": 500, "end": 900, "confidence": 0.8, "speaker": "SPEAKER_01"},
+        {"text": "world.", "start": 950, "end": 1234, "confidence": 0.6, "speaker": "SPEAKER_01"},
+        {"text": "Bye", "start": 0, "end": 0, "confidence": 0.0},
+    ]
+
+    utterances = columns.utterances(words)
+    assert utterances[0] == {
+        "text": "Hello world.",
+        "start": 500,
+        "end": 1234,
+        "words": words[:2],
+        "speaker": "SPEAKER_01",
+        "confidence": pytest.approx(0.7),
+    }
+    assert utterances[1] == {
+        "text": "Forty two",
+        "start": 2000,
+        "end": 3000,
+        "words": [],
+        "speaker": "SPEAKER_00",
+    }
+    assert utterances[2]["words"] == words[2:]
+    assert "speaker" not in utterances[2]
+    # Nested words are shared, not copied
+    assert utterances[0]["words"][0] is words[0]
+
+
+def test_format_result_without_speaker_labels():
+    """Test that speakers are dropped when diarization was not requested."""
+    from murmurai_server.columnar import TranscriptColumns
+    from murmurai_server.transcriber import format_result
+
+    formatted = format_result({"segments": SEGMENTS}, "en", speaker_labels=False)
+    columns = TranscriptColumns.from_dict(formatted["columns"])
+    assert not any("speaker" in w for w in columns.words())
+    assert not any("speaker" in u for u in columns.utterances())
+
+
+def test_format_result_empty():
+    """Test a transcript without any speech."""
+    from murmurai_server.transcriber import format_result
+
+    formatted = format_result({"segments": []}, "en")
+    assert formatted["text"] == ""
+    assert formatted["audio_duration"] == 0
+    assert "confidence" not in formatted
+
+
+class TestCheckpointResume:
+    """Tests for resuming a failed job at the stage that failed."""
+
+    @staticmethod
+    def _model(calls: list[str]):
+        def transcribe(audio, **kwargs):
+            calls.append("asr")
+            return {"language": "en", "segments": [{"text": "hi", "start": 0.5, "end": 1.5}]}
+
+        return SimpleNamespace(vad_model=None, transcribe=transcribe)
+
+    @staticmethod
+    def _align(calls: list[str]):
+        def align(result, audio, language, options):
+            calls.append("align")
+            words = [{"word": "hi", "start": 0.5, "end": 1.5, "score": 0.9}]
+            return {"segments": [{**result["segments"][0], "words": words}]}
+
+        return align
+
+    def test_retry_skips_finished_stages(self, test_settings, monkeypatch):
+        """Test that a retry after a diarization failure only re-runs diarization."""
+        calls: list[str] = []
+        options = TranscribeOptions(speaker_labels=True, word_timestamps=True)
+        audio = np.zeros(32000, dtype=np.float32)
+        monkeypatch.setattr(
+            transcriber.ModelManager, "get_model", lambda **kwargs: self._model(calls)
+        )
+        monkeypatch.setattr(transcriber, "speech_regions", lambda *args: [(0.5, 1.5)])
+        monkeypatch.setattr(transcriber, "_align", self._align(calls))
+
+        def broken(file, **kwargs):
+            raise RuntimeError("Invalid Hugging Face token")
+
+        monkeypatch.setattr(transcriber.ModelManager, "get_diarize_model", lambda name: broken)
+        with pytest.raises(RuntimeError):
+            run_models(audio, options, checkpoint_key="job")
+        assert calls == ["asr", "align"]
+
+        def diarize(file, **kwargs):
+            calls.append("diarize")
+            annotation = Annotation()
+            annotation[Segment(0.0, 2.0)] = "SPEAKER_00"
+            return SimpleNamespace(
+                speaker_diarization=annotation, speaker_embeddings=np.ones((1, 3))
+            )
+
+        monkeypatch.setattr(transcriber.ModelManager, "get_diarize_model", lambda name: diarize)
+        output = run_models(audio, options, checkpoint_key="job")
+
+        assert calls == ["asr", "align", "diarize"]
+        segment = output["result"]["segments"][0]
+        assert segment["speaker"] == "SPEAKER_00"
+        assert segment["words"][0]["word"] == "hi"
+        assert output["language"] == "en"
+        assert output["speech_regions"] == [[0.5, 1.5]]
+
+        # A third run is served entirely from checkpoints
+        output = run_models(audio, options, checkpoint_key="job")
+        assert calls == ["asr", "align", "diarize"]
+        assert output["speaker_embeddings"]["SPEAKER_00"].tolist() == [1.0, 1.0, 1.0]
+
+    def test_disabled_checkpoints(self, test_settings, monkeypatch):
+        """Test that nothing is stored or reused when checkpoints are disabled."""
+        test_settings.checkpoints = False
+        calls: list[str] = []
+        monkeypatch.setattr(
+            transcriber.ModelManager, "get_model", lambda **kwargs: self._model(calls)
+        )
+        monkeypatch.setattr(transcriber, "speech_regions", lambda *args: [(0.5, 1.5)])
+
+        for _ in range(2):
+            run_models(np.zeros(32000, dtype=np.float32), TranscribeOptions(), checkpoint_key="j")
+
+        assert calls == ["asr", "asr"]
+        assert not (test_settings.data_dir / "cache" / "checkpoints").exists()
@@ -0,0 +1,279 @@
+"""Tests for the webhook outbox and its delivery loop."""
+
+import asyncio
+import gzip
+import hashlib
+import hmac
+from functools import partial
+
+import httpx
+import orjson
+import pytest
+from httpx import AsyncClient
+
+from murmurai_server import webhooks
+from murmurai_server.database import (
+    claim_webhook_delivery,
+    create_transcript,
+    delete_transcript,
+    get_webhook_deliveries,
+    update_transcript,
+)
+from murmurai_server.models import Transcript
+from murmurai_server.webhooks import deliver, enqueue_webhooks, retry_delay, signature_headers
+
+
+async def _job(
+    transcript_id: str,
+    url: str | None = "https://hooks.example.com/done",
+    payload: str = "full",
+) -> dict:
+    await create_transcript(
+        id=transcript_id,
+        audio_url=None,
+        language="en",
+        speaker_labels=False,
+        speakers_expected=None,
+        webhook_url=url,
+        webhook_auth_header="Bearer secret",
+        webhook_payload=payload,
+    )
+    return {
+        "id": transcript_id,
+        "webhook_url": url,
+        "webhook_auth_header": "Bearer secret",
+        "webhook_payload": payload,
+    }
+
+
+def _client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_delivery_is_signed_and_recorded(initialized_db, test_settings):
+    """Test that a delivery carries auth and a verifiable signature, and is recorded."""
+    test_settings.webhook_secret = "s3cret"
+    requests: list[httpx.Request] = []
+    await enqueue_webhooks([await _job("hook-1"), await _job("hook-2", url=None)])
+
+    delivery = await claim_webhook_delivery(60)
+    assert delivery is not None
+    assert await claim_webhook_delivery(60) is None  # Claimed, and hook-2 has no URL
+
+    async with _client(lambda r: requests.append(r) or httpx.Response(204)) as client:
+        assert await deliver(client, delivery) == "delivered"
+
+    request = requests[0]
+    assert request.headers["Authorization"] == "Bearer secret"
+    expected = hmac.new(
+        b"s3cret",
+        f"{request.headers['X-MurmurAI-Timestamp']}.".encode() + request.content,
+        hashlib.sha256,
+    ).hexdigest()
+    assert request.headers["X-MurmurAI-Signature"] == f"sha256={expected}"
+
+    [recorded] = await get_webhook_deliveries("hook-1")
+    assert recorded["status"] == "delivered"
+    assert recorded["delivered_at"] is not None
+    assert [(a["attempt"], a["status_code"]) for a in recorded["history"]] == [(1, 204)]
+
+
+@pytest.mark.asyncio
+async def test_failed_attempts_retry_until_max(initialized_db, test_settings):
+    """Test that failures are retried, then the delivery is marked failed."""
+    test_settings.webhook_max_attempts = 2
+    test_settings.webhook_retry_base_seconds = 0
+    await enqueue_webhooks([await _job("hook-1")])
+
+    def refuse(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("Connection refused")
+
+    async with _client(refuse) as client:
+        delivery = await claim_webhook_delivery(60)
+        assert delivery is not None
+        assert await deliver(client, delivery) == "pending"
+        delivery = await claim_webhook_delivery(60)
+        assert delivery is not None and delivery["attempts"] == 1
+        assert await deliver(client, delivery) == "failed"
+    assert await claim_webhook_delivery(60) is None
+
+    [recorded] = await get_webhook_deliveries("hook-1")
+    assert recorded["status"] == "failed"
+    assert recorded["last_error"] == "Connection refused"
+    assert [a["status_code"] for a in recorded["history"]] == [None, None]
+
+
+@pytest.mark.asyncio
+async def test_payload_modes(initialized_db, test_settings):
+    """Test the full, summary and id_only bodies, and gzip for full payloads only."""
+    test_settings.webhook_gzip = True
+    test_settings.webhook_secret = "s3cret"
+    requests: list[httpx.Request] = []
+    for transcript_id, payload in [
+        ("hook-1", "full"),
+        ("hook-2", "summary"),
+        ("hook-3", "id_only"),
+    ]:
+        await enqueue_webhooks([await _job(transcript_id, payload=payload)])
+        await update_transcript(
+            transcript_id, status="completed", text="hello " * 200, audio_duration=60.0
+        )
+
+    async with _client(lambda r: requests.append(r) or httpx.Response(200)) as client:
+        while delivery := await claim_webhook_delivery(60):
+            assert await deliver(client, delivery) == "delivered"
+
+    full, summary, id_only = requests
+    assert full.headers["Content-Encoding"] == "gzip"
+    body = gzip.decompress(full.content)
+    full_body = orjson.loads(body)
+    assert full_body["text"].startswith("hello")
+    assert set(full_body) == set(Transcript.model_fields)  # No internal columns or secrets
+    assert b"Bearer secret" not in body
+    expected = hmac.new(
+        b"s3cret", f"{full.headers['X-MurmurAI-Timestamp']}.".encode() + body, hashlib.sha256
+    ).hexdigest()
+    assert full.headers["X-MurmurAI-Signature"] == f"sha256={expected}"  # Over the JSON
+
+    assert "Content-Encoding" not in summary.headers
+    summary_body = orjson.loads(summary.content)
+    assert summary_body["status"] == "completed"
+    assert summary_body["audio_duration"] == 60.0
+    assert summary_body["completed_at"] is not None
+    assert "text" not in summary_body and "words" not in summary_body
+    assert orjson.loads(id_only.content) == {"id": "hook-3", "status": "completed"}
+
+    sizes = {}
+    for transcript_id, request in [("hook-1", full), ("hook-2", summary), ("hook-3", id_only)]:
+        [recorded] = await get_webhook_deliveries(transcript_id)
+        sizes[recorded["payload"]] = recorded["history"][0]["bytes_sent"]
+        assert sizes[recorded["payload"]] == len(request.content)
+    assert sizes["id_only"] < sizes["summary"] and sizes["full"] < len(body)
+
+
+def test_retry_delay_doubles_with_jitter(test_settings):
+    """Test exponential backoff with jitter, capped at the maximum."""
+    test_settings.webhook_retry_base_seconds = 10
+    test_settings.webhook_retry_max_seconds = 60
+    for attempt, full in [(1, 10), (2, 20), (3, 40), (4, 60), (10, 60)]:
+        assert full / 2 <= retry_delay(attempt) <= full
+
+
+def test_signature_headers():
+    """Test the signature over timestamp and body."""
+    headers = signature_headers(b"{}", "key", timestamp=1700000000)
+    digest = hmac.new(b"key", b"1700000000.{}", hashlib.sha256).hexdigest()
+    assert headers == {
+        "X-MurmurAI-Timestamp": "1700000000",
+        "X-MurmurAI-Signature": f"sha256={digest}",
+    }
+
+
+@pytest.mark.asyncio
+async def test_claim_skips_saturated_hosts(initialized_db):
+    """Test that deliveries to hosts at their concurrency cap are left for later."""
+    await enqueue_webhooks(
+        [await _job("hook-1"), await _job("hook-2", url="https://other.example.com/done")]
+    )
+
+    delivery = await claim_webhook_delivery(60, exclude_hosts=["hooks.example.com"])
+    assert delivery is not None and delivery["transcript_id"] == "hook-2"
+    assert await claim_webhook_delivery(60, exclude_hosts=["hooks.example.com"]) is None
+
+
+@pytest.mark.asyncio
+async def test_delivery_loop_sends_queued_webhooks(initialized_db, test_settings, monkeypatch):
+    """Test that the loop delivers queued webhooks and a slow host does not block others."""
+    test_settings.webhook_poll_interval = 0.01
+    test_settings.webhook_host_concurrency = 1
+    slow = asyncio.Event()
+    delivered: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "slow.example.com":
+            await slow.wait()
+        delivered.append(request.url.host)
+        return httpx.Response(200)
+
+    monkeypatch.setattr(
+        webhooks.httpx,
+        "AsyncClient",
+        partial(httpx.AsyncClient, transport=httpx.MockTransport(handler)),
+    )
+    await enqueue_webhooks(
+        [
+            await _job("hook-1", url="https://slow.example.com/a"),
+            await _job("hook-2", url="https://slow.example.com/b"),
+            await _job("hook-3", url="https://fast.example.com/c"),
+        ]
+    )
+
+    loop = asyncio.create_task(webhooks.delivery_loop())
+    try:
+        for _ in range(200):
+            if delivered:
+                break
+            await asyncio.sleep(0.01)
+        assert delivered == ["fast.example.com"]  # Overtook the capped slow host
+
+        slow.set()
+        for _ in range(200):
+            if len(delivered) == 3:
+                break
+            await asyncio.sleep(0.01)
+        assert sorted(delivered) == ["fast.example.com", "slow.example.com", "slow.example.com"]
+    finally:
+        loop.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await loop
+
+
+@pytest.mark.asyncio
+async def test_webhooks_endpoint(async_client: AsyncClient, auth_headers: dict):
+    """Test the delivery history endpoint and that deleting a transcript drops it."""
+    await enqueue_webhooks([await _job("hook-1")])
+
+    response = await async_client.get("/v1/transcript/hook-1/webhooks", headers=auth_headers)
+    assert response.status_code == 200
+    [delivery] = response.json()["deliveries"]
+    assert delivery["url"] == "https://hooks.example.com/done"
+    assert delivery["status"] == "pending"
+    assert delivery["history"] == []
+    assert "auth_header" not in delivery
+
+    await delete_transcript("hook-1")
+    assert await get_webhook_deliveries("hook-1") == []
+    response = await async_client.get("/v1/transcript/hook-1/webhooks", headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_finished_job_queues_webhook(test_settings, tmp_path):
+    """Test that a worker finishing a job only queues its webhook."""
+    from unittest.mock import patch
+
+    from murmurai_server.database import init_db
+    from murmurai_server.transcriber import TranscribeOptions
+    from murmurai_server.worker import process_transcription
+
+    asyncio.run(init_db())
+    asyncio.run(_job("hook-1"))
+    audio = tmp_path / "job.wav"
+    audio.touch()
+
+    with (
+        patch("murmurai_server.worker.transcribe", side_effect=RuntimeError("boom")),
+        patch.object(webhooks.httpx.AsyncClient, "post") as post,
+    ):
+        process_transcription(
+            "hook-1",
+            audio,
+            TranscribeOptions(),
+            audio_url=None,
+            webhook_url="https://hooks.example.com/done",
+            webhook_auth_header=None,
+        )
+
+    post.assert_not_called()
+    [delivery] = asyncio.run(get_webhook_deliveries("hook-1"))
+    assert delivery["status"] == "pending"
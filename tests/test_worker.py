@@ -0,0 +1,299 @@
+"""Tests for queue-consuming workers."""
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from murmurai_server.cache import get_checkpoint, put_checkpoint
+from murmurai_server.database import claim_next_transcript, create_transcript, get_transcript
+from murmurai_server.transcriber import TranscribeOptions
+from murmurai_server.worker import (
+    _coordinator_client,
+    process_transcription,
+    run_next_job,
+    run_next_remote_job,
+    supervise,
+    worker_cpu_slices,
+    worker_id_for,
+    worker_loop,
+)
+
+STUB_RESULT = {
+    "text": "hello world",
+    "words": [{"text": "hello", "start": 0, "end": 500, "confidence": 0.9}],
+    "utterances": [{"text": "hello world", "start": 0, "end": 1000, "words": []}],
+    "confidence": 0.9,
+    "audio_duration": 1000,
+    "language_code": "en",
+}
+
+
+def _queue_job(job_id: str, audio_path: Path) -> None:
+    audio_path.touch()
+    asyncio.run(
+        create_transcript(
+            id=job_id,
+            audio_url=None,
+            language="en",
+            speaker_labels=False,
+            speakers_expected=None,
+            options=TranscribeOptions(language="en", word_timestamps=True).to_dict(),
+            audio_path=str(audio_path),
+        )
+    )
+
+
+def test_run_next_job_completes_queued_job(test_settings, tmp_path: Path):
+    """Test that a worker claims, transcribes and stores a queued job."""
+    from murmurai_server.database import init_db
+
+    asyncio.run(init_db())
+    audio = tmp_path / "job.mp3"
+    _queue_job("worker-job", audio)
+    put_checkpoint("worker-job", "transcribe", {"result": {}})
+
+    with patch("murmurai_server.worker.transcribe", return_value=STUB_RESULT) as mock:
+        assert run_next_job("worker-test") is True
+
+    options = mock.call_args.kwargs["options"]
+    assert options.language == "en"
+    assert options.word_timestamps is True
+    # Jobs without a cache key keep checkpoints under their ID, dropped once saved
+    assert mock.call_args.kwargs["checkpoint_key"] == "worker-job"
+    assert get_checkpoint("worker-job", "transcribe") is None
+
+    result = asyncio.run(get_transcript("worker-job"))
+    assert result["status"] == "completed"
+    assert result["text"] == "hello world"
+    assert not audio.exists()
+
+
+def test_worker_loop_stops_after_max_jobs(test_settings, tmp_path: Path):
+    """Test that worker_loop drains jobs and honors max_jobs."""
+    from murmurai_server.database import init_db
+
+    asyncio.run(init_db())
+    for i in range(3):
+        _queue_job(f"loop-{i}", tmp_path / f"loop-{i}.mp3")
+
+    with (
+        patch("murmurai_server.pipeline.decode_audio"),
+        patch("murmurai_server.pipeline.run_models"),
+        patch("murmurai_server.pipeline.finish_result", return_value=STUB_RESULT),
+    ):
+        assert worker_loop("worker-test", max_jobs=2) == 2
+
+    statuses = [asyncio.run(get_transcript(f"loop-{i}"))["status"] for i in range(3)]
+    assert statuses == ["completed", "completed", "queued"]
+
+
+def test_run_next_job_empty_queue(test_settings):
+    """Test that an empty queue returns False without side effects."""
+    from murmurai_server.database import init_db
+
+    asyncio.run(init_db())
+    assert run_next_job("worker-test") is False
+
+
+def test_embedded_job_is_held_by_this_process(test_settings, tmp_path: Path):
+    """Test that a job run in the API process is recorded under its pid-based worker id."""
+    from murmurai_server.database import get_job, init_db
+
+    asyncio.run(init_db())
+    _queue_job("embedded-job", tmp_path / "embedded.mp3")
+    holders = []
+
+    def transcribe(**kwargs):
+        holders.append(asyncio.run(get_job("embedded-job"))["worker_id"])
+        return STUB_RESULT
+
+    with patch("murmurai_server.worker.transcribe", side_effect=transcribe):
+        process_transcription(
+            "embedded-job",
+            tmp_path / "embedded.mp3",
+            TranscribeOptions(),
+            audio_url=None,
+            webhook_url=None,
+            webhook_auth_header=None,
+        )
+
+    assert holders == [worker_id_for(os.getpid())]
+    assert asyncio.run(get_transcript("embedded-job"))["status"] == "completed"
+
+
+@pytest.mark.parametrize("processes,threads", [(1, 1), (2, 1), (4, 3)])
+def test_worker_cpu_slices(processes: int, threads: int):
+    """Test that every worker gets exactly `threads` CPUs."""
+    slices = worker_cpu_slices(processes, threads)
+    assert len(slices) == processes
+    for cpus in slices:
+        assert 1 <= len(cpus) <= threads
+
+
+def test_supervise_restarts_crashed_worker_and_requeues_job(test_settings, tmp_path: Path):
+    """Test that a worker dying mid-job is restarted and its job retried."""
+    from murmurai_server.database import init_db
+
+    asyncio.run(init_db())
+    _queue_job("crash-job", tmp_path / "crash.mp3")
+    crashed_marker = tmp_path / "crashed"
+
+    def fake_child(cpus, threads):
+        # First child claims the job and dies like a segfaulting worker;
+        # the restarted child finds the job back in the queue and exits cleanly.
+        job = asyncio.run(claim_next_transcript(worker_id_for(os.getpid())))
+        if not crashed_marker.exists():
+            crashed_marker.touch()
+            os._exit(1)
+        (tmp_path / "retried").write_text(job["id"] if job else "")
+        os._exit(0)
+
+    previous = {sig: signal.getsignal(sig) for sig in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        with patch("murmurai_server.worker._run_child", side_effect=fake_child):
+            supervise(processes=1, cpu_slices=None, threads=1, restart_delay=0.01)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+    assert (tmp_path / "retried").read_text() == "crash-job"
+    result = asyncio.run(get_transcript("crash-job"))
+    assert result["status"] == "queued"
+    assert result["attempts"] == 2
+
+
+def test_supervise_notifies_jobs_out_of_attempts(test_settings, tmp_path: Path):
+    """Test that a job failed by a crash on its last attempt gets its webhook and loses its audio."""
+    from murmurai_server.database import get_webhook_deliveries, init_db
+
+    test_settings.max_job_attempts = 1
+    asyncio.run(init_db())
+    audio = tmp_path / "doomed.mp3"
+    audio.touch()
+    asyncio.run(
+        create_transcript(
+            id="doomed",
+            audio_url=None,
+            language="en",
+            speaker_labels=False,
+            speakers_expected=None,
+            webhook_url="https://hooks.example.com/done",
+            options={},
+            audio_path=str(audio),
+        )
+    )
+    crashed_marker = tmp_path / "crashed"
+
+    def fake_child(cpus, threads):
+        if crashed_marker.exists():
+            os._exit(0)
+        asyncio.run(claim_next_transcript(worker_id_for(os.getpid())))
+        crashed_marker.touch()
+        os._exit(1)
+
+    previous = {sig: signal.getsignal(sig) for sig in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        with patch("murmurai_server.worker._run_child", side_effect=fake_child):
+            supervise(processes=1, cpu_slices=None, threads=1, restart_delay=0.01)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+    assert asyncio.run(get_transcript("doomed"))["status"] == "error"
+    [delivery] = asyncio.run(get_webhook_deliveries("doomed"))
+    assert delivery["status"] == "pending"
+    assert not audio.exists()
+
+
+def _remote_worker(done: "multiprocessing.Queue[int]") -> None:
+    """Forked remote worker: drain the coordinator's queue with the stub engine."""
+    count = 0
+    with _coordinator_client() as client:
+        while run_next_remote_job(worker_id_for(os.getpid()), client):
+            count += 1
+    done.put(count)
+
+
+def test_remote_worker_survives_unreachable_coordinator(test_settings):
+    """Test that a failed job whose outcome cannot be posted does not stop the worker."""
+    requests = []
+
+    def coordinator(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        if request.url.path.endswith("/lease"):
+            job = {
+                "id": "remote-job",
+                "options": {},
+                "attempts": 1,
+                "lease_seconds": 60,
+                "audio_url": "/v1/internal/jobs/remote-job/audio",
+                "filename": "remote-job.wav",
+            }
+            return httpx.Response(200, json=job)
+        if request.url.path.endswith("/audio"):
+            return httpx.Response(200, content=b"RIFF")
+        raise httpx.ConnectError("Connection refused")
+
+    client = httpx.Client(base_url="http://coordinator", transport=httpx.MockTransport(coordinator))
+    with patch("murmurai_server.worker.transcribe", side_effect=RuntimeError("bad audio")):
+        assert run_next_remote_job("remote-1", client) is True
+    assert requests[-1] == "/v1/internal/jobs/remote-job/fail"
+
+
+def test_remote_workers_drain_coordinator_queue(
+    test_env, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Test two worker processes leasing jobs from a localhost coordinator."""
+    import uvicorn
+
+    from murmurai_server.config import get_settings
+    from murmurai_server.database import init_db
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    monkeypatch.setenv("MURMURAI_EMBEDDED_WORKER", "false")
+    monkeypatch.setenv("MURMURAI_SKIP_DEPENDENCY_CHECK", "true")
+    monkeypatch.setenv("MURMURAI_COORDINATOR_URL", f"http://127.0.0.1:{port}")
+    get_settings.cache_clear()
+
+    asyncio.run(init_db())
+    for i in range(4):
+        _queue_job(f"remote-{i}", tmp_path / f"remote-{i}.wav")
+
+    from murmurai_server.server import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    ctx = multiprocessing.get_context("fork")
+    done: multiprocessing.Queue[int] = ctx.Queue()
+    try:
+        with patch("murmurai_server.worker.transcribe", return_value=STUB_RESULT):
+            workers = [ctx.Process(target=_remote_worker, args=(done,)) for _ in range(2)]
+            for w in workers:
+                w.start()
+            counts = [done.get(timeout=60) for _ in workers]
+            for w in workers:
+                w.join(timeout=10)
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    assert sum(counts) == 4
+    for i in range(4):
+        result = asyncio.run(get_transcript(f"remote-{i}"))
+        assert result["status"] == "completed"
+        assert result["text"] == "hello world"